@@ -0,0 +1,132 @@
+"""
+列式翻译单元格式
+
+每个字段一个数组，所有单元取值相同的字段（如fileName、srcLang、tgtLang）只在constants中出现一次：
+
+    {
+      "format": "columnar",
+      "fields": ["fileName", "segNumber", ...],   # 完整字段顺序
+      "count": 2,
+      "constants": {"fileName": "a.xliff", "srcLang": "en", "tgtLang": "zh"},
+      "columns": {"segNumber": [1, 2], "unitId": ["1", "2"], ...},
+      "success": true,
+      "message": "..."
+    }
+
+同一结构可以编码为JSON或MessagePack。本模块只依赖标准库（MessagePack解码需要msgpack），
+客户端可以直接复制使用 decode_columnar 按列读取，不需要为每个单元构建字典。
+"""
+from itertools import repeat
+from typing import Any, Dict, Iterator, List, Sequence
+import json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+COLUMNAR_FORMAT = "columnar"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.xliff-process.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+# 客户端可能使用的MessagePack媒体类型
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/msgpack", "application/vnd.msgpack")
+
+
+def msgpack_available() -> bool:
+    """当前环境是否安装了msgpack"""
+    return msgpack is not None
+
+
+def build_columnar(rows: List[tuple], fields: Sequence[str], message: str) -> Dict[str, Any]:
+    """
+    把元组列表转换为列式结构
+
+    Args:
+        rows: 元组列表，字段顺序与 fields 一致
+        fields: 字段名
+        message: 响应消息
+
+    Returns:
+        列式结构（列为元组，可直接交给orjson或msgpack编码）
+    """
+    constants = {}
+    columns = {}
+    if rows:
+        for field, column in zip(fields, zip(*rows)):
+            first = column[0]
+            if column.count(first) == len(column):
+                constants[field] = first
+            else:
+                columns[field] = column
+    return {
+        "format": COLUMNAR_FORMAT,
+        "fields": list(fields),
+        "count": len(rows),
+        "constants": constants,
+        "columns": columns,
+        "success": True,
+        "message": message,
+    }
+
+
+class ColumnarUnits:
+    """
+    解码后的列式翻译单元
+
+    column() 按列访问；rows() 按字段顺序逐个产出元组，常量字段不展开为列表。
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        if payload.get("format") != COLUMNAR_FORMAT:
+            raise ValueError("不是列式格式的响应")
+        self.fields: List[str] = list(payload["fields"])
+        self.count: int = payload["count"]
+        self.constants: Dict[str, Any] = payload["constants"]
+        self.columns: Dict[str, List[Any]] = payload["columns"]
+        self.success: bool = payload.get("success", True)
+        self.message = payload.get("message")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, field: str) -> Sequence[Any]:
+        """
+        读取一列
+
+        Args:
+            field: 字段名
+
+        Returns:
+            该字段的取值序列，常量字段返回重复同一值的列表
+        """
+        if field in self.columns:
+            return self.columns[field]
+        if field in self.constants:
+            return [self.constants[field]] * self.count
+        raise KeyError(field)
+
+    def rows(self) -> Iterator[tuple]:
+        """按 fields 的顺序逐个产出单元元组"""
+        iterators = [
+            iter(self.columns[field]) if field in self.columns else repeat(self.constants[field], self.count)
+            for field in self.fields
+        ]
+        return zip(*iterators)
+
+
+def decode_columnar(body: bytes, media_type: str = COLUMNAR_JSON_MEDIA_TYPE) -> ColumnarUnits:
+    """
+    解码列式响应体
+
+    Args:
+        body: 响应体
+        media_type: 响应的Content-Type（可带参数）
+
+    Returns:
+        ColumnarUnits对象
+    """
+    if media_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES:
+        if msgpack is None:
+            raise RuntimeError("解码MessagePack需要安装msgpack")
+        return ColumnarUnits(msgpack.unpackb(body, raw=False))
+    return ColumnarUnits(json.loads(body))
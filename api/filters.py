@@ -0,0 +1,50 @@
+from fastapi import HTTPException
+from typing import Optional
+from services.unit_filter import UnitFilter
+
+
+def unit_filter_params(
+    minPercent: Optional[float] = None,
+    maxPercent: Optional[float] = None,
+    hasTarget: Optional[bool] = None,
+    unitIdPrefix: Optional[str] = None,
+    srcLang: Optional[str] = None,
+    tgtLang: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> Optional[UnitFilter]:
+    """
+    处理端点的过滤和分页查询参数（FastAPI依赖）
+
+    Args:
+        minPercent: 百分比下限（含），没有百分比的单元按-1比较
+        maxPercent: 百分比上限（含），如 99 只返回未完全匹配的单元
+        hasTarget: true只返回有译文的单元，false只返回译文为空的单元
+        unitIdPrefix: unitId前缀
+        srcLang: 源语言，en 同时匹配 en-us
+        tgtLang: 目标语言，zh 同时匹配 zh-cn
+        offset: 跳过的匹配单元数量
+        limit: 最多返回的单元数量
+
+    Returns:
+        UnitFilter，没有任何过滤和分页参数时返回None
+
+    Raises:
+        HTTPException: 参数取值无效时返回400
+    """
+    if (minPercent is None and maxPercent is None and hasTarget is None and not unitIdPrefix
+            and not srcLang and not tgtLang and not offset and limit is None):
+        return None
+    try:
+        return UnitFilter(
+            min_percent=minPercent,
+            max_percent=maxPercent,
+            has_target=hasTarget,
+            unit_id_prefix=unitIdPrefix,
+            src_lang=srcLang,
+            tgt_lang=tgtLang,
+            offset=offset,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
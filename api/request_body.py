@@ -0,0 +1,74 @@
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from typing import NamedTuple, Optional
+from models.xliff import FileProcessRequest
+from services.encoding import XmlContent
+
+# 按原始XML接收的请求体类型，另外接受所有 +xml 后缀的类型（如 application/xliff+xml）
+XML_MEDIA_TYPES = ("application/xml", "text/xml")
+
+# OpenAPI文档中的请求体：JSON（FileProcessRequest）或原始XML
+PROCESS_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"$ref": "#/components/schemas/FileProcessRequest"}},
+            "application/xml": {"schema": {"type": "string", "format": "binary"}},
+        },
+        "description": "JSON {fileName, content}，或原始XML文件（Content-Type: application/xml，文件名通过查询参数fileName提供）",
+    }
+}
+
+
+class ProcessInput(NamedTuple):
+    """处理端点的输入文档"""
+    file_name: str
+    content: XmlContent
+
+
+def is_xml_media_type(content_type: Optional[str]) -> bool:
+    """
+    判断请求体是否为原始XML
+
+    Args:
+        content_type: Content-Type请求头
+
+    Returns:
+        是否按原始XML处理
+    """
+    media_type = (content_type or "").split(';', 1)[0].strip().lower()
+    return media_type in XML_MEDIA_TYPES or media_type.endswith('+xml')
+
+
+async def process_input(request: Request, fileName: Optional[str] = None) -> ProcessInput:
+    """
+    读取处理端点的请求体（FastAPI依赖）
+
+    Content-Type为XML时请求体按原始字节交给服务层，由解析器按BOM和XML声明解码，
+    不经过JSON字符串和str的转换；否则按JSON解析为FileProcessRequest。
+
+    Args:
+        request: 请求
+        fileName: 原始XML请求体的文件名（查询参数）
+
+    Returns:
+        ProcessInput，JSON请求体的content为文本，原始XML请求体为字节
+
+    Raises:
+        HTTPException: 原始XML请求体缺少fileName时返回400
+        RequestValidationError: JSON请求体不符合FileProcessRequest时返回422
+    """
+    body = await request.body()
+    if is_xml_media_type(request.headers.get("content-type")):
+        if not fileName:
+            raise HTTPException(status_code=400, detail="原始XML请求体需要通过查询参数fileName提供文件名")
+        return ProcessInput(fileName, body)
+    try:
+        payload = FileProcessRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [dict(error, loc=("body", *error["loc"])) for error in e.errors(include_url=False)],
+            body=body
+        )
+    return ProcessInput(payload.fileName, payload.content)
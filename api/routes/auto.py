@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Header
+from typing import Optional
+from models.xliff import select_fields
+from services.formats import detect_format, registered_formats
+# 处理服务模块在导入时注册各自的文件格式
+from services import tmx_processor, xliff_processor
+from services.unit_filter import UnitFilter
+from services.parse_cache import run_cached
+from api.filters import unit_filter_params
+from api.request_body import PROCESS_REQUEST_BODY, ProcessInput, process_input
+from api.serialization import COLUMNAR_RESPONSES, units_response
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/auto", tags=["Auto Detection"])
+
+# 响应中标明识别结果的请求头
+FILE_FORMAT_HEADER = "X-File-Format"
+
+
+@router.post("/process", responses=COLUMNAR_RESPONSES, openapi_extra=PROCESS_REQUEST_BODY)
+async def auto_process(
+    document: ProcessInput = Depends(process_input),
+    engine: Optional[str] = None,
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
+    """
+    自动识别文件格式并提取翻译单元
+
+    通过格式注册表根据文档开头的根元素和命名空间判断格式，无法判断时按文件扩展名。
+    XLIFF 1.2的结果同 /api/xliff/process（engine未指定时使用配置的XLIFF_ENGINE），
+    XLIFF 2.x总是使用stream引擎，TMX的结果同 /api/tmx/process。
+    请求体、fields、过滤和分页参数以及列式响应格式同上述端点；识别出的格式在 X-File-Format 响应头中
+    """
+    try:
+        file_format = detect_format(document.content, document.file_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        engine = engine or settings.XLIFF_ENGINE
+        selected = select_fields(fields, file_format.fields)
+        rows = await run_cached(
+            ("auto/process", document.file_name, document.content, file_format.name, engine, selected, unit_filter),
+            file_format.process,
+            document.file_name,
+            document.content,
+            fields=selected,
+            unit_filter=unit_filter,
+            engine=engine
+        )
+        response = units_response(rows, selected, f"成功自动识别为{file_format.label}文件并处理 {len(rows)} 个翻译单元", accept)
+        response.headers[FILE_FORMAT_HEADER] = file_format.name
+        return response
+    except Exception as e:
+        logger.error(f"自动识别处理失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/formats")
+async def list_formats():
+    """
+    列出格式注册表中的文件格式（按识别顺序）
+    """
+    return {
+        "formats": [
+            {"name": file_format.name, "family": file_format.family, "label": file_format.label,
+             "extensions": list(file_format.extensions)}
+            for file_format in registered_formats()
+        ]
+    }
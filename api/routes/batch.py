@@ -0,0 +1,341 @@
+from fastapi import APIRouter, File, Header, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Awaitable, Callable, List, Optional
+from models.xliff import (
+    BatchArchiveResult,
+    BatchArchiveResponse,
+    BatchProcessRequest,
+    BatchReplacementRequest,
+    BatchXliffProcessResult,
+    BatchXliffProcessResponse,
+    BatchTmxProcessResult,
+    BatchTmxProcessResponse,
+    BatchReplacementResult,
+    BatchReplacementResponse,
+    FileProcessRequest,
+    FileReplacementRequest,
+    TMX_DATA_FIELDS,
+    TmxData,
+    XLIFF_DATA_FIELDS,
+    XliffData,
+    models_from_rows
+)
+from services.xliff_processor import XliffProcessorService
+from services.tmx_processor import TmxProcessorService
+from services.executor import iter_completed, run_service
+from services.parse_cache import run_cached
+from services.formats import SNIFF_BYTES, FileFormat, detect_format
+from api.streaming import NDJSON_MEDIA_TYPE, ndjson_async_response, wants_ndjson
+from config import settings
+import logging
+import shutil
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/batch", tags=["Batch Processing"])
+
+# 在OpenAPI文档中声明NDJSON响应
+BATCH_NDJSON_RESPONSES = {
+    200: {
+        "content": {NDJSON_MEDIA_TYPE: {}},
+        "description": "请求头 Accept: application/x-ndjson 时，每个文件完成后输出一行结果（按完成顺序，index为请求中的位置），最后一行为 {success, message, count} 汇总",
+    }
+}
+
+# 压缩包中的文件都通过格式注册表识别；具有这些扩展名但无法识别的文件报告错误而不是跳过
+ARCHIVE_XLIFF_EXTENSIONS = ('.xlf', '.xliff', '.xliff2', '.sdlxliff', '.mxliff', '.mqxliff')
+ARCHIVE_TMX_EXTENSIONS = ('.tmx',)
+_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def _summary(results: List[Any]) -> str:
+    failed = sum(1 for result in results if not result.success)
+    return f"处理完成 {len(results)} 个文件，成功 {len(results) - failed} 个，失败 {failed} 个"
+
+
+async def _respond(jobs: List[Awaitable[Any]], response_cls, accept: Optional[str],
+                   summary: Callable[[List[Any]], str] = _summary, on_close: Optional[Callable[[], None]] = None):
+    """
+    并行执行每个文件的任务，按Accept返回NDJSON流或汇总响应
+
+    单个文件的错误写入该文件的结果中，不影响其他文件；
+    on_close在所有任务结束（流式输出时为输出结束）后调用，用于释放资源
+    """
+    if wants_ndjson(accept):
+        finished = []
+
+        async def results():
+            try:
+                async for result in iter_completed(jobs):
+                    finished.append(result)
+                    yield result
+            finally:
+                if on_close:
+                    on_close()
+
+        return ndjson_async_response(results(), lambda count: summary(finished))
+
+    try:
+        results = [result async for result in iter_completed(jobs)]
+    finally:
+        if on_close:
+            on_close()
+    results.sort(key=lambda result: result.index)
+    return response_cls(
+        results=results,
+        success=all(result.success for result in results),
+        message=summary(results)
+    )
+
+
+async def _run_file(index: int, file_name: str, result_cls, job: Callable[[], Awaitable[Any]], on_success: Callable[[Any], dict]):
+    try:
+        value = await job()
+        return result_cls(index=index, fileName=file_name, success=True, **on_success(value))
+    except Exception as e:
+        logger.error(f"批量处理文件 {file_name} 失败: {str(e)}")
+        return result_cls(index=index, fileName=file_name, success=False, message=str(e))
+
+
+def _process_xliff_file(index: int, file: FileProcessRequest, engine: str):
+    return _run_file(
+        index,
+        file.fileName,
+        BatchXliffProcessResult,
+        lambda: run_cached(
+            ("xliff/process", file.fileName, file.content, engine, XLIFF_DATA_FIELDS, None),
+            XliffProcessorService.process_xliff_rows,
+            file_name=file.fileName,
+            content=file.content,
+            engine=engine
+        ),
+        lambda rows: {"data": models_from_rows(XliffData, rows), "message": f"成功处理 {len(rows)} 个翻译单元"}
+    )
+
+
+def _process_tmx_file(index: int, file: FileProcessRequest):
+    return _run_file(
+        index,
+        file.fileName,
+        BatchTmxProcessResult,
+        lambda: run_cached(
+            ("tmx/process", file.fileName, file.content, TMX_DATA_FIELDS, None),
+            TmxProcessorService.process_tmx_rows,
+            file_name=file.fileName,
+            content=file.content
+        ),
+        lambda rows: {"data": models_from_rows(TmxData, rows), "message": f"成功处理 {len(rows)} 个TMX翻译单元"}
+    )
+
+
+def _replacement_result(value, dry_run: bool) -> dict:
+    content, replacements_count, unmatched = value
+    if dry_run:
+        message = f"预检完成：可替换 {replacements_count} 个翻译单元，未匹配 {len(unmatched)} 个"
+    else:
+        message = f"成功替换 {replacements_count} 个翻译单元"
+    return {
+        "content": content,
+        "replacements_count": replacements_count,
+        "unmatched": unmatched if dry_run else None,
+        "message": message
+    }
+
+
+def _replace_file(index: int, file: FileReplacementRequest, func, dry_run: bool, **kwargs):
+    translations = [trans.model_dump() for trans in file.translations]
+    return _run_file(
+        index,
+        file.fileName,
+        BatchReplacementResult,
+        lambda: run_service(
+            func,
+            content=file.content,
+            translations=translations,
+            dry_run=dry_run,
+            **kwargs
+        ),
+        lambda value: _replacement_result(value, dry_run)
+    )
+
+
+@router.post("/xliff/process", response_model=BatchXliffProcessResponse, responses=BATCH_NDJSON_RESPONSES)
+async def batch_process_xliff(request: BatchProcessRequest, engine: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """
+    批量处理多个XLIFF文件
+    
+    各文件在执行器中并行解析，每个文件单独返回成功或失败，单个文件出错不影响整个批次。
+    Accept: application/x-ndjson 时每个文件完成后立即输出其结果
+    """
+    engine = engine or settings.XLIFF_ENGINE
+    jobs = [_process_xliff_file(index, file, engine) for index, file in enumerate(request.files)]
+    return await _respond(jobs, BatchXliffProcessResponse, accept)
+
+
+@router.post("/tmx/process", response_model=BatchTmxProcessResponse, responses=BATCH_NDJSON_RESPONSES)
+async def batch_process_tmx(request: BatchProcessRequest, accept: Optional[str] = Header(None)):
+    """
+    批量处理多个TMX文件
+    
+    规则同XLIFF批量处理
+    """
+    jobs = [_process_tmx_file(index, file) for index, file in enumerate(request.files)]
+    return await _respond(jobs, BatchTmxProcessResponse, accept)
+
+
+@router.post("/xliff/replace", response_model=BatchReplacementResponse, responses=BATCH_NDJSON_RESPONSES)
+async def batch_replace_xliff(request: BatchReplacementRequest, dry_run: bool = False, accept: Optional[str] = Header(None)):
+    """
+    批量替换多个XLIFF文件中的翻译内容
+    
+    各文件并行替换，每个文件单独返回成功或失败；dry_run=true时只返回匹配情况
+    """
+    jobs = [
+        _replace_file(index, file, XliffProcessorService.splice_xliff_targets, dry_run)
+        for index, file in enumerate(request.files)
+    ]
+    return await _respond(jobs, BatchReplacementResponse, accept)
+
+
+@router.post("/tmx/replace", response_model=BatchReplacementResponse, responses=BATCH_NDJSON_RESPONSES)
+async def batch_replace_tmx(request: BatchReplacementRequest, target_lang: Optional[str] = None, dry_run: bool = False, accept: Optional[str] = Header(None)):
+    """
+    批量替换多个TMX文件中的翻译内容
+    
+    目标tuv的确定规则同 /api/replacement/tmx
+    """
+    jobs = [
+        _replace_file(index, file, TmxProcessorService.splice_tmx_targets, dry_run, target_lang=target_lang)
+        for index, file in enumerate(request.files)
+    ]
+    return await _respond(jobs, BatchReplacementResponse, accept)
+
+
+def _archive_members(archive: zipfile.ZipFile) -> List[tuple]:
+    """
+    列出压缩包中需要处理的文件及其格式
+
+    每个文件都读取开头部分通过格式注册表识别（同 /api/auto/process），XLIFF 1.2和2.x按各自的方式处理；
+    扩展名为XLIFF/TMX但无法识别的文件保留下来，在结果中报告识别错误，其他无法识别的文件跳过。
+
+    Returns:
+        (位置, ZipInfo, 文件格式, 识别错误) 列表，识别成功时错误为None，失败时格式为None
+    """
+    members = []
+    for index, info in enumerate(archive.infolist()):
+        # 跳过目录和macOS生成的资源文件
+        if info.is_dir() or info.filename.startswith('__MACOSX/'):
+            continue
+        try:
+            with archive.open(info) as member:
+                members.append((index, info, detect_format(member.read(SNIFF_BYTES), info.filename), None))
+        except Exception as e:
+            if info.filename.lower().endswith(ARCHIVE_XLIFF_EXTENSIONS + ARCHIVE_TMX_EXTENSIONS):
+                members.append((index, info, None, str(e)))
+    return members
+
+
+def _extension_file_type(file_name: str) -> Optional[str]:
+    """识别失败的文件按扩展名给出fileType"""
+    name = file_name.lower()
+    if name.endswith(ARCHIVE_TMX_EXTENSIONS):
+        return "tmx"
+    if name.endswith(ARCHIVE_XLIFF_EXTENSIONS):
+        return "xliff"
+    return None
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int) -> bytes:
+    """
+    解压单个文件，超过大小限制时报错（不信任压缩包中记录的大小）
+
+    返回原始字节，由解析器按BOM和XML声明解码
+    """
+    with archive.open(info) as member:
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"解压后超过 {max_bytes} 字节的限制")
+    return data
+
+
+async def _process_member(archive: zipfile.ZipFile, index: int, info: zipfile.ZipInfo,
+                          file_format: Optional[FileFormat], error: Optional[str], engine: str):
+    file_name = info.filename
+    file_type = file_format.family if file_format else _extension_file_type(file_name)
+    try:
+        if file_format is None:
+            raise ValueError(error)
+        # 在获得并发名额之后才解压，同时驻留内存的文件数受限
+        content = await run_in_threadpool(_read_member, archive, info, settings.ARCHIVE_MAX_MEMBER_BYTES)
+        # 缓存键同 /api/auto/process，同一文件在两个端点之间共享解析结果
+        rows = await run_cached(
+            ("auto/process", file_name, content, file_format.name, engine, file_format.fields, None),
+            file_format.process,
+            file_name,
+            content,
+            fields=file_format.fields,
+            engine=engine
+        )
+        data = models_from_rows(TmxData if file_type == "tmx" else XliffData, rows)
+        return BatchArchiveResult(
+            index=index,
+            fileName=file_name,
+            fileType=file_type,
+            success=True,
+            message=f"成功处理 {len(data)} 个翻译单元",
+            data=data
+        )
+    except Exception as e:
+        logger.error(f"处理压缩包中的文件 {file_name} 失败: {str(e)}")
+        return BatchArchiveResult(index=index, fileName=file_name, fileType=file_type, success=False, message=str(e))
+
+
+def _spool_copy(source) -> tempfile.SpooledTemporaryFile:
+    source.seek(0)
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    shutil.copyfileobj(source, spool)
+    spool.seek(0)
+    return spool
+
+
+@router.post("/archive", response_model=BatchArchiveResponse, responses=BATCH_NDJSON_RESPONSES)
+async def process_archive(file: UploadFile = File(...), engine: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """
+    上传并处理ZIP压缩包中的XLIFF/TMX文件
+    
+    每个文件通过格式注册表识别（同 /api/auto/process），扩展名为XLIFF/TMX但无法识别的文件报错，其他无法识别的文件会被跳过。
+    压缩包保存在临时文件中，各文件在处理时才逐个解压，不会一次解压整个压缩包。
+    Accept: application/x-ndjson 时每个文件完成后立即输出其结果
+    """
+    engine = engine or settings.XLIFF_ENGINE
+    streaming = wants_ndjson(accept)
+    
+    # FastAPI在处理函数返回后关闭上传文件，流式输出期间需要自己持有一份副本
+    source = await run_in_threadpool(_spool_copy, file.file) if streaming else file.file
+    try:
+        archive = await run_in_threadpool(zipfile.ZipFile, source)
+        members = await run_in_threadpool(_archive_members, archive)
+    except zipfile.BadZipFile:
+        if source is not file.file:
+            source.close()
+        raise HTTPException(status_code=400, detail="不是有效的ZIP压缩包")
+    
+    skipped = len([info for info in archive.infolist() if not info.is_dir()]) - len(members)
+    jobs = [
+        _process_member(archive, index, info, file_format, error, engine)
+        for index, info, file_format, error in members
+    ]
+    
+    def close():
+        archive.close()
+        if source is not file.file:
+            source.close()
+    
+    return await _respond(
+        jobs,
+        BatchArchiveResponse,
+        accept,
+        summary=lambda results: f"{_summary(results)}，跳过 {skipped} 个其他文件",
+        on_close=close
+    )
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from services.parse_cache import parse_cache
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/cache", tags=["Cache"])
+
+@router.get("/stats")
+async def cache_stats():
+    """
+    解析结果缓存统计
+    
+    返回条目数、占用字节数、命中/未命中次数和淘汰次数
+    """
+    return parse_cache.stats()
+
+@router.delete("")
+async def clear_cache():
+    """
+    清空解析结果缓存
+    """
+    parse_cache.clear()
+    logger.info("解析结果缓存已清空")
+    return {"success": True, "message": "缓存已清空"}
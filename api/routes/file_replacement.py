@@ -1,21 +1,73 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import List, Optional
+from urllib.parse import quote
 from models.xliff import (
     FileReplacementRequest,
-    FileReplacementResponse
+    FileReplacementResponse,
+    TranslationReplacementData
 )
 from services.xliff_processor import XliffProcessorService
 from services.tmx_processor import TmxProcessorService
+from services.executor import run_service
+from services.formats import detect_format
+from services.encoding import decode_xml_bytes, iter_encoded, xml_charset
+from services.splice import iter_spliced
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/replacement", tags=["File Translation Replacement"])
 
-@router.post("/xliff", response_model=FileReplacementResponse)
-async def replace_xliff_translations(request: FileReplacementRequest):
+# 文件下载响应中携带替换结果的请求头
+REPLACEMENTS_COUNT_HEADER = "X-Replacements-Count"
+UNMATCHED_COUNT_HEADER = "X-Unmatched-Count"
+
+_translations_adapter = TypeAdapter(List[TranslationReplacementData])
+
+# 在OpenAPI文档中声明文件下载响应
+FILE_DOWNLOAD_RESPONSES = {
+    200: {
+        "content": {"application/xml": {}},
+        "description": f"更新后的文件，替换数量和未匹配数量在 {REPLACEMENTS_COUNT_HEADER}、{UNMATCHED_COUNT_HEADER} 响应头中",
+    }
+}
+
+async def _read_upload(file: UploadFile, translations: UploadFile) -> tuple[str, str, List[dict]]:
+    """读取上传的文件和翻译数据，返回(文本内容, 原编码, 翻译数据列表)"""
+    try:
+        items = _translations_adapter.validate_json(await translations.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"翻译数据格式错误: {str(e)}")
+    
+    data = await file.read()
+    try:
+        content, encoding = decode_xml_bytes(data)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="文件编码无法识别，请使用UTF-8或UTF-16")
+    return content, encoding, [item.model_dump() for item in items]
+
+def _file_response(content: str, encoding: str, edits, replacements_count: int, unmatched: List[str], file_name: Optional[str]) -> StreamingResponse:
+    """以原编码流式返回拼接后的文件，不生成整文档大小的中间字符串"""
+    headers = {
+        REPLACEMENTS_COUNT_HEADER: str(replacements_count),
+        UNMATCHED_COUNT_HEADER: str(len(unmatched)),
+    }
+    if file_name:
+        headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(file_name)}"
+    return StreamingResponse(
+        iter_encoded(iter_spliced(content, edits), encoding),
+        media_type=f"application/xml; charset={xml_charset(encoding)}",
+        headers=headers
+    )
+
+@router.post("/xliff", response_model=FileReplacementResponse, response_model_exclude_none=True)
+async def replace_xliff_translations(request: FileReplacementRequest, dry_run: bool = False):
     """
     替换XLIFF文件中的翻译内容
     
-    根据提供的翻译数据，更新XLIFF文件中对应的target元素
+    根据提供的翻译数据，更新XLIFF文件中对应的target元素。
+    dry_run=true时只检查匹配情况并返回未匹配的单元ID，不修改内容
     """
     try:
         # 转换翻译数据格式
@@ -29,11 +81,22 @@ async def replace_xliff_translations(request: FileReplacementRequest):
             })
         
         # 执行替换操作
-        updated_content, replacements_count = XliffProcessorService.replace_xliff_targets(
+        updated_content, replacements_count, unmatched = await run_service(
+            XliffProcessorService.splice_xliff_targets,
             content=request.content,
-            translations=translations
+            translations=translations,
+            dry_run=dry_run
         )
         
+        if dry_run:
+            return FileReplacementResponse(
+                content=updated_content,
+                success=True,
+                message=f"预检完成：可替换 {replacements_count} 个翻译单元，未匹配 {len(unmatched)} 个",
+                replacements_count=replacements_count,
+                unmatched=unmatched
+            )
+        
         return FileReplacementResponse(
             content=updated_content,
             success=True,
@@ -45,12 +108,14 @@ async def replace_xliff_translations(request: FileReplacementRequest):
         logger.error(f"XLIFF翻译替换失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/tmx", response_model=FileReplacementResponse)
-async def replace_tmx_translations(request: FileReplacementRequest):
+@router.post("/tmx", response_model=FileReplacementResponse, response_model_exclude_none=True)
+async def replace_tmx_translations(request: FileReplacementRequest, target_lang: Optional[str] = None, dry_run: bool = False):
     """
     替换TMX文件中的翻译内容
     
-    根据提供的翻译数据，更新TMX文件中对应的target段落
+    根据提供的翻译数据，更新TMX文件中对应的target段落。
+    目标tuv按target_lang匹配xml:lang，未指定时根据header的srclang推断；
+    dry_run=true时只检查匹配情况并返回未匹配的单元ID，不修改内容
     """
     try:
         # 转换翻译数据格式
@@ -64,11 +129,23 @@ async def replace_tmx_translations(request: FileReplacementRequest):
             })
         
         # 执行替换操作
-        updated_content, replacements_count = TmxProcessorService.replace_tmx_targets(
+        updated_content, replacements_count, unmatched = await run_service(
+            TmxProcessorService.splice_tmx_targets,
             content=request.content,
-            translations=translations
+            translations=translations,
+            target_lang=target_lang,
+            dry_run=dry_run
         )
         
+        if dry_run:
+            return FileReplacementResponse(
+                content=updated_content,
+                success=True,
+                message=f"预检完成：可替换 {replacements_count} 个翻译单元，未匹配 {len(unmatched)} 个",
+                replacements_count=replacements_count,
+                unmatched=unmatched
+            )
+        
         return FileReplacementResponse(
             content=updated_content,
             success=True,
@@ -80,68 +157,85 @@ async def replace_tmx_translations(request: FileReplacementRequest):
         logger.error(f"TMX翻译替换失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/auto", response_model=FileReplacementResponse)
+@router.post("/xliff/file", response_class=StreamingResponse, responses=FILE_DOWNLOAD_RESPONSES)
+async def replace_xliff_file(file: UploadFile = File(...), translations: UploadFile = File(...)):
+    """
+    以文件形式替换XLIFF中的翻译内容
+    
+    multipart上传原始文件（file）和JSON数组形式的翻译数据（translations，作为文件部分上传，
+    普通表单字段有1MB的大小限制），直接以文件流返回更新后的XLIFF，避免整个文档在JSON中转义往返
+    """
+    content, encoding, items = await _read_upload(file, translations)
+    try:
+        edits, replacements_count, unmatched = await run_service(
+            XliffProcessorService.plan_xliff_targets,
+            content=content,
+            translations=items
+        )
+    except Exception as e:
+        logger.error(f"XLIFF文件翻译替换失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _file_response(content, encoding, edits, replacements_count, unmatched, file.filename)
+
+@router.post("/tmx/file", response_class=StreamingResponse, responses=FILE_DOWNLOAD_RESPONSES)
+async def replace_tmx_file(file: UploadFile = File(...), translations: UploadFile = File(...), target_lang: Optional[str] = None):
+    """
+    以文件形式替换TMX中的翻译内容
+    
+    参数和返回方式同 /xliff/file，目标tuv的确定规则同 /tmx
+    """
+    content, encoding, items = await _read_upload(file, translations)
+    try:
+        edits, replacements_count, unmatched = await run_service(
+            TmxProcessorService.plan_tmx_targets,
+            content=content,
+            translations=items,
+            target_lang=target_lang
+        )
+    except Exception as e:
+        logger.error(f"TMX文件翻译替换失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _file_response(content, encoding, edits, replacements_count, unmatched, file.filename)
+
+@router.post("/auto", response_model=FileReplacementResponse, response_model_exclude_none=True)
 async def auto_replace_translations(request: FileReplacementRequest):
     """
     自动检测文件类型并替换翻译内容
     
-    根据文件内容自动判断是XLIFF还是TMX，然后执行相应的替换操作
+    通过格式注册表根据文档开头的根元素和命名空间判断格式（XLIFF 1.2、XLIFF 2.x、TMX），
+    无法判断时按fileName的扩展名，然后执行相应的替换操作
     """
     try:
-        # 简单的文件类型检测
-        content_lower = request.content.lower()
+        file_format = detect_format(request.content, request.fileName)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # 转换翻译数据格式
+        translations = []
+        for trans in request.translations:
+            translations.append({
+                'segNumber': trans.segNumber,
+                'unitId': trans.unitId,  # 传递unitId
+                'aiResult': trans.aiResult,
+                'mtResult': trans.mtResult
+            })
         
-        if '<xliff' in content_lower or '<trans-unit' in content_lower or '<unit' in content_lower:
-            # 处理XLIFF文件
-            translations = []
-            for trans in request.translations:
-                translations.append({
-                    'segNumber': trans.segNumber,
-                    'unitId': trans.unitId,  # 传递unitId
-                    'aiResult': trans.aiResult,
-                    'mtResult': trans.mtResult
-                })
-            
-            updated_content, replacements_count = XliffProcessorService.replace_xliff_targets(
-                content=request.content,
-                translations=translations
-            )
-            
-            file_type = "XLIFF"
-            
-        elif '<tmx' in content_lower or '<tu' in content_lower:
-            # 处理TMX文件
-            translations = []
-            for trans in request.translations:
-                translations.append({
-                    'segNumber': trans.segNumber,
-                    'unitId': trans.unitId,  # 传递unitId
-                    'aiResult': trans.aiResult,
-                    'mtResult': trans.mtResult
-                })
-            
-            updated_content, replacements_count = TmxProcessorService.replace_tmx_targets(
-                content=request.content,
-                translations=translations
-            )
-            
-            file_type = "TMX"
-            
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="无法识别文件类型，请确保文件为有效的XLIFF或TMX格式"
-            )
+        updated_content, replacements_count = await run_service(
+            file_format.replace,
+            content=request.content,
+            translations=translations
+        )
         
         return FileReplacementResponse(
             content=updated_content,
             success=True,
-            message=f"成功自动识别为{file_type}文件并替换 {replacements_count} 个翻译单元",
+            message=f"成功自动识别为{file_format.label}文件并替换 {replacements_count} 个翻译单元",
             replacements_count=replacements_count
         )
         
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"自动翻译替换失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
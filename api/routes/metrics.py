@@ -0,0 +1,73 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from services.document_sessions import document_sessions
+from services.executor import service_executor
+from services.metrics import CONTENT_TYPE, metrics
+from services.parse_cache import parse_cache
+
+router = APIRouter(tags=["Metrics"])
+
+
+def _cache_metrics():
+    """解析结果缓存的统计信息，抓取时读取"""
+    stats = parse_cache.stats()
+    families = [
+        ("xliff_parse_cache_entries", "gauge", "解析结果缓存条目数", [({}, stats["entries"])]),
+        ("xliff_parse_cache_bytes", "gauge", "解析结果缓存占用字节数", [({}, stats["bytes"])]),
+        ("xliff_parse_cache_max_bytes", "gauge", "解析结果缓存字节预算", [({}, stats["max_bytes"])]),
+        ("xliff_parse_cache_hits_total", "counter", "解析结果缓存命中次数", [({}, stats["hits"])]),
+        ("xliff_parse_cache_misses_total", "counter", "解析结果缓存未命中次数", [({}, stats["misses"])]),
+        ("xliff_parse_cache_evictions_total", "counter", "解析结果缓存淘汰次数", [({}, stats["evictions"])]),
+    ]
+    disk = stats["disk"]
+    if disk is not None:
+        families += [
+            ("xliff_parse_cache_disk_entries", "gauge", "磁盘缓存条目数（所有进程共享）", [({}, disk["entries"])]),
+            ("xliff_parse_cache_disk_bytes", "gauge", "磁盘缓存占用字节数（所有进程共享）", [({}, disk["bytes"])]),
+            ("xliff_parse_cache_disk_max_bytes", "gauge", "磁盘缓存字节预算", [({}, disk["max_bytes"])]),
+            ("xliff_parse_cache_disk_hits_total", "counter", "磁盘缓存命中次数", [({}, disk["hits"])]),
+            ("xliff_parse_cache_disk_misses_total", "counter", "磁盘缓存未命中次数", [({}, disk["misses"])]),
+            ("xliff_parse_cache_disk_evictions_total", "counter", "磁盘缓存淘汰次数", [({}, disk["evictions"])]),
+        ]
+    return families
+
+
+def _executor_metrics():
+    """服务执行器的统计信息，抓取时读取"""
+    stats = service_executor.stats()
+    labels = {"kind": stats["kind"]}
+    return [
+        ("xliff_executor_workers", "gauge", "执行器worker数", [(labels, stats["max_workers"])]),
+        ("xliff_executor_in_flight", "gauge", "执行器中正在执行的调用数", [(labels, stats["in_flight"])]),
+        ("xliff_executor_calls_total", "counter", "执行器调用次数", [(labels, stats["calls"])]),
+        ("xliff_executor_failures_total", "counter", "执行器调用失败次数", [(labels, stats["failures"])]),
+        ("xliff_executor_seconds_total", "counter", "执行器调用累计耗时（秒，含排队）", [(labels, stats["total_seconds"])]),
+    ]
+
+
+def _session_metrics():
+    """文档会话存储的统计信息，抓取时读取"""
+    stats = document_sessions.stats()
+    return [
+        ("xliff_document_sessions", "gauge", "文档会话数", [({}, stats["sessions"])]),
+        ("xliff_document_sessions_bytes", "gauge", "文档会话占用字节数（估计值）", [({}, stats["bytes"])]),
+        ("xliff_document_sessions_evictions_total", "counter", "超出预算淘汰的会话数", [({}, stats["evictions"])]),
+        ("xliff_document_sessions_expirations_total", "counter", "过期的会话数", [({}, stats["expirations"])]),
+    ]
+
+
+metrics.add_collector(_cache_metrics)
+metrics.add_collector(_session_metrics)
+metrics.add_collector(_executor_metrics)
+
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics():
+    """
+    Prometheus指标（文本格式0.0.4）
+
+    与其他接口一样需要访问密钥，抓取配置中通过 Authorization: Bearer 传入。
+    包括每个路由的请求耗时直方图、请求数、请求体字节数、每请求翻译单元数、正在处理的请求数，
+    parse/extract/replace/serialize各阶段耗时直方图，以及解析缓存和执行器的统计。
+    """
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
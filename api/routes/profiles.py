@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
+from services.profiling import DEFAULT_TOP_FUNCTIONS, profile_store
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(request: Request):
+    """只允许管理员密钥访问（由认证中间件标记）"""
+    if not getattr(request.state, "admin", False):
+        raise HTTPException(status_code=403, detail="只允许管理员密钥访问")
+
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiling"], dependencies=[Depends(require_admin)])
+
+PROFILE_FORMATS = ("json", "text", "pstats")
+
+
+@router.get("")
+async def list_profiles():
+    """
+    列出保存的请求分析结果（最新的在前）
+    """
+    return profile_store.list()
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: Optional[str] = "json", limit: int = DEFAULT_TOP_FUNCTIONS):
+    """
+    取回请求分析结果
+
+    - json：请求耗时、各阶段耗时、执行器调用和按累计耗时排序的热点函数
+    - text：pstats文本报告
+    - pstats：pstats文件（附件），可用 snakeviz 等工具打开
+    """
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}，可选值: {', '.join(PROFILE_FORMATS)}")
+
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"分析结果不存在或已过期: {profile_id}")
+
+    if format == "text":
+        return PlainTextResponse(profile.text(limit))
+    if format == "pstats":
+        return Response(
+            profile.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+        )
+    return profile.summary(limit)
+
+
+@router.delete("")
+async def clear_profiles():
+    """
+    清空保存的请求分析结果
+    """
+    profile_store.clear()
+    logger.info("请求分析结果已清空")
+    return {"success": True, "message": "分析结果已清空"}
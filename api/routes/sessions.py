@@ -0,0 +1,338 @@
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from urllib.parse import quote
+from models.xliff import (
+    DocumentSessionInfo,
+    FileProcessRequest,
+    FileReplacementResponse,
+    SessionReplacementRequest,
+    SessionUpdateResponse,
+    TMX_DATA_FIELDS,
+    ValidationResponse,
+    XLIFF_DATA_FIELDS,
+    select_fields
+)
+from api.filters import unit_filter_params
+from api.serialization import COLUMNAR_RESPONSES, units_response
+from config import settings
+from services.document_sessions import (
+    FORMAT_TMX,
+    DocumentSession,
+    PreconditionFailed,
+    detect_format,
+    document_sessions,
+    etag_matches,
+    index_state,
+    restore_index,
+    splice_session_targets
+)
+from services.encoding import decode_xml_bytes, iter_encoded, xml_charset
+from services.parse_cache import run_cached
+from services.tmx_processor import TmxProcessorService
+from services.unit_filter import UnitFilter
+from services.xliff_processor import XliffProcessorService
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/sessions", tags=["Document Sessions"])
+
+
+def _get_session(session_id: str, if_match: Optional[str] = None) -> DocumentSession:
+    """取出会话；提供If-Match时要求ETag一致，避免对已经变化的文档操作"""
+    session = document_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"会话不存在或已过期: {session_id}")
+    if if_match is not None and not etag_matches(if_match, session.etag):
+        raise HTTPException(status_code=412, detail="文档已变化，ETag不匹配")
+    return session
+
+
+def _session_info(session: DocumentSession, response: Response) -> DocumentSessionInfo:
+    response.headers["ETag"] = session.etag
+    return DocumentSessionInfo(**session.info(document_sessions.ttl_seconds))
+
+
+async def _current(session: DocumentSession) -> DocumentSession:
+    """需要整个文档的操作之前，合并尚未合并的增量更新"""
+    if session.pending_updates:
+        await run_in_threadpool(session.materialize)
+        document_sessions.update(session)
+    return session
+
+
+async def _create_session(file_name: str, content: str, encoding: str, response: Response) -> DocumentSessionInfo:
+    try:
+        file_format = detect_format(file_name, content)
+        # 建立完整的单元索引，之后的提取和替换直接使用；相同的文档（包括其他worker进程
+        # 通过磁盘缓存保存的）直接复用单元位置
+        state = await run_cached(("sessions/index", "", content, file_format), index_state, file_format, content)
+        index = restore_index(file_format, content, state)
+    except Exception as e:
+        logger.error(f"创建文档会话失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        session = document_sessions.add(DocumentSession(file_name, file_format, content, encoding, index))
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    logger.info(f"已创建文档会话 {session.session_id}: {file_name}, {session.unit_count} 个单元")
+    response.headers["Location"] = f"{router.prefix}/{session.session_id}"
+    return _session_info(session, response)
+
+
+@router.post("", response_model=DocumentSessionInfo, status_code=201)
+async def create_session(request: FileProcessRequest, response: Response):
+    """
+    创建文档会话
+
+    上传一次XLIFF或TMX内容，返回会话ID和ETag；之后的提取、验证和替换请求只需引用会话ID。
+    会话在最后一次访问后 SESSION_TTL_SECONDS 秒过期，超出内存预算时淘汰最久未访问的会话
+    """
+    return await _create_session(request.fileName, request.content, 'utf-8', response)
+
+
+@router.post("/upload", response_model=DocumentSessionInfo, status_code=201)
+async def upload_session(response: Response, file: UploadFile = File(...)):
+    """
+    以文件上传的方式创建文档会话
+
+    按BOM识别UTF-8/UTF-16编码，下载内容时按原编码输出
+    """
+    data = await file.read()
+    try:
+        content, encoding = decode_xml_bytes(data)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="文件编码无法识别，请使用UTF-8或UTF-16")
+    return await _create_session(file.filename, content, encoding, response)
+
+
+@router.get("")
+async def session_stats():
+    """
+    文档会话存储统计
+
+    返回会话数、占用字节数、字节预算、TTL以及淘汰和过期次数
+    """
+    return document_sessions.stats()
+
+
+@router.get("/{session_id}", response_model=DocumentSessionInfo)
+async def get_session(session_id: str, response: Response):
+    """
+    获取会话信息并刷新过期时间
+    """
+    return _session_info(_get_session(session_id), response)
+
+
+@router.get("/{session_id}/content", response_class=StreamingResponse,
+            responses={200: {"content": {"application/xml": {}}}, 304: {"description": "If-None-Match与ETag一致"}})
+async def get_session_content(session_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    以原编码下载会话中的当前文档（包括通过PATCH写入的更新）
+
+    If-None-Match与当前ETag一致时返回304
+    """
+    session = _get_session(session_id)
+    if etag_matches(if_none_match, session.etag):
+        return Response(status_code=304, headers={"ETag": session.etag})
+    return StreamingResponse(
+        iter_encoded(session.iter_rendered(), session.encoding),
+        media_type=f"application/xml; charset={xml_charset(session.encoding)}",
+        headers={
+            "ETag": session.etag,
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(session.file_name)}",
+        }
+    )
+
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str):
+    """
+    删除文档会话
+    """
+    if not document_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"会话不存在或已过期: {session_id}")
+    return {"success": True, "message": "会话已删除"}
+
+
+@router.post("/{session_id}/process", responses=COLUMNAR_RESPONSES)
+async def process_session(
+    session_id: str,
+    engine: Optional[str] = None,
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    提取会话文档中的翻译单元
+
+    XLIFF结果同 /api/xliff/process（engine可选toolkit或stream），TMX结果同 /api/tmx/process；
+    fields和过滤、分页参数同上述端点，支持列式响应格式。结果按ETag缓存，不再对文档内容计算哈希
+    """
+    session = await _current(_get_session(session_id, if_match))
+    try:
+        if session.file_format == FORMAT_TMX:
+            selected = select_fields(fields, TMX_DATA_FIELDS)
+            rows = await run_cached(
+                ("sessions/tmx/process", session.file_name, session.etag, selected, unit_filter),
+                TmxProcessorService.process_tmx_rows,
+                file_name=session.file_name,
+                content=session.content,
+                fields=selected,
+                unit_filter=unit_filter
+            )
+            return units_response(rows, selected, f"成功处理 {len(rows)} 个翻译单元", accept)
+
+        engine = engine or settings.XLIFF_ENGINE
+        selected = select_fields(fields, XLIFF_DATA_FIELDS)
+        rows = await run_cached(
+            ("sessions/xliff/process", session.file_name, session.etag, engine, selected, unit_filter),
+            XliffProcessorService.process_xliff_rows,
+            file_name=session.file_name,
+            content=session.content,
+            engine=engine,
+            fields=selected,
+            unit_filter=unit_filter
+        )
+        return units_response(rows, selected, f"成功处理 {len(rows)} 个翻译单元", accept)
+    except Exception as e:
+        logger.error(f"处理会话文档失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{session_id}/process-with-tags", responses=COLUMNAR_RESPONSES)
+async def process_session_with_tags(
+    session_id: str,
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    提取会话XLIFF文档中保留内部标签的翻译单元
+
+    结果同 /api/xliff/process-with-tags（包括fields和过滤、分页参数），直接使用会话中的单元索引，不再扫描文档
+    """
+    session = _get_session(session_id, if_match)
+    if session.file_format == FORMAT_TMX:
+        raise HTTPException(status_code=400, detail="process-with-tags只支持XLIFF会话")
+    try:
+        selected = select_fields(fields, XLIFF_DATA_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    session = await _current(session)
+    # 索引已在内存中，只需切片，不必把整个文档传给工作进程
+    rows = await run_in_threadpool(XliffProcessorService.process_xliff_index_rows, session.file_name, session.index, selected, unit_filter)
+    return units_response(rows, selected, f"成功处理带标签的 {len(rows)} 个翻译单元", accept)
+
+
+@router.post("/{session_id}/validate", response_model=ValidationResponse)
+async def validate_session(session_id: str, mode: Optional[str] = None, if_match: Optional[str] = Header(None)):
+    """
+    验证会话文档
+
+    mode同 /api/xliff/validate 和 /api/tmx/validate
+    """
+    session = await _current(_get_session(session_id, if_match))
+    mode = mode or settings.VALIDATION_MODE
+    validate = TmxProcessorService.validate_tmx if session.file_format == FORMAT_TMX else XliffProcessorService.validate_xliff
+    try:
+        valid, message, unit_count = await run_cached(
+            (f"sessions/{session.file_format}/validate", "", session.etag, mode),
+            validate,
+            session.content,
+            mode=mode,
+            schema_dir=settings.SCHEMA_DIR
+        )
+    except (ValueError, FileNotFoundError) as e:
+        # 不支持的模式或缺少模式文件属于请求/配置问题，不代表内容无效
+        logger.error(f"验证会话文档失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"验证会话文档失败: {str(e)}")
+        return ValidationResponse(valid=False, message=f"验证过程出错: {str(e)}", unit_count=0)
+    return ValidationResponse(valid=valid, message=message, unit_count=unit_count)
+
+
+@router.post("/{session_id}/replace", response_model=FileReplacementResponse, response_model_exclude_none=True)
+async def replace_session_translations(
+    session_id: str,
+    request: SessionReplacementRequest,
+    target_lang: Optional[str] = None,
+    dry_run: bool = False,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    替换会话文档中的翻译内容
+
+    结果同 /api/replacement/xliff 和 /api/replacement/tmx，使用会话中的单元索引，不再扫描文档；
+    会话中的文档本身不变（需要保存译文时使用 PATCH /{session_id}/targets）。
+    target_lang只用于TMX，dry_run=true时只检查匹配情况
+    """
+    session = await _current(_get_session(session_id, if_match))
+    translations = [item.model_dump() for item in request.translations]
+    try:
+        updated_content, replacements_count, unmatched = await run_in_threadpool(
+            splice_session_targets, session, translations, target_lang, dry_run
+        )
+    except Exception as e:
+        logger.error(f"会话翻译替换失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if dry_run:
+        return FileReplacementResponse(
+            content=updated_content,
+            success=True,
+            message=f"预检完成：可替换 {replacements_count} 个翻译单元，未匹配 {len(unmatched)} 个",
+            replacements_count=replacements_count,
+            unmatched=unmatched
+        )
+    return FileReplacementResponse(
+        content=updated_content,
+        success=True,
+        message=f"成功替换 {replacements_count} 个翻译单元",
+        replacements_count=replacements_count
+    )
+
+
+@router.patch("/{session_id}/targets", response_model=SessionUpdateResponse)
+async def update_session_targets(
+    session_id: str,
+    request: SessionReplacementRequest,
+    response: Response,
+    target_lang: Optional[str] = None,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    把一批译文写入会话中的文档
+
+    译文分批到达时逐批调用，每批只按单元索引查找本批单元，耗时与批量大小而不是文档大小成正比；
+    同一单元的后续更新覆盖之前的。随时可以通过 GET /{session_id}/content 下载当前文档。
+    每次写入后ETag变化，带If-Match可以避免并发写入互相覆盖
+    """
+    # If-Match在写入时与写入在同一把锁内比较，这里不提前检查
+    session = _get_session(session_id)
+    translations = [item.model_dump() for item in request.translations]
+    try:
+        update = await run_in_threadpool(session.apply_targets, translations, target_lang, if_match)
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except Exception as e:
+        logger.error(f"会话增量更新失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    document_sessions.update(session)
+
+    response.headers["ETag"] = update.etag
+    return SessionUpdateResponse(
+        success=True,
+        message=f"成功更新 {update.replacements_count} 个翻译单元，未匹配 {len(update.unmatched)} 个",
+        replacements_count=update.replacements_count,
+        unmatched=update.unmatched,
+        etag=update.etag,
+        revision=update.revision,
+        pendingUpdates=update.pending_updates
+    )
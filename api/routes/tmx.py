@@ -1,45 +1,89 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body, Header
+from typing import List, Optional
 from models.xliff import (
-    FileProcessRequest,
     TmxProcessResponse, 
     TmxData,
-    ValidationResponse
+    ValidationResponse,
+    TMX_DATA_FIELDS,
+    select_fields
 )
 from services.tmx_processor import TmxProcessorService
+from services.unit_filter import UnitFilter
+from api.filters import unit_filter_params
+from api.request_body import PROCESS_REQUEST_BODY, ProcessInput, process_input
+from api.streaming import ndjson_response, wants_ndjson
+from api.serialization import COLUMNAR_RESPONSES, PROCESS_RESPONSES, row_line_encoder, units_response
+from services.parse_cache import lookup_cached, run_cached
+from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/tmx", tags=["TMX Processing"])
 tmx_service = TmxProcessorService()
 
-@router.post("/process", response_model=TmxProcessResponse)
-async def process_tmx(request: FileProcessRequest):
+# 翻译单元以元组形式从服务层返回，直接编码为JSON，不逐个创建Pydantic模型
+_encode_row = row_line_encoder(TMX_DATA_FIELDS)
+
+def _row_encoder(fields):
+    """所选字段对应的NDJSON行编码函数"""
+    return _encode_row if fields == TMX_DATA_FIELDS else row_line_encoder(fields)
+
+@router.post("/process", response_model=TmxProcessResponse, responses=PROCESS_RESPONSES, openapi_extra=PROCESS_REQUEST_BODY)
+async def process_tmx(
+    document: ProcessInput = Depends(process_input),
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
     """
     处理TMX内容
     
-    接收TMX文件内容，返回解析后的翻译单元数据
+    接收TMX文件内容，返回解析后的翻译单元数据。
+    fields为逗号分隔的字段名（如 id,source），只提取并返回这些字段，
+    未选择noTagSource/noTagTarget、contextId、srcLang/tgtLang时不计算这些字段；
+    过滤、分页参数同 /api/xliff/process（TMX单元的percent为-1），被过滤的单元不清理标签；
+    Accept: application/x-ndjson 时逐行流式返回翻译单元，
+    Accept: application/vnd.xliff-process.columnar+json 或 application/x-msgpack 时返回列式结构
     """
     try:
-        data = tmx_service.process_tmx(
-            file_name=request.fileName,
-            content=request.content
-        )
-        return TmxProcessResponse(
-            data=data,
-            success=True,
-            message=f"成功处理 {len(data)} 个TMX翻译单元"
+        selected = select_fields(fields, TMX_DATA_FIELDS)
+        cache_key = ("tmx/process", document.file_name, document.content, selected, unit_filter)
+        
+        if wants_ndjson(accept):
+            rows = await lookup_cached(cache_key)
+            if rows is None:
+                rows = tmx_service.iter_tmx_rows(
+                    file_name=document.file_name,
+                    content=document.content,
+                    fields=selected,
+                    unit_filter=unit_filter
+                )
+            return await ndjson_response(rows, lambda count: f"成功处理 {count} 个TMX翻译单元", encode=_row_encoder(selected))
+        
+        rows = await run_cached(
+            cache_key,
+            tmx_service.process_tmx_rows,
+            file_name=document.file_name,
+            content=document.content,
+            fields=selected,
+            unit_filter=unit_filter
         )
+        return units_response(rows, selected, f"成功处理 {len(rows)} 个TMX翻译单元", accept)
     except Exception as e:
         logger.error(f"处理TMX失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/upload", response_model=TmxProcessResponse)
-async def upload_tmx(file: UploadFile = File(...)):
+@router.post("/upload", response_model=TmxProcessResponse, responses=COLUMNAR_RESPONSES)
+async def upload_tmx(
+    file: UploadFile = File(...),
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
     """
     上传并处理TMX文件
     
-    接收TMX文件上传，返回解析后的翻译单元数据
+    接收TMX文件上传，返回解析后的翻译单元数据，fields和过滤、分页参数同 /process，支持列式响应格式
     """
     try:
         # 检查文件类型
@@ -49,44 +93,51 @@ async def upload_tmx(file: UploadFile = File(...)):
                 detail="不支持的文件格式，请上传TMX文件"
             )
         
-        # 读取文件内容
+        # 读取原始字节，不解码为str，由解析器按BOM和XML声明解码
         content = await file.read()
-        content_str = content.decode('utf-8')
         
         # 处理TMX
-        data = tmx_service.process_tmx(
+        selected = select_fields(fields, TMX_DATA_FIELDS)
+        rows = await run_cached(
+            ("tmx/process", file.filename, content, selected, unit_filter),
+            tmx_service.process_tmx_rows,
             file_name=file.filename,
-            content=content_str
+            content=content,
+            fields=selected,
+            unit_filter=unit_filter
         )
         
-        return TmxProcessResponse(
-            data=data,
-            success=True,
-            message=f"成功处理 {len(data)} 个TMX翻译单元"
-        )
-    except UnicodeDecodeError:
-        raise HTTPException(
-            status_code=400,
-            detail="文件编码错误，请确保文件为UTF-8编码"
-        )
+        return units_response(rows, selected, f"成功处理 {len(rows)} 个TMX翻译单元", accept)
     except Exception as e:
         logger.error(f"上传处理TMX失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/validate", response_model=ValidationResponse)
-async def validate_tmx(content: str = Body(..., embed=True)):
+async def validate_tmx(content: str = Body(..., embed=True), mode: Optional[str] = None):
     """
     验证TMX内容格式
     
-    检查提供的内容是否为有效的TMX格式
+    检查提供的内容是否为有效的TMX格式。
+    mode: wellformed（流式检查XML格式，内存占用恒定）、structural（默认）或 schema（模式验证）
     """
+    mode = mode or settings.VALIDATION_MODE
     try:
-        valid, message, unit_count = tmx_service.validate_tmx(content)
+        valid, message, unit_count = await run_cached(
+            ("tmx/validate", "", content, mode),
+            tmx_service.validate_tmx,
+            content,
+            mode=mode,
+            schema_dir=settings.SCHEMA_DIR
+        )
         return ValidationResponse(
             valid=valid,
             message=message,
             unit_count=unit_count
         )
+    except (ValueError, FileNotFoundError) as e:
+        # 不支持的模式或缺少模式文件属于请求/配置问题，不代表内容无效
+        logger.error(f"验证TMX失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"验证TMX失败: {str(e)}")
         return ValidationResponse(
@@ -1,45 +1,95 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body, Header
+from typing import List, Optional
 from models.xliff import (
-    FileProcessRequest, 
     XliffProcessResponse, 
     XliffData,
-    ValidationResponse
+    ValidationResponse,
+    XLIFF_DATA_FIELDS,
+    select_fields
 )
 from services.xliff_processor import XliffProcessorService
+from services.unit_filter import UnitFilter
+from api.filters import unit_filter_params
+from api.request_body import PROCESS_REQUEST_BODY, ProcessInput, process_input
+from api.streaming import ndjson_response, wants_ndjson
+from api.serialization import COLUMNAR_RESPONSES, PROCESS_RESPONSES, row_line_encoder, units_response
+from config import settings
+from services.parse_cache import lookup_cached, run_cached
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/xliff", tags=["XLIFF Processing"])
 xliff_service = XliffProcessorService()
 
-@router.post("/process", response_model=XliffProcessResponse)
-async def process_xliff(request: FileProcessRequest):
+# 翻译单元以元组形式从服务层返回，直接编码为JSON，不逐个创建Pydantic模型
+_encode_row = row_line_encoder(XLIFF_DATA_FIELDS)
+
+def _row_encoder(fields):
+    """所选字段对应的NDJSON行编码函数"""
+    return _encode_row if fields == XLIFF_DATA_FIELDS else row_line_encoder(fields)
+
+@router.post("/process", response_model=XliffProcessResponse, responses=PROCESS_RESPONSES, openapi_extra=PROCESS_REQUEST_BODY)
+async def process_xliff(
+    document: ProcessInput = Depends(process_input),
+    engine: Optional[str] = None,
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
     """
     处理XLIFF内容
     
-    接收XLIFF文件内容，返回解析后的翻译单元数据
+    接收XLIFF文件内容，返回解析后的翻译单元数据。
+    engine可选toolkit或stream，未指定时使用配置的XLIFF_ENGINE；
+    fields为逗号分隔的字段名（如 unitId,source），只提取并返回这些字段，未选择的字段不计算；
+    minPercent/maxPercent、hasTarget、unitIdPrefix、srcLang/tgtLang过滤单元，offset/limit分页，
+    在提取过程中判断，取满一页后停止解析；
+    Accept: application/x-ndjson 时逐行流式返回翻译单元，
+    Accept: application/vnd.xliff-process.columnar+json 或 application/x-msgpack 时返回列式结构
     """
     try:
-        data = xliff_service.process_xliff(
-            file_name=request.fileName,
-            content=request.content
-        )
-        return XliffProcessResponse(
-            data=data,
-            success=True,
-            message=f"成功处理 {len(data)} 个翻译单元"
+        engine = engine or settings.XLIFF_ENGINE
+        selected = select_fields(fields, XLIFF_DATA_FIELDS)
+        cache_key = ("xliff/process", document.file_name, document.content, engine, selected, unit_filter)
+        
+        if wants_ndjson(accept):
+            rows = await lookup_cached(cache_key)
+            if rows is None:
+                rows = xliff_service.iter_xliff_rows(
+                    file_name=document.file_name,
+                    content=document.content,
+                    engine=engine,
+                    fields=selected,
+                    unit_filter=unit_filter
+                )
+            return await ndjson_response(rows, lambda count: f"成功处理 {count} 个翻译单元", encode=_row_encoder(selected))
+        
+        rows = await run_cached(
+            cache_key,
+            xliff_service.process_xliff_rows,
+            file_name=document.file_name,
+            content=document.content,
+            engine=engine,
+            fields=selected,
+            unit_filter=unit_filter
         )
+        return units_response(rows, selected, f"成功处理 {len(rows)} 个翻译单元", accept)
     except Exception as e:
         logger.error(f"处理XLIFF失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/upload", response_model=XliffProcessResponse)
-async def upload_xliff(file: UploadFile = File(...)):
+@router.post("/upload", response_model=XliffProcessResponse, responses=COLUMNAR_RESPONSES)
+async def upload_xliff(
+    file: UploadFile = File(...),
+    engine: Optional[str] = None,
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
     """
     上传并处理XLIFF文件
     
-    接收XLIFF文件上传，返回解析后的翻译单元数据
+    接收XLIFF文件上传，返回解析后的翻译单元数据，fields和过滤、分页参数同 /process，支持列式响应格式
     """
     try:
         # 检查文件类型
@@ -49,65 +99,94 @@ async def upload_xliff(file: UploadFile = File(...)):
                 detail="不支持的文件格式，请上传XLIFF文件"
             )
         
-        # 读取文件内容
+        # 读取原始字节，不解码为str，由解析器按BOM和XML声明解码
         content = await file.read()
-        content_str = content.decode('utf-8')
         
         # 处理XLIFF
-        data = xliff_service.process_xliff(
+        engine = engine or settings.XLIFF_ENGINE
+        selected = select_fields(fields, XLIFF_DATA_FIELDS)
+        rows = await run_cached(
+            ("xliff/process", file.filename, content, engine, selected, unit_filter),
+            xliff_service.process_xliff_rows,
             file_name=file.filename,
-            content=content_str
+            content=content,
+            engine=engine,
+            fields=selected,
+            unit_filter=unit_filter
         )
         
-        return XliffProcessResponse(
-            data=data,
-            success=True,
-            message=f"成功处理 {len(data)} 个翻译单元"
-        )
-    except UnicodeDecodeError:
-        raise HTTPException(
-            status_code=400,
-            detail="文件编码错误，请确保文件为UTF-8编码"
-        )
+        return units_response(rows, selected, f"成功处理 {len(rows)} 个翻译单元", accept)
     except Exception as e:
         logger.error(f"上传处理XLIFF失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/process-with-tags", response_model=XliffProcessResponse)
-async def process_xliff_with_tags(request: FileProcessRequest):
+@router.post("/process-with-tags", response_model=XliffProcessResponse, responses=PROCESS_RESPONSES, openapi_extra=PROCESS_REQUEST_BODY)
+async def process_xliff_with_tags(
+    document: ProcessInput = Depends(process_input),
+    fields: Optional[str] = None,
+    unit_filter: Optional[UnitFilter] = Depends(unit_filter_params),
+    accept: Optional[str] = Header(None)
+):
     """
     处理XLIFF内容（保留内部标签）
     
-    专门用于AI翻译的XLIFF处理器，保留内部标记，使用更精确的方法避免DOM解析器添加命名空间
+    专门用于AI翻译的XLIFF处理器，保留内部标记，使用更精确的方法避免DOM解析器添加命名空间。
+    fields和过滤、分页参数同 /process；Accept: application/x-ndjson 时逐行流式返回翻译单元，列式响应格式同 /process
     """
     try:
-        data = xliff_service.process_xliff_with_tags(
-            file_name=request.fileName,
-            content=request.content
-        )
-        return XliffProcessResponse(
-            data=data,
-            success=True,
-            message=f"成功处理带标签的 {len(data)} 个翻译单元"
+        selected = select_fields(fields, XLIFF_DATA_FIELDS)
+        cache_key = ("xliff/process-with-tags", document.file_name, document.content, selected, unit_filter)
+        
+        if wants_ndjson(accept):
+            rows = await lookup_cached(cache_key)
+            if rows is None:
+                rows = xliff_service.iter_xliff_with_tags_rows(
+                    file_name=document.file_name,
+                    content=document.content,
+                    fields=selected,
+                    unit_filter=unit_filter
+                )
+            return await ndjson_response(rows, lambda count: f"成功处理带标签的 {count} 个翻译单元", encode=_row_encoder(selected))
+        
+        rows = await run_cached(
+            cache_key,
+            xliff_service.process_xliff_with_tags_rows,
+            file_name=document.file_name,
+            content=document.content,
+            fields=selected,
+            unit_filter=unit_filter
         )
+        return units_response(rows, selected, f"成功处理带标签的 {len(rows)} 个翻译单元", accept)
     except Exception as e:
         logger.error(f"处理带标签的XLIFF失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/validate", response_model=ValidationResponse)
-async def validate_xliff(content: str = Body(..., embed=True)):
+async def validate_xliff(content: str = Body(..., embed=True), mode: Optional[str] = None):
     """
     验证XLIFF内容格式
     
-    检查提供的内容是否为有效的XLIFF格式
+    检查提供的内容是否为有效的XLIFF格式。
+    mode: wellformed（流式检查XML格式，内存占用恒定）、structural（默认）或 schema（模式验证）
     """
+    mode = mode or settings.VALIDATION_MODE
     try:
-        valid, message, unit_count = xliff_service.validate_xliff(content)
+        valid, message, unit_count = await run_cached(
+            ("xliff/validate", "", content, mode),
+            xliff_service.validate_xliff,
+            content,
+            mode=mode,
+            schema_dir=settings.SCHEMA_DIR
+        )
         return ValidationResponse(
             valid=valid,
             message=message,
             unit_count=unit_count
         )
+    except (ValueError, FileNotFoundError) as e:
+        # 不支持的模式或缺少模式文件属于请求/配置问题，不代表内容无效
+        logger.error(f"验证XLIFF失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"验证XLIFF失败: {str(e)}")
         return ValidationResponse(
@@ -0,0 +1,119 @@
+from fastapi.responses import ORJSONResponse, Response
+from typing import Callable, List, Optional, Sequence
+from api.columnar import (
+    COLUMNAR_JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPES,
+    build_columnar,
+    msgpack,
+    msgpack_available
+)
+from api.streaming import NDJSON_RESPONSES
+from services.metrics import STAGE_SERIALIZE, record_units, stage
+import orjson
+
+# 在OpenAPI文档中声明列式响应
+COLUMNAR_RESPONSES = {
+    200: {
+        "content": {COLUMNAR_JSON_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}},
+        "description": f"请求头 Accept: {COLUMNAR_JSON_MEDIA_TYPE} 或 {MSGPACK_MEDIA_TYPE} 时返回列式结构，"
+                       "每个字段一个数组，所有单元相同的字段只在constants中出现一次",
+    }
+}
+
+# 同时支持NDJSON和列式响应的处理端点
+PROCESS_RESPONSES = {
+    200: {
+        "content": {**NDJSON_RESPONSES[200]["content"], **COLUMNAR_RESPONSES[200]["content"]},
+        "description": NDJSON_RESPONSES[200]["description"] + "；" + COLUMNAR_RESPONSES[200]["description"],
+    }
+}
+
+
+def columnar_media_type(accept: Optional[str]) -> Optional[str]:
+    """
+    根据Accept请求头选择列式响应的媒体类型
+
+    Args:
+        accept: Accept请求头
+
+    Returns:
+        列式JSON或MessagePack的媒体类型，不使用列式格式时返回None
+        （未安装msgpack时忽略MessagePack，退回普通JSON）
+    """
+    if not accept:
+        return None
+    accept = accept.lower()
+    if msgpack_available() and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return MSGPACK_MEDIA_TYPE
+    if COLUMNAR_JSON_MEDIA_TYPE in accept:
+        return COLUMNAR_JSON_MEDIA_TYPE
+    return None
+
+
+def rows_response(rows: List[tuple], fields: Sequence[str], message: str) -> ORJSONResponse:
+    """
+    把服务层快速路径产出的元组直接编码为 {data, success, message} 响应
+
+    不经过Pydantic的逐单元验证和jsonable_encoder，输出与XliffProcessResponse/
+    TmxProcessResponse序列化的结果逐字节一致（键顺序相同、紧凑格式、不转义非ASCII字符）。
+    路由仍声明response_model，OpenAPI文档不受影响。
+
+    Args:
+        rows: 元组列表，字段顺序与 fields 一致
+        fields: 字段名（XLIFF_DATA_FIELDS 或 TMX_DATA_FIELDS）
+        message: 响应消息
+
+    Returns:
+        ORJSONResponse对象
+    """
+    return ORJSONResponse({
+        "data": [dict(zip(fields, row)) for row in rows],
+        "success": True,
+        "message": message,
+    })
+
+
+def row_line_encoder(fields: Sequence[str]) -> Callable[[tuple], bytes]:
+    """
+    返回把单个元组编码为一行NDJSON的函数，供 ndjson_response 使用
+
+    Args:
+        fields: 字段名（XLIFF_DATA_FIELDS 或 TMX_DATA_FIELDS）
+
+    Returns:
+        编码函数，结果以换行结尾
+    """
+    def encode(row: tuple) -> bytes:
+        return orjson.dumps(dict(zip(fields, row)), option=orjson.OPT_APPEND_NEWLINE)
+    return encode
+
+
+def units_response(rows: List[tuple], fields: Sequence[str], message: str, accept: Optional[str]) -> Response:
+    """
+    按Accept请求头以普通JSON、列式JSON或MessagePack返回翻译单元
+
+    Args:
+        rows: 元组列表，字段顺序与 fields 一致
+        fields: 字段名（XLIFF_DATA_FIELDS 或 TMX_DATA_FIELDS）
+        message: 响应消息
+        accept: Accept请求头
+
+    Returns:
+        Response对象
+    """
+    record_units(len(rows))
+    media_type = columnar_media_type(accept)
+    with stage(STAGE_SERIALIZE):
+        if media_type is None:
+            response = rows_response(rows, fields, message)
+        else:
+            payload = build_columnar(rows, fields, message)
+            if media_type == MSGPACK_MEDIA_TYPE:
+                body = msgpack.packb(payload, use_bin_type=True)
+            else:
+                body = orjson.dumps(payload)
+            response = Response(body, media_type=media_type)
+    # 响应格式取决于Accept，缓存代理需要区分
+    response.headers["Vary"] = "Accept"
+    return response
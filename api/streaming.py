@@ -0,0 +1,106 @@
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+import json
+import logging
+from services.metrics import record_units
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 在OpenAPI文档中声明NDJSON响应
+NDJSON_RESPONSES = {
+    200: {
+        "content": {NDJSON_MEDIA_TYPE: {}},
+        "description": "请求头 Accept: application/x-ndjson 时，每行一个翻译单元，最后一行为 {success, message, count} 汇总",
+    }
+}
+
+_END = object()
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """
+    判断客户端是否请求NDJSON流式响应
+
+    Args:
+        accept: Accept请求头
+
+    Returns:
+        是否使用NDJSON
+    """
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept.lower()
+
+
+def _summary_line(success: bool, message: str, count: int) -> bytes:
+    return (json.dumps({"success": success, "message": message, "count": count}, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def _model_line(item: BaseModel) -> bytes:
+    return (item.model_dump_json() + "\n").encode('utf-8')
+
+
+async def ndjson_response(units: Iterator[Any], message: Callable[[int], str], encode: Callable[[Any], bytes] = _model_line) -> StreamingResponse:
+    """
+    将翻译单元迭代器包装为NDJSON流式响应
+
+    第一个单元在返回响应前取出，因此文件无法解析等早期错误仍由调用方转换为HTTP错误；
+    开始输出之后发生的错误只能写入最后的汇总行（success为false）。
+    生成器无法跨进程传递，迭代在线程池中进行，不会阻塞事件循环。
+
+    Args:
+        units: 翻译单元迭代器（Pydantic模型，或配合encode使用的元组）
+        message: 根据单元数量生成成功消息的函数
+        encode: 把单个翻译单元编码为一行（含换行符）的函数，默认使用model_dump_json
+
+    Returns:
+        StreamingResponse对象
+    """
+    units = iter(units)
+    first = await run_in_threadpool(next, units, _END)
+
+    def lines():
+        count = 0
+        item = first
+        try:
+            while item is not _END:
+                yield encode(item)
+                count += 1
+                item = next(units, _END)
+        except Exception as e:
+            logger.error(f"NDJSON流式输出中断: {str(e)}")
+            yield _summary_line(False, str(e), count)
+            return
+        finally:
+            record_units(count)
+        yield _summary_line(True, message(count), count)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def ndjson_async_response(items: AsyncIterator[BaseModel], message: Callable[[int], str]) -> StreamingResponse:
+    """
+    将异步迭代器（如批量任务按完成顺序产出的结果）包装为NDJSON流式响应
+
+    Args:
+        items: 结果的异步迭代器
+        message: 根据结果数量生成汇总消息的函数，在所有结果输出之后调用
+
+    Returns:
+        StreamingResponse对象
+    """
+    async def lines():
+        count = 0
+        try:
+            async for item in items:
+                yield _model_line(item)
+                count += 1
+        except Exception as e:
+            logger.error(f"NDJSON流式输出中断: {str(e)}")
+            yield _summary_line(False, str(e), count)
+            return
+        yield _summary_line(True, message(count), count)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
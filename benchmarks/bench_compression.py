@@ -0,0 +1,118 @@
+"""
+压缩编码的CPU与体积权衡
+
+对合成的XLIFF文档（请求体）和处理结果JSON（响应体）分别测量各编码、各级别的
+压缩比、压缩和解压吞吐量，用于选择 GZIP_LEVEL / BROTLI_QUALITY / ZSTD_LEVEL 的默认值。
+
+用法: python -m benchmarks.bench_compression [--units 20000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_xliff
+from middleware.compression import available_encodings, make_decoder, make_encoder
+from services.xliff_processor import XliffProcessorService
+
+LEVELS = {
+    "gzip": (1, 4, 6, 9),
+    "br": (1, 4, 6, 9),
+    "zstd": (1, 3, 6, 12),
+}
+
+# 模拟流式响应时每块的大小
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _best_of(repeat: int, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(payload: bytes, encoding: str, level: int, repeat: int, streaming: bool = False) -> dict:
+    """测量一种编码和级别，streaming为True时按块压缩并同步刷新（与流式响应相同）"""
+    def compress():
+        encoder = make_encoder(encoding, level)
+        if not streaming:
+            return encoder.compress(payload) + encoder.finish()
+        chunks = []
+        for start in range(0, len(payload), STREAM_CHUNK_SIZE):
+            chunks.append(encoder.compress(payload[start:start + STREAM_CHUNK_SIZE]))
+            chunks.append(encoder.flush())
+        chunks.append(encoder.finish())
+        return b''.join(chunks)
+
+    compress_seconds, compressed = _best_of(repeat, compress)
+
+    def decompress():
+        decoder = make_decoder(encoding)
+        return decoder.decompress(compressed, len(payload)) + decoder.flush()
+
+    decompress_seconds, restored = _best_of(repeat, decompress)
+    assert restored == payload
+
+    megabytes = len(payload) / 1e6
+    return {
+        "encoding": encoding,
+        "level": level,
+        "streaming": streaming,
+        "ratio": round(len(payload) / len(compressed), 2),
+        "compressed_bytes": len(compressed),
+        "compress_mb_s": round(megabytes / compress_seconds, 1),
+        "decompress_mb_s": round(megabytes / decompress_seconds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20000, help="合成XLIFF的单元数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量重复次数（取最快一次）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    xliff = generate_xliff(args.units)
+    units = XliffProcessorService.process_xliff("bench.xliff", xliff, engine="stream")
+    payloads = {
+        "request: xliff": xliff.encode("utf-8"),
+        "response: process json": json.dumps(
+            {"data": [unit.model_dump() for unit in units], "success": True}, ensure_ascii=False
+        ).encode("utf-8"),
+    }
+
+    results = []
+    for name, payload in payloads.items():
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                for streaming in (False, True):
+                    result = measure(payload, encoding, level, args.repeat, streaming)
+                    result["payload"] = name
+                    result["payload_bytes"] = len(payload)
+                    results.append(result)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    for name, payload in payloads.items():
+        print(f"\n{name}: {len(payload) / 1e6:.1f} MB")
+        print(f"{'encoding':<8} {'level':>5} {'mode':<9} {'ratio':>6} {'compress MB/s':>14} {'decompress MB/s':>16}")
+        for result in results:
+            if result["payload"] != name:
+                continue
+            mode = "stream" if result["streaming"] else "whole"
+            print(f"{result['encoding']:<8} {result['level']:>5} {mode:<9} {result['ratio']:>6} "
+                  f"{result['compress_mb_s']:>14} {result['decompress_mb_s']:>16}")
+
+
+if __name__ == "__main__":
+    main()
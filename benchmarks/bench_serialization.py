@@ -0,0 +1,122 @@
+"""
+响应序列化：Pydantic模型路径与元组快速路径的对比
+
+模型路径：服务层逐个创建并验证XliffData/TmxData，FastAPI按response_model再次验证、
+转换为可JSON化的对象后由json.dumps编码（即改造前 /process 端点的完整流程）。
+快速路径：服务层产出元组，rows_response用orjson直接编码。
+两条路径的输出逐字节一致（脚本会校验），分别给出提取、编码和合计耗时。
+
+用法: python -m benchmarks.bench_serialization [--units 20000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from api.serialization import rows_response
+from benchmarks.corpus import generate_tmx, generate_xliff
+from models.xliff import TMX_DATA_FIELDS, XLIFF_DATA_FIELDS, TmxProcessResponse, XliffProcessResponse
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+
+def _best_of(repeat: int, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _model_body(response_cls, data, message: str) -> bytes:
+    """按FastAPI处理response_model的方式序列化"""
+    field = create_model_field(name="response", type_=response_cls, mode="serialization")
+    response = response_cls(data=data, success=True, message=message)
+    content = asyncio.run(serialize_response(field=field, response_content=response))
+    return JSONResponse(content).body
+
+
+def measure(name: str, content: str, parse_models, parse_rows, response_cls, fields, repeat: int) -> dict:
+    """分别测量两条路径的提取和编码耗时"""
+    parse_model_seconds, models = _best_of(repeat, lambda: parse_models(content))
+    encode_model_seconds, model_body = _best_of(
+        repeat, lambda: _model_body(response_cls, models, f"成功处理 {len(models)} 个翻译单元")
+    )
+    parse_row_seconds, rows = _best_of(repeat, lambda: parse_rows(content))
+    encode_row_seconds, row_response = _best_of(
+        repeat, lambda: rows_response(rows, fields, f"成功处理 {len(rows)} 个翻译单元")
+    )
+    assert row_response.body == model_body
+
+    model_total = parse_model_seconds + encode_model_seconds
+    row_total = parse_row_seconds + encode_row_seconds
+    return {
+        "payload": name,
+        "units": len(rows),
+        "response_bytes": len(model_body),
+        "model_parse_ms": round(parse_model_seconds * 1000, 1),
+        "model_encode_ms": round(encode_model_seconds * 1000, 1),
+        "model_total_ms": round(model_total * 1000, 1),
+        "rows_parse_ms": round(parse_row_seconds * 1000, 1),
+        "rows_encode_ms": round(encode_row_seconds * 1000, 1),
+        "rows_total_ms": round(row_total * 1000, 1),
+        "encode_speedup": round(encode_model_seconds / encode_row_seconds, 1),
+        "total_speedup": round(model_total / row_total, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20000, help="合成文件的单元数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量重复次数（取最快一次）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    xliff = generate_xliff(args.units)
+    tmx = generate_tmx(args.units)
+    results = [
+        measure(
+            "xliff stream", xliff,
+            lambda content: XliffProcessorService.process_xliff("bench.xliff", content, engine="stream"),
+            lambda content: XliffProcessorService.process_xliff_rows("bench.xliff", content, engine="stream"),
+            XliffProcessResponse, XLIFF_DATA_FIELDS, args.repeat
+        ),
+        measure(
+            "xliff with tags", xliff,
+            lambda content: XliffProcessorService.process_xliff_with_tags("bench.xliff", content),
+            lambda content: XliffProcessorService.process_xliff_with_tags_rows("bench.xliff", content),
+            XliffProcessResponse, XLIFF_DATA_FIELDS, args.repeat
+        ),
+        measure(
+            "tmx", tmx,
+            lambda content: TmxProcessorService.process_tmx("bench.tmx", content),
+            lambda content: TmxProcessorService.process_tmx_rows("bench.tmx", content),
+            TmxProcessResponse, TMX_DATA_FIELDS, args.repeat
+        ),
+    ]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'payload':<16} {'units':>7} {'MB':>6} {'model parse/encode ms':>22} {'rows parse/encode ms':>21} {'encode x':>9} {'total x':>8}")
+    for result in results:
+        print(f"{result['payload']:<16} {result['units']:>7} {result['response_bytes'] / 1e6:>6.1f} "
+              f"{result['model_parse_ms']:>10} / {result['model_encode_ms']:<9} "
+              f"{result['rows_parse_ms']:>9} / {result['rows_encode_ms']:<9} "
+              f"{result['encode_speedup']:>9} {result['total_speedup']:>8}")
+
+
+if __name__ == "__main__":
+    main()
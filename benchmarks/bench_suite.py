@@ -0,0 +1,392 @@
+"""
+服务热点路径与端点的基准测试套件
+
+对每个服务方法（直接调用）和每个端点（通过ASGI应用，包含路由、验证、序列化和中间件）
+在合成语料上测量吞吐量（单元/秒）和峰值内存（相对测量开始前的常驻内存增量），
+并与保存的基线JSON比较，吞吐量下降或内存增长超过容差时标记为回归并以状态码1退出。
+
+每个用例在独立的子进程中运行，峰值内存互不影响。端点用例使用线程执行器并关闭解析缓存，
+服务调用与请求处理在同一进程内，测量的是每次请求的完整开销。
+基线与机器相关，应在同一台参考机器上生成和比较。
+
+用法:
+    python -m benchmarks.bench_suite [--units 1000,10000] [--formats all] [--kind all]
+        [--tag-density 0.4] [--text-length 10] [--repeat 3] [--cases 正则]
+        [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.25]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.corpus import (
+    DEFAULT_TAG_DENSITY,
+    DEFAULT_TEXT_LENGTH,
+    FORMAT_TMX,
+    XLIFF_FORMATS,
+    file_name,
+    generate,
+    sample_formats
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+KIND_SERVICE = "service"
+KIND_ENDPOINT = "endpoint"
+
+# 内存采样间隔（秒）
+_SAMPLE_INTERVAL = 0.002
+# 内存比较的绝对容差（MB），避免小用例因分配器抖动误报
+_MEMORY_SLACK_MB = 8.0
+
+
+class Case(NamedTuple):
+    name: str
+    kind: str
+    formats: Tuple[str, ...]
+    # 接收准备好的上下文，执行一次被测操作
+    run: Callable[[Dict[str, Any]], Any]
+
+
+def _translations(rows: List[tuple]) -> List[dict]:
+    """为每个单元生成一条译文（segNumber、unitId在元组中的位置同XLIFF_DATA_FIELDS）"""
+    return [{"segNumber": row[1], "unitId": row[2], "aiResult": f"译文 {row[1]}", "mtResult": None} for row in rows]
+
+
+def _tmx_translations(rows: List[tuple]) -> List[dict]:
+    """TMX元组中id、segNumber的位置同TMX_DATA_FIELDS"""
+    return [{"segNumber": row[2], "unitId": str(row[0]), "aiResult": f"译文 {row[2]}", "mtResult": None} for row in rows]
+
+
+def _service_cases() -> List[Case]:
+    from services.xliff_processor import XliffProcessorService
+    from services.tmx_processor import TmxProcessorService
+
+    return [
+        Case("process_xliff[toolkit]", KIND_SERVICE, XLIFF_FORMATS,
+             lambda ctx: XliffProcessorService.process_xliff(ctx["file_name"], ctx["content"], engine="toolkit")),
+        Case("process_xliff[stream]", KIND_SERVICE, XLIFF_FORMATS,
+             lambda ctx: XliffProcessorService.process_xliff(ctx["file_name"], ctx["content"], engine="stream")),
+        Case("process_xliff_with_tags", KIND_SERVICE, XLIFF_FORMATS,
+             lambda ctx: XliffProcessorService.process_xliff_with_tags(ctx["file_name"], ctx["content"])),
+        Case("replace_xliff_targets", KIND_SERVICE, XLIFF_FORMATS,
+             lambda ctx: XliffProcessorService.replace_xliff_targets(ctx["content"], ctx["translations"])),
+        Case("process_tmx", KIND_SERVICE, (FORMAT_TMX,),
+             lambda ctx: TmxProcessorService.process_tmx(ctx["file_name"], ctx["content"])),
+        Case("clean_tmx_tags", KIND_SERVICE, (FORMAT_TMX,),
+             lambda ctx: [TmxProcessorService.clean_tmx_tags(segment) for segment in ctx["segments"]]),
+        Case("replace_tmx_targets", KIND_SERVICE, (FORMAT_TMX,),
+             lambda ctx: TmxProcessorService.replace_tmx_targets(ctx["content"], ctx["translations"])),
+    ]
+
+
+def _post(path: str, body_key: str = "process_body") -> Callable[[Dict[str, Any]], Any]:
+    def run(ctx: Dict[str, Any]):
+        response = ctx["client"].post(path, content=ctx[body_key], headers={"Content-Type": "application/json"})
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} 返回 {response.status_code}: {response.text[:200]}")
+        return response
+    return run
+
+
+def _endpoint_cases() -> List[Case]:
+    return [
+        Case("POST /api/xliff/process", KIND_ENDPOINT, XLIFF_FORMATS, _post("/api/xliff/process?engine=toolkit")),
+        Case("POST /api/xliff/process?engine=stream", KIND_ENDPOINT, XLIFF_FORMATS, _post("/api/xliff/process?engine=stream")),
+        Case("POST /api/xliff/process-with-tags", KIND_ENDPOINT, XLIFF_FORMATS, _post("/api/xliff/process-with-tags")),
+        Case("POST /api/replacement/xliff", KIND_ENDPOINT, XLIFF_FORMATS, _post("/api/replacement/xliff", "replacement_body")),
+        Case("POST /api/tmx/process", KIND_ENDPOINT, (FORMAT_TMX,), _post("/api/tmx/process")),
+        Case("POST /api/replacement/tmx", KIND_ENDPOINT, (FORMAT_TMX,), _post("/api/replacement/tmx", "replacement_body")),
+    ]
+
+
+def _output_units(output: Any) -> Optional[int]:
+    """被测操作产出的单元数量：服务返回的列表长度或处理端点响应中data的长度，替换类操作返回None"""
+    if isinstance(output, list):
+        return len(output)
+    if hasattr(output, "json"):
+        data = output.json().get("data")
+        if isinstance(data, list):
+            return len(data)
+    return None
+
+
+def _case_names(kind: str) -> List[Tuple[str, str, Tuple[str, ...]]]:
+    """不导入服务模块即可列出的用例（名称、类型、适用格式）"""
+    cases = []
+    if kind in ("all", KIND_SERVICE):
+        cases += [(case.name, case.kind, case.formats) for case in _service_cases()]
+    if kind in ("all", KIND_ENDPOINT):
+        cases += [(case.name, case.kind, case.formats) for case in _endpoint_cases()]
+    return cases
+
+
+def _current_rss() -> Optional[int]:
+    """当前常驻内存（字节），只在有/proc的系统上可用"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss() -> int:
+    """进程的历史峰值常驻内存（字节）"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _peak_memory(func: Callable[[], Any]) -> float:
+    """
+    执行一次func，返回期间相对开始时的峰值常驻内存增量（MB）
+
+    Linux上用后台线程采样/proc/self/statm；其他系统退回ru_maxrss（历史峰值，可能偏低）。
+    """
+    baseline = _current_rss()
+    if baseline is None:
+        before = _max_rss()
+        func()
+        return max(0, _max_rss() - before) / 1e6
+
+    peak = baseline
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            rss = _current_rss()
+            if rss > peak:
+                peak = rss
+            time.sleep(_SAMPLE_INTERVAL)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(peak, _current_rss())
+    return (peak - baseline) / 1e6
+
+
+def _prepare(case: Case, file_format: str, units: int, seed: int, tag_density: float, text_length: int) -> Dict[str, Any]:
+    from services.xliff_processor import XliffProcessorService
+    from services.tmx_processor import TmxProcessorService
+
+    content = generate(file_format, units, seed=seed, tag_density=tag_density, text_length=text_length)
+    ctx: Dict[str, Any] = {"file_name": file_name(file_format), "content": content}
+    if file_format == FORMAT_TMX:
+        rows = TmxProcessorService.process_tmx_rows(ctx["file_name"], content)
+        ctx["translations"] = _tmx_translations(rows)
+        ctx["segments"] = re.findall(r"<seg>(.*?)</seg>", content, re.DOTALL)
+    else:
+        rows = XliffProcessorService.process_xliff_rows(ctx["file_name"], content, engine="stream")
+        ctx["translations"] = _translations(rows)
+
+    if case.kind == KIND_ENDPOINT:
+        import orjson
+        ctx["process_body"] = orjson.dumps({"fileName": ctx["file_name"], "content": content})
+        ctx["replacement_body"] = orjson.dumps({
+            "fileName": ctx["file_name"], "content": content, "translations": ctx["translations"]
+        })
+    return ctx
+
+
+def run_case(name: str, file_format: str, units: int, seed: int, tag_density: float, text_length: int, repeat: int) -> Dict[str, Any]:
+    """
+    在当前进程中运行一个用例（由子进程调用）
+
+    Returns:
+        结果字典，失败时包含error
+    """
+    # 端点用例：服务在本进程的线程池中执行，且每次都真正解析
+    os.environ["EXECUTOR_KIND"] = "thread"
+    os.environ["PARSE_CACHE_ENABLED"] = "false"
+
+    case = next(case for case in _service_cases() + _endpoint_cases() if case.name == name)
+    result: Dict[str, Any] = {
+        "case": name,
+        "kind": case.kind,
+        "format": file_format,
+        "units": units,
+        "tag_density": tag_density,
+        "text_length": text_length,
+    }
+    client = None
+    try:
+        ctx = _prepare(case, file_format, units, seed, tag_density, text_length)
+        result["input_bytes"] = len(ctx["content"].encode("utf-8"))
+        if case.kind == KIND_ENDPOINT:
+            from fastapi.testclient import TestClient
+            from config import settings
+            from main import app
+            client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY, "Accept-Encoding": "identity"})
+            client.__enter__()
+            ctx["client"] = client
+
+        # 预热一次（导入延迟加载的模块、编译正则等）；记录实际提取出的单元数，
+        # 提取类用例按产出的单元计算吞吐量，没有产出时吞吐量没有意义，按错误记录且不与基线比较
+        output_units = _output_units(case.run(ctx))
+        if output_units is not None:
+            result["output_units"] = output_units
+            if output_units == 0:
+                raise RuntimeError("没有提取出任何单元")
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            case.run(ctx)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        items = units if output_units is None else output_units
+        result["seconds"] = round(best, 4)
+        result["units_per_sec"] = round(items / best, 1)
+        result["peak_memory_mb"] = round(_peak_memory(lambda: case.run(ctx)), 1)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+    return result
+
+
+def _isolated(name: str, file_format: str, units: int, seed: int, tag_density: float, text_length: int, repeat: int) -> Dict[str, Any]:
+    """在新的spawn子进程中运行用例"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, name, file_format, units, seed, tag_density, text_length, repeat).result()
+
+
+def result_key(result: Dict[str, Any]) -> Tuple:
+    """用于与基线对应的键"""
+    return (result["case"], result["format"], result["units"], result["tag_density"], result["text_length"])
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    与基线比较，在结果中写入变化比例和回归标记
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对变化，如0.25表示吞吐量下降或内存增长不超过25%
+
+    Returns:
+        回归描述列表
+    """
+    previous = {result_key(item): item for item in baseline if "error" not in item}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or "error" in result:
+            continue
+        speed = result["units_per_sec"] / old["units_per_sec"]
+        result["speed_vs_baseline"] = round(speed, 2)
+        label = f"{result['case']} [{result['format']}, {result['units']} units]"
+        if speed < 1 - tolerance:
+            result["regression"] = True
+            regressions.append(f"{label}: 吞吐量 {old['units_per_sec']} -> {result['units_per_sec']} 单元/秒")
+        if result["peak_memory_mb"] > old["peak_memory_mb"] * (1 + tolerance) + _MEMORY_SLACK_MB:
+            result["regression"] = True
+            regressions.append(f"{label}: 峰值内存 {old['peak_memory_mb']} -> {result['peak_memory_mb']} MB")
+    return regressions
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _print_table(results: List[Dict[str, Any]]):
+    print(f"{'case':<40} {'format':<8} {'units':>8} {'units/s':>12} {'peak MB':>8} {'vs base':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['case']:<40} {result['format']:<8} {result['units']:>8}  错误: {result['error']}")
+            continue
+        versus = result.get("speed_vs_baseline", "")
+        marker = "  << 回归" if result.get("regression") else ""
+        print(f"{result['case']:<40} {result['format']:<8} {result['units']:>8} {result['units_per_sec']:>12} "
+              f"{result['peak_memory_mb']:>8} {versus:>8}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", default="1000", help="单元数量，逗号分隔可测多个规模（如 1000,100000,1000000）")
+    parser.add_argument("--formats", default="all", help="语料格式：all 或 xliff12,xliff20,memoq,tmx 的组合")
+    parser.add_argument("--kind", default="all", choices=("all", KIND_SERVICE, KIND_ENDPOINT), help="只运行服务或端点用例")
+    parser.add_argument("--cases", default=None, help="只运行名称匹配该正则的用例")
+    parser.add_argument("--tag-density", type=float, default=DEFAULT_TAG_DENSITY, help="每个句段平均的行内标签数量")
+    parser.add_argument("--text-length", type=int, default=DEFAULT_TEXT_LENGTH, help="句段平均的单词数量")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量重复次数（取最快一次）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线JSON文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件（同键结果覆盖）")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="判定回归的相对容差")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    unit_counts = [int(value) for value in args.units.split(",") if value.strip()]
+    formats = sample_formats(args.formats)
+    pattern = re.compile(args.cases) if args.cases else None
+
+    results = []
+    for units in unit_counts:
+        for name, _, case_formats in _case_names(args.kind):
+            if pattern and not pattern.search(name):
+                continue
+            for file_format in case_formats:
+                if file_format not in formats:
+                    continue
+                result = _isolated(name, file_format, units, args.seed, args.tag_density, args.text_length, args.repeat)
+                results.append(result)
+                if not args.json:
+                    status = result.get("error") or f"{result['units_per_sec']} 单元/秒, 峰值 {result['peak_memory_mb']} MB"
+                    print(f"  {name} [{file_format}, {units}]: {status}", file=sys.stderr)
+
+    baseline_doc = {"metadata": {}, "results": []}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline_doc = json.load(baseline_file)
+    regressions = compare(results, baseline_doc["results"], args.tolerance)
+
+    if args.save_baseline:
+        merged = {result_key(item): item for item in baseline_doc["results"]}
+        for result in results:
+            item = {key: value for key, value in result.items() if key not in ("speed_vs_baseline", "regression")}
+            merged[result_key(item)] = item
+        baseline_doc = {"metadata": _metadata(), "results": list(merged.values())}
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline_doc, baseline_file, ensure_ascii=False, indent=2)
+            baseline_file.write("\n")
+
+    if args.json:
+        print(json.dumps({"metadata": _metadata(), "results": results, "regressions": regressions}, ensure_ascii=False, indent=2))
+    else:
+        _print_table(results)
+        if regressions:
+            print("\n性能回归:")
+            for line in regressions:
+                print(f"  {line}")
+
+    if regressions and not args.save_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+clean_tmx_tags：单次扫描的实现与逐步替换的原实现的对比
+
+原实现依次执行多次str.replace和re.sub（先解码实体，再处理memoQ换行/空格占位符、颜色标签，
+最后删除剩余标签并再次解码实体），每个句段要完整遍历十余次；现在用一个编译好的正则表达式扫描一次。
+脚本在合成TMX句段和memoQ风格句段上分别测量两种实现，校验输出逐条一致后给出加速比。
+原实现保留在本模块中（legacy_clean_tmx_tags），测试用它做差分对比。
+
+用法: python -m benchmarks.bench_tmx_tags [--units 20000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import DEFAULT_TAG_DENSITY, generate_tmx
+from services.tmx_processor import TmxProcessorService
+
+
+def legacy_clean_tmx_tags(content: str) -> str:
+    """clean_tmx_tags改为单次扫描之前的实现，作为差分测试的参照"""
+    if not content:
+        return ""
+
+    cleaned_content = content
+    cleaned_content = cleaned_content.replace('&amp;lt;', '&lt;')
+    cleaned_content = cleaned_content.replace('&amp;gt;', '&gt;')
+    cleaned_content = cleaned_content.replace('&amp;', '&')
+    cleaned_content = cleaned_content.replace('&quot;', '"')
+
+    cleaned_content = re.sub(r'<ph>&lt;mq:rxt[^>]*val="\\n"[^>]*/&gt;</ph>', '\n', cleaned_content)
+    cleaned_content = re.sub(r'<ph>&lt;mq:ch val="\s*"\s*/&gt;</ph>', '', cleaned_content)
+    cleaned_content = re.sub(r'<mq:ch val="\s*"\s*/>', '', cleaned_content)
+
+    bpt_ept_pattern = r'<bpt[^>]*>&lt;mq:rxt[^>]*val="&lt;([^&]*)&gt;"[^>]*&gt;</bpt>(.*?)<ept[^>]*>&lt;/mq:rxt[^>]*val="&lt;/([^&]*)&gt;"[^>]*&gt;</ept>'
+    cleaned_content = re.sub(bpt_ept_pattern, lambda match: f'<{match.group(1)}>{match.group(2)}</{match.group(3)}>', cleaned_content)
+
+    direct_rxt_pattern = r'<mq:rxt[^>]*val="&lt;([^&]*)&gt;"[^>]*>(.*?)</mq:rxt[^>]*val="&lt;/([^&]*)&gt;"[^>]*>'
+    cleaned_content = re.sub(direct_rxt_pattern, lambda match: f'<{match.group(1)}>{match.group(2)}</{match.group(3)}>', cleaned_content)
+
+    cleaned_content = re.sub(r'</?(?:bpt|ept|ph|it|mq:[a-z\-]+)[^>]*>', '', cleaned_content)
+
+    cleaned_content = cleaned_content.replace('&lt;', '<')
+    cleaned_content = cleaned_content.replace('&gt;', '>')
+    cleaned_content = cleaned_content.replace('&quot;', '"')
+
+    return cleaned_content
+
+
+_WORDS = (
+    "click", "the", "button", "to", "save", "your", "changes", "file", "open", "settings",
+    "account", "password", "update", "download", "error", "network", "&amp;", "&quot;OK&quot;", "a &lt; b",
+)
+# memoQ导出的占位符：换行、不间断空格、bpt/ept包裹的颜色标签，以及实体被再次转义的写法
+_MEMOQ_PLACEHOLDERS = (
+    '<ph>&lt;mq:rxt displaytext="\\n" val="\\n" /&gt;</ph>',
+    '<ph>&lt;mq:ch val=" " /&gt;</ph>',
+    '<mq:ch val=" "/>',
+    '<ph x="{n}">&lt;br/&gt;</ph>',
+    '<it pos="begin" x="{n}">&lt;i&gt;</it>',
+)
+_MEMOQ_PAIRS = (
+    ('<bpt i="{n}">&lt;mq:rxt displaytext="font" val="&lt;font color=&quot;red&quot;&gt;"&gt;</bpt>',
+     '<ept i="{n}">&lt;/mq:rxt displaytext="font" val="&lt;/font&gt;"&gt;</ept>'),
+    ('<bpt i="{n}">&amp;lt;mq:rxt displaytext="span" val=&quot;&amp;lt;span class=&quot;hl&quot;&amp;gt;&quot;&amp;gt;</bpt>',
+     '<ept i="{n}">&amp;lt;/mq:rxt displaytext="span" val=&quot;&amp;lt;/span&amp;gt;&quot;&amp;gt;</ept>'),
+    ('<bpt i="{n}" type="bold">&lt;b&gt;</bpt>', '<ept i="{n}">&lt;/b&gt;</ept>'),
+)
+_DIRECT_PAIRS = (
+    ('<mq:rxt displaytext="b" val="&lt;b&gt;">', '</mq:rxt displaytext="b" val="&lt;/b&gt;">'),
+    ('<bpt i="{n}" type="bold">&lt;b&gt;</bpt>', '<ept i="{n}">&lt;/b&gt;</ept>'),
+)
+
+
+def _memoq_text(rng: random.Random, pairs, depth: int, counter: List[int]) -> str:
+    """随机生成嵌套的占位符和文本；同一句段只使用一种颜色标签写法"""
+    parts = []
+    for _ in range(rng.randint(1, 5)):
+        roll = rng.random()
+        counter[0] += 1
+        if depth < 2 and roll < 0.2:
+            open_tag, close_tag = rng.choice(pairs)
+            parts.append(open_tag.format(n=counter[0]) + _memoq_text(rng, pairs, depth + 1, counter) + close_tag.format(n=counter[0]))
+        elif roll < 0.4:
+            parts.append(rng.choice(_MEMOQ_PLACEHOLDERS).format(n=counter[0]))
+        else:
+            parts.append(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 8))))
+    return "".join(parts)
+
+
+def memoq_segments(count: int, seed: int = 0) -> List[str]:
+    """
+    生成memoQ风格的TMX句段（seg元素的内容）
+
+    Args:
+        count: 句段数量
+        seed: 随机种子
+
+    Returns:
+        句段列表，同一组参数总是生成相同的内容
+    """
+    rng = random.Random(seed)
+    return [
+        _memoq_text(rng, _DIRECT_PAIRS if rng.random() < 0.2 else _MEMOQ_PAIRS, 0, [0])
+        for _ in range(count)
+    ]
+
+
+def tmx_segments(units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY) -> List[str]:
+    """合成TMX文件中所有seg元素的内容（源句段和译文句段）"""
+    return re.findall(r"<seg>(.*?)</seg>", generate_tmx(units, seed=seed, tag_density=tag_density), re.DOTALL)
+
+
+def _best_of(repeat: int, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(name: str, segments: List[str], repeat: int) -> dict:
+    """分别测量两种实现处理全部句段的耗时，并校验输出一致"""
+    legacy_seconds, expected = _best_of(repeat, lambda: [legacy_clean_tmx_tags(segment) for segment in segments])
+    seconds, cleaned = _best_of(repeat, lambda: [TmxProcessorService.clean_tmx_tags(segment) for segment in segments])
+    assert cleaned == expected
+    return {
+        "corpus": name,
+        "segments": len(segments),
+        "legacy_ms": round(legacy_seconds * 1000, 1),
+        "single_pass_ms": round(seconds * 1000, 1),
+        "speedup": round(legacy_seconds / seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=20000, help="合成TMX的单元数量（memoQ风格句段数量相同）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量重复次数（取最快一次）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    corpora = {
+        "tmx (no tags)": tmx_segments(args.units, tag_density=0),
+        f"tmx (tag density {DEFAULT_TAG_DENSITY})": tmx_segments(args.units),
+        "tmx (tag density 2)": tmx_segments(args.units, tag_density=2),
+        "memoq placeholders": memoq_segments(args.units),
+    }
+    results = [measure(name, segments, args.repeat) for name, segments in corpora.items()]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'corpus':<26} {'segments':>9} {'legacy ms':>10} {'single pass ms':>15} {'speedup':>8}")
+    for result in results:
+        print(f"{result['corpus']:<26} {result['segments']:>9} {result['legacy_ms']:>10} "
+              f"{result['single_pass_ms']:>15} {result['speedup']:>8}")
+
+
+if __name__ == "__main__":
+    main()
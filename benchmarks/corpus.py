@@ -0,0 +1,259 @@
+"""
+基准测试用的合成语料
+
+生成结构接近真实项目文件的XLIFF 1.2、XLIFF 2.0、memoQ风格XLIFF和TMX：行内标签、实体、
+重复句段和不同长度的文本混合出现。单元数量、行内标签密度和句段长度可以调整，
+同一组参数（含随机种子）总是生成相同的内容，便于比较不同版本的结果。
+"""
+from typing import Callable, Dict, List
+import random
+
+FORMAT_XLIFF12 = "xliff12"
+FORMAT_XLIFF20 = "xliff20"
+FORMAT_MEMOQ = "memoq"
+FORMAT_TMX = "tmx"
+XLIFF_FORMATS = (FORMAT_XLIFF12, FORMAT_XLIFF20, FORMAT_MEMOQ)
+FORMATS = XLIFF_FORMATS + (FORMAT_TMX,)
+
+# 默认每个句段平均0.4个行内标签、10个单词
+DEFAULT_TAG_DENSITY = 0.4
+DEFAULT_TEXT_LENGTH = 10
+
+_WORDS = (
+    "click", "the", "button", "to", "save", "your", "changes", "file", "open", "settings",
+    "account", "password", "update", "download", "error", "network", "connection", "retry",
+    "please", "select", "language", "project", "translation", "memory", "review", "export",
+)
+_TARGET_WORDS = ("点击", "按钮", "保存", "更改", "文件", "打开", "设置", "账户", "密码", "更新", "下载", "错误", "网络", "重试")
+
+
+def _word_count(rng: random.Random, text_length: int) -> int:
+    """平均为text_length个单词，在其一半到一倍半之间浮动"""
+    return rng.randint(max(1, text_length // 2), max(1, text_length * 3 // 2))
+
+
+def _tag_count(rng: random.Random, tag_density: float) -> int:
+    """期望值为tag_density的标签数量"""
+    whole = int(tag_density)
+    return whole + (1 if rng.random() < tag_density - whole else 0)
+
+
+# 各格式的行内标签：(成对标签的开始, 结束) 或独立占位符，{n} 为标签编号
+_XLIFF12_TAGS = (
+    ('<g id="{n}">', '</g>'),
+    '<x id="{n}"/>',
+    ('<bpt id="{n}">&lt;b&gt;</bpt>', '<ept id="{n}">&lt;/b&gt;</ept>'),
+)
+_XLIFF20_TAGS = (
+    ('<pc id="{n}">', '</pc>'),
+    '<ph id="{n}"/>',
+    ('<sc id="{n}"/>', '<ec startRef="{n}"/>'),
+)
+_MEMOQ_TAGS = (
+    ('<bpt id="{n}" ctype="bold">&lt;b&gt;</bpt>', '<ept id="{n}">&lt;/b&gt;</ept>'),
+    '<ph id="{n}">&lt;mq:rxt displaytext="br" val="&lt;br/&gt;"/&gt;</ph>',
+    ('<bpt id="{n}" ctype="italic">&lt;i&gt;</bpt>', '<ept id="{n}">&lt;/i&gt;</ept>'),
+)
+_TMX_TAGS = (
+    ('<bpt i="{n}" type="bold">&lt;b&gt;</bpt>', '<ept i="{n}">&lt;/b&gt;</ept>'),
+    '<ph x="{n}" type="lb">&lt;br/&gt;</ph>',
+    ('<bpt i="{n}" type="link">&lt;a href="#"&gt;</bpt>', '<ept i="{n}">&lt;/a&gt;</ept>'),
+)
+
+
+def _text(rng: random.Random, words, text_length: int, tag_density: float, tags, joiner: str = " ") -> str:
+    """生成一个句段，随机位置插入行内标签，偶尔包含实体"""
+    tokens = [rng.choice(words) for _ in range(_word_count(rng, text_length))]
+    tokens[0] = tokens[0].capitalize()
+    if tags and tag_density > 0:
+        for number in range(1, _tag_count(rng, tag_density) + 1):
+            tag = rng.choice(tags)
+            start = rng.randrange(len(tokens))
+            if isinstance(tag, tuple):
+                end = rng.randrange(start, len(tokens))
+                tokens[start] = tag[0].format(n=number) + tokens[start]
+                tokens[end] = tokens[end] + tag[1].format(n=number)
+            else:
+                tokens[start] = tokens[start] + tag.format(n=number)
+    if rng.random() < 0.1:
+        tokens.append("&amp;")
+    return joiner.join(tokens)
+
+
+def generate_xliff(units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY, text_length: int = DEFAULT_TEXT_LENGTH) -> str:
+    """
+    生成XLIFF 1.2文档
+
+    Args:
+        units: 翻译单元数量
+        seed: 随机种子
+        tag_density: 每个源句段平均的行内标签数量，0表示没有标签
+        text_length: 源句段平均的单词数量
+
+    Returns:
+        XLIFF文档内容
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">\n'
+        '  <file original="app.properties" source-language="en" target-language="zh-CN" datatype="plaintext">\n'
+        '    <body>\n'
+    ]
+    for index in range(1, units + 1):
+        source = _text(rng, _WORDS, text_length, tag_density, _XLIFF12_TAGS) + "."
+        parts.append(f'      <trans-unit id="u{index}" percent="{rng.choice((0, 75, 100))}">\n')
+        parts.append(f'        <source>{source}</source>\n')
+        if rng.random() < 0.7:
+            parts.append(f'        <target state="translated">{_text(rng, _TARGET_WORDS, text_length, 0, None, "")}</target>\n')
+        parts.append('      </trans-unit>\n')
+    parts.append('    </body>\n  </file>\n</xliff>\n')
+    return ''.join(parts)
+
+
+def generate_xliff2(units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY, text_length: int = DEFAULT_TEXT_LENGTH) -> str:
+    """
+    生成XLIFF 2.0文档（<unit>/<segment>，行内标签为<pc>、<ph>、<sc>/<ec>）
+
+    Args:
+        units: 翻译单元数量
+        seed: 随机种子
+        tag_density: 每个源句段平均的行内标签数量
+        text_length: 源句段平均的单词数量
+
+    Returns:
+        XLIFF文档内容
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en" trgLang="zh-CN">\n'
+        '  <file id="f1" original="app.json">\n'
+    ]
+    for index in range(1, units + 1):
+        source = _text(rng, _WORDS, text_length, tag_density, _XLIFF20_TAGS) + "."
+        parts.append(f'    <unit id="u{index}">\n')
+        if rng.random() < 0.7:
+            parts.append('      <segment state="translated">\n')
+            parts.append(f'        <source>{source}</source>\n')
+            parts.append(f'        <target>{_text(rng, _TARGET_WORDS, text_length, 0, None, "")}</target>\n')
+        else:
+            parts.append('      <segment>\n')
+            parts.append(f'        <source>{source}</source>\n')
+        parts.append('      </segment>\n')
+        parts.append('    </unit>\n')
+    parts.append('  </file>\n</xliff>\n')
+    return ''.join(parts)
+
+
+def generate_memoq(units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY, text_length: int = DEFAULT_TEXT_LENGTH) -> str:
+    """
+    生成memoQ导出风格的XLIFF 1.2文档（mq命名空间属性、mq:percent、转义后的原始标签）
+
+    Args:
+        units: 翻译单元数量
+        seed: 随机种子
+        tag_density: 每个源句段平均的行内标签数量
+        text_length: 源句段平均的单词数量
+
+    Returns:
+        XLIFF文档内容
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2" xmlns:mq="MQXliff">\n'
+        '  <file original="project.docx" source-language="en-US" target-language="zh-CN" datatype="x-memoq">\n'
+        '    <header><tool tool-id="MemoQ" tool-name="MemoQ" tool-version="10.0"/></header>\n'
+        '    <body>\n'
+    ]
+    for index in range(1, units + 1):
+        source = _text(rng, _WORDS, text_length, tag_density, _MEMOQ_TAGS) + "."
+        percent = rng.choice((0, 0, 75, 95, 100, 101))
+        status = "ManuallyConfirmed" if percent >= 100 else ("PartiallyEdited" if percent else "NotStarted")
+        parts.append(
+            f'      <trans-unit id="{index}" mq:status="{status}" mq:percent="{percent}" '
+            f'mq:segmentguid="{rng.getrandbits(128):032x}" mq:lastchangedtimestamp="2024-01-01T00:00:00Z">\n'
+        )
+        parts.append(f'        <source xml:space="preserve">{source}</source>\n')
+        target = _text(rng, _TARGET_WORDS, text_length, 0, None, "") if status != "NotStarted" else ""
+        parts.append(f'        <target xml:space="preserve">{target}</target>\n')
+        parts.append('      </trans-unit>\n')
+    parts.append('    </body>\n  </file>\n</xliff>\n')
+    return ''.join(parts)
+
+
+def generate_tmx(units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY, text_length: int = DEFAULT_TEXT_LENGTH) -> str:
+    """
+    生成TMX 1.4文档
+
+    Args:
+        units: 翻译单元数量
+        seed: 随机种子
+        tag_density: 每个源句段平均的行内标签数量
+        text_length: 源句段平均的单词数量
+
+    Returns:
+        TMX文档内容
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<tmx version="1.4">\n'
+        '  <header creationtool="bench" creationtoolversion="1" segtype="sentence" o-tmf="bench" '
+        'adminlang="en" srclang="en" datatype="plaintext"/>\n'
+        '  <body>\n'
+    ]
+    for index in range(1, units + 1):
+        source = _text(rng, _WORDS, text_length, tag_density, _TMX_TAGS) + "."
+        parts.append(f'    <tu tuid="{index}" creationid="bench" changeid="bench">\n')
+        if rng.random() < 0.2:
+            parts.append(f'      <prop type="x-context">ctx-{index % 50}</prop>\n')
+        parts.append(f'      <tuv xml:lang="en"><seg>{source}</seg></tuv>\n')
+        parts.append(f'      <tuv xml:lang="zh-CN"><seg>{_text(rng, _TARGET_WORDS, text_length, 0, None, "")}</seg></tuv>\n')
+        parts.append('    </tu>\n')
+    parts.append('  </body>\n</tmx>\n')
+    return ''.join(parts)
+
+
+GENERATORS: Dict[str, Callable[..., str]] = {
+    FORMAT_XLIFF12: generate_xliff,
+    FORMAT_XLIFF20: generate_xliff2,
+    FORMAT_MEMOQ: generate_memoq,
+    FORMAT_TMX: generate_tmx,
+}
+
+
+def generate(file_format: str, units: int, seed: int = 0, tag_density: float = DEFAULT_TAG_DENSITY, text_length: int = DEFAULT_TEXT_LENGTH) -> str:
+    """
+    按格式生成语料
+
+    Args:
+        file_format: xliff12、xliff20、memoq或tmx
+        units: 翻译单元数量（1k到1M量级）
+        seed: 随机种子
+        tag_density: 每个源句段平均的行内标签数量
+        text_length: 源句段平均的单词数量
+
+    Returns:
+        文档内容
+    """
+    if file_format not in GENERATORS:
+        raise ValueError(f"不支持的语料格式: {file_format}，可选值: {', '.join(FORMATS)}")
+    return GENERATORS[file_format](units, seed=seed, tag_density=tag_density, text_length=text_length)
+
+
+def file_name(file_format: str) -> str:
+    """语料对应的文件名"""
+    return "bench.tmx" if file_format == FORMAT_TMX else "bench.xliff"
+
+
+def sample_formats(names: str) -> List[str]:
+    """解析逗号分隔的格式列表，all表示全部"""
+    if names == "all":
+        return list(FORMATS)
+    formats = [name.strip() for name in names.split(",") if name.strip()]
+    for name in formats:
+        if name not in GENERATORS:
+            raise ValueError(f"不支持的语料格式: {name}，可选值: {', '.join(FORMATS)}")
+    return formats
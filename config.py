@@ -25,6 +25,57 @@ class Settings:
     HOST = "0.0.0.0"
     PORT = 8848
     
+    # XLIFF解析引擎：toolkit（translate-toolkit完整对象模型）或 stream（lxml iterparse流式解析）
+    XLIFF_ENGINE = os.getenv("XLIFF_ENGINE", "toolkit")
+    
+    # 服务调用执行器：process（进程池，默认）或 thread（线程池）；worker数量为0时使用CPU核心数
+    EXECUTOR_KIND = os.getenv("EXECUTOR_KIND", "process")
+    EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", "0"))
+    
+    # 解析结果缓存：以内容哈希为键，超过字节预算时按LRU淘汰
+    PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    # 磁盘缓存：多个worker进程共享的SQLite数据库（WAL模式），路径为空时不启用；超过字节预算时淘汰最久未访问的条目，
+    # 超过TTL秒未访问的条目过期（0表示不过期）；启动时把最近访问的条目载入内存缓存，最多PARSE_CACHE_WARM_BYTES字节
+    # 条目用MessagePack保存，路径应当只允许运行服务的用户读写（能写入数据库的用户可以篡改缓存的结果）
+    PARSE_CACHE_DISK_PATH = os.getenv("PARSE_CACHE_DISK_PATH", "")
+    PARSE_CACHE_DISK_MAX_BYTES = int(os.getenv("PARSE_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+    PARSE_CACHE_DISK_TTL_SECONDS = int(os.getenv("PARSE_CACHE_DISK_TTL_SECONDS", str(7 * 24 * 3600)))
+    PARSE_CACHE_WARM_BYTES = int(os.getenv("PARSE_CACHE_WARM_BYTES", str(32 * 1024 * 1024)))
+    
+    # 验证端点的默认模式：wellformed（流式格式检查）、structural（translate-toolkit解析）或 schema（XSD/DTD验证）
+    VALIDATION_MODE = os.getenv("VALIDATION_MODE", "structural")
+    # schema验证使用的模式文件目录（由运维提供XLIFF 1.2/2.0 XSD、xml.xsd、TMX 1.4 DTD），为空时schema模式返回400
+    SCHEMA_DIR = os.getenv("SCHEMA_DIR", "")
+    
+    # 压缩包上传中单个文件解压后的最大字节数，防止压缩炸弹
+    ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_BYTES", str(256 * 1024 * 1024)))
+    
+    # 请求体解压（Content-Encoding: gzip/br/zstd）及解压后的最大字节数
+    REQUEST_DECOMPRESSION = os.getenv("REQUEST_DECOMPRESSION", "true").lower() in ("1", "true", "yes")
+    REQUEST_MAX_DECOMPRESSED_BYTES = int(os.getenv("REQUEST_MAX_DECOMPRESSED_BYTES", str(512 * 1024 * 1024)))
+    
+    # 响应压缩：按Accept-Encoding协商，COMPRESSION_PREFERENCE为服务端优先顺序，小于COMPRESSION_MIN_SIZE字节的完整响应不压缩
+    RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() in ("1", "true", "yes")
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_PREFERENCE = [item.strip() for item in os.getenv("COMPRESSION_PREFERENCE", "zstd,br,gzip").split(",") if item.strip()]
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "4"))
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+    ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+    
+    # Prometheus指标：启用时记录请求和各阶段耗时，并提供 /metrics 端点（需要访问密钥）
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    # 文档会话：最后一次访问后经过TTL秒过期，总字节数（文档和单元索引的估计值）超过预算时淘汰最久未访问的会话
+    # 会话只保存在进程内存中，多worker部署时需要按会话ID粘性路由或只运行一个worker
+    SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+    
+    # 管理员密钥：同样可以访问所有接口，另外可以用请求头 X-Profile: 1 分析单个请求并取回结果；为空时不启用
+    ADMIN_ACCESS_KEY = os.getenv("API_ADMIN_KEY", "")
+    # 保存的请求分析结果数量，超出时淘汰最早的
+    PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", "50"))
+    
     # 不需要认证的端点
     EXCLUDE_PATHS = [
         "/",
@@ -1,8 +1,16 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from api.routes import xliff, tmx, file_replacement
+from starlette.concurrency import run_in_threadpool
+from api.routes import xliff, tmx, file_replacement, auto, batch, cache, metrics, profiles, sessions
 from config import settings
+from services.executor import service_executor
+from services.parse_cache import parse_cache
+from services.document_sessions import document_sessions
+from services.profiling import profile_store
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
 import uvicorn
 import logging
 from contextlib import asynccontextmanager
@@ -19,9 +27,23 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("XLIFF Process API Server 启动中...")
+    service_executor.start(settings.EXECUTOR_KIND, settings.EXECUTOR_WORKERS)
+    parse_cache.configure(settings.PARSE_CACHE_MAX_BYTES, settings.PARSE_CACHE_ENABLED)
+    if settings.PARSE_CACHE_ENABLED and settings.PARSE_CACHE_DISK_PATH:
+        parse_cache.configure_disk(
+            settings.PARSE_CACHE_DISK_PATH, settings.PARSE_CACHE_DISK_MAX_BYTES, settings.PARSE_CACHE_DISK_TTL_SECONDS,
+            settings.API_VERSION
+        )
+        warmed = await run_in_threadpool(parse_cache.warm, settings.PARSE_CACHE_WARM_BYTES)
+        if parse_cache.disk is not None:
+            logger.info(f"磁盘缓存 {settings.PARSE_CACHE_DISK_PATH} 已打开，预热 {warmed} 个条目")
+    profile_store.configure(settings.PROFILE_MAX_ENTRIES)
+    document_sessions.configure(settings.SESSION_MAX_BYTES, settings.SESSION_TTL_SECONDS)
     yield
     # 关闭时执行
     logger.info("XLIFF Process API Server 关闭中...")
+    service_executor.shutdown()
+    parse_cache.close_disk()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -36,10 +58,15 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["*"],
+    # 文件下载端点通过响应头返回替换数量，浏览器需要显式暴露
+    expose_headers=["Content-Disposition", "X-Replacements-Count", "X-Unmatched-Count", "X-Profile-Id", "ETag", "Location"],
 )
 
+# 单个请求的性能分析，在认证中间件之内，依赖其标记的管理员请求
+app.add_middleware(ProfilingMiddleware, store=profile_store)
+
 # 添加认证中间件
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
@@ -71,20 +98,45 @@ async def auth_middleware(request: Request, call_next):
             content={"detail": "Access key required"}
         )
     
-    if access_key != settings.ACCESS_KEY:
+    is_admin = bool(settings.ADMIN_ACCESS_KEY) and access_key == settings.ADMIN_ACCESS_KEY
+    if access_key != settings.ACCESS_KEY and not is_admin:
         logger.warning(f"Invalid access key attempted from {request.client.host}")
         return JSONResponse(
             status_code=403,
             content={"detail": "Invalid access key"}
         )
     
+    # 供性能分析中间件和管理接口判断
+    request.state.admin = is_admin
     response = await call_next(request)
     return response
 
+# 请求体解压和响应压缩，放在最外层以便覆盖所有响应（包括认证失败）
+app.add_middleware(
+    CompressionMiddleware,
+    request_decompression=settings.REQUEST_DECOMPRESSION,
+    max_decompressed_bytes=settings.REQUEST_MAX_DECOMPRESSED_BYTES,
+    response_compression=settings.RESPONSE_COMPRESSION,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    preference=settings.COMPRESSION_PREFERENCE,
+    levels={"gzip": settings.GZIP_LEVEL, "br": settings.BROTLI_QUALITY, "zstd": settings.ZSTD_LEVEL},
+)
+
+# 请求指标，放在压缩之外，耗时包含认证和压缩
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
 # 注册路由
 app.include_router(xliff.router)
 app.include_router(tmx.router)
 app.include_router(file_replacement.router)
+app.include_router(auto.router)
+app.include_router(batch.router)
+app.include_router(cache.router)
+app.include_router(sessions.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+app.include_router(profiles.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,557 @@
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional, Sequence
+import logging
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+ENCODING_ZSTD = "zstd"
+
+# 值得压缩的响应类型（XLIFF/TMX/JSON等文本格式通常可压缩10倍以上）
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/xml",
+    "application/x-ndjson",
+    "application/x-msgpack",
+)
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+
+def available_encodings() -> List[str]:
+    """返回当前环境支持的编码（brotli和zstd依赖可选的第三方库）"""
+    encodings = [ENCODING_GZIP]
+    if brotli is not None:
+        encodings.append(ENCODING_BROTLI)
+    if zstandard is not None:
+        encodings.append(ENCODING_ZSTD)
+    return encodings
+
+
+class DecompressedTooLarge(ValueError):
+    """解压后的数据超过允许的字节数"""
+
+
+class _GzipDecoder:
+    def __init__(self):
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        # 请求体可以由多个gzip成员拼接而成（如分块压缩后追加），一个成员结束后用新的解压器继续解压剩余数据
+        chunks = []
+        size = 0
+        while data:
+            if self._decoder.eof:
+                self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            # 最多输出limit+1字节：超过limit即可判定过大，不会先解压出整个炸弹
+            chunk = self._decoder.decompress(data, limit + 1 - size)
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                raise DecompressedTooLarge()
+            # 输出未达到上限时输入已全部消耗，或者当前成员已结束、剩余数据属于下一个成员
+            data = self._decoder.unused_data if self._decoder.eof else b""
+        return b"".join(chunks)
+
+    def flush(self) -> bytes:
+        if not self._decoder.eof:
+            raise ValueError("gzip数据不完整")
+        return b""
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        body = self._decoder.process(data, output_buffer_limit=limit + 1)
+        if len(body) > limit:
+            raise DecompressedTooLarge()
+        return body
+
+    def flush(self) -> bytes:
+        if not self._decoder.is_finished():
+            raise ValueError("brotli数据不完整")
+        return b""
+
+
+class _LimitedBuffer:
+    """zstd解压输出的接收端，累计超过limit时中止解压"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.limit = 0
+
+    def write(self, data) -> int:
+        if self.size + len(data) > self.limit:
+            raise DecompressedTooLarge()
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self) -> bytes:
+        body = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return body
+
+
+# zstd帧格式（RFC 8878）中帧开头的魔数；可跳过帧的魔数为 0x184D2A50-0x184D2A5F
+_ZSTD_MAGIC = 0xFD2FB528
+_ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+# 帧跟踪器的状态与该状态下需要读取的头部字节数
+_ZSTD_MAGIC_STATE = "magic"
+_ZSTD_SKIPPABLE_SIZE_STATE = "skippable_size"
+_ZSTD_DESCRIPTOR_STATE = "descriptor"
+_ZSTD_BLOCK_STATE = "block"
+_ZSTD_HEADER_BYTES = {
+    _ZSTD_MAGIC_STATE: 4,
+    _ZSTD_SKIPPABLE_SIZE_STATE: 4,
+    _ZSTD_DESCRIPTOR_STATE: 1,
+    _ZSTD_BLOCK_STATE: 3,
+}
+
+
+class _ZstdFrameTracker:
+    """
+    跟踪zstd帧的边界，判断数据是否在帧结束处截止
+
+    stream_writer不报告帧是否完整，这里只解析帧头和块头、按长度跳过块内容，不解压数据。
+    """
+
+    def __init__(self):
+        self._state = _ZSTD_MAGIC_STATE
+        self._header = b""
+        self._skip = 0
+        self._checksum = False
+        self._frames = 0
+
+    def feed(self, data: bytes):
+        view = memoryview(data)
+        position = 0
+        while True:
+            if self._skip:
+                step = min(self._skip, len(view) - position)
+                self._skip -= step
+                position += step
+                if self._skip:
+                    return
+            needed = _ZSTD_HEADER_BYTES[self._state] - len(self._header)
+            self._header += view[position:position + needed].tobytes()
+            position += needed
+            if len(self._header) < _ZSTD_HEADER_BYTES[self._state]:
+                return
+            header, self._header = self._header, b""
+            self._advance(int.from_bytes(header, "little"))
+
+    def _advance(self, value: int):
+        if self._state == _ZSTD_MAGIC_STATE:
+            if value == _ZSTD_MAGIC:
+                self._state = _ZSTD_DESCRIPTOR_STATE
+            elif value & _ZSTD_SKIPPABLE_MASK == _ZSTD_SKIPPABLE_MAGIC:
+                self._state = _ZSTD_SKIPPABLE_SIZE_STATE
+            else:
+                raise ValueError("zstd帧魔数无效")
+        elif self._state == _ZSTD_SKIPPABLE_SIZE_STATE:
+            self._skip = value
+            self._state = _ZSTD_MAGIC_STATE
+        elif self._state == _ZSTD_DESCRIPTOR_STATE:
+            # 帧头描述符之后依次为窗口描述符、字典ID、原始大小，长度由描述符中的标志决定
+            single_segment = (value >> 5) & 1
+            self._checksum = bool((value >> 2) & 1)
+            content_size_bytes = (single_segment, 2, 4, 8)[value >> 6]
+            self._skip = (1 - single_segment) + (0, 1, 2, 4)[value & 3] + content_size_bytes
+            self._state = _ZSTD_BLOCK_STATE
+        else:
+            last_block = value & 1
+            block_type = (value >> 1) & 3
+            # RLE块的内容只有一个字节，其余块的内容长度即块大小
+            self._skip = 1 if block_type == 1 else value >> 3
+            if last_block:
+                self._skip += 4 if self._checksum else 0
+                self._frames += 1
+                self._state = _ZSTD_MAGIC_STATE
+
+    @property
+    def complete(self) -> bool:
+        """至少有一个帧，且数据恰好在帧（含校验和）结束处截止"""
+        return self._frames > 0 and self._state == _ZSTD_MAGIC_STATE and not self._skip and not self._header
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        # decompressobj不能限制输出大小，stream_writer每产生一块输出就交给接收端检查；
+        # 允许客户端分多个帧流式压缩，帧是否完整由帧跟踪器判断
+        self._output = _LimitedBuffer()
+        self._decoder = zstandard.ZstdDecompressor().stream_writer(self._output, closefd=False)
+        self._frames = _ZstdFrameTracker()
+
+    def decompress(self, data: bytes, limit: int) -> bytes:
+        self._output.limit = limit
+        try:
+            self._decoder.write(data)
+        except DecompressedTooLarge:
+            self._output.take()
+            raise
+        self._frames.feed(data)
+        return self._output.take()
+
+    def flush(self) -> bytes:
+        if not self._frames.complete:
+            raise ValueError("zstd数据不完整")
+        return b""
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._encoder = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.compress(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._encoder.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._encoder = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.process(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush()
+
+    def finish(self) -> bytes:
+        return self._encoder.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._encoder = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._encoder.compress(data)
+
+    def flush(self) -> bytes:
+        return self._encoder.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._encoder.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+_DECODERS = {
+    ENCODING_GZIP: _GzipDecoder,
+    ENCODING_BROTLI: _BrotliDecoder,
+    ENCODING_ZSTD: _ZstdDecoder,
+}
+
+_ENCODERS = {
+    ENCODING_GZIP: _GzipEncoder,
+    ENCODING_BROTLI: _BrotliEncoder,
+    ENCODING_ZSTD: _ZstdEncoder,
+}
+
+
+def make_decoder(encoding: str):
+    """
+    创建增量解压器
+
+    Args:
+        encoding: Content-Encoding值（gzip、br、zstd）
+
+    Returns:
+        具有 decompress(data, limit) 和 flush() 方法的对象，不支持时返回None；
+        decompress输出超过limit字节时抛出DecompressedTooLarge（不会先解压出全部数据），
+        flush在数据不完整时抛出异常
+    """
+    if encoding not in available_encodings():
+        return None
+    return _DECODERS[encoding]()
+
+
+def make_encoder(encoding: str, level: int):
+    """
+    创建增量压缩器
+
+    Args:
+        encoding: 编码名称（gzip、br、zstd）
+        level: 压缩级别（gzip 1-9，br 0-11，zstd 1-22）
+
+    Returns:
+        具有 compress(data)、flush()（同步刷新，用于流式响应）和 finish() 方法的对象
+    """
+    return _ENCODERS[encoding](level)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """解析Accept-Encoding请求头，返回 {编码: q值}"""
+    weights = {}
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+    return weights
+
+
+def negotiate_encoding(header: Optional[str], preference: Sequence[str]) -> Optional[str]:
+    """
+    按服务端优先顺序选择客户端接受的编码
+
+    Args:
+        header: Accept-Encoding请求头
+        preference: 服务端优先顺序
+
+    Returns:
+        选中的编码，不压缩时返回None
+    """
+    if not header:
+        return None
+    weights = parse_accept_encoding(header)
+    available = available_encodings()
+    candidates = [encoding for encoding in preference if encoding in available]
+    best = None
+    best_quality = 0.0
+    for encoding in candidates:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+class CompressionMiddleware:
+    """
+    请求体解压与响应压缩中间件
+
+    请求：按Content-Encoding（gzip、br、zstd）逐块解压请求体，路由读取到的是解压后的数据，
+    解压后超过大小限制返回413，数据损坏返回400，不支持的编码返回415。
+    响应：按Accept-Encoding协商编码；完整响应小于阈值时不压缩，
+    流式响应（NDJSON、文件下载）每个数据块压缩后同步刷新，客户端可以立即解码。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        request_decompression: bool = True,
+        max_decompressed_bytes: int = 512 * 1024 * 1024,
+        response_compression: bool = True,
+        minimum_size: int = 1024,
+        preference: Sequence[str] = (ENCODING_ZSTD, ENCODING_BROTLI, ENCODING_GZIP),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.request_decompression = request_decompression
+        self.max_decompressed_bytes = max_decompressed_bytes
+        self.response_compression = response_compression
+        self.minimum_size = minimum_size
+        self.preference = tuple(preference)
+        self.levels = {ENCODING_GZIP: 4, ENCODING_BROTLI: 4, ENCODING_ZSTD: 3}
+        self.levels.update(levels or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+
+        content_encoding = headers.get("content-encoding", "").strip().lower()
+        if self.request_decompression and content_encoding and content_encoding != "identity":
+            decoder = make_decoder(content_encoding)
+            if decoder is None:
+                response = PlainTextResponse(f"不支持的Content-Encoding: {content_encoding}", status_code=415)
+                await response(scope, receive, send)
+                return
+            scope = dict(scope)
+            # 解压后长度会变化，去掉原有的长度和编码请求头
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"]
+                if name not in (b"content-encoding", b"content-length")
+            ]
+            state = _DecompressionState()
+            try:
+                await self._call_app(scope, self._decompressing_receive(receive, decoder, state), state.wrap_send(send))
+            except Exception:
+                # 解压错误引起的异常（可能被其他中间件包装过）改为返回记录的错误
+                if state.error is None or state.response_started:
+                    raise
+            if state.error is not None and not state.response_started:
+                await state.send_error(scope, receive, send)
+            return
+
+        await self._call_app(scope, receive, send)
+
+    async def _call_app(self, scope: Scope, receive: Receive, send: Send):
+        if self.response_compression:
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), self.preference)
+            if encoding:
+                send = _CompressingSend(send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, send)
+
+    def _decompressing_receive(self, receive: Receive, decoder, state: "_DecompressionState") -> Receive:
+        total = 0
+        finished = False
+
+        async def wrapped() -> Message:
+            nonlocal total, finished
+            if state.error is not None:
+                raise state.error
+            message = await receive()
+            if message["type"] != "http.request" or finished:
+                return message
+
+            try:
+                body = decoder.decompress(message.get("body", b""), self.max_decompressed_bytes - total)
+                if not message.get("more_body", False):
+                    body += decoder.flush()
+                    finished = True
+            except DecompressedTooLarge:
+                state.fail(413, f"解压后的请求体超过 {self.max_decompressed_bytes} 字节")
+                raise state.error
+            except Exception as e:
+                logger.warning(f"请求体解压失败: {str(e)}")
+                state.fail(400, "请求体解压失败")
+                raise state.error
+
+            total += len(body)
+            return {**message, "body": body}
+
+        return wrapped
+
+
+class _DecompressionState:
+    """
+    一个请求的解压错误
+
+    解压错误在应用读取请求体时发生，异常会经过路由和其他中间件（BaseHTTPMiddleware会把它变成500，
+    路由中的 except Exception 会把它变成其他400响应），所以由本中间件记录错误，
+    丢弃应用之后发出的响应，自己返回400/413。
+    """
+
+    def __init__(self):
+        self.error: Optional[HTTPException] = None
+        self.response_started = False
+
+    def fail(self, status_code: int, detail: str):
+        self.error = HTTPException(status_code=status_code, detail=detail)
+
+    def wrap_send(self, send: Send) -> Send:
+        async def wrapped(message: Message):
+            if self.error is not None:
+                return
+            if message["type"] == "http.response.start":
+                self.response_started = True
+            await send(message)
+        return wrapped
+
+    async def send_error(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse({"detail": self.error.detail}, status_code=self.error.status_code)
+        await response(scope, receive, send)
+
+
+class _CompressingSend:
+    """包装send，按响应类型和大小决定是否压缩"""
+
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not _is_compressible(headers.get("content-type", "")):
+                self.passthrough = True
+            return
+
+        if message_type != "http.response.body":
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                # 完整且较小的响应不值得压缩
+                self.passthrough = True
+                await self._flush_start()
+                await self.send(message)
+                return
+
+            self.encoder = make_encoder(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            if not more_body:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self._flush_start()
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # 流式响应：长度未知，逐块压缩并刷新
+            del headers["Content-Length"]
+            await self._flush_start()
+
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush() if body else b""
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _flush_start(self):
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
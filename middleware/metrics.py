@@ -0,0 +1,97 @@
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.metrics import (
+    REQUEST_BYTES,
+    REQUEST_DURATION,
+    REQUESTS_IN_FLIGHT,
+    REQUESTS_TOTAL,
+    UNITS_PER_REQUEST,
+    RequestMetrics,
+    current_request,
+)
+from typing import Dict, Sequence, Tuple
+import time
+
+# 未匹配任何路由的请求（404）统一使用的标签，避免任意路径产生无限多的时间序列
+UNMATCHED_ROUTE = "unmatched"
+
+# 路由模板缓存的最大条目数
+_ROUTE_CACHE_SIZE = 1024
+
+
+class MetricsMiddleware:
+    """
+    请求指标中间件
+
+    记录每个路由（按路由模板而不是实际路径）的请求耗时、状态码、请求体字节数和返回的翻译单元数，
+    以及正在处理的请求数。放在最外层，耗时包含认证和压缩。
+    """
+
+    def __init__(self, app: ASGIApp, routes: Sequence[BaseRoute]):
+        self.app = app
+        # 与应用共享同一个路由列表，之后注册的路由同样可以匹配
+        self.routes = routes
+        self._route_cache: Dict[Tuple[str, str], str] = {}
+
+    def route_label(self, scope: Scope) -> str:
+        """
+        返回请求对应的路由模板
+
+        Args:
+            scope: ASGI scope
+
+        Returns:
+            路由模板（如 /api/xliff/process），未匹配时返回 unmatched
+        """
+        key = (scope["method"], scope["path"])
+        label = self._route_cache.get(key)
+        if label is None:
+            label = UNMATCHED_ROUTE
+            for route in self.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    label = getattr(route, "path", UNMATCHED_ROUTE)
+                    break
+            if len(self._route_cache) >= _ROUTE_CACHE_SIZE:
+                self._route_cache.clear()
+            self._route_cache[key] = label
+        return label
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_label(scope)
+        request = RequestMetrics(route)
+        token = current_request.set(request)
+        status_code = 500
+        body_bytes = 0
+
+        async def counting_receive() -> Message:
+            nonlocal body_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                body_bytes += len(message.get("body", b""))
+            return message
+
+        async def status_send(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, status_send)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=str(status_code))
+            REQUESTS_IN_FLIGHT.dec()
+            if body_bytes:
+                REQUEST_BYTES.observe(body_bytes, route=route)
+            if request.units is not None:
+                UNITS_PER_REQUEST.observe(request.units, route=route)
+            current_request.reset(token)
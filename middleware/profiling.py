@@ -0,0 +1,65 @@
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.profiling import ProfileStore, finish_profile, start_profile
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_DISABLED_VALUES = (b"", b"0", b"false", b"no", b"off")
+
+
+class ProfilingMiddleware:
+    """
+    按请求开启性能分析的中间件
+
+    请求头 X-Profile: 1 且访问密钥为管理员密钥时，该请求中的服务调用在cProfile下执行，
+    分析结果保存到 ProfileStore，响应头 X-Profile-Id 返回分析ID，用 /api/profiles/{id} 取回。
+    非管理员密钥请求分析返回403。必须放在认证中间件之内，由认证中间件标记管理员请求。
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = None
+        for name, header_value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                value = header_value.strip().lower()
+                break
+        if value is None or value in _DISABLED_VALUES:
+            await self.app(scope, receive, send)
+            return
+
+        if not scope.get("state", {}).get("admin"):
+            response = JSONResponse(status_code=403, content={"detail": "性能分析只允许管理员密钥使用"})
+            await response(scope, receive, send)
+            return
+
+        profile, *tokens = start_profile(scope["method"], scope["path"])
+        status_code = 500
+
+        async def send_with_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[PROFILE_ID_HEADER] = profile.profile_id
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            finish_profile(profile, tokens, status_code, time.perf_counter() - started)
+            self.store.put(profile)
+            logger.info(f"已保存请求分析 {profile.profile_id}: {profile.method} {profile.path} {profile.wall_seconds * 1000:.1f}ms")
@@ -1,5 +1,6 @@
+from operator import itemgetter
 from pydantic import BaseModel
-from typing import Optional, List, Union
+from typing import Callable, Optional, List, Sequence, Tuple, Union
 
 class XliffData(BaseModel):
     """XLIFF数据单元模型"""
@@ -28,6 +29,69 @@ class TmxData(BaseModel):
     srcLang: Optional[str] = None
     tgtLang: Optional[str] = None
 
+# 字段顺序，服务层快速路径产出的元组按此顺序排列
+XLIFF_DATA_FIELDS = tuple(XliffData.model_fields)
+TMX_DATA_FIELDS = tuple(TmxData.model_fields)
+
+def select_fields(requested: Optional[Union[str, Sequence[str]]], all_fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    解析fields参数，得到需要提取的字段
+
+    Args:
+        requested: 逗号分隔的字段名或字段名序列，None或空表示全部字段
+        all_fields: XLIFF_DATA_FIELDS 或 TMX_DATA_FIELDS
+
+    Returns:
+        按 all_fields 顺序排列的字段元组
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if not requested:
+        return all_fields
+    if isinstance(requested, str):
+        requested = requested.split(',')
+    wanted = {name.strip() for name in requested if name.strip()}
+    unknown = wanted.difference(all_fields)
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(sorted(unknown))}，可选字段: {', '.join(all_fields)}")
+    if not wanted:
+        return all_fields
+    return tuple(name for name in all_fields if name in wanted)
+
+def row_projector(fields: Tuple[str, ...], all_fields: Tuple[str, ...]) -> Optional[Callable[[tuple], tuple]]:
+    """
+    返回从完整元组中取出所选字段的函数
+
+    Args:
+        fields: select_fields 的结果
+        all_fields: XLIFF_DATA_FIELDS 或 TMX_DATA_FIELDS
+
+    Returns:
+        投影函数，结果总是元组；选择了全部字段时返回None
+    """
+    if fields == all_fields:
+        return None
+    positions = [all_fields.index(name) for name in fields]
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda row: (row[position],)
+    return itemgetter(*positions)
+
+def models_from_rows(model_cls, rows: List[tuple]) -> list:
+    """
+    把快速路径产出的元组构造为模型，不再逐个验证
+
+    Args:
+        model_cls: XliffData或TmxData
+        rows: 字段顺序与模型定义一致的元组列表
+
+    Returns:
+        模型列表
+    """
+    fields = tuple(model_cls.model_fields)
+    return [model_cls.model_construct(**dict(zip(fields, row))) for row in rows]
+
 class FileProcessRequest(BaseModel):
     """文件处理请求模型"""
     fileName: str
@@ -69,4 +133,101 @@ class FileReplacementResponse(BaseModel):
     content: str
     success: bool
     message: Optional[str] = None
-    replacements_count: int
\ No newline at end of file
+    replacements_count: int
+    unmatched: Optional[List[str]] = None  # dry_run时返回未匹配的单元ID
+
+class BatchProcessRequest(BaseModel):
+    """批量文件处理请求模型"""
+    files: List[FileProcessRequest]
+
+class BatchReplacementRequest(BaseModel):
+    """批量文件译文替换请求模型"""
+    files: List[FileReplacementRequest]
+
+class BatchXliffProcessResult(BaseModel):
+    """批量处理中单个XLIFF文件的结果"""
+    index: int  # 文件在请求中的位置
+    fileName: str
+    success: bool
+    message: Optional[str] = None
+    data: Optional[List[XliffData]] = None
+
+class BatchTmxProcessResult(BaseModel):
+    """批量处理中单个TMX文件的结果"""
+    index: int
+    fileName: str
+    success: bool
+    message: Optional[str] = None
+    data: Optional[List[TmxData]] = None
+
+class BatchReplacementResult(BaseModel):
+    """批量替换中单个文件的结果"""
+    index: int
+    fileName: str
+    success: bool
+    message: Optional[str] = None
+    content: Optional[str] = None
+    replacements_count: int = 0
+    unmatched: Optional[List[str]] = None
+
+class BatchArchiveResult(BaseModel):
+    """压缩包中单个文件的处理结果"""
+    index: int  # 文件在压缩包中的位置
+    fileName: str
+    fileType: Optional[str] = None  # xliff 或 tmx
+    success: bool
+    message: Optional[str] = None
+    data: Optional[Union[List[XliffData], List[TmxData]]] = None
+
+class BatchXliffProcessResponse(BaseModel):
+    """XLIFF批量处理响应模型"""
+    results: List[BatchXliffProcessResult]
+    success: bool
+    message: Optional[str] = None
+
+class BatchTmxProcessResponse(BaseModel):
+    """TMX批量处理响应模型"""
+    results: List[BatchTmxProcessResult]
+    success: bool
+    message: Optional[str] = None
+
+class BatchReplacementResponse(BaseModel):
+    """批量译文替换响应模型"""
+    results: List[BatchReplacementResult]
+    success: bool
+    message: Optional[str] = None
+
+
+class BatchArchiveResponse(BaseModel):
+    """压缩包处理响应模型"""
+    results: List[BatchArchiveResult]
+    success: bool
+    message: Optional[str] = None
+
+class DocumentSessionInfo(BaseModel):
+    """文档会话信息"""
+    sessionId: str
+    fileName: str
+    format: str  # xliff或tmx
+    etag: str
+    encoding: str  # 上传时的编码，下载时按原编码输出
+    size: int  # 占用内存的估计值（字节）
+    unitCount: int
+    revision: int = 0  # 通过PATCH写入的批次数
+    pendingUpdates: int = 0  # 尚未合并到文档中的单元更新数
+    createdAt: float
+    expiresAt: float  # 最后一次访问后经过TTL过期
+
+class SessionReplacementRequest(BaseModel):
+    """会话翻译替换请求模型"""
+    translations: List[TranslationReplacementData]
+
+class SessionUpdateResponse(BaseModel):
+    """会话增量更新响应模型"""
+    success: bool
+    message: Optional[str] = None
+    replacements_count: int
+    unmatched: List[str]
+    etag: str
+    revision: int
+    pendingUpdates: int
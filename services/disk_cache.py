@@ -0,0 +1,255 @@
+"""
+解析结果的磁盘缓存
+
+同一主机上的多个uvicorn worker进程共享一个SQLite数据库（WAL模式，读写互不阻塞），
+以 cache_key 计算的内容哈希为键保存 ParseCache 压缩后的条目（提取出的翻译单元、
+会话的单元索引等），进程重启或重新部署后仍然可以命中。
+总字节数超过预算时淘汰最久未访问的条目，超过TTL未访问的条目在写入时清除。
+
+条目由 ParseCache 用MessagePack编码，读取时只恢复基本类型、元组和登记过的单元位置/模型类型，
+不会执行数据库中的代码；能写入数据库文件的用户仍然可以篡改缓存的结果，
+数据库文件及其所在目录应当只允许运行服务的用户读写。
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 存储格式版本，与数据库中的 user_version 不一致时清空已有条目
+_FORMAT_VERSION = 2
+# 命中时更新访问时间的最小间隔（秒），避免每次读取都产生一次写事务
+_TOUCH_INTERVAL = 60
+# 淘汰时每次取出的候选条目数
+_EVICT_BATCH = 64
+
+# 条目数和总字节数由触发器维护，写入和淘汰时不必对整个表求和
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL,
+        data BLOB NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed, size)",
+    """CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO totals (id, entries, bytes) VALUES (0, 0, 0)",
+    """CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET entries = entries + 1, bytes = bytes + new.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET entries = entries - 1, bytes = bytes - old.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+        UPDATE totals SET bytes = bytes + new.size - old.size;
+    END""",
+)
+
+
+class DiskCache:
+    """
+    SQLite磁盘缓存
+
+    每个进程持有一个连接，进程内通过锁串行访问；进程之间的并发由SQLite的WAL和busy_timeout处理。
+    磁盘错误只记录日志并按未命中处理，不影响请求。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024, ttl_seconds: int = 0, namespace: str = ""):
+        """
+        Args:
+            path: 数据库文件路径，所在目录不存在时创建（只允许当前用户访问）
+            max_bytes: 所有条目的字节预算
+            ttl_seconds: 条目在最后一次访问后的过期秒数，0表示不过期
+            namespace: 键的前缀（代码版本），不同版本写入的条目互不命中，旧版本的条目按LRU/TTL淘汰
+
+        Raises:
+            sqlite3.Error: 无法打开或初始化数据库
+            OSError: 无法创建目录
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self._prefix = f"{namespace}:" if namespace else ""
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # isolation_level=None：事务由 BEGIN IMMEDIATE 显式控制
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != _FORMAT_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS entries")
+                self._conn.execute("DROP TABLE IF EXISTS totals")
+                self._conn.execute(f"PRAGMA user_version={_FORMAT_VERSION}")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    @contextmanager
+    def _transaction(self):
+        """写事务，开始时即取得写锁，避免多个进程同时从读锁升级时互相等待"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _expired_before(self, now: float) -> Optional[float]:
+        return now - self.ttl_seconds if self.ttl_seconds > 0 else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            条目数据，未命中、已过期或读取失败时返回None
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                key = self._prefix + key
+                row = self._conn.execute("SELECT accessed, data FROM entries WHERE key = ?", (key,)).fetchone()
+                expired_before = self._expired_before(now)
+                if row is None or (expired_before is not None and row[0] < expired_before):
+                    self._misses += 1
+                    return None
+                self._hits += 1
+                if now - row[0] >= _TOUCH_INTERVAL:
+                    self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                return row[1]
+        except sqlite3.Error as e:
+            logger.warning(f"读取磁盘缓存失败: {str(e)}")
+            return None
+
+    def put(self, key: str, data: bytes):
+        """
+        写入条目，清除过期条目，超过字节预算时淘汰最久未访问的条目；单条超过预算的数据不保存
+
+        Args:
+            key: 缓存键
+            data: 条目数据
+        """
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock, self._transaction():
+                self._conn.execute(
+                    "INSERT INTO entries (key, size, accessed, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET size = excluded.size, accessed = excluded.accessed, data = excluded.data",
+                    (self._prefix + key, len(data), now, data)
+                )
+                expired_before = self._expired_before(now)
+                if expired_before is not None:
+                    self._conn.execute("DELETE FROM entries WHERE accessed < ?", (expired_before,))
+                self._evict()
+        except sqlite3.Error as e:
+            logger.warning(f"写入磁盘缓存失败: {str(e)}")
+
+    def delete(self, key: str):
+        """删除条目（如无法恢复的旧数据）"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (self._prefix + key,))
+        except sqlite3.Error as e:
+            logger.warning(f"删除磁盘缓存条目失败: {str(e)}")
+
+    def _totals(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+    def _evict(self):
+        total = self._totals()[1]
+        while total > self.max_bytes:
+            candidates = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not candidates:
+                break
+            for key, size in candidates:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                self._evictions += 1
+
+    def recent(self, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+        """
+        按最近访问的顺序读取当前命名空间中未过期的条目（预热内存缓存时使用），不更新访问时间；
+        读取失败时记录日志并停止
+
+        Args:
+            max_bytes: 读取的总字节数上限
+
+        Yields:
+            (缓存键, 条目数据)
+        """
+        expired_before = self._expired_before(time.time())
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM entries WHERE accessed >= ? ORDER BY accessed DESC",
+                    (expired_before or 0,)
+                ).fetchall()
+            remaining = max_bytes
+            for key, size in rows:
+                if size > remaining or not key.startswith(self._prefix):
+                    continue
+                with self._lock:
+                    row = self._conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                remaining -= size
+                yield key[len(self._prefix):], row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"读取磁盘缓存失败: {str(e)}")
+
+    def clear(self):
+        """删除全部条目"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            logger.warning(f"清空磁盘缓存失败: {str(e)}")
+
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回磁盘缓存统计信息（条目数和字节数为所有进程共享的数据，命中次数为当前进程的计数）"""
+        with self._lock:
+            try:
+                entries, total = self._totals()
+            except sqlite3.Error:
+                entries, total = 0, 0
+            return {
+                "path": self.path,
+                "namespace": self.namespace,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
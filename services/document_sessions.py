@@ -0,0 +1,463 @@
+"""
+服务端文档会话
+
+上传一次文档，得到会话ID和ETag，之后的提取、验证和替换请求只引用会话ID，
+不必在每个请求中重复传输和解析整个文档。会话保存原始文本、原编码和完整的单元索引
+（XliffUnitIndex/TmxTuIndex，即每个单元及其source/target的字符偏移），
+按访问时间滑动过期，总字节数超过预算时淘汰最久未访问的会话。
+
+分批到达的译文通过 apply_targets() 写入覆盖层（按单元位置保存的编辑），每批耗时只与批量大小有关；
+下载时把覆盖层拼接到原文上输出，需要整个文档的操作（提取、验证、替换）之前才合并覆盖层并重建索引。
+
+会话只保存在创建它的进程内存中，预算也只有内存预算；多worker部署时其他进程上的同一个会话ID不存在，
+需要按会话ID做粘性路由或只运行一个worker。磁盘缓存只共享建立会话时的单元索引。
+"""
+from collections import OrderedDict
+from services import formats
+from services.metrics import STAGE_REPLACE, stage
+from services.splice import Edit, apply_edits, iter_spliced
+from services.tmx_index import TmxTuIndex
+from services.tmx_processor import TmxProcessorService
+from services.xliff_index import XliffUnitIndex
+from services.xliff_processor import XliffProcessorService
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+import hashlib
+import sys
+import threading
+import time
+import uuid
+
+FORMAT_XLIFF = "xliff"
+FORMAT_TMX = "tmx"
+DOCUMENT_FORMATS = (FORMAT_XLIFF, FORMAT_TMX)
+
+# 索引中每个单元占用内存的估计值（位置元组和属性字符串）
+_INDEX_BYTES_PER_UNIT = 512
+# 覆盖层中每个编辑除替换文本外占用内存的估计值
+_EDIT_OVERHEAD_BYTES = 128
+
+UnitIndex = Union[XliffUnitIndex, TmxTuIndex]
+
+
+def detect_format(file_name: str, content: str) -> str:
+    """
+    通过格式注册表按根元素判断文档格式，无法判断时按扩展名
+
+    Args:
+        file_name: 文件名
+        content: 文档内容
+
+    Returns:
+        xliff或tmx（XLIFF 1.2和2.x使用同一种单元索引）
+
+    Raises:
+        ValueError: 无法识别的格式
+    """
+    return formats.detect_format(content, file_name).family
+
+
+def build_index(file_format: str, content: str) -> UnitIndex:
+    """
+    为会话建立完整的单元索引（在执行器中调用）
+
+    Args:
+        file_format: xliff或tmx
+        content: 文档内容
+
+    Returns:
+        XliffUnitIndex或TmxTuIndex
+
+    Raises:
+        ValueError: 不是有效的XLIFF文件
+    """
+    if file_format == FORMAT_TMX:
+        return TmxTuIndex.build(content)
+    index = XliffUnitIndex.build(content)
+    if not index.has_root:
+        raise ValueError("未找到<xliff>根元素，不是有效的XLIFF文件")
+    return index
+
+
+def index_state(file_format: str, content: str) -> Tuple:
+    """
+    建立单元索引并返回不含文档文本的状态（在执行器中调用）
+
+    状态只有单元位置列表，从工作进程传回和写入解析缓存时不必复制整个文档，
+    由 restore_index() 与文档文本重新组合为索引。
+
+    Args:
+        file_format: xliff或tmx
+        content: 文档内容
+
+    Returns:
+        索引状态
+
+    Raises:
+        ValueError: 不是有效的XLIFF文件
+    """
+    index = build_index(file_format, content)
+    if file_format == FORMAT_TMX:
+        return index.units, index.srclang
+    return index.units, index.has_root
+
+
+def restore_index(file_format: str, content: str, state: Tuple) -> UnitIndex:
+    """
+    用 index_state() 返回的状态重建单元索引
+
+    Args:
+        file_format: xliff或tmx
+        content: 建立索引时的文档内容
+        state: 索引状态
+
+    Returns:
+        XliffUnitIndex或TmxTuIndex
+    """
+    if file_format == FORMAT_TMX:
+        return TmxTuIndex(content, *state)
+    return XliffUnitIndex(content, *state)
+
+
+def compute_etag(content: str) -> str:
+    """返回文档内容的强ETag（带引号）"""
+    digest = hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    判断If-Match/If-None-Match请求头是否与ETag匹配
+
+    Args:
+        header: 请求头，可以是 *、逗号分隔的多个ETag，忽略弱验证前缀 W/
+        etag: 当前ETag
+
+    Returns:
+        是否匹配
+    """
+    if header is None:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class PreconditionFailed(Exception):
+    """If-Match与会话当前的ETag不一致"""
+
+
+class TargetUpdate(NamedTuple):
+    """apply_targets() 的结果，ETag和版本号是本批写入后（同一把锁内）的值"""
+    replacements_count: int
+    unmatched: List[str]
+    etag: str
+    revision: int
+    pending_updates: int
+
+
+class DocumentSession:
+    """
+    一个文档会话
+
+    Attributes:
+        session_id: 会话ID
+        file_name: 文件名
+        file_format: xliff或tmx
+        content: 文档文本
+        encoding: 上传时的编码（utf-8、utf-8-sig或utf-16），下载时按原编码输出
+        revision: 通过 apply_targets() 写入的批次数
+        index: 完整的单元索引，与content共享同一个字符串
+        size: 占用内存的估计值（字节）
+    """
+
+    def __init__(self, file_name: str, file_format: str, content: str, encoding: str, index: UnitIndex):
+        self.session_id = uuid.uuid4().hex
+        self.file_name = file_name
+        self.file_format = file_format
+        self.content = content
+        self.encoding = encoding
+        self.revision = 0
+        self._base_etag = compute_etag(content)
+        # 执行器在其他进程建立索引时，返回的索引带有一份内容副本，改为引用会话中的字符串
+        index.content = content
+        self.index = index
+        # 尚未合并的target更新：编辑起始偏移 -> 编辑，同一单元的后续更新覆盖之前的
+        self._overlay: Dict[int, Edit] = {}
+        self._overlay_bytes = 0
+        self.size = self._measure()
+        # 存储中记账的字节数，大小变化后由 DocumentSessionStore.update() 调整
+        self.accounted_size = 0
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_access = self.created_at
+
+    @property
+    def etag(self) -> str:
+        """当前文档（含尚未合并的更新）的强ETag，写入更新后变化"""
+        if self.revision == 0:
+            return self._base_etag
+        # 不对整个文档重新计算哈希；会话ID保证不同会话的ETag不会相同
+        return f'"{self.session_id}-{self.revision}"'
+
+    @property
+    def unit_count(self) -> int:
+        return len(self.index)
+
+    @property
+    def pending_updates(self) -> int:
+        """尚未合并到文档中的单元更新数"""
+        return len(self._overlay)
+
+    def _measure(self) -> int:
+        return sys.getsizeof(self.content) + len(self.index) * _INDEX_BYTES_PER_UNIT + self._overlay_bytes
+
+    def apply_targets(self, translations: List[dict], target_lang: Optional[str] = None,
+                      if_match: Optional[str] = None) -> TargetUpdate:
+        """
+        把一批译文写入覆盖层，不修改文档
+
+        只按单元索引查找本批单元，耗时与批量大小而不是文档大小成正比。
+        If-Match在写入的同一把锁内比较，携带同一ETag的并发写入只有一个成功。
+
+        Args:
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            target_lang: 目标语言代码（只用于TMX），为空时根据header的srclang推断
+            if_match: If-Match请求头，为None时不检查
+
+        Returns:
+            TargetUpdate
+
+        Raises:
+            PreconditionFailed: If-Match与当前ETag不一致
+        """
+        with self.lock:
+            if if_match is not None and not etag_matches(if_match, self.etag):
+                raise PreconditionFailed("文档已变化，ETag不匹配")
+            with stage(STAGE_REPLACE):
+                edits, replacements_count, unmatched = self._plan(translations, target_lang)
+            for edit in edits:
+                previous = self._overlay.get(edit[0])
+                if previous is not None:
+                    self._overlay_bytes -= sys.getsizeof(previous[2]) + _EDIT_OVERHEAD_BYTES
+                self._overlay[edit[0]] = edit
+                self._overlay_bytes += sys.getsizeof(edit[2]) + _EDIT_OVERHEAD_BYTES
+            if edits:
+                self.revision += 1
+            self.size = self._measure()
+            return TargetUpdate(replacements_count, unmatched, self.etag, self.revision, self.pending_updates)
+
+    def iter_rendered(self) -> Iterator[str]:
+        """
+        按文档顺序输出当前文档（原文加上尚未合并的更新）的片段
+
+        Returns:
+            文档片段迭代器
+        """
+        with self.lock:
+            content = self.content
+            edits = sorted(self._overlay.values())
+        return iter_spliced(content, edits)
+
+    def materialize(self):
+        """
+        把覆盖层合并到文档中并重建单元索引
+
+        需要整个文档的操作（提取、验证、替换）之前调用；没有待合并的更新时不做任何事。
+        """
+        with self.lock:
+            if not self._overlay:
+                return
+            content = apply_edits(self.content, sorted(self._overlay.values()))
+            index = build_index(self.file_format, content)
+            self.content = content
+            self.index = index
+            self._overlay.clear()
+            self._overlay_bytes = 0
+            self.size = self._measure()
+
+    def _plan(self, translations: List[dict], target_lang: Optional[str]) -> Tuple[List[Edit], int, List[str]]:
+        if self.file_format == FORMAT_TMX:
+            return TmxProcessorService.plan_tmx_edits(self.index, translations, target_lang)
+        return XliffProcessorService.plan_xliff_edits(self.index, translations)
+
+    def info(self, ttl_seconds: float) -> Dict[str, Any]:
+        """返回会话的基本信息"""
+        return {
+            "sessionId": self.session_id,
+            "fileName": self.file_name,
+            "format": self.file_format,
+            "etag": self.etag,
+            "encoding": self.encoding,
+            "size": self.size,
+            "unitCount": self.unit_count,
+            "revision": self.revision,
+            "pendingUpdates": self.pending_updates,
+            "createdAt": self.created_at,
+            "expiresAt": self.last_access + ttl_seconds,
+        }
+
+
+def splice_session_targets(session: DocumentSession, translations: List[dict], target_lang: Optional[str] = None,
+                           dry_run: bool = False) -> Tuple[str, int, List[str]]:
+    """
+    使用会话中已建立的单元索引替换target内容，不再扫描文档
+
+    结果与 splice_xliff_targets/splice_tmx_targets 相同，会话内容本身不变。
+    会话中有尚未合并的更新时先合并，结果基于当前文档。
+
+    Args:
+        session: 文档会话
+        translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+        target_lang: 目标语言代码（只用于TMX），为空时根据header的srclang推断
+        dry_run: 为True时只统计可替换数量和未匹配的单元，不生成新内容
+
+    Returns:
+        (更新后的内容, 替换数量, 未匹配的单元ID列表)，dry_run时返回原始内容
+    """
+    session.materialize()
+    with session.lock, stage(STAGE_REPLACE):
+        edits, replacements_count, unmatched = session._plan(translations, target_lang)
+        if dry_run:
+            return session.content, replacements_count, unmatched
+        return apply_edits(session.content, edits), replacements_count, unmatched
+
+
+class DocumentSessionStore:
+    """
+    文档会话存储
+
+    会话在最后一次访问后 ttl_seconds 秒过期；总字节数超过 max_bytes 时按最久未访问的顺序淘汰。
+    访问顺序与过期顺序一致，过期会话在每次存取时从队首清理。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, DocumentSession]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._expirations = 0
+
+    def configure(self, max_bytes: int, ttl_seconds: float):
+        """调整字节预算和过期时间"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.ttl_seconds = ttl_seconds
+            self._expire(time.time())
+            self._evict(0)
+
+    def add(self, session: DocumentSession) -> DocumentSession:
+        """
+        保存会话，必要时淘汰最久未访问的会话
+
+        Args:
+            session: 新会话
+
+        Returns:
+            保存的会话
+
+        Raises:
+            ValueError: 单个文档超过整个字节预算
+        """
+        if session.size > self.max_bytes:
+            raise ValueError(f"文档过大（约 {session.size} 字节），超过会话存储预算 {self.max_bytes} 字节")
+        with self._lock:
+            self._expire(time.time())
+            self._evict(session.size)
+            self._sessions[session.session_id] = session
+            session.accounted_size = session.size
+            self._bytes += session.size
+        return session
+
+    def update(self, session: DocumentSession):
+        """
+        会话大小变化（写入或合并更新）后调整记账，超出预算时淘汰其他最久未访问的会话
+
+        Args:
+            session: 大小已变化的会话
+        """
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                return
+            self._bytes += session.size - session.accounted_size
+            session.accounted_size = session.size
+            while len(self._sessions) > 1 and self._bytes > self.max_bytes:
+                oldest_id = next(iter(self._sessions))
+                if oldest_id == session.session_id:
+                    self._sessions.move_to_end(oldest_id)
+                    continue
+                self._bytes -= self._sessions.pop(oldest_id).accounted_size
+                self._evictions += 1
+
+    def get(self, session_id: str) -> Optional[DocumentSession]:
+        """
+        获取会话并刷新过期时间
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            会话，不存在或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """删除会话，返回会话是否存在"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._bytes -= session.accounted_size
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回会话存储统计信息"""
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_access + self.ttl_seconds > now:
+                break
+            self._sessions.popitem(last=False)
+            self._bytes -= session.accounted_size
+            self._expirations += 1
+
+    def _evict(self, incoming: int):
+        while self._sessions and self._bytes + incoming > self.max_bytes:
+            _, session = self._sessions.popitem(last=False)
+            self._bytes -= session.accounted_size
+            self._evictions += 1
+
+
+# 全局会话存储，在 main.lifespan 中根据配置调整
+document_sessions = DocumentSessionStore()
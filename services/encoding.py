@@ -0,0 +1,178 @@
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+import codecs
+import io
+import re
+
+# 流式输出时每次编码的字符数
+_ENCODE_CHUNK_SIZE = 1 << 20
+
+# XML内容：文本，或保留原始编码的字节/二进制文件对象（由解析器根据BOM和XML声明解码）
+XmlContent = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+# XML声明中的encoding，只在文件开头查找
+_DECLARATION_RE = re.compile(rb'<\?xml[^>]*?\sencoding\s*=\s*["\']([A-Za-z][A-Za-z0-9._:-]*)["\']')
+_DECLARATION_SCAN_BYTES = 1024
+
+# 没有BOM的UTF-16文档以 "<?" 开头时的字节序列
+_UTF16_LE_START = b'<\x00?\x00'
+_UTF16_BE_START = b'\x00<\x00?'
+
+# 编解码器名称与IANA名称差别不止于下划线的charset
+_IANA_CHARSETS = {'ascii': 'us-ascii', 'shift_jis': 'shift_jis', 'cp932': 'windows-31j'}
+
+
+def xml_encoding(data: bytes) -> str:
+    """
+    按BOM、开头的字节序列和XML声明确定文档编码，都没有时为UTF-8
+
+    Args:
+        data: 文件字节内容（只检查开头部分）
+
+    Returns:
+        Python编解码器名称（utf-8、utf-8-sig、utf-16、utf-16-le、iso8859-1等）
+
+    Raises:
+        ValueError: 声明了不支持的编码
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if data.startswith(_UTF16_LE_START):
+        return 'utf-16-le'
+    if data.startswith(_UTF16_BE_START):
+        return 'utf-16-be'
+    match = _DECLARATION_RE.match(bytes(data[:_DECLARATION_SCAN_BYTES]))
+    if not match:
+        return 'utf-8'
+    declared = match.group(1).decode('ascii')
+    try:
+        name = codecs.lookup(declared).name
+    except LookupError:
+        raise ValueError(f"不支持的XML编码: {declared}")
+    # 声明为UTF-16/32但字节与ASCII兼容（文本按UTF-8重新编码后声明未改），按UTF-8处理
+    if name.startswith(('utf-16', 'utf-32')):
+        return 'utf-8'
+    return name
+
+
+def xml_charset(encoding: str) -> str:
+    """
+    把 xml_encoding 返回的编解码器名称转换为Content-Type中的charset（IANA名称）
+
+    Args:
+        encoding: Python编解码器名称
+
+    Returns:
+        charset名称，如 utf-8、utf-16le、iso-8859-1、windows-1252
+    """
+    name = codecs.lookup(encoding).name
+    if name in ('utf-8', 'utf-8-sig'):
+        return 'utf-8'
+    if name.startswith('utf-'):
+        return name.replace('-le', 'le').replace('-be', 'be')
+    if name.startswith('iso8859-'):
+        return 'iso-' + name[3:]
+    if name.startswith('cp125'):
+        return 'windows-' + name[2:]
+    return _IANA_CHARSETS.get(name, name.replace('_', '-'))
+
+
+def decode_xml_bytes(data: bytes) -> Tuple[str, str]:
+    """
+    按BOM和XML声明解码上传的XML文件，都没有时按UTF-8解码
+
+    Args:
+        data: 文件字节内容
+
+    Returns:
+        (文本内容, 编码名称)，编码名称可用于按原编码写回（utf-8、utf-8-sig、utf-16、iso8859-1等）
+
+    Raises:
+        ValueError: 声明了不支持的编码
+        UnicodeDecodeError: 内容与编码不符
+    """
+    encoding = xml_encoding(data)
+    if encoding == 'utf-8-sig':
+        return bytes(data[len(codecs.BOM_UTF8):]).decode('utf-8'), encoding
+    return bytes(data).decode(encoding), encoding
+
+
+def xml_bytes(content: XmlContent) -> bytes:
+    """
+    取得可直接交给lxml/translate-toolkit解析的字节
+
+    字节内容按原样返回，解析器根据BOM和XML声明解码，不经过str；
+    文本（JSON请求体中的content）编码为UTF-8；文件对象读出全部内容。
+
+    Args:
+        content: XML内容
+
+    Returns:
+        字节内容
+    """
+    if isinstance(content, str):
+        return content.encode('utf-8')
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, (bytearray, memoryview)):
+        return bytes(content)
+    return content.read()
+
+
+def xml_stream(content: XmlContent) -> BinaryIO:
+    """
+    取得可交给iterparse的二进制文件对象，文件对象原样返回，字节内容不复制
+
+    Args:
+        content: XML内容
+
+    Returns:
+        二进制文件对象
+    """
+    if hasattr(content, 'read'):
+        return content
+    if isinstance(content, str):
+        return io.BytesIO(content.encode('utf-8'))
+    # BytesIO在写入之前与bytes共享缓冲区
+    return io.BytesIO(content)
+
+
+def xml_text(content: XmlContent) -> str:
+    """
+    取得文本内容，用于基于字符偏移的索引和替换
+
+    Args:
+        content: XML内容，字节按BOM和XML声明解码
+
+    Returns:
+        文本内容
+    """
+    if isinstance(content, str):
+        return content
+    return decode_xml_bytes(xml_bytes(content))[0]
+
+
+def iter_encoded(pieces: Iterable[str], encoding: str = 'utf-8') -> Iterator[bytes]:
+    """
+    将文本片段逐块编码为字节，用于流式响应
+
+    使用增量编码器，BOM只在开头输出一次；较大的片段按块编码，不生成整文档大小的bytes。
+    原编码无法表示的字符（如写回ISO-8859-1文档的中文译文）输出为字符引用。
+
+    Args:
+        pieces: 文本片段迭代器
+        encoding: 输出编码
+
+    Returns:
+        字节块迭代器
+    """
+    encoder = codecs.getincrementalencoder(encoding)('xmlcharrefreplace')
+    for piece in pieces:
+        for start in range(0, len(piece), _ENCODE_CHUNK_SIZE):
+            chunk = encoder.encode(piece[start:start + _ENCODE_CHUNK_SIZE])
+            if chunk:
+                yield chunk
+    tail = encoder.encode('', final=True)
+    if tail:
+        yield tail
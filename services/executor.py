@@ -0,0 +1,174 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+import asyncio
+import functools
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from services.metrics import collect_stages, observe_stages
+from services.profiling import current_profile, profile_call
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_PROCESS = "process"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_KINDS = (EXECUTOR_PROCESS, EXECUTOR_THREAD)
+
+
+class ServiceExecutor:
+    """
+    CPU密集型服务调用的执行器
+
+    路由处理函数通过 run() 把解析、替换等同步操作派发到进程池（默认）或线程池，
+    避免大文件阻塞事件循环，使同一个worker仍能响应健康检查和小文件请求。
+    未启动时 run() 直接在当前线程调用，行为与直接调用服务方法相同。
+    """
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.max_workers = 0
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+        self._in_flight = 0
+        self._total_seconds = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self, kind: str = EXECUTOR_PROCESS, max_workers: int = 0):
+        """
+        创建执行器
+
+        Args:
+            kind: process（进程池）或 thread（线程池）
+            max_workers: 工作进程/线程数，0表示使用CPU核心数
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"不支持的执行器类型: {kind}")
+        if self._pool is not None:
+            self.shutdown()
+
+        max_workers = max_workers or os.cpu_count() or 1
+        if kind == EXECUTOR_PROCESS:
+            # spawn启动的子进程不继承事件循环和线程状态
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="service")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        logger.info(f"服务执行器已启动: {kind}, workers={max_workers}")
+
+    def shutdown(self, wait: bool = True):
+        """关闭执行器，等待正在执行的调用完成"""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
+        logger.info("服务执行器已关闭")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在执行器中调用同步函数并等待结果
+
+        进程池模式下函数和参数必须可以pickle（模块级函数或服务类的静态方法）。
+        调用中各热点阶段的耗时随返回值一起带回，在主进程写入指标；
+        当前请求开启了分析时改为在cProfile下调用，统计合并到该请求的分析结果。
+
+        Args:
+            func: 要调用的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+        """
+        name = getattr(func, '__qualname__', repr(func))
+        with self._lock:
+            self._calls += 1
+            self._in_flight += 1
+
+        profile = current_profile.get()
+        call = collect_stages if profile is None else profile_call
+        started = time.perf_counter()
+        try:
+            if self._pool is None:
+                outcome = call(func, *args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                outcome = await loop.run_in_executor(self._pool, functools.partial(call, func, *args, **kwargs))
+            observe_stages(outcome[1])
+            if profile is not None:
+                profile.add_call(name, time.perf_counter() - started, outcome[2])
+            return outcome[0]
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight -= 1
+                self._total_seconds += elapsed
+            logger.debug(f"{name} 耗时 {elapsed * 1000:.1f}ms")
+
+    def stats(self) -> Dict[str, Any]:
+        """返回执行器统计信息"""
+        with self._lock:
+            return {
+                "kind": self.kind or "inline",
+                "max_workers": self.max_workers,
+                "calls": self._calls,
+                "failures": self._failures,
+                "in_flight": self._in_flight,
+                "total_seconds": self._total_seconds,
+            }
+
+
+# 全局执行器，在 main.lifespan 中启动和关闭
+service_executor = ServiceExecutor()
+
+
+async def run_service(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """通过全局执行器调用服务方法"""
+    return await service_executor.run(func, *args, **kwargs)
+
+
+async def iter_completed(jobs: Iterable[Awaitable[Any]], limit: Optional[int] = None) -> AsyncIterator[Any]:
+    """
+    并发执行一组协程，按完成顺序产出结果
+
+    同时进行的任务数受限，避免一次把所有文件内容提交给进程池（每个待执行任务都持有一份参数副本）。
+    迭代提前结束（如客户端断开）时取消尚未完成的任务。
+
+    Args:
+        jobs: 协程列表，协程内部应自行处理异常
+        limit: 最大并发数，默认为执行器worker数的两倍
+
+    Returns:
+        结果的异步迭代器
+    """
+    semaphore = asyncio.Semaphore(limit or max(service_executor.max_workers, 1) * 2)
+
+    async def bounded(job: Awaitable[Any]) -> Any:
+        try:
+            async with semaphore:
+                return await job
+        finally:
+            # 被取消时尚未开始的协程需要显式关闭，已结束的协程关闭无副作用
+            if inspect.iscoroutine(job):
+                job.close()
+
+    tasks = [asyncio.ensure_future(bounded(job)) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,150 @@
+"""
+文件格式注册表
+
+各处理服务在模块导入时注册自己支持的格式（XLIFF 1.2、XLIFF 2.x、TMX……）：
+嗅探函数只根据文档开头几KB中的XML声明、根元素、根元素的命名空间和属性判断格式，
+不复制、不扫描整个文档。自动识别的端点（/api/replacement/auto、/api/auto/process）、
+文档会话和压缩包处理都通过同一个注册表分派。
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from services.encoding import XmlContent, xml_encoding
+import re
+
+# 嗅探时读取的文档开头字节数（文本按字符数）
+SNIFF_BYTES = 4096
+
+# 根元素之前可能出现的XML声明、处理指令、注释和DOCTYPE
+_PROLOG_RE = re.compile(r'\s*(?:<\?.*?\?>|<!--.*?-->|<!DOCTYPE(?:[^\[>]|\[.*?\])*>)', re.DOTALL)
+# 根元素的开始标签，属性可能因超出嗅探范围而不完整
+_ROOT_RE = re.compile(r'\s*<([A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?)([^>]*)')
+_ATTR_RE = re.compile(r'([A-Za-z_][\w.:\-]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+class XmlHead(NamedTuple):
+    """文档开头的根元素信息"""
+    root: str
+    namespace: str
+    attributes: Dict[str, str]
+
+
+class FileFormat(NamedTuple):
+    """
+    注册的文件格式
+
+    process和replace在执行器中调用，必须是可以序列化到工作进程的模块级函数或静态方法：
+    process(file_name, content, fields=None, unit_filter=None, engine=None) 返回按fields排列的元组列表，
+    replace(content, translations) 返回 (更新后的内容, 替换数量)
+    """
+    name: str
+    family: str
+    label: str
+    sniff: Callable[[XmlHead], bool]
+    extensions: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    process: Callable
+    replace: Callable
+
+
+_formats: Dict[str, FileFormat] = {}
+
+
+def register_format(file_format: FileFormat) -> FileFormat:
+    """
+    注册文件格式，同名格式被替换
+
+    Args:
+        file_format: 文件格式
+
+    Returns:
+        注册的文件格式
+    """
+    _formats[file_format.name] = file_format
+    return file_format
+
+
+def registered_formats() -> List[FileFormat]:
+    """按注册顺序返回全部文件格式"""
+    return list(_formats.values())
+
+
+def _head_text(content: XmlContent, size: int) -> str:
+    """取文档开头的文本，字节按BOM和XML声明解码，文件对象读取后恢复位置"""
+    if isinstance(content, str):
+        return content[:size].lstrip('\ufeff')
+    if hasattr(content, 'read'):
+        position = content.tell()
+        data = content.read(size)
+        content.seek(position)
+    else:
+        data = bytes(memoryview(content)[:size])
+    try:
+        encoding = xml_encoding(data)
+    except ValueError:
+        encoding = 'utf-8'
+    # 截断处可能是不完整的多字节字符
+    return data.decode(encoding, 'ignore').lstrip('\ufeff')
+
+
+def read_head(content: XmlContent, size: int = SNIFF_BYTES) -> Optional[XmlHead]:
+    """
+    解析文档开头的根元素
+
+    Args:
+        content: XML内容（文本、字节或二进制文件对象）
+        size: 读取的字节数
+
+    Returns:
+        XmlHead，开头没有根元素（不是XML，或序言超出读取范围）时返回None
+    """
+    text = _head_text(content, size)
+    position = 0
+    while True:
+        match = _PROLOG_RE.match(text, position)
+        if not match or match.end() == position:
+            break
+        position = match.end()
+    match = _ROOT_RE.match(text, position)
+    if not match:
+        return None
+
+    qualified_name = match.group(1)
+    prefix, _, local_name = qualified_name.rpartition(':')
+    attributes = {}
+    namespaces = {}
+    for name, double_quoted, single_quoted in _ATTR_RE.findall(match.group(2)):
+        value = double_quoted or single_quoted
+        if name == 'xmlns':
+            namespaces[''] = value
+        elif name.startswith('xmlns:'):
+            namespaces[name[6:]] = value
+        else:
+            attributes[name] = value
+    return XmlHead(local_name, namespaces.get(prefix, ''), attributes)
+
+
+def detect_format(content: XmlContent, file_name: Optional[str] = None) -> FileFormat:
+    """
+    根据文档开头判断格式，开头无法判断时按文件扩展名
+
+    Args:
+        content: XML内容（文本、字节或二进制文件对象）
+        file_name: 文件名
+
+    Returns:
+        第一个嗅探成功的文件格式
+
+    Raises:
+        ValueError: 无法识别的格式
+    """
+    head = read_head(content)
+    if head is not None:
+        for file_format in _formats.values():
+            if file_format.sniff(head):
+                return file_format
+    else:
+        extension = file_name.rsplit('.', 1)[-1].lower() if file_name and '.' in file_name else ''
+        for file_format in _formats.values():
+            if extension in file_format.extensions:
+                return file_format
+    labels = '、'.join(file_format.label for file_format in _formats.values())
+    raise ValueError(f"无法识别文件类型，请确保文件为有效的{labels or 'XLIFF或TMX'}格式")
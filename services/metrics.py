@@ -0,0 +1,358 @@
+"""
+Prometheus兼容的进程内指标
+
+只实现服务需要的三种指标（Counter、Gauge、Histogram）和文本格式（0.0.4）输出，
+不依赖prometheus_client。记录一次观测只是一次二分查找和加锁累加，
+没有抓取时的开销可以忽略；格式化只在抓取 /metrics 时进行。
+
+服务层用 stage() 标记热点阶段（parse、extract、replace、serialize），
+嵌套阶段的耗时只计入最内层，外层阶段记录的是扣除内层之后的时间。
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+# 文本格式的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_PARSE = "parse"
+STAGE_EXTRACT = "extract"
+STAGE_REPLACE = "replace"
+STAGE_SERIALIZE = "serialize"
+
+# 秒级耗时的默认分桶，覆盖小文件的毫秒级到大文件的分钟级
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024, 1024 * 1024 * 1024)
+UNITS_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """指标基类，按标签值元组保存各时间序列"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签: {', '.join(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        """清除所有时间序列"""
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> List[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        """返回 (样本名, 标签, 值) 列表"""
+        with self._lock:
+            return [(self.name, tuple(zip(self.labelnames, key)), value) for key, value in self._series.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for sample_name, labels, value in self.samples():
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """固定分桶的直方图，每个时间序列保存各桶计数、总和与总数"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        # bisect_left使等于上界的值落入该桶（le语义）
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [各桶计数..., +Inf桶计数, 总和]
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[:-1]) if series else 0
+
+    def total(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-1] if series else 0.0
+
+    def samples(self) -> List[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        with self._lock:
+            snapshot = [(key, list(series)) for key, series in self._series.items()]
+        samples = []
+        for key, series in snapshot:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels + (("le", _format_value(float(bound))),), cumulative))
+            samples.append((f"{self.name}_sum", labels, series[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+# 抓取时调用的收集函数返回 (名称, 类型, 说明, [(标签字典, 值), ...])
+CollectedMetric = Tuple[str, str, str, Iterable[Tuple[Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    """指标注册表，负责输出Prometheus文本格式"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[CollectedMetric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[CollectedMetric]]):
+        """
+        注册抓取时调用的收集函数，用于导出缓存、执行器等已有的统计信息
+
+        Args:
+            collector: 返回 (名称, 类型, 说明, [(标签字典, 值), ...]) 列表的函数
+        """
+        self._collectors.append(collector)
+
+    def reset(self):
+        """清除所有指标的时间序列（测试用）"""
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        """
+        输出Prometheus文本格式
+
+        Returns:
+            指标文本，以换行结尾
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, values in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    lines.append(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(float(value))}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局注册表
+metrics = MetricsRegistry()
+
+REQUEST_DURATION = metrics.histogram(
+    "xliff_http_request_duration_seconds", "HTTP请求耗时（秒），route为路由模板", ("method", "route")
+)
+REQUESTS_TOTAL = metrics.counter(
+    "xliff_http_requests_total", "HTTP请求数", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = metrics.gauge(
+    "xliff_http_requests_in_flight", "正在处理的HTTP请求数"
+)
+REQUEST_BYTES = metrics.histogram(
+    "xliff_http_request_body_bytes", "请求体字节数（解压前）", ("route",), BYTES_BUCKETS
+)
+UNITS_PER_REQUEST = metrics.histogram(
+    "xliff_units_per_request", "每个请求返回的翻译单元数", ("route",), UNITS_BUCKETS
+)
+STAGE_DURATION = metrics.histogram(
+    "xliff_stage_duration_seconds", "热点阶段耗时（秒）：parse、extract、replace、serialize，嵌套阶段不重复计时", ("stage",)
+)
+
+_local = threading.local()
+
+# 当前请求的阶段耗时汇总（只在分析请求时设置），值为 {阶段名: 秒数}
+request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+def _add_request_stage(name: str, seconds: float):
+    stages = request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+class stage:
+    """
+    记录一个热点阶段耗时的上下文管理器
+
+    进入内层阶段时暂停外层阶段的计时，退出后恢复，因此各阶段的耗时互不重叠。
+    当前线程处于 collect_stages() 中时累加到收集字典（由执行器在主进程汇总），
+    否则直接写入阶段直方图（正在分析的请求同时累加到 request_stages）。
+
+    用法：
+        with stage(STAGE_PARSE):
+            store.parse(data)
+    """
+
+    __slots__ = ("name", "elapsed", "_started", "_outer")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "stage":
+        now = time.perf_counter()
+        self._outer = getattr(_local, "active", None)
+        if self._outer is not None:
+            self._outer.elapsed += now - self._outer._started
+        _local.active = self
+        self._started = now
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        self.elapsed += now - self._started
+        _local.active = self._outer
+        if self._outer is not None:
+            self._outer._started = now
+        timings = getattr(_local, "timings", None)
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + self.elapsed
+        else:
+            STAGE_DURATION.observe(self.elapsed, stage=self.name)
+            _add_request_stage(self.name, self.elapsed)
+        return False
+
+
+def collect_stages(func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+    """
+    调用函数并收集其中各阶段的耗时
+
+    供执行器使用：在工作进程中调用，返回值和耗时一起回到主进程，由 observe_stages() 写入直方图。
+    模块级函数，可以被pickle。
+
+    Args:
+        func: 要调用的函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        (函数返回值, {阶段名: 秒数})
+    """
+    previous = getattr(_local, "timings", None)
+    timings: Dict[str, float] = {}
+    _local.timings = timings
+    try:
+        return func(*args, **kwargs), timings
+    finally:
+        _local.timings = previous
+
+
+def observe_stages(timings: Dict[str, float]):
+    """把 collect_stages() 收集的各阶段耗时写入阶段直方图，每个阶段一次观测"""
+    for name, seconds in timings.items():
+        STAGE_DURATION.observe(seconds, stage=name)
+        _add_request_stage(name, seconds)
+
+
+class RequestMetrics:
+    """单个请求的指标上下文，由中间件创建"""
+
+    __slots__ = ("route", "units")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.units: Optional[int] = None
+
+
+# 当前请求的指标上下文，中间件未启用时为None
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+def record_units(count: int):
+    """
+    记录当前请求返回的翻译单元数，在请求结束时写入每请求单元数直方图
+
+    Args:
+        count: 翻译单元数量
+    """
+    request = current_request.get()
+    if request is not None:
+        request.units = (request.units or 0) + count
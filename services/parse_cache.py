@@ -0,0 +1,336 @@
+from collections import OrderedDict
+from pydantic import BaseModel
+from models.xliff import TmxData, XliffData
+from services.disk_cache import DiskCache
+from starlette.concurrency import run_in_threadpool
+from services.executor import run_service
+from services.profiling import current_profile
+from services.tmx_index import TmxTuSpan, TmxTuvSpan
+from services.xliff_index import XliffUnitSpan
+from typing import Any, Dict, Optional, Tuple, Union
+import hashlib
+import logging
+import msgpack
+import sqlite3
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# 服务结果的版本：提取、替换等结果的格式或语义变化时加1。与API版本一起作为磁盘缓存的命名空间，
+# 部署新代码后旧版本写入的条目不再命中（之后按LRU/TTL淘汰）
+PROCESSOR_VERSION = 2
+
+# 计算哈希时每次编码的字符数，避免为整个文档生成一份bytes副本
+_HASH_CHUNK_SIZE = 1 << 20
+
+# 条目用MessagePack保存，读取时不会构造任意对象（磁盘缓存中的条目可能由其他进程写入）。
+# 元组和下列命名元组用扩展类型标记，模型列表按类名恢复；其他类型的结果不缓存
+_EXT_TUPLE = 1
+_EXT_NAMED_TUPLE = 2
+_NAMED_TUPLES = {cls.__name__: cls for cls in (XliffUnitSpan, TmxTuSpan, TmxTuvSpan)}
+_MODELS = {cls.__name__: cls for cls in (XliffData, TmxData)}
+
+
+def cache_key(endpoint: str, file_name: str, content: Union[str, bytes], *params: Any) -> str:
+    """
+    根据端点、文件名、内容及影响结果的参数计算缓存键
+
+    Args:
+        endpoint: 端点名称
+        file_name: 文件名
+        content: 文件内容，文本或原始字节（UTF-8字节与对应文本的缓存键相同）
+        *params: 其他影响结果的参数（如解析引擎）
+
+    Returns:
+        SHA-256十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((endpoint, file_name, params)).encode('utf-8'))
+    digest.update(b'\0')
+    if not isinstance(content, str):
+        digest.update(content)
+        return digest.hexdigest()
+    for start in range(0, len(content), _HASH_CHUNK_SIZE):
+        digest.update(content[start:start + _HASH_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _encode_extension(obj: Any) -> msgpack.ExtType:
+    """把元组和已登记的命名元组编码为扩展类型，列表仍编码为数组"""
+    if type(obj) is tuple:
+        return msgpack.ExtType(_EXT_TUPLE, _packb(list(obj)))
+    name = type(obj).__name__
+    if _NAMED_TUPLES.get(name) is type(obj):
+        return msgpack.ExtType(_EXT_NAMED_TUPLE, _packb([name, *obj]))
+    raise TypeError(f"无法缓存的类型: {name}")
+
+
+def _decode_extension(code: int, data: bytes) -> Any:
+    items = _unpackb(data)
+    if code == _EXT_TUPLE:
+        return tuple(items)
+    if code == _EXT_NAMED_TUPLE:
+        return _NAMED_TUPLES[items[0]](*items[1:])
+    raise ValueError(f"未知的扩展类型: {code}")
+
+
+def _packb(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True, strict_types=True, default=_encode_extension)
+
+
+def _unpackb(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, ext_hook=_decode_extension)
+
+
+def _pack(value: Any) -> bytes:
+    """
+    将结果压缩为紧凑的字节串
+
+    Pydantic模型列表只保存类名和字段值元组，恢复时按字段顺序重建。
+
+    Raises:
+        TypeError: 结果中含有无法缓存的类型
+    """
+    if isinstance(value, list) and value and isinstance(value[0], BaseModel):
+        model_cls = type(value[0])
+        if _MODELS.get(model_cls.__name__) is not model_cls:
+            raise TypeError(f"无法缓存的类型: {model_cls.__name__}")
+        fields = list(model_cls.model_fields)
+        rows = [tuple(getattr(item, field) for field in fields) for item in value]
+        payload = ['models', model_cls.__name__, fields, rows]
+    else:
+        payload = ['value', value]
+    return zlib.compress(_packb(payload), 1)
+
+
+def _unpack(data: bytes) -> Any:
+    payload = _unpackb(zlib.decompress(data))
+    if payload[0] == 'models':
+        _, model_name, fields, rows = payload
+        # 缓存中的数据已经过验证，直接构造模型
+        return [_MODELS[model_name].model_construct(**dict(zip(fields, row))) for row in rows]
+    return payload[1]
+
+
+class ParseCache:
+    """
+    解析结果缓存
+
+    以内容哈希为键保存提取出的翻译单元列表（压缩后的紧凑形式），
+    总字节数超过预算时按最近最少使用的顺序淘汰。
+    配置了磁盘缓存时作为第二级：内存未命中时读取磁盘（多个worker进程共享），写入时同时写入磁盘。
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.disk: Optional[DiskCache] = None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def configure(self, max_bytes: int, enabled: bool):
+        """调整容量和开关，超出新容量的条目会立即淘汰"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.enabled = enabled
+            if not enabled:
+                self._entries.clear()
+                self._bytes = 0
+            self._evict()
+
+    def configure_disk(self, path: str, max_bytes: int, ttl_seconds: int, api_version: str = ""):
+        """
+        打开或关闭磁盘缓存，无法打开时记录日志并只使用内存缓存
+
+        Args:
+            path: SQLite数据库文件路径，为空时关闭磁盘缓存
+            max_bytes: 磁盘缓存的字节预算
+            ttl_seconds: 条目在最后一次访问后的过期秒数，0表示不过期
+            api_version: API版本，与 PROCESSOR_VERSION 一起作为键的命名空间
+        """
+        self.close_disk()
+        if not path:
+            return
+        try:
+            self.disk = DiskCache(path, max_bytes, ttl_seconds, f"{api_version}/{PROCESSOR_VERSION}")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"无法打开磁盘缓存 {path}，只使用内存缓存: {str(e)}")
+
+    def close_disk(self):
+        """关闭磁盘缓存，内存缓存中的条目保留"""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def warm(self, max_bytes: int) -> int:
+        """
+        用磁盘缓存中最近访问的条目预热内存缓存（启动时调用）
+
+        Args:
+            max_bytes: 载入的总字节数上限，不超过内存缓存的容量
+
+        Returns:
+            载入的条目数
+        """
+        if not self.enabled or self.disk is None or max_bytes <= 0:
+            return 0
+        loaded = list(self.disk.recent(min(max_bytes, self.max_bytes)))
+        with self._lock:
+            # 按访问时间从旧到新插入，最近访问的条目最后淘汰
+            for key, data in reversed(loaded):
+                self._store(key, data)
+            self._evict()
+        return len(loaded)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if data is not None:
+            return _unpack(data)
+        if self.disk is None:
+            return None
+
+        data = self.disk.get(key)
+        if data is None:
+            return None
+        try:
+            value = _unpack(data)
+        except Exception as e:
+            # 其他版本写入的、已无法恢复的条目
+            logger.warning(f"磁盘缓存条目无法读取，已删除: {str(e)}")
+            self.disk.delete(key)
+            return None
+        with self._lock:
+            self._store(key, data)
+            self._evict()
+        return value
+
+    def put(self, key: str, value: Any):
+        """
+        写入缓存，单条超过容量的结果不缓存
+
+        Args:
+            key: 缓存键
+            value: 结果（翻译单元行、模型列表、单元索引状态或由基本类型组成的值）
+        """
+        if not self.enabled:
+            return
+        try:
+            data = _pack(value)
+        except TypeError as e:
+            logger.warning(f"结果无法缓存: {str(e)}")
+            return
+        if self.disk is not None:
+            self.disk.put(key, data)
+        with self._lock:
+            self._store(key, data)
+            self._evict()
+
+    def clear(self):
+        """清空缓存（包括磁盘缓存）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def _store(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = data
+        self._bytes += len(data)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, data = self._entries.popitem(last=False)
+            self._bytes -= len(data)
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息"""
+        disk_stats = self.disk.stats() if self.disk is not None else None
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "disk": disk_stats,
+            }
+
+
+# 全局缓存，在 main.lifespan 中根据配置调整
+parse_cache = ParseCache()
+
+
+async def lookup_cached(key: Tuple[Any, ...]) -> Optional[Any]:
+    """
+    只查缓存，不调用服务方法（用于流式响应）
+
+    Args:
+        key: cache_key 的参数 (端点, 文件名, 内容, *其他参数)
+
+    Returns:
+        缓存的结果，未命中、缓存关闭或当前请求正在分析时返回None
+    """
+    # 分析请求要测量实际的解析过程，不使用缓存
+    if not parse_cache.enabled or current_profile.get() is not None:
+        return None
+    digest = await run_in_threadpool(cache_key, *key)
+    return await run_in_threadpool(parse_cache.get, digest)
+
+
+async def run_cached(key: Tuple[Any, ...], func, *args, **kwargs) -> Any:
+    """
+    先查缓存，未命中时通过执行器调用服务方法并写入缓存
+
+    Args:
+        key: cache_key 的参数 (端点, 文件名, 内容, *其他参数)
+        func: 服务方法
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        服务方法的返回值
+    """
+    if not parse_cache.enabled:
+        return await run_service(func, *args, **kwargs)
+
+    # 哈希、解压和压缩与文档大小成正比，放到线程池中避免阻塞事件循环
+    digest = await run_in_threadpool(cache_key, *key)
+    # 分析请求要测量实际的解析过程，跳过查找，结果仍写入缓存
+    if current_profile.get() is None:
+        cached = await run_in_threadpool(parse_cache.get, digest)
+        if cached is not None:
+            return cached
+
+    result = await run_service(func, *args, **kwargs)
+    await run_in_threadpool(parse_cache.put, digest, result)
+    return result
@@ -0,0 +1,242 @@
+"""
+单个请求的性能分析
+
+带分析请求头的请求在执行器中用cProfile（确定性分析器，标准库自带）运行每次服务调用，
+各次调用的统计在主进程合并，连同各阶段耗时保存在 ProfileStore 中，之后按ID取回。
+没有分析请求头的请求只多一次ContextVar读取。
+"""
+from collections import OrderedDict
+from contextvars import ContextVar
+from services.metrics import collect_stages, request_stages
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+import uuid
+
+# 默认返回的热点函数数量
+DEFAULT_TOP_FUNCTIONS = 30
+
+# Python 3.12起cProfile基于sys.monitoring，同一进程中同时只能有一个分析器，
+# 线程池模式下同一请求的多个调用需要依次分析
+_profiler_lock = threading.Lock()
+
+
+def profile_call(func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, Dict[str, float], Dict]:
+    """
+    在cProfile下调用函数，并收集各阶段耗时
+
+    模块级函数，可以被pickle，在工作进程中执行。
+
+    Args:
+        func: 要调用的函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        (函数返回值, {阶段名: 秒数}, cProfile原始统计)
+    """
+    with _profiler_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result, timings = collect_stages(func, *args, **kwargs)
+        finally:
+            profiler.disable()
+    profiler.create_stats()
+    return result, timings, profiler.stats
+
+
+class _RawStats:
+    """把原始统计字典包装成 pstats.Stats 可以接受的对象"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _function_name(key: Tuple[str, int, str]) -> str:
+    file_name, line, name = key
+    if file_name == '~':
+        # 内置函数
+        return name
+    return f"{file_name}:{line}({name})"
+
+
+class RequestProfile:
+    """
+    一个请求的分析结果
+
+    Attributes:
+        profile_id: 分析ID
+        method: 请求方法
+        path: 请求路径
+        stages: 各阶段耗时 {阶段名: 秒数}
+        calls: 执行器调用列表 [{function, seconds}]
+    """
+
+    def __init__(self, method: str, path: str):
+        self.profile_id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.created_at = time.time()
+        self.status_code: Optional[int] = None
+        self.wall_seconds = 0.0
+        self.stages: Dict[str, float] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def add_call(self, name: str, seconds: float, raw_stats: Dict):
+        """
+        合并一次执行器调用的分析统计
+
+        Args:
+            name: 调用的函数名
+            seconds: 调用耗时（含排队和进程间传输）
+            raw_stats: profile_call() 返回的cProfile原始统计
+        """
+        with self._lock:
+            self.calls.append({"function": name, "seconds": round(seconds, 6)})
+            if self._stats is None:
+                self._stats = pstats.Stats(_RawStats(raw_stats))
+            else:
+                self._stats.add(_RawStats(raw_stats))
+
+    def top_functions(self, limit: int = DEFAULT_TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+        """
+        按累计耗时排序的热点函数
+
+        Args:
+            limit: 返回的函数数量
+
+        Returns:
+            [{function, ncalls, tottime, cumtime}] 列表
+        """
+        if self._stats is None:
+            return []
+        entries = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "function": _function_name(key),
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+            for key, (_, ncalls, tottime, cumtime, _) in entries[:limit]
+        ]
+
+    def summary(self, limit: int = DEFAULT_TOP_FUNCTIONS) -> Dict[str, Any]:
+        """返回JSON可序列化的分析摘要"""
+        return {
+            "id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "calls": self.calls,
+            "top_functions": self.top_functions(limit),
+        }
+
+    def text(self, limit: int = DEFAULT_TOP_FUNCTIONS) -> str:
+        """返回pstats按累计耗时排序的文本报告"""
+        if self._stats is None:
+            return "没有执行器调用，未采集到函数级统计\n"
+        stream = io.StringIO()
+        stats = pstats.Stats(_RawStats(self._stats.stats), stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """返回pstats文件格式的统计（可用 pstats.Stats(path)、snakeviz 等工具打开）"""
+        return marshal.dumps(self._stats.stats if self._stats is not None else {})
+
+
+# 当前请求的分析上下文，未分析时为None
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def start_profile(method: str, path: str) -> Tuple[RequestProfile, Any, Any]:
+    """
+    为当前请求开启分析
+
+    Args:
+        method: 请求方法
+        path: 请求路径
+
+    Returns:
+        (分析结果对象, current_profile令牌, request_stages令牌)，结束时传给 finish_profile()
+    """
+    profile = RequestProfile(method, path)
+    return profile, current_profile.set(profile), request_stages.set(profile.stages)
+
+
+def finish_profile(profile: RequestProfile, tokens: Tuple[Any, Any], status_code: int, wall_seconds: float):
+    """结束当前请求的分析，恢复上下文"""
+    profile.status_code = status_code
+    profile.wall_seconds = wall_seconds
+    current_profile.reset(tokens[0])
+    request_stages.reset(tokens[1])
+
+
+class ProfileStore:
+    """
+    分析结果存储
+
+    保存最近的若干个分析结果，超出数量时淘汰最早的。
+    """
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries: int):
+        """调整保存数量"""
+        with self._lock:
+            self.max_entries = max_entries
+            self._trim()
+
+    def put(self, profile: RequestProfile):
+        with self._lock:
+            self._entries[profile.profile_id] = profile
+            self._trim()
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._entries.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """按时间倒序列出分析结果的基本信息"""
+        with self._lock:
+            profiles = list(self._entries.values())
+        return [
+            {
+                "id": profile.profile_id,
+                "method": profile.method,
+                "path": profile.path,
+                "status_code": profile.status_code,
+                "created_at": profile.created_at,
+                "wall_seconds": round(profile.wall_seconds, 6),
+            }
+            for profile in reversed(profiles)
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _trim(self):
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+
+
+# 全局分析结果存储，在 main.lifespan 中根据配置调整
+profile_store = ProfileStore()
@@ -0,0 +1,46 @@
+from typing import Iterable, Iterator, List, Tuple
+
+# 一次编辑: (起始偏移, 结束偏移, 替换文本)，偏移基于原始文档字符串
+Edit = Tuple[int, int, str]
+
+
+def iter_spliced(content: str, edits: Iterable[Edit]) -> Iterator[str]:
+    """
+    按文档顺序依次输出拼接后的文档片段
+
+    编辑必须按起始偏移升序排列且互不重叠。未被编辑覆盖的原文以切片方式输出，
+    整个过程只遍历一次文档，不产生整文档大小的中间字符串。
+
+    Args:
+        content: 原始文档内容
+        edits: 已排序的编辑列表
+
+    Returns:
+        文档片段迭代器
+    """
+    position = 0
+    for start, end, replacement in edits:
+        if start < position:
+            raise ValueError(f"编辑区间重叠: {start} < {position}")
+        if start > position:
+            yield content[position:start]
+        yield replacement
+        position = end
+    if position < len(content):
+        yield content[position:]
+
+
+def apply_edits(content: str, edits: List[Edit]) -> str:
+    """
+    将编辑一次性应用到文档，返回完整的新文档
+
+    Args:
+        content: 原始文档内容
+        edits: 已排序的编辑列表
+
+    Returns:
+        更新后的文档内容
+    """
+    if not edits:
+        return content
+    return ''.join(iter_spliced(content, edits))
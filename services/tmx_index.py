@@ -0,0 +1,225 @@
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+import re
+
+_HEADER_OPEN_RE = re.compile(r'<header(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_BODY_OPEN_RE = re.compile(r'<body(?=[\s>/])', re.IGNORECASE)
+_TU_OPEN_RE = re.compile(r'<tu(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_TU_CLOSE_RE = re.compile(r'</tu\s*>', re.IGNORECASE)
+_TUV_OPEN_RE = re.compile(r'<tuv(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_TUV_CLOSE_RE = re.compile(r'</tuv\s*>', re.IGNORECASE)
+_SEG_OPEN_RE = re.compile(r'<seg(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_SEG_CLOSE_RE = re.compile(r'</seg\s*>', re.IGNORECASE)
+_TUID_ATTR_RE = re.compile(r'''(?:^|\s)tuid\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_ID_ATTR_RE = re.compile(r'''(?:^|\s)id\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_LANG_ATTR_RE = re.compile(r'''(?:^|\s)(?:xml:)?lang\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_SRCLANG_ATTR_RE = re.compile(r'''(?:^|\s)srclang\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+
+# (外层起始, 外层结束, 内容起始, 内容结束)
+Span = Tuple[int, int, int, int]
+
+
+class TmxTuvSpan(NamedTuple):
+    """<tuv> 及其 <seg> 在原始文档中的位置信息"""
+    lang: str
+    start: int
+    end: int
+    seg: Optional[Span]
+    seg_attrs: str
+
+
+class TmxTuSpan(NamedTuple):
+    """单个 <tu> 在原始文档中的位置信息（字符偏移）"""
+    tuid: str
+    id: str
+    ordinal: int
+    start: int
+    end: int
+    tuvs: Tuple[TmxTuvSpan, ...]
+
+
+def _attr(pattern, attrs: str) -> Optional[str]:
+    """读取起始标签中的属性值，不存在时返回None"""
+    match = pattern.search(attrs)
+    if not match:
+        return None
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def _scan_tuvs(content: str, start: int, end: int) -> Tuple[TmxTuvSpan, ...]:
+    """扫描 [start, end) 区间内的所有 <tuv>"""
+    tuvs = []
+    position = start
+
+    while position < end:
+        open_match = _TUV_OPEN_RE.search(content, position, end)
+        if not open_match:
+            break
+        if open_match.group(1).endswith('/'):
+            position = open_match.end()
+            continue
+
+        close_match = _TUV_CLOSE_RE.search(content, open_match.end(), end)
+        if not close_match:
+            break
+
+        lang = _attr(_LANG_ATTR_RE, open_match.group(1)) or ""
+
+        seg = None
+        seg_attrs = ''
+        seg_match = _SEG_OPEN_RE.search(content, open_match.end(), close_match.start())
+        if seg_match:
+            seg_attrs = seg_match.group(1)
+            if seg_attrs.endswith('/'):
+                seg_attrs = seg_attrs[:-1].rstrip()
+                seg = (seg_match.start(), seg_match.end(), seg_match.end(), seg_match.end())
+            else:
+                seg_close = _SEG_CLOSE_RE.search(content, seg_match.end(), close_match.start())
+                if seg_close:
+                    seg = (seg_match.start(), seg_close.end(), seg_match.end(), seg_close.start())
+
+        tuvs.append(TmxTuvSpan(
+            lang=lang,
+            start=open_match.start(),
+            end=close_match.end(),
+            seg=seg,
+            seg_attrs=seg_attrs
+        ))
+        position = close_match.end()
+
+    return tuple(tuvs)
+
+
+class TmxTuIndex:
+    """
+    TMX翻译单元索引
+
+    单次扫描原始文档，按 tuid/id 和文档顺序记录每个 <tu> 及其 <tuv>/<seg> 的位置，
+    替换时直接根据索引生成编辑，不再对整个文档重复执行正则搜索。
+    """
+
+    def __init__(self, content: str, units: List[TmxTuSpan], srclang: str = ""):
+        self.content = content
+        self.units = units
+        self.srclang = srclang
+        self._by_id: Dict[str, TmxTuSpan] = {}
+        for unit in units:
+            # tuid和id都可以作为查找键，重复时以文档中第一次出现的为准
+            for tu_id in (unit.tuid, unit.id):
+                if tu_id:
+                    self._by_id.setdefault(tu_id, unit)
+        # 只保留部分单元时顺序号不连续，改用字典查找
+        self._by_ordinal: Optional[Dict[int, TmxTuSpan]] = None
+        if units and units[-1].ordinal != len(units):
+            self._by_ordinal = {unit.ordinal: unit for unit in units}
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def get(self, tu_id: str) -> Optional[TmxTuSpan]:
+        """按 tuid 或 id 属性查找"""
+        return self._by_id.get(tu_id)
+
+    def by_ordinal(self, ordinal: int) -> Optional[TmxTuSpan]:
+        """按文档中的顺序号（从1开始）查找"""
+        if self._by_ordinal is not None:
+            return self._by_ordinal.get(ordinal)
+        if 1 <= ordinal <= len(self.units):
+            return self.units[ordinal - 1]
+        return None
+
+    def target_tuv(self, unit: TmxTuSpan, target_lang: Optional[str] = None) -> Optional[TmxTuvSpan]:
+        """
+        按语言确定单元中的目标 <tuv>
+
+        指定目标语言时先完全匹配，再匹配主语言子标签；主语言子标签与header srclang相同的tuv
+        视为源语言（srclang="en" 时 en-US 也是源语言），只能被完全匹配选中；
+        未指定时取第一个主语言子标签不同于srclang的tuv；
+        文档没有声明srclang或没有这样的tuv时退回到第二个tuv，不会返回源语言的tuv。
+
+        Args:
+            unit: 翻译单元
+            target_lang: 目标语言代码
+
+        Returns:
+            目标tuv，找不到时返回None
+        """
+        srclang = self.srclang.lower()
+        if srclang == '*all*':
+            srclang = ''
+        source_primary = srclang.split('-')[0]
+
+        if target_lang:
+            wanted = target_lang.lower()
+            for tuv in unit.tuvs:
+                if tuv.lang.lower() == wanted:
+                    return tuv
+            primary = wanted.split('-')[0]
+            for tuv in unit.tuvs:
+                lang_primary = tuv.lang.lower().split('-')[0]
+                if lang_primary == primary and lang_primary != source_primary:
+                    return tuv
+            return None
+
+        if source_primary:
+            for tuv in unit.tuvs:
+                if tuv.lang.lower().split('-')[0] != source_primary:
+                    return tuv
+
+        if len(unit.tuvs) >= 2:
+            return unit.tuvs[1]
+        return None
+
+    @classmethod
+    def build(cls, content: str, wanted: Optional[AbstractSet[str]] = None,
+              wanted_ordinals: Optional[AbstractSet[int]] = None) -> 'TmxTuIndex':
+        """
+        扫描文档并构建索引
+
+        Args:
+            content: TMX文件内容
+            wanted: 只记录tuid或id在其中的单元（替换时使用），其余单元不扫描tuv，
+                索引占用的内存与翻译数量而不是文档大小成正比；为None时记录全部单元
+            wanted_ordinals: 指定wanted时，额外记录这些顺序号的单元
+
+        Returns:
+            TmxTuIndex对象
+        """
+        srclang = ""
+        body_match = _BODY_OPEN_RE.search(content)
+        header_match = _HEADER_OPEN_RE.search(content, 0, body_match.start() if body_match else len(content))
+        if header_match:
+            srclang = _attr(_SRCLANG_ATTR_RE, header_match.group(1)) or ""
+
+        units = []
+        ordinal = 0
+        position = body_match.start() if body_match else 0
+        length = len(content)
+
+        while position < length:
+            open_match = _TU_OPEN_RE.search(content, position)
+            if not open_match:
+                break
+            if open_match.group(1).endswith('/'):
+                position = open_match.end()
+                continue
+
+            close_match = _TU_CLOSE_RE.search(content, open_match.end())
+            if not close_match:
+                break
+
+            attrs = open_match.group(1)
+            ordinal += 1
+            tuid = _attr(_TUID_ATTR_RE, attrs) or ""
+            tu_id = _attr(_ID_ATTR_RE, attrs) or ""
+            if wanted is None or tuid in wanted or tu_id in wanted or ordinal in (wanted_ordinals or ()):
+                units.append(TmxTuSpan(
+                    tuid=tuid,
+                    id=tu_id,
+                    ordinal=ordinal,
+                    start=open_match.start(),
+                    end=close_match.end(),
+                    tuvs=_scan_tuvs(content, open_match.end(), close_match.start())
+                ))
+            position = close_match.end()
+
+        return cls(content, units, srclang)
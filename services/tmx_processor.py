@@ -1,17 +1,87 @@
 from translate.storage import tmx
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence
 import logging
 import re
 from lxml import etree
-from models.xliff import TmxData
+from models.xliff import TMX_DATA_FIELDS, TmxData, row_projector
+from services.encoding import XmlContent, xml_bytes
+from services.formats import FileFormat, register_format
+from services.metrics import STAGE_EXTRACT, STAGE_PARSE, STAGE_REPLACE, stage
+from services.splice import Edit, apply_edits
+from services.tmx_index import TmxTuIndex
+from services.unit_filter import UnitFilter
+from services.xml_validation import (
+    MODE_STRUCTURAL, MODE_WELLFORMED, MODE_SCHEMA,
+    check_mode, check_schema_dir, check_wellformed, validate_against, tmx_validator
+)
 
 logger = logging.getLogger(__name__)
 
+# clean_tmx_tags的词法规则：实体可能被再次转义（&amp;lt;），引号可能写成&quot;。
+# 各分支的优先级与原先逐步替换的顺序一致（占位符、颜色标签、其余标签、实体），结果相同；
+# 只有bpt/ept包裹的颜色标签与直接的<mq:rxt>颜色标签交错嵌套时，配对方式可能不同
+_LT = r'&(?:amp;)?lt;'
+_GT = r'&(?:amp;)?gt;'
+_QUOTE = r'(?:"|&(?:amp;)?quot;)'
+_VALUE = r'((?:[^&]++|&(?:amp;)?quot;)*)'
+_NEWLINE_PH = rf'<ph>{_LT}mq:rxt[^>]*val={_QUOTE}\\n{_QUOTE}[^>]*/{_GT}</ph>'
+# 颜色标签之间的内容不跨行，也不跨越换行占位符；只在 < 处检查，其余字符整段跳过
+_INNER = rf'((?:[^<\n]++|<(?!{_NEWLINE_PH[1:]}))*?)'
+_ENTITY = r'(?:&(?:amp;)?(?:lt|gt|quot);|&amp;)'
+_TAG = r'(?:bpt|ept|ph|it|mq:[a-z\-]+)'
+# 前置断言让扫描直接跳到 < 和 & 处，不在普通文本的每个位置尝试所有分支
+_TOKEN_RE = re.compile(
+    rf'(?=[<&])(?:(?P<newline>{_NEWLINE_PH})'
+    rf'|(?P<space><ph>{_LT}mq:ch val={_QUOTE}\s*{_QUOTE}\s*/{_GT}</ph>|<mq:ch val={_QUOTE}\s*{_QUOTE}\s*/>)'
+    rf'|(?P<pair><bpt[^>]*+>{_LT}mq:rxt[^>]*val={_QUOTE}{_LT}{_VALUE}{_GT}{_QUOTE}[^>]*{_GT}</bpt>{_INNER}'
+    rf'<ept[^>]*+>{_LT}/mq:rxt[^>]*val={_QUOTE}{_LT}/{_VALUE}{_GT}{_QUOTE}[^>]*{_GT}</ept>)'
+    rf'|(?P<rxt><mq:rxt[^>]*val={_QUOTE}{_LT}{_VALUE}{_GT}{_QUOTE}[^>]*>{_INNER}'
+    rf'</mq:rxt[^>]*val={_QUOTE}{_LT}/{_VALUE}{_GT}{_QUOTE}[^>]*>)'
+    rf'|(?P<code><{_TAG}[^>]*+>(?P<code_text>[^<]*+)</{_TAG}[^>]*+>)'
+    rf'|(?P<tag></?{_TAG}[^>]*+>)'
+    rf'|(?P<entity>{_ENTITY}(?:[^<&]*+{_ENTITY})*))'
+)
+
+
+@lru_cache(maxsize=4096)
+def _decode(text: str) -> str:
+    """解码一段不含标签的文本中的实体（行内代码大多重复出现，结果按文本缓存）"""
+    if '&' not in text:
+        return text
+    if '&amp;' not in text and '&quot;' not in text:
+        return text.replace('&lt;', '<').replace('&gt;', '>')
+    text = text.replace('&amp;lt;', '&lt;').replace('&amp;gt;', '&gt;').replace('&amp;', '&').replace('&quot;', '"')
+    return text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+
+
+def _unquote(value: str) -> str:
+    return value.replace('&amp;quot;', '"').replace('&quot;', '"') if '&' in value else value
+
+
+def _clean_token(match: re.Match) -> str:
+    """clean_tmx_tags扫描到的每个词法单元的替换文本"""
+    kind = match.lastgroup
+    if kind == 'code':
+        # 最常见的情况：成对的bpt/ept/ph/it标签只保留其中的原始代码
+        return _decode(match.group('code_text'))
+    if kind == 'entity':
+        return _decode(match.group())
+    if kind == 'tag' or kind == 'space':
+        return ''
+    if kind == 'newline':
+        return '\n'
+    # 颜色标签：还原为val中的开始/结束标签，中间的内容继续清理
+    index = _TOKEN_RE.groupindex[kind]
+    open_tag, inner, close_tag = match.group(index + 1, index + 2, index + 3)
+    inner = _TOKEN_RE.sub(_clean_token, inner) if inner else inner
+    return f'<{_unquote(open_tag)}>{inner}</{_unquote(close_tag)}>'
+
 class TmxProcessorService:
     """TMX文件处理服务"""
     
     @staticmethod
-    def process_tmx(file_name: str, content: str) -> List[TmxData]:
+    def process_tmx(file_name: str, content: XmlContent) -> List[TmxData]:
         """
         解析TMX内容并提取翻译单元
         
@@ -22,12 +92,83 @@ class TmxProcessorService:
         Returns:
             TmxData对象列表
         """
+        with stage(STAGE_EXTRACT):
+            return list(TmxProcessorService.iter_tmx(file_name, content))
+    
+    @staticmethod
+    def iter_tmx(file_name: str, content: XmlContent) -> Iterator[TmxData]:
+        """
+        解析TMX内容并逐个产出翻译单元
+        
+        Args:
+            file_name: 文件名
+            content: TMX文件内容
+            
+        Returns:
+            TmxData对象迭代器
+        """
+        for row in TmxProcessorService.iter_tmx_rows(file_name, content):
+            yield TmxData(**dict(zip(TMX_DATA_FIELDS, row)))
+    
+    @staticmethod
+    def process_tmx_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> List[tuple]:
+        """
+        解析TMX内容并以元组形式返回翻译单元（快速路径，不创建Pydantic模型）
+        
+        Args:
+            file_name: 文件名
+            content: TMX文件内容，文本或保留原始编码的字节/二进制文件对象（按BOM和XML声明解码）
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
+            
+        Returns:
+            元组列表，字段顺序同 fields（默认 TMX_DATA_FIELDS），取值类型与TmxData一致
+        """
+        with stage(STAGE_EXTRACT):
+            return list(TmxProcessorService.iter_tmx_rows(file_name, content, fields, unit_filter))
+    
+    @staticmethod
+    def iter_tmx_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
+        """
+        解析TMX内容并逐个产出翻译单元元组
+        
+        只计算所选字段：未选择noTagSource/noTagTarget时不清理标签，
+        未选择contextId、srcLang/tgtLang时不执行相应的XPath查询。
+        过滤条件在清理标签和查找context之前判断，被过滤和分页跳过的单元不计算这些字段，
+        取满一页（limit）后停止
+        
+        Args:
+            file_name: 文件名
+            content: TMX文件内容
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
+            
+        Returns:
+            元组迭代器，字段顺序同 fields（默认 TMX_DATA_FIELDS）
+        """
+        fields = TMX_DATA_FIELDS if fields is None else tuple(fields)
+        project = row_projector(fields, TMX_DATA_FIELDS)
+        wanted = set(fields)
+        want_source = not wanted.isdisjoint(('source', 'noTagSource'))
+        want_target = not wanted.isdisjoint(('target', 'noTagTarget')) or (unit_filter is not None and unit_filter.needs_target)
+        want_context = 'contextId' in wanted
+        want_langs = not wanted.isdisjoint(('srcLang', 'tgtLang')) or (unit_filter is not None and unit_filter.needs_langs)
+        matched = 0
         try:
             # 使用translate-toolkit解析TMX
             store = tmx.tmxfile()
-            store.parse(content.encode('utf-8'))
-            
-            data = []
+            with stage(STAGE_PARSE):
+                store.parse(xml_bytes(content))
             
             for index, unit in enumerate(store.units):
                 if unit.isheader():
@@ -37,79 +178,115 @@ class TmxProcessorService:
                 if not unit_id:
                     unit_id = str(index + 1)
                 
-                # 获取源文本和目标文本
-                source = unit.source or ""
-                target = unit.target or ""
+                # 获取目标文本（可能是str的子类multistring，统一转为str）
+                target = str(unit.target or "") if want_target else ""
                 
                 # 获取TMX特有属性
                 creator = ""
                 changer = ""
                 context_id = ""
-                
-                if hasattr(unit, 'xmlelement') and unit.xmlelement is not None:
-                    element = unit.xmlelement
-                    creator = element.get('creationid', '')
-                    changer = element.get('changeid', '')
-                    
-                    # 查找context属性
-                    props = element.xpath('.//prop[@type="x-context"]')
-                    if props:
-                        context_id = props[0].text or ""
-                
-                # 清理标签获得无标签版本
-                no_tag_source = TmxProcessorService.clean_tmx_tags(source)
-                no_tag_target = TmxProcessorService.clean_tmx_tags(target)
-                
-                # 尝试获取语言信息
                 src_lang = ""
                 tgt_lang = ""
                 
-                if hasattr(unit, 'xmlelement') and unit.xmlelement is not None:
-                    tuvs = unit.xmlelement.xpath('.//tuv')
+                element = getattr(unit, 'xmlelement', None)
+                
+                # 尝试获取语言信息
+                if want_langs and element is not None:
+                    tuvs = element.xpath('.//tuv')
                     if len(tuvs) >= 2:
                         src_lang = tuvs[0].get('xml:lang') or tuvs[0].get('lang') or ""
                         tgt_lang = tuvs[1].get('xml:lang') or tuvs[1].get('lang') or ""
                         src_lang = src_lang.lower()
                         tgt_lang = tgt_lang.lower()
                 
-                tmx_data = TmxData(
-                    id=unit_id,
-                    fileName=file_name,
-                    segNumber=index + 1,
-                    percent=-1,  # TMX通常没有percent属性
-                    source=source,
-                    target=target,
-                    noTagSource=no_tag_source,
-                    noTagTarget=no_tag_target,
-                    contextId=context_id,
-                    creator=creator,
-                    changer=changer,
-                    srcLang=src_lang,
-                    tgtLang=tgt_lang
+                # TMX没有percent属性，按-1参与过滤
+                if unit_filter is not None:
+                    if not unit_filter.accepts(unit_id, -1.0, src_lang, tgt_lang, target):
+                        continue
+                    matched += 1
+                    if matched <= unit_filter.offset:
+                        continue
+                
+                source = str(unit.source or "") if want_source else ""
+                
+                if element is not None:
+                    creator = element.get('creationid', '')
+                    changer = element.get('changeid', '')
+                    
+                    # 查找context属性
+                    if want_context:
+                        props = element.xpath('.//prop[@type="x-context"]')
+                        if props:
+                            context_id = props[0].text or ""
+                
+                # 清理标签获得无标签版本
+                no_tag_source = TmxProcessorService.clean_tmx_tags(source) if 'noTagSource' in wanted else None
+                no_tag_target = TmxProcessorService.clean_tmx_tags(target) if 'noTagTarget' in wanted else None
+                
+                # 按TMX_DATA_FIELDS的顺序排列，再取出所选字段
+                row = (
+                    unit_id,
+                    file_name,
+                    index + 1,
+                    -1.0,  # TMX通常没有percent属性
+                    source,
+                    target,
+                    no_tag_source,
+                    no_tag_target,
+                    context_id,
+                    creator,
+                    changer,
+                    src_lang,
+                    tgt_lang
                 )
+                yield row if project is None else project(row)
                 
-                data.append(tmx_data)
-            
-            return data
+                if unit_filter is not None and matched == unit_filter.stop:
+                    return
             
         except Exception as e:
             logger.error(f"处理TMX文件失败: {str(e)}")
             raise
     
     @staticmethod
-    def validate_tmx(content: str) -> tuple[bool, str, int]:
+    def validate_tmx(content: XmlContent, mode: str = MODE_STRUCTURAL, schema_dir: str = "") -> tuple[bool, str, int]:
         """
         验证TMX内容格式
         
         Args:
             content: TMX文件内容
+            mode: 验证模式，wellformed只流式检查XML格式并统计单元，
+                structural使用translate-toolkit解析（默认），
+                schema使用TMX 1.4 DTD验证
+            schema_dir: schema模式使用的模式文件目录，为空表示未配置
             
         Returns:
             (是否有效, 消息, 单元数量)
+            
+        Raises:
+            ValueError: 不支持的验证模式
+            FileNotFoundError: schema模式下未配置模式目录或DTD文件不存在
         """
+        check_mode(mode)
+        if mode == MODE_WELLFORMED:
+            unit_count, error = check_wellformed(content, 'tmx', frozenset(('tu',)))
+            if error:
+                return False, f"TMX格式无效: {error}", 0
+            return True, "TMX格式良好", unit_count
+        if mode == MODE_SCHEMA:
+            check_schema_dir(schema_dir)
+            unit_count, error = validate_against(
+                content,
+                lambda root: tmx_validator(schema_dir, root),
+                frozenset(('tu',))
+            )
+            if error:
+                return False, f"TMX不符合模式: {error}", 0
+            return True, "TMX符合模式", unit_count
+        
         try:
             store = tmx.tmxfile()
-            store.parse(content.encode('utf-8'))
+            store.parse(xml_bytes(content))
             
             # 计算非header单元的数量
             unit_count = sum(1 for unit in store.units if not unit.isheader())
@@ -123,64 +300,18 @@ class TmxProcessorService:
         """
         清理TMX标签，获得纯文本内容
         
+        一次扫描完成memoQ占位符（换行、空格、颜色标签）的还原、bpt/ept/ph/it等标签的删除和实体解码，
+        结果与逐步替换的实现一致
+        
         Args:
             content: 含有标签的TMX内容
             
         Returns:
             清理后的纯文本内容
         """
-        if not content:
-            return ""
-        
-        # 先解码HTML实体，方便后续处理
-        cleaned_content = content
-        cleaned_content = cleaned_content.replace('&amp;lt;', '&lt;')
-        cleaned_content = cleaned_content.replace('&amp;gt;', '&gt;')
-        cleaned_content = cleaned_content.replace('&amp;', '&')
-        cleaned_content = cleaned_content.replace('&quot;', '"')
-        
-        # 步骤1: 处理换行标签
-        # <ph>&lt;mq:rxt displaytext="\n" val="\n" /&gt;</ph> 替换为\n
-        cleaned_content = re.sub(r'<ph>&lt;mq:rxt[^>]*val="\\n"[^>]*/&gt;</ph>', '\n', cleaned_content)
-        
-        # <ph>&lt;mq:ch val=" " /&gt;</ph> 直接删除
-        cleaned_content = re.sub(r'<ph>&lt;mq:ch val="\s*"\s*/&gt;</ph>', '', cleaned_content)
-        
-        # 处理直接的<mq:ch val=" " />格式也直接删除
-        cleaned_content = re.sub(r'<mq:ch val="\s*"\s*/>', '', cleaned_content)
-        
-        # 步骤2: 处理带颜色标签
-        # 处理bpt/ept包裹的mq:rxt标签
-        bpt_ept_pattern = r'<bpt[^>]*>&lt;mq:rxt[^>]*val="&lt;([^&]*)&gt;"[^>]*&gt;</bpt>(.*?)<ept[^>]*>&lt;/mq:rxt[^>]*val="&lt;/([^&]*)&gt;"[^>]*&gt;</ept>'
-        
-        def replace_bpt_ept(match):
-            open_tag = match.group(1)
-            content_inner = match.group(2)
-            close_tag = match.group(3)
-            return f'<{open_tag}>{content_inner}</{close_tag}>'
-        
-        cleaned_content = re.sub(bpt_ept_pattern, replace_bpt_ept, cleaned_content)
-        
-        # 处理直接的mq:rxt标签
-        direct_rxt_pattern = r'<mq:rxt[^>]*val="&lt;([^&]*)&gt;"[^>]*>(.*?)</mq:rxt[^>]*val="&lt;/([^&]*)&gt;"[^>]*>'
-        
-        def replace_direct_rxt(match):
-            open_tag = match.group(1)
-            content_inner = match.group(2)
-            close_tag = match.group(3)
-            return f'<{open_tag}>{content_inner}</{close_tag}>'
-        
-        cleaned_content = re.sub(direct_rxt_pattern, replace_direct_rxt, cleaned_content)
-        
-        # 步骤3: 清理剩余的所有标签
-        cleaned_content = re.sub(r'</?(?:bpt|ept|ph|it|mq:[a-z\-]+)[^>]*>', '', cleaned_content)
-        
-        # 步骤4: 解码剩余的HTML实体
-        cleaned_content = cleaned_content.replace('&lt;', '<')
-        cleaned_content = cleaned_content.replace('&gt;', '>')
-        cleaned_content = cleaned_content.replace('&quot;', '"')
-        
-        return cleaned_content
+        if not content or ('<' not in content and '&' not in content):
+            return content or ""
+        return _TOKEN_RE.sub(_clean_token, content)
     
     @staticmethod
     def replace_tmx_targets(content: str, translations: List[dict]) -> tuple[str, int]:
@@ -194,45 +325,121 @@ class TmxProcessorService:
         Returns:
             (更新后的内容, 替换数量)
         """
-        updated_content = content
+        updated_content, replacements_count, _ = TmxProcessorService.splice_tmx_targets(content, translations)
+        return updated_content, replacements_count
+    
+    @staticmethod
+    def plan_tmx_edits(index: TmxTuIndex, translations: List[dict], target_lang: Optional[str] = None) -> tuple[List[Edit], int, List[str]]:
+        """
+        根据tu索引计算target替换所需的编辑，不修改文档
+        
+        单元查找顺序：unitId对应的tuid/id，segNumber对应的tuid/id，最后按segNumber作为文档顺序号
+        
+        Args:
+            index: TMX翻译单元索引
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            target_lang: 目标语言代码，为空时根据header的srclang推断
+            
+        Returns:
+            (按文档顺序排列的编辑列表, 替换数量, 未匹配的单元ID列表)
+        """
+        pending = {}
         replacements_count = 0
+        unmatched = []
         
         for translation in translations:
             if not translation.get('aiResult') and not translation.get('mtResult'):
                 continue
             
             new_target_content = translation.get('aiResult') or translation.get('mtResult') or ''
-            seg_id = str(translation['segNumber'])
+            seg_id = translation.get('unitId') or str(translation['segNumber'])
             
-            # 查找对应的tu元素
-            tu_pattern = rf'(<tu[^>]*(?:id=["\']{re.escape(seg_id)}["\']|tuid=["\']{re.escape(seg_id)}["\'])[^>]*>)([\s\S]*?)(</tu>)'
-            tu_match = re.search(tu_pattern, updated_content, re.IGNORECASE)
+            unit = index.get(seg_id)
+            if unit is None and not translation.get('unitId'):
+                unit = index.by_ordinal(translation['segNumber'])
             
-            if not tu_match:
+            tuv = index.target_tuv(unit, target_lang) if unit is not None else None
+            if tuv is None or tuv.seg is None:
+                unmatched.append(seg_id)
                 continue
             
-            tu_start = tu_match.group(1)
-            tu_content = tu_match.group(2)
-            tu_end = tu_match.group(3)
+            # 同一单元出现多次时以最后一次为准
+            pending[unit.ordinal] = (tuv, new_target_content)
+            replacements_count += 1
+        
+        edits = []
+        for ordinal in sorted(pending):
+            tuv, new_target_content = pending[ordinal]
+            seg_start, seg_end, inner_start, inner_end = tuv.seg
+            if inner_start == seg_end:
+                # 自闭合的<seg/>需要展开成完整元素
+                edits.append((seg_start, seg_end, f'<seg{tuv.seg_attrs}>{new_target_content}</seg>'))
+            else:
+                edits.append((inner_start, inner_end, new_target_content))
+        
+        return edits, replacements_count, unmatched
+    
+    @staticmethod
+    def plan_tmx_targets(content: str, translations: List[dict], target_lang: Optional[str] = None) -> tuple[List[Edit], int, List[str]]:
+        """
+        建立tu索引并计算替换所需的编辑，不生成新内容
+        
+        调用方可以用 splice.iter_spliced 按片段流式输出更新后的文档
+        
+        Args:
+            content: 原始TMX文件内容
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            target_lang: 目标语言代码，为空时根据header的srclang推断
             
-            # 在tu内容中查找第二个tuv（target）
-            tuv_pattern = r'<tuv[^>]*>[\s\S]*?</tuv>'
-            tuv_matches = re.findall(tuv_pattern, tu_content, re.IGNORECASE)
+        Returns:
+            (编辑列表, 替换数量, 未匹配的单元ID列表)
+        """
+        # 只为需要替换的单元建立索引；没有unitId时segNumber还可能作为顺序号使用
+        wanted = {translation.get('unitId') or str(translation['segNumber']) for translation in translations}
+        wanted_ordinals = {translation['segNumber'] for translation in translations if not translation.get('unitId')}
+        with stage(STAGE_PARSE):
+            index = TmxTuIndex.build(content, wanted, wanted_ordinals)
+        with stage(STAGE_REPLACE):
+            return TmxProcessorService.plan_tmx_edits(index, translations, target_lang)
+    
+    @staticmethod
+    def splice_tmx_targets(content: str, translations: List[dict], target_lang: Optional[str] = None, dry_run: bool = False) -> tuple[str, int, List[str]]:
+        """
+        单次扫描建立tu索引，再一次性拼接输出更新后的TMX内容
+        
+        目标tuv按xml:lang确定，耗时与文档大小和翻译数量成线性关系
+        
+        Args:
+            content: 原始TMX文件内容
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            target_lang: 目标语言代码，为空时根据header的srclang推断
+            dry_run: 为True时只统计可替换数量和未匹配的单元，不生成新内容
             
-            if len(tuv_matches) >= 2:
-                target_tuv = tuv_matches[1]  # 第二个tuv是target
-                
-                # 替换target tuv中的seg内容
-                seg_pattern = r'(<seg[^>]*>)[\s\S]*?(</seg>)'
-                new_target_tuv = re.sub(seg_pattern, rf'\g<1>{new_target_content}\g<2>', target_tuv, flags=re.IGNORECASE)
-                
-                new_tu_content = tu_content.replace(target_tuv, new_target_tuv)
-                
-                updated_content = updated_content.replace(
-                    tu_match.group(0),
-                    tu_start + new_tu_content + tu_end
-                )
-                
-                replacements_count += 1
+        Returns:
+            (更新后的内容, 替换数量, 未匹配的单元ID列表)，dry_run时返回原始内容
+        """
+        edits, replacements_count, unmatched = TmxProcessorService.plan_tmx_targets(content, translations, target_lang)
         
-        return updated_content, replacements_count
\ No newline at end of file
+        if dry_run:
+            return content, replacements_count, unmatched
+        
+        with stage(STAGE_REPLACE):
+            return apply_edits(content, edits), replacements_count, unmatched
+
+
+def process_tmx_format_rows(file_name: str, content: XmlContent, fields: Optional[Sequence[str]] = None,
+                            unit_filter: Optional[UnitFilter] = None, engine: Optional[str] = None) -> List[tuple]:
+    """格式注册表使用的TMX提取函数，TMX只有一种解析方式，忽略engine"""
+    return TmxProcessorService.process_tmx_rows(file_name, content, fields, unit_filter)
+
+
+register_format(FileFormat(
+    name="tmx",
+    family="tmx",
+    label="TMX",
+    sniff=lambda head: head.root == 'tmx',
+    extensions=('tmx',),
+    fields=TMX_DATA_FIELDS,
+    process=process_tmx_format_rows,
+    replace=TmxProcessorService.replace_tmx_targets
+))
@@ -0,0 +1,109 @@
+from typing import Optional, Tuple
+
+
+def _lang_matches(lang: str, wanted: Optional[str]) -> bool:
+    """语言相同，或wanted是lang的主语言（en 匹配 en-us）"""
+    return wanted is None or lang == wanted or lang.startswith(wanted + '-')
+
+
+class UnitFilter:
+    """
+    翻译单元的过滤条件和分页
+
+    在服务层的提取循环中使用：先计算过滤所需的字段并调用 accepts，
+    不符合条件的单元和offset之前的单元不再计算其余字段，取满limit个单元后停止解析。
+    percent、srcLang/tgtLang、target的取值与响应中的字段一致（没有百分比属性的XLIFF单元和TMX单元
+    percent为-1，语言已转为小写）。
+    """
+
+    __slots__ = ("min_percent", "max_percent", "has_target", "unit_id_prefix", "src_lang", "tgt_lang", "offset", "limit")
+
+    def __init__(
+        self,
+        min_percent: Optional[float] = None,
+        max_percent: Optional[float] = None,
+        has_target: Optional[bool] = None,
+        unit_id_prefix: Optional[str] = None,
+        src_lang: Optional[str] = None,
+        tgt_lang: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ):
+        """
+        Args:
+            min_percent: 百分比下限（含）
+            max_percent: 百分比上限（含）
+            has_target: True只保留有译文的单元，False只保留译文为空（或只有空白）的单元
+            unit_id_prefix: unitId前缀
+            src_lang: 源语言，如 en 或 en-us，忽略大小写
+            tgt_lang: 目标语言，如 zh 或 zh-cn，忽略大小写
+            offset: 跳过的匹配单元数量
+            limit: 最多返回的单元数量，None表示不限
+
+        Raises:
+            ValueError: 参数取值无效
+        """
+        if offset < 0:
+            raise ValueError("offset不能为负数")
+        if limit is not None and limit < 1:
+            raise ValueError("limit必须大于0")
+        if min_percent is not None and max_percent is not None and min_percent > max_percent:
+            raise ValueError("minPercent不能大于maxPercent")
+        self.min_percent = min_percent
+        self.max_percent = max_percent
+        self.has_target = has_target
+        self.unit_id_prefix = unit_id_prefix or None
+        self.src_lang = src_lang.lower() if src_lang else None
+        self.tgt_lang = tgt_lang.lower() if tgt_lang else None
+        self.offset = offset
+        self.limit = limit
+
+    @property
+    def needs_percent(self) -> bool:
+        return self.min_percent is not None or self.max_percent is not None
+
+    @property
+    def needs_target(self) -> bool:
+        return self.has_target is not None
+
+    @property
+    def needs_langs(self) -> bool:
+        return self.src_lang is not None or self.tgt_lang is not None
+
+    @property
+    def stop(self) -> Optional[int]:
+        """匹配到第几个单元之后停止提取，None表示提取到文件末尾"""
+        return None if self.limit is None else self.offset + self.limit
+
+    def key(self) -> Tuple:
+        """影响结果的全部参数，用于缓存键"""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def accepts(self, unit_id: str, percent: float, src_lang: str, tgt_lang: str, target: str) -> bool:
+        """
+        判断单元是否符合过滤条件（不考虑分页）
+
+        Args:
+            unit_id: 单元ID
+            percent: 百分比，needs_percent为False时可以是任意值
+            src_lang: 小写的源语言，needs_langs为False时可以是任意值
+            tgt_lang: 小写的目标语言，needs_langs为False时可以是任意值
+            target: 译文，needs_target为False时可以是任意值
+
+        Returns:
+            是否保留
+        """
+        if self.unit_id_prefix is not None and not unit_id.startswith(self.unit_id_prefix):
+            return False
+        if self.min_percent is not None and percent < self.min_percent:
+            return False
+        if self.max_percent is not None and percent > self.max_percent:
+            return False
+        if not (_lang_matches(src_lang, self.src_lang) and _lang_matches(tgt_lang, self.tgt_lang)):
+            return False
+        if self.has_target is not None and bool(target.strip()) != self.has_target:
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"UnitFilter{self.key()!r}"
@@ -0,0 +1,207 @@
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+import math
+import re
+
+# 根元素、<file> 以及单元起始标签：<trans-unit ...> (XLIFF 1.2) 或 <unit ...> (XLIFF 2.x)
+_ROOT_OPEN_RE = re.compile(r'<xliff(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_OPEN_RE = re.compile(r'<(file|trans-unit|unit)(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_UNIT_CLOSE_RE = re.compile(r'</(?:trans-unit|unit)\s*>', re.IGNORECASE)
+_ID_ATTR_RE = re.compile(r'''(?:^|\s)id\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_SOURCE_LANG_ATTR_RE = re.compile(r'''(?:^|\s)(?:source-language|srcLang)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_TARGET_LANG_ATTR_RE = re.compile(r'''(?:^|\s)(?:target-language|trgLang)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+# 与 xliff_processor._unit_percent 取同一个属性：命名空间解析后只有无前缀的 percent 会被识别，
+# mq:percent 等带前缀的属性在两个端点中都不作为百分比
+_PERCENT_ATTR_RE = re.compile(r'''(?:^|\s)percent\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+_SOURCE_OPEN_RE = re.compile(r'<source(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_SOURCE_CLOSE_RE = re.compile(r'</source\s*>', re.IGNORECASE)
+_TARGET_OPEN_RE = re.compile(r'<target(?=[\s>/])([^>]*)>', re.IGNORECASE)
+_TARGET_CLOSE_RE = re.compile(r'</target\s*>', re.IGNORECASE)
+
+# (外层起始, 外层结束, 内容起始, 内容结束)
+Span = Tuple[int, int, int, int]
+
+
+class XliffUnitSpan(NamedTuple):
+    """单个翻译单元在原始文档中的位置信息（字符偏移）"""
+    unit_id: str
+    ordinal: int
+    start: int
+    end: int
+    attrs: str
+    source: Optional[Span]
+    target: Optional[Span]
+    target_attrs: str
+    file_src_lang: str
+    file_tgt_lang: str
+
+    @property
+    def percent(self) -> float:
+        """单元的匹配百分比（无前缀的percent属性），缺失或无效时为-1"""
+        percent_value = attr_value(_PERCENT_ATTR_RE, self.attrs)
+        if percent_value:
+            try:
+                percent = float(percent_value)
+            except ValueError:
+                return -1.0
+            # NaN和无穷大无法编码为JSON
+            if math.isfinite(percent):
+                return percent
+        return -1.0
+
+    @property
+    def src_lang(self) -> str:
+        """源语言，优先取单元级别属性，否则使用所在 <file> 的语言"""
+        return (attr_value(_SOURCE_LANG_ATTR_RE, self.attrs) or self.file_src_lang).lower()
+
+    @property
+    def tgt_lang(self) -> str:
+        """目标语言，优先取单元级别属性，否则使用所在 <file> 的语言"""
+        return (attr_value(_TARGET_LANG_ATTR_RE, self.attrs) or self.file_tgt_lang).lower()
+
+
+def attr_value(pattern, attrs: str) -> Optional[str]:
+    """读取起始标签中的属性值，不存在时返回None"""
+    match = pattern.search(attrs)
+    if not match:
+        return None
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def _find_element(content: str, open_re, close_re, start: int, end: int) -> Tuple[Optional[Span], str]:
+    """
+    在 [start, end) 区间内查找第一个指定元素，返回其位置和起始标签属性
+
+    自闭合元素（如 <target/>）的内容区间为空。
+    """
+    open_match = open_re.search(content, start, end)
+    if not open_match:
+        return None, ''
+
+    attrs = open_match.group(1)
+    if attrs.endswith('/'):
+        attrs = attrs[:-1].rstrip()
+        return (open_match.start(), open_match.end(), open_match.end(), open_match.end()), attrs
+
+    close_match = close_re.search(content, open_match.end(), end)
+    if not close_match:
+        return None, ''
+
+    return (open_match.start(), close_match.end(), open_match.end(), close_match.start()), attrs
+
+
+class XliffUnitIndex:
+    """
+    XLIFF单元索引
+
+    单次扫描原始文档，记录每个 <trans-unit>/<unit> 及其 <source>/<target> 的位置，
+    后续的提取与替换都基于该索引直接切片，不再对整个文档重复执行正则搜索。
+    """
+
+    def __init__(self, content: str, units: List[XliffUnitSpan], has_root: bool = True):
+        self.content = content
+        self.units = units
+        self.has_root = has_root
+        self._by_id: Dict[str, XliffUnitSpan] = {}
+        for unit in units:
+            # 与按ID正则搜索的语义保持一致：重复ID以文档中第一次出现的为准
+            self._by_id.setdefault(unit.unit_id, unit)
+        # 只保留部分单元时顺序号不连续，改用字典查找
+        self._by_ordinal: Optional[Dict[int, XliffUnitSpan]] = None
+        if units and units[-1].ordinal != len(units):
+            self._by_ordinal = {unit.ordinal: unit for unit in units}
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def get(self, unit_id: str) -> Optional[XliffUnitSpan]:
+        """按单元ID查找"""
+        return self._by_id.get(unit_id)
+
+    def inner(self, span: Optional[Span]) -> str:
+        """返回元素内部的原始标记（不经过DOM重新序列化）"""
+        if span is None:
+            return ""
+        return self.content[span[2]:span[3]]
+
+    def by_ordinal(self, ordinal: int) -> Optional[XliffUnitSpan]:
+        """按文档中的顺序号（从1开始）查找"""
+        if self._by_ordinal is not None:
+            return self._by_ordinal.get(ordinal)
+        if 1 <= ordinal <= len(self.units):
+            return self.units[ordinal - 1]
+        return None
+
+    @classmethod
+    def build(cls, content: str, wanted: Optional[AbstractSet[str]] = None) -> 'XliffUnitIndex':
+        """
+        扫描文档并构建索引
+
+        Args:
+            content: XLIFF文件内容
+            wanted: 只记录这些ID的单元（替换时使用），其余单元只计数不记录，
+                索引占用的内存与翻译数量而不是文档大小成正比；为None时记录全部单元
+
+        Returns:
+            XliffUnitIndex对象
+        """
+        units = []
+        ordinal = 0
+        position = 0
+        length = len(content)
+
+        # XLIFF 2.x 在根元素上声明语言，作为 <file> 未声明时的默认值
+        root_src_lang = ""
+        root_tgt_lang = ""
+        root_match = _ROOT_OPEN_RE.search(content)
+        if root_match:
+            root_src_lang = attr_value(_SOURCE_LANG_ATTR_RE, root_match.group(1)) or ""
+            root_tgt_lang = attr_value(_TARGET_LANG_ATTR_RE, root_match.group(1)) or ""
+            position = root_match.end()
+        file_src_lang = root_src_lang
+        file_tgt_lang = root_tgt_lang
+
+        while position < length:
+            open_match = _OPEN_RE.search(content, position)
+            if not open_match:
+                break
+
+            attrs = open_match.group(2)
+            if open_match.group(1).lower() == 'file':
+                file_src_lang = attr_value(_SOURCE_LANG_ATTR_RE, attrs) or root_src_lang
+                file_tgt_lang = attr_value(_TARGET_LANG_ATTR_RE, attrs) or root_tgt_lang
+                position = open_match.end()
+                continue
+
+            if attrs.endswith('/'):
+                # 自闭合单元没有内容，跳过
+                position = open_match.end()
+                continue
+
+            close_match = _UNIT_CLOSE_RE.search(content, open_match.end())
+            if not close_match:
+                break
+
+            unit_id = attr_value(_ID_ATTR_RE, attrs)
+            if unit_id is not None:
+                ordinal += 1
+            if unit_id is not None and (wanted is None or unit_id in wanted):
+                body_start = open_match.end()
+                body_end = close_match.start()
+                source, _ = _find_element(content, _SOURCE_OPEN_RE, _SOURCE_CLOSE_RE, body_start, body_end)
+                target, target_attrs = _find_element(content, _TARGET_OPEN_RE, _TARGET_CLOSE_RE, body_start, body_end)
+                units.append(XliffUnitSpan(
+                    unit_id=unit_id,
+                    ordinal=ordinal,
+                    start=open_match.start(),
+                    end=close_match.end(),
+                    attrs=attrs,
+                    source=source,
+                    target=target,
+                    target_attrs=target_attrs,
+                    file_src_lang=file_src_lang,
+                    file_tgt_lang=file_tgt_lang
+                ))
+
+            position = close_match.end()
+
+        return cls(content, units, root_match is not None)
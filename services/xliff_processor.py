@@ -1,33 +1,225 @@
 from translate.storage import xliff
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Sequence
 import logging
-import re
+import math
 from lxml import etree
-from models.xliff import XliffData
+from models.xliff import XLIFF_DATA_FIELDS, XliffData, row_projector
+from services.encoding import XmlContent, xml_bytes, xml_stream, xml_text
+from services.formats import FileFormat, XmlHead, register_format
+from services.metrics import STAGE_EXTRACT, STAGE_PARSE, STAGE_REPLACE, stage
+from services.splice import Edit, apply_edits
+from services.unit_filter import UnitFilter
+from services.xliff_index import XliffUnitIndex
+from services.xml_validation import (
+    MODE_STRUCTURAL, MODE_WELLFORMED, MODE_SCHEMA,
+    check_mode, check_schema_dir, check_wellformed, validate_against, xliff_validator
+)
 
 logger = logging.getLogger(__name__)
 
+# 可选的解析引擎
+ENGINE_TOOLKIT = "toolkit"
+ENGINE_STREAM = "stream"
+ENGINES = (ENGINE_TOOLKIT, ENGINE_STREAM)
+
+# 与translate-toolkit取文本的方式一致
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+_STRING_XPATH = etree.XPath("string()")
+_NORMALIZED_XPATH = etree.XPath("normalize-space()")
+_ID_SEPARATOR = "\x04"
+_ID_SEPARATOR_SAFE = "__%04__"
+
+# XLIFF 2.x的命名空间（urn:oasis:names:tc:xliff:document:2.0、2.1……）
+_XLIFF_2_NAMESPACE_PREFIX = "urn:oasis:names:tc:xliff:document:2."
+
+# XLIFF 1.2和2.0的翻译单元元素
+_UNIT_NAMES = frozenset(('trans-unit', 'unit'))
+
+def _localname(tag) -> str:
+    """返回元素的本地名称，注释和处理指令返回空字符串"""
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit('}', 1)[-1]
+
+def _first_child(element, name: str):
+    """返回第一个指定本地名称的直接子元素"""
+    for child in element.iterchildren():
+        if _localname(child.tag) == name:
+            return child
+    return None
+
+def _first_descendant(element, name: str):
+    """返回第一个指定本地名称的后代元素"""
+    for child in element.iterdescendants():
+        if _localname(child.tag) == name:
+            return child
+    return None
+
+def _node_text(node, default_space: str) -> str:
+    """按xml:space规则提取节点文本，default时规范化空白"""
+    if node is None:
+        return ""
+    if (node.get(_XML_SPACE) or default_space) == "default":
+        return str(_NORMALIZED_XPATH(node))
+    return str(_STRING_XPATH(node))
+
+def _unit_percent(element) -> float:
+    """获取翻译百分比（支持多种属性名）"""
+    percent_value = (
+        element.get('percent') or 
+        element.get('mq:percent') or 
+        element.get('{urn:oasis:names:tc:xliff:document:2.0}percent') or
+        element.get('{urn:oasis:names:tc:xliff:document:1.2}percent')
+    )
+    if percent_value:
+        try:
+            percent = float(percent_value)
+        except ValueError:
+            return -1.0
+        # NaN和无穷大无法编码为JSON
+        if math.isfinite(percent):
+            return percent
+    return -1.0
+
+def _as_models(rows: Iterator[tuple]) -> Iterator[XliffData]:
+    """把按XLIFF_DATA_FIELDS顺序排列的元组逐个验证为XliffData"""
+    for row in rows:
+        yield XliffData(**dict(zip(XLIFF_DATA_FIELDS, row)))
+
 class XliffProcessorService:
     """XLIFF文件处理服务"""
     
     @staticmethod
-    def process_xliff(file_name: str, content: str) -> List[XliffData]:
+    def process_xliff(file_name: str, content: XmlContent, engine: str = ENGINE_TOOLKIT) -> List[XliffData]:
         """
         解析XLIFF内容并提取翻译单元
         
         Args:
             file_name: 文件名
             content: XLIFF文件内容
+            engine: 解析引擎，toolkit使用translate-toolkit完整对象模型，
+                stream使用lxml iterparse流式解析
             
         Returns:
             XliffData对象列表
         """
+        with stage(STAGE_EXTRACT):
+            return list(XliffProcessorService.iter_xliff(file_name, content, engine))
+    
+    @staticmethod
+    def iter_xliff(file_name: str, content: XmlContent, engine: str = ENGINE_TOOLKIT) -> Iterator[XliffData]:
+        """
+        按指定的解析引擎逐个产出翻译单元
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            engine: 解析引擎，toolkit或stream
+            
+        Returns:
+            XliffData对象迭代器
+        """
+        return _as_models(XliffProcessorService.iter_xliff_rows(file_name, content, engine))
+    
+    @staticmethod
+    def process_xliff_rows(
+        file_name: str,
+        content: XmlContent,
+        engine: str = ENGINE_TOOLKIT,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> List[tuple]:
+        """
+        解析XLIFF内容并以元组形式返回翻译单元（快速路径，不创建Pydantic模型）
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容，文本或保留原始编码的字节/二进制文件对象（按BOM和XML声明解码）
+            engine: 解析引擎，toolkit或stream
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
+            
+        Returns:
+            元组列表，字段顺序同 fields（默认 XLIFF_DATA_FIELDS），取值类型与XliffData一致
+        """
+        with stage(STAGE_EXTRACT):
+            return list(XliffProcessorService.iter_xliff_rows(file_name, content, engine, fields, unit_filter))
+    
+    @staticmethod
+    def iter_xliff_rows(
+        file_name: str,
+        content: XmlContent,
+        engine: str = ENGINE_TOOLKIT,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
+        """
+        按指定的解析引擎逐个产出翻译单元元组
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            engine: 解析引擎，toolkit或stream
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
+            
+        Returns:
+            元组迭代器，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
+        """
+        if engine == ENGINE_STREAM:
+            return XliffProcessorService.iter_xliff_stream_rows(file_name, content, fields, unit_filter)
+        if engine != ENGINE_TOOLKIT:
+            raise ValueError(f"不支持的解析引擎: {engine}")
+        return XliffProcessorService.iter_xliff_toolkit_rows(file_name, content, fields, unit_filter)
+    
+    @staticmethod
+    def iter_xliff_toolkit(file_name: str, content: XmlContent) -> Iterator[XliffData]:
+        """
+        使用translate-toolkit解析XLIFF并逐个产出翻译单元
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            
+        Returns:
+            XliffData对象迭代器
+        """
+        return _as_models(XliffProcessorService.iter_xliff_toolkit_rows(file_name, content))
+    
+    @staticmethod
+    def iter_xliff_toolkit_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
+        """
+        使用translate-toolkit解析XLIFF并逐个产出翻译单元元组
+        
+        只计算所选字段：未选择percent时不查找百分比属性，未选择source/target时不取单元文本。
+        过滤条件在取source之前判断，被过滤和分页跳过的单元不构建元组
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
+            
+        Returns:
+            元组迭代器，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
+        """
+        fields = XLIFF_DATA_FIELDS if fields is None else tuple(fields)
+        project = row_projector(fields, XLIFF_DATA_FIELDS)
+        want_percent = 'percent' in fields or (unit_filter is not None and unit_filter.needs_percent)
+        want_source = 'source' in fields
+        want_target = 'target' in fields or (unit_filter is not None and unit_filter.needs_target)
+        want_langs = 'srcLang' in fields or 'tgtLang' in fields or (unit_filter is not None and unit_filter.needs_langs)
+        matched = 0
         try:
             # 使用translate-toolkit解析XLIFF
             store = xliff.xlifffile()
-            store.parse(content.encode('utf-8'))
-            
-            data = []
+            with stage(STAGE_PARSE):
+                store.parse(xml_bytes(content))
             
             # 获取文件级别的语言属性
             file_src_lang = ""
@@ -61,25 +253,14 @@ class XliffProcessorService:
                     unit_id = unit_full_id
                 
                 # 获取翻译百分比（支持多种属性名）
-                percent = -1
-                if hasattr(unit, 'xmlelement'):
-                    element = unit.xmlelement
-                    percent_value = (
-                        element.get('percent') or 
-                        element.get('mq:percent') or 
-                        element.get('{urn:oasis:names:tc:xliff:document:2.0}percent') or
-                        element.get('{urn:oasis:names:tc:xliff:document:1.2}percent')
-                    )
-                    if percent_value:
-                        try:
-                            percent = float(percent_value)
-                        except ValueError:
-                            percent = -1
+                percent = -1.0
+                if want_percent and hasattr(unit, 'xmlelement'):
+                    percent = _unit_percent(unit.xmlelement)
                 
                 # 获取源语言和目标语言 - 优先从单元获取，否则使用文件级别的
                 src_lang = ""
                 tgt_lang = ""
-                if hasattr(unit, 'xmlelement'):
+                if want_langs and hasattr(unit, 'xmlelement'):
                     element = unit.xmlelement
                     src_lang = (element.get('source-language') or "").lower()
                     tgt_lang = (element.get('target-language') or "").lower()
@@ -90,213 +271,391 @@ class XliffProcessorService:
                 if not tgt_lang:
                     tgt_lang = file_tgt_lang
                 
-                # 构建数据对象
-                xliff_data = XliffData(
-                    fileName=file_name,
-                    segNumber=index + 1,
-                    unitId=unit_id,  # 保存真实的单元ID
-                    percent=percent,
-                    source=unit.source or "",
-                    target=unit.target or "",
-                    srcLang=src_lang,
-                    tgtLang=tgt_lang
+                # source/target可能是multistring，统一转为str
+                target = str(unit.target or "") if want_target else ""
+                
+                if unit_filter is not None:
+                    if not unit_filter.accepts(unit_id, percent, src_lang, tgt_lang, target):
+                        continue
+                    matched += 1
+                    if matched <= unit_filter.offset:
+                        continue
+                
+                # 按XLIFF_DATA_FIELDS的顺序排列
+                row = (
+                    file_name,
+                    index + 1,
+                    unit_id,  # 保存真实的单元ID
+                    percent,
+                    str(unit.source or "") if want_source else "",
+                    target,
+                    src_lang,
+                    tgt_lang
                 )
+                yield row if project is None else project(row)
                 
-                data.append(xliff_data)
-            
-            return data
+                if unit_filter is not None and matched == unit_filter.stop:
+                    return
             
         except Exception as e:
             logger.error(f"处理XLIFF文件失败: {str(e)}")
             raise
     
     @staticmethod
-    def validate_xliff(content: str) -> tuple[bool, str, int]:
+    def iter_xliff_stream(file_name: str, content: XmlContent) -> Iterator[XliffData]:
         """
-        验证XLIFF内容格式
+        使用lxml iterparse流式解析XLIFF并逐个产出翻译单元，规则见 iter_xliff_stream_rows
         
         Args:
+            file_name: 文件名
             content: XLIFF文件内容
             
         Returns:
-            (是否有效, 消息, 单元数量)
+            XliffData对象迭代器
         """
-        try:
-            store = xliff.xlifffile()
-            store.parse(content.encode('utf-8'))
-            
-            # 计算非header单元的数量
-            unit_count = sum(1 for unit in store.units if not unit.isheader())
-            
-            return True, "XLIFF格式有效", unit_count
-        except Exception as e:
-            return False, f"XLIFF格式无效: {str(e)}", 0
+        return _as_models(XliffProcessorService.iter_xliff_stream_rows(file_name, content))
     
     @staticmethod
-    def process_xliff_with_tags(file_name: str, content: str) -> List[XliffData]:
+    def iter_xliff_stream_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
         """
-        专门用于AI翻译的XLIFF处理器，保留内部标记
-        使用更精确的方法避免DOM解析器添加命名空间
+        使用lxml iterparse流式解析XLIFF并逐个产出翻译单元元组
+        
+        每遇到 </trans-unit> 或 </unit> 即产出一个单元并清理已处理的元素，
+        峰值内存取决于最大的单元而不是整个文件。字段取值规则与translate-toolkit
+        路径一致，区别在于语言信息取自单元所在的 <file>（XLIFF 2.x取根元素），
+        并且同时支持XLIFF 2.x的 <unit>。未选择的字段（如percent、source/target）不计算。
+        被过滤的单元不提取source，取满一页（limit）后停止解析，不再读取文件的剩余部分。
         
         Args:
             file_name: 文件名
             content: XLIFF文件内容
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
             
         Returns:
-            XliffData对象列表，保留原始标签
+            元组迭代器，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
         """
+        fields = XLIFF_DATA_FIELDS if fields is None else tuple(fields)
+        project = row_projector(fields, XLIFF_DATA_FIELDS)
+        want_percent = 'percent' in fields or (unit_filter is not None and unit_filter.needs_percent)
+        want_source = 'source' in fields
+        want_target = 'target' in fields or (unit_filter is not None and unit_filter.needs_target)
+        want_langs = 'srcLang' in fields or 'tgtLang' in fields or (unit_filter is not None and unit_filter.needs_langs)
+        matched = 0
         try:
-            # 先使用translate-toolkit获取基本结构
-            store = xliff.xlifffile()
-            store.parse(content.encode('utf-8'))
-            
-            data = []
+            # 只关注根元素、<file>和单元，其余元素不产生Python层面的事件
+            context = etree.iterparse(
+                xml_stream(content),
+                events=('start', 'end'),
+                tag=('{*}xliff', '{*}file', '{*}trans-unit', '{*}unit'),
+                resolve_entities=False,
+                no_network=True
+            )
+            
+            root_checked = False
+            root_src_lang = ""
+            root_tgt_lang = ""
+            file_original = ""
+            file_src_lang = ""
+            file_tgt_lang = ""
             unit_index = 0
             
-            for unit in store.units:
-                if unit.isheader():
-                    continue
+            for event, element in context:
+                if not root_checked:
+                    root = element.getroottree().getroot()
+                    if _localname(root.tag) != 'xliff':
+                        raise ValueError(f"根元素为<{_localname(root.tag)}>，不是有效的XLIFF文件")
+                    root_checked = True
+                    root_src_lang = root.get('srcLang') or ""
+                    root_tgt_lang = root.get('trgLang') or ""
                 
-                unit_full_id = unit.getid()
-                if not unit_full_id:
+                name = _localname(element.tag)
+                
+                if event == 'start':
+                    if name == 'file':
+                        file_original = element.get('original') or ""
+                        file_src_lang = (element.get('source-language') or root_src_lang).lower()
+                        file_tgt_lang = (element.get('target-language') or root_tgt_lang).lower()
                     continue
                 
-                # 提取真实的单元ID（去掉文件路径部分）
-                if '\x04' in unit_full_id:
-                    unit_id = unit_full_id.split('\x04')[-1]  # 取最后一部分作为真实ID
-                else:
-                    unit_id = unit_full_id
+                if name == 'xliff' or name == 'file':
+                    continue
                 
                 unit_index += 1
                 
-                # 获取百分比属性
-                percent = -1
-                if hasattr(unit, 'xmlelement'):
-                    element = unit.xmlelement
-                    percent_value = (
-                        element.get('percent') or 
-                        element.get('mq:percent') or 
-                        element.get('{urn:oasis:names:tc:xliff:document:2.0}percent') or
-                        element.get('{urn:oasis:names:tc:xliff:document:1.2}percent')
-                    )
-                    if percent_value:
-                        try:
-                            percent = float(percent_value)
-                        except ValueError:
-                            percent = -1
-                
-                # 使用正则表达式从原始XML中提取内容，避免DOM解析器修改
-                source = XliffProcessorService._extract_element_content(content, 'source', unit_id)
-                target = XliffProcessorService._extract_element_content(content, 'target', unit_id)
-                
-                # 如果正则提取失败，fallback到translate-toolkit方法
-                if not source:
-                    source = unit.source or ""
-                if not target:
-                    target = unit.target or ""
+                # 与translate-toolkit的getid一致：<file original>\x04<id>
+                unit_full_id = (file_original + _ID_SEPARATOR) if file_original else ""
+                unit_full_id += (element.get('id') or "").replace(_ID_SEPARATOR_SAFE, _ID_SEPARATOR)
                 
-                # 获取语言信息
-                src_lang = ""
-                tgt_lang = ""
-                if hasattr(unit, 'xmlelement'):
-                    element = unit.xmlelement
-                    src_lang = (element.get('source-language') or "").lower()
-                    tgt_lang = (element.get('target-language') or "").lower()
-                
-                # 如果单元级别没有语言信息，尝试从文件级别获取
-                if not src_lang or not tgt_lang:
-                    file_src_lang, file_tgt_lang = XliffProcessorService._get_file_languages(content)
-                    if not src_lang:
-                        src_lang = file_src_lang
-                    if not tgt_lang:
-                        tgt_lang = file_tgt_lang
-                
-                xliff_data = XliffData(
-                    fileName=file_name,
-                    segNumber=unit_index,
-                    unitId=unit_id,  # 保存真实的单元ID
-                    percent=percent,
-                    source=source,
-                    target=target,
-                    srcLang=src_lang,
-                    tgtLang=tgt_lang
-                )
+                if unit_full_id:
+                    unit_id = unit_full_id.split(_ID_SEPARATOR)[-1]
+                    
+                    find = _first_child if name == 'trans-unit' else _first_descendant
+                    default_space = element.get(_XML_SPACE) or "default"
+                    percent = _unit_percent(element) if want_percent else -1.0
+                    target = _node_text(find(element, 'target'), default_space) if want_target else ""
+                    src_lang = ((element.get('source-language') or "").lower() or file_src_lang) if want_langs else ""
+                    tgt_lang = ((element.get('target-language') or "").lower() or file_tgt_lang) if want_langs else ""
+                    
+                    keep = True
+                    if unit_filter is not None:
+                        keep = unit_filter.accepts(unit_id, percent, src_lang, tgt_lang, target)
+                        if keep:
+                            matched += 1
+                            keep = matched > unit_filter.offset
+                    
+                    if keep:
+                        row = (
+                            file_name,
+                            unit_index,
+                            unit_id,
+                            percent,
+                            _node_text(find(element, 'source'), default_space) if want_source else "",
+                            target,
+                            src_lang,
+                            tgt_lang
+                        )
+                        yield row if project is None else project(row)
+                        
+                        # 取满一页后不再解析文件的剩余部分
+                        if unit_filter is not None and matched == unit_filter.stop:
+                            return
                 
-                data.append(xliff_data)
+                # 释放已处理的单元及其之前的兄弟节点
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
             
-            return data
+            if not root_checked:
+                raise ValueError("未找到<xliff>根元素，不是有效的XLIFF文件")
             
         except Exception as e:
-            logger.error(f"处理带标签的XLIFF文件失败: {str(e)}")
+            logger.error(f"流式处理XLIFF文件失败: {str(e)}")
             raise
     
     @staticmethod
-    def _extract_element_content(xml_content: str, element_name: str, unit_id: str) -> str:
+    def validate_xliff(content: XmlContent, mode: str = MODE_STRUCTURAL, schema_dir: str = "") -> tuple[bool, str, int]:
         """
-        从原始XML内容中提取指定元素的内容，保持原始格式
+        验证XLIFF内容格式
         
         Args:
-            xml_content: 原始XML内容
-            element_name: 元素名称（source或target）
-            unit_id: 单元ID
+            content: XLIFF文件内容
+            mode: 验证模式，wellformed只流式检查XML格式并统计单元，
+                structural使用translate-toolkit解析（默认），
+                schema按命名空间使用XLIFF 1.2或2.0的XSD验证
+            schema_dir: schema模式使用的模式文件目录，为空表示未配置
             
         Returns:
-            元素内容
+            (是否有效, 消息, 单元数量)
+            
+        Raises:
+            ValueError: 不支持的验证模式
+            FileNotFoundError: schema模式下未配置模式目录或模式文件不存在
         """
+        check_mode(mode)
+        if mode == MODE_WELLFORMED:
+            unit_count, error = check_wellformed(content, 'xliff', _UNIT_NAMES)
+            if error:
+                return False, f"XLIFF格式无效: {error}", 0
+            return True, "XLIFF格式良好", unit_count
+        if mode == MODE_SCHEMA:
+            check_schema_dir(schema_dir)
+            unit_count, error = validate_against(
+                content,
+                lambda root: xliff_validator(schema_dir, root),
+                _UNIT_NAMES
+            )
+            if error:
+                return False, f"XLIFF不符合模式: {error}", 0
+            return True, "XLIFF符合模式", unit_count
+        
         try:
-            # 构建匹配特定trans-unit或unit中的source/target元素的正则表达式
-            unit_pattern = rf'<(?:trans-unit|unit)[^>]*id=["\']{re.escape(unit_id)}["\'][^>]*>([\s\S]*?)</(?:trans-unit|unit)>'
+            store = xliff.xlifffile()
+            store.parse(xml_bytes(content))
             
-            unit_match = re.search(unit_pattern, xml_content, re.IGNORECASE)
-            if not unit_match:
-                return ""
+            # 计算非header单元的数量
+            unit_count = sum(1 for unit in store.units if not unit.isheader())
             
-            unit_content = unit_match.group(1)
+            return True, "XLIFF格式有效", unit_count
+        except Exception as e:
+            return False, f"XLIFF格式无效: {str(e)}", 0
+    
+    @staticmethod
+    def process_xliff_with_tags(file_name: str, content: XmlContent) -> List[XliffData]:
+        """
+        专门用于AI翻译的XLIFF处理器，保留内部标记
+        单次扫描原始文档，直接切片得到source/target的内部标记，
+        不经过DOM重新序列化，避免解析器添加命名空间
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
             
-            # 在unit内容中查找source或target元素
-            element_pattern = rf'<{element_name}[^>]*>([\s\S]*?)</{element_name}>'
+        Returns:
+            XliffData对象列表，保留原始标签
+        """
+        with stage(STAGE_EXTRACT):
+            return list(XliffProcessorService.iter_xliff_with_tags(file_name, content))
+    
+    @staticmethod
+    def iter_xliff_with_tags(file_name: str, content: XmlContent) -> Iterator[XliffData]:
+        """
+        逐个产出保留内部标记的翻译单元，规则同process_xliff_with_tags
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
             
-            element_match = re.search(element_pattern, unit_content, re.IGNORECASE)
-            if not element_match:
-                return ""
+        Returns:
+            XliffData对象迭代器，保留原始标签
+        """
+        return _as_models(XliffProcessorService.iter_xliff_with_tags_rows(file_name, content))
+    
+    @staticmethod
+    def process_xliff_with_tags_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> List[tuple]:
+        """
+        以元组形式返回保留内部标记的翻译单元（快速路径，不创建Pydantic模型）
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
             
-            content = element_match.group(1).strip()
+        Returns:
+            元组列表，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
+        """
+        with stage(STAGE_EXTRACT):
+            return list(XliffProcessorService.iter_xliff_with_tags_rows(file_name, content, fields, unit_filter))
+    
+    @staticmethod
+    def iter_xliff_with_tags_rows(
+        file_name: str,
+        content: XmlContent,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
+        """
+        逐个产出保留内部标记的翻译单元元组
+        
+        Args:
+            file_name: 文件名
+            content: XLIFF文件内容
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
             
-            # 解码HTML实体
-            content = XliffProcessorService._decode_html_entities(content)
+        Returns:
+            元组迭代器，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
+        """
+        try:
+            with stage(STAGE_PARSE):
+                if hasattr(content, 'read'):
+                    content = xml_bytes(content)
+                # 索引只按标签位置切片，不检查文档结构；先流式检查格式是否良好（不建树），
+                # 截断或标签不配对的文档与 process_xliff 一样报错
+                _, error = check_wellformed(content, 'xliff', _UNIT_NAMES)
+                if error:
+                    raise ValueError(error)
+                index = XliffUnitIndex.build(xml_text(content))
+            if not index.has_root:
+                raise ValueError("未找到<xliff>根元素，不是有效的XLIFF文件")
+            
+            yield from XliffProcessorService.iter_xliff_index_rows(file_name, index, fields, unit_filter)
             
-            return content
         except Exception as e:
-            logger.error(f"提取{element_name}内容失败: {str(e)}")
-            return ""
+            logger.error(f"处理带标签的XLIFF文件失败: {str(e)}")
+            raise
     
     @staticmethod
-    def _get_file_languages(xml_content: str) -> tuple[str, str]:
+    def process_xliff_index_rows(
+        file_name: str,
+        index: XliffUnitIndex,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> List[tuple]:
         """
-        从文件级别获取语言信息
+        从已建立的单元索引提取保留内部标记的翻译单元元组（文档会话使用，不再扫描文档）
         
         Args:
-            xml_content: XML内容
+            file_name: 文件名
+            index: 记录了全部单元的XLIFF单元索引
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，None表示返回全部单元
             
         Returns:
-            (源语言, 目标语言)
+            元组列表，字段顺序同 fields（默认 XLIFF_DATA_FIELDS），与 process_xliff_with_tags_rows 的结果一致
         """
-        try:
-            # 查找file元素的语言属性
-            file_pattern = r'<file[^>]*source-language=["\'"]([^"\']*)["\'][^>]*target-language=["\'"]([^"\']*)["\'][^>]*>'
-            match = re.search(file_pattern, xml_content, re.IGNORECASE)
-            if match:
-                return match.group(1).lower(), match.group(2).lower()
-            
-            # 尝试另一种属性顺序
-            file_pattern2 = r'<file[^>]*target-language=["\'"]([^"\']*)["\'][^>]*source-language=["\'"]([^"\']*)["\'][^>]*>'
-            match2 = re.search(file_pattern2, xml_content, re.IGNORECASE)
-            if match2:
-                return match2.group(2).lower(), match2.group(1).lower()
-            
-            return "", ""
-        except Exception:
-            return "", ""
+        with stage(STAGE_EXTRACT):
+            return list(XliffProcessorService.iter_xliff_index_rows(file_name, index, fields, unit_filter))
+    
+    @staticmethod
+    def iter_xliff_index_rows(
+        file_name: str,
+        index: XliffUnitIndex,
+        fields: Optional[Sequence[str]] = None,
+        unit_filter: Optional[UnitFilter] = None
+    ) -> Iterator[tuple]:
+        """
+        从单元索引逐个产出保留内部标记的翻译单元元组
+        
+        Args:
+            file_name: 文件名
+            index: XLIFF单元索引
+            fields: 需要的字段（select_fields 的结果），None表示全部字段
+            unit_filter: 过滤条件和分页，被过滤的单元不切片解码source
+            
+        Returns:
+            元组迭代器，字段顺序同 fields（默认 XLIFF_DATA_FIELDS）
+        """
+        fields = XLIFF_DATA_FIELDS if fields is None else tuple(fields)
+        project = row_projector(fields, XLIFF_DATA_FIELDS)
+        want_percent = 'percent' in fields or (unit_filter is not None and unit_filter.needs_percent)
+        want_source = 'source' in fields
+        want_target = 'target' in fields or (unit_filter is not None and unit_filter.needs_target)
+        want_langs = 'srcLang' in fields or 'tgtLang' in fields or (unit_filter is not None and unit_filter.needs_langs)
+        matched = 0
+        for unit in index.units:
+            # 百分比和语言每次访问都要从属性文本中查找，只取一次
+            percent = unit.percent if want_percent else -1.0
+            src_lang = unit.src_lang if want_langs else ""
+            tgt_lang = unit.tgt_lang if want_langs else ""
+            # 切片得到原始内部标记并解码HTML实体
+            target = XliffProcessorService._decode_html_entities(index.inner(unit.target).strip()) if want_target else ""
+            
+            if unit_filter is not None:
+                if not unit_filter.accepts(unit.unit_id, percent, src_lang, tgt_lang, target):
+                    continue
+                matched += 1
+                if matched <= unit_filter.offset:
+                    continue
+            
+            source = XliffProcessorService._decode_html_entities(index.inner(unit.source).strip()) if want_source else ""
+            row = (
+                file_name,
+                unit.ordinal,
+                unit.unit_id,  # 保存真实的单元ID
+                percent,
+                source,
+                target,
+                src_lang,
+                tgt_lang
+            )
+            yield row if project is None else project(row)
+            
+            if unit_filter is not None and matched == unit_filter.stop:
+                return
     
     @staticmethod
     def _decode_html_entities(text: str) -> str:
@@ -332,8 +691,24 @@ class XliffProcessorService:
         Returns:
             (更新后的内容, 替换数量)
         """
-        updated_content = content
+        updated_content, replacements_count, _ = XliffProcessorService.splice_xliff_targets(content, translations)
+        return updated_content, replacements_count
+    
+    @staticmethod
+    def plan_xliff_edits(index: XliffUnitIndex, translations: List[dict]) -> tuple[List[Edit], int, List[str]]:
+        """
+        根据单元索引计算target替换所需的编辑，不修改文档
+        
+        Args:
+            index: XLIFF单元索引
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            
+        Returns:
+            (按文档顺序排列的编辑列表, 替换数量, 未匹配的单元ID列表)
+        """
+        pending = {}
         replacements_count = 0
+        unmatched = []
         
         for translation in translations:
             if not translation.get('aiResult') and not translation.get('mtResult'):
@@ -343,56 +718,107 @@ class XliffProcessorService:
             # 优先使用unitId，如果没有则fallback到segNumber（向后兼容）
             unit_id = translation.get('unitId') or str(translation['segNumber'])
             
-            # 查找对应的trans-unit或unit
-            unit_pattern = rf'(<(?:trans-unit|unit)[^>]*id=["\']{re.escape(unit_id)}["\'][^>]*>)([\s\S]*?)(</(?:trans-unit|unit)>)'
-            unit_match = re.search(unit_pattern, updated_content, re.IGNORECASE)
-            
-            if not unit_match:
+            unit = index.get(unit_id)
+            if unit is None or (unit.target is None and unit.source is None):
+                unmatched.append(unit_id)
                 continue
             
-            unit_start = unit_match.group(1)
-            unit_content = unit_match.group(2)
-            unit_end = unit_match.group(3)
+            # 同一单元出现多次时以最后一次为准
+            pending[unit.ordinal] = (unit, new_target_content)
+            replacements_count += 1
+        
+        edits = []
+        for ordinal in sorted(pending):
+            unit, new_target_content = pending[ordinal]
+            if unit.target is not None:
+                # 如果已有target，保留其属性并替换整个元素
+                target_start, target_end = unit.target[0], unit.target[1]
+                edits.append((target_start, target_end, f'<target{unit.target_attrs}>{new_target_content}</target>'))
+            else:
+                # 如果没有target，在source之后创建新的target
+                source_end = unit.source[1]
+                edits.append((source_end, source_end, f'\n        <target>{new_target_content}</target>'))
+        
+        return edits, replacements_count, unmatched
+    
+    @staticmethod
+    def plan_xliff_targets(content: str, translations: List[dict]) -> tuple[List[Edit], int, List[str]]:
+        """
+        建立单元索引并计算替换所需的编辑，不生成新内容
+        
+        调用方可以用 splice.iter_spliced 按片段流式输出更新后的文档
+        
+        Args:
+            content: 原始XLIFF文件内容
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
             
-            # 在unit内容中查找并替换target
-            target_pattern = r'<target[^>]*>[\s\S]*?</target>'
-            target_match = re.search(target_pattern, unit_content, re.IGNORECASE)
+        Returns:
+            (编辑列表, 替换数量, 未匹配的单元ID列表)
+        """
+        # 只为需要替换的单元建立索引
+        wanted = {translation.get('unitId') or str(translation['segNumber']) for translation in translations}
+        with stage(STAGE_PARSE):
+            index = XliffUnitIndex.build(content, wanted)
+        with stage(STAGE_REPLACE):
+            return XliffProcessorService.plan_xliff_edits(index, translations)
+    
+    @staticmethod
+    def splice_xliff_targets(content: str, translations: List[dict], dry_run: bool = False) -> tuple[str, int, List[str]]:
+        """
+        单次扫描建立单元索引，再一次性拼接输出更新后的XLIFF内容
+        
+        耗时与文档大小和翻译数量成线性关系
+        
+        Args:
+            content: 原始XLIFF文件内容
+            translations: 翻译数据列表，包含segNumber, unitId, aiResult, mtResult
+            dry_run: 为True时只统计可替换数量和未匹配的单元，不生成新内容
             
-            if target_match:
-                # 如果已有target，替换其内容
-                existing_target = target_match.group(0)
-                
-                # 提取target的属性
-                target_attr_pattern = r'<target([^>]*?)>'
-                target_attr_match = re.search(target_attr_pattern, existing_target, re.IGNORECASE)
-                target_attributes = target_attr_match.group(1) if target_attr_match else ''
-                
-                new_target = f'<target{target_attributes}>{new_target_content}</target>'
-                new_unit_content = unit_content.replace(existing_target, new_target)
-                
-                updated_content = updated_content.replace(
-                    unit_match.group(0),
-                    unit_start + new_unit_content + unit_end
-                )
-                
-                replacements_count += 1
-            else:
-                # 如果没有target，创建新的target
-                source_pattern = r'(<source[^>]*>[\s\S]*?</source>)'
-                source_match = re.search(source_pattern, unit_content, re.IGNORECASE)
-                
-                if source_match:
-                    new_target = f'\n        <target>{new_target_content}</target>'
-                    new_unit_content = unit_content.replace(
-                        source_match.group(0),
-                        source_match.group(0) + new_target
-                    )
-                    
-                    updated_content = updated_content.replace(
-                        unit_match.group(0),
-                        unit_start + new_unit_content + unit_end
-                    )
-                    
-                    replacements_count += 1
+        Returns:
+            (更新后的内容, 替换数量, 未匹配的单元ID列表)，dry_run时返回原始内容
+        """
+        edits, replacements_count, unmatched = XliffProcessorService.plan_xliff_targets(content, translations)
+        
+        if dry_run:
+            return content, replacements_count, unmatched
         
-        return updated_content, replacements_count
\ No newline at end of file
+        with stage(STAGE_REPLACE):
+            return apply_edits(content, edits), replacements_count, unmatched
+
+
+def _is_xliff2(head: XmlHead) -> bool:
+    return head.namespace.startswith(_XLIFF_2_NAMESPACE_PREFIX) or head.attributes.get('version', '').startswith('2')
+
+
+def process_xliff12_rows(file_name: str, content: XmlContent, fields: Optional[Sequence[str]] = None,
+                         unit_filter: Optional[UnitFilter] = None, engine: Optional[str] = None) -> List[tuple]:
+    """格式注册表使用的XLIFF 1.x提取函数，engine未指定时使用toolkit"""
+    return XliffProcessorService.process_xliff_rows(file_name, content, engine or ENGINE_TOOLKIT, fields, unit_filter)
+
+
+def process_xliff2_rows(file_name: str, content: XmlContent, fields: Optional[Sequence[str]] = None,
+                        unit_filter: Optional[UnitFilter] = None, engine: Optional[str] = None) -> List[tuple]:
+    """格式注册表使用的XLIFF 2.x提取函数，translate-toolkit不支持 <unit>，总是使用stream引擎"""
+    return XliffProcessorService.process_xliff_rows(file_name, content, ENGINE_STREAM, fields, unit_filter)
+
+
+register_format(FileFormat(
+    name="xliff-2",
+    family="xliff",
+    label="XLIFF 2.x",
+    sniff=lambda head: head.root == 'xliff' and _is_xliff2(head),
+    extensions=(),
+    fields=XLIFF_DATA_FIELDS,
+    process=process_xliff2_rows,
+    replace=XliffProcessorService.replace_xliff_targets
+))
+register_format(FileFormat(
+    name="xliff-1.2",
+    family="xliff",
+    label="XLIFF 1.2",
+    sniff=lambda head: head.root == 'xliff' and not _is_xliff2(head),
+    extensions=('xlf', 'xliff', 'sdlxliff', 'mqxliff'),
+    fields=XLIFF_DATA_FIELDS,
+    process=process_xliff12_rows,
+    replace=XliffProcessorService.replace_xliff_targets
+))
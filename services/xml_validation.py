@@ -0,0 +1,259 @@
+from lxml import etree
+from services.encoding import XmlContent, xml_bytes
+from typing import FrozenSet, Iterator, Optional, Tuple
+import functools
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# 验证模式
+MODE_WELLFORMED = "wellformed"
+MODE_STRUCTURAL = "structural"
+MODE_SCHEMA = "schema"
+VALIDATION_MODES = (MODE_WELLFORMED, MODE_STRUCTURAL, MODE_SCHEMA)
+
+# 每次送入解析器的字符数（字节内容按同样大小切片），避免为整个文档生成一份bytes副本
+_FEED_CHUNK_SIZE = 1 << 20
+
+XLIFF_12_NAMESPACE = "urn:oasis:names:tc:xliff:document:1.2"
+XLIFF_20_NAMESPACE = "urn:oasis:names:tc:xliff:document:2.0"
+
+# 模式目录中应提供的文件（官方发布的原始文件名）
+XLIFF_12_SCHEMA = "xliff-core-1.2-transitional.xsd"
+XLIFF_20_SCHEMA = "xliff_core_2.0.xsd"
+TMX_14_DTD = "tmx14.dtd"
+
+
+def check_mode(mode: str):
+    """
+    检查验证模式是否受支持
+
+    Args:
+        mode: 验证模式
+
+    Raises:
+        ValueError: 不支持的模式
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"不支持的验证模式: {mode}，可选值: {', '.join(VALIDATION_MODES)}")
+
+
+def _localname(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit('}', 1)[-1]
+
+
+class _UnitCounter:
+    """
+    解析器target：不构建元素树，只检查根元素并统计单元数量
+
+    未定义data/end等回调，lxml不会为文本和结束标签调用Python代码。
+    """
+
+    def __init__(self, root_name: str, unit_names: FrozenSet[str]):
+        self.root_name = root_name
+        self.unit_names = unit_names
+        self.root_seen = False
+        self.count = 0
+
+    def start(self, tag, attrib):
+        name = _localname(tag)
+        if not self.root_seen:
+            if name != self.root_name:
+                raise ValueError(f"根元素为<{name}>，不是<{self.root_name}>")
+            self.root_seen = True
+        elif name in self.unit_names:
+            self.count += 1
+
+    def close(self) -> int:
+        return self.count
+
+
+def _feed_chunks(content: XmlContent) -> Iterator[bytes]:
+    """把内容切成送入解析器的字节块，至少产出一块"""
+    if hasattr(content, 'read'):
+        chunk = content.read(_FEED_CHUNK_SIZE)
+        yield chunk
+        while chunk:
+            chunk = content.read(_FEED_CHUNK_SIZE)
+            if chunk:
+                yield chunk
+        return
+    if not content:
+        yield b''
+        return
+    if isinstance(content, str):
+        for start in range(0, len(content), _FEED_CHUNK_SIZE):
+            yield content[start:start + _FEED_CHUNK_SIZE].encode('utf-8')
+        return
+    view = memoryview(content)
+    for start in range(0, len(view), _FEED_CHUNK_SIZE):
+        yield view[start:start + _FEED_CHUNK_SIZE].tobytes()
+
+
+def check_wellformed(content: XmlContent, root_name: str, unit_names: FrozenSet[str]) -> Tuple[int, Optional[str]]:
+    """
+    流式检查XML是否格式良好并统计单元数量
+
+    内容分块送入解析器，不保留元素树，内存占用与文件大小无关；字节内容不解码，
+    由解析器按BOM和XML声明处理；遇到第一个错误立即停止，错误信息包含行号和列号。
+
+    Args:
+        content: 文件内容，文本、字节或二进制文件对象
+        root_name: 期望的根元素本地名称
+        unit_names: 计为翻译单元的元素本地名称
+
+    Returns:
+        (单元数量, 错误信息)，格式良好时错误信息为None
+    """
+    counter = _UnitCounter(root_name, unit_names)
+    parser = etree.XMLParser(target=counter, resolve_entities=False, no_network=True)
+    try:
+        for chunk in _feed_chunks(content):
+            parser.feed(chunk)
+        return parser.close(), None
+    except etree.XMLSyntaxError as e:
+        # libxml2的错误信息已包含行号和列号
+        return counter.count, e.msg
+    except ValueError as e:
+        return counter.count, str(e)
+
+
+class _SchemaResolver(etree.Resolver):
+    """把模式中引用的外部文件（如xml.xsd）映射到模式目录中的同名文件"""
+
+    def __init__(self, schema_dir: str):
+        super().__init__()
+        self.schema_dir = schema_dir
+
+    def resolve(self, url, pubid, context):
+        local_path = os.path.join(self.schema_dir, os.path.basename(url or ""))
+        if os.path.isfile(local_path):
+            return self.resolve_filename(local_path, context)
+        return None
+
+
+def check_schema_dir(schema_dir: str):
+    """
+    检查是否配置了模式目录
+
+    Args:
+        schema_dir: 模式目录
+
+    Raises:
+        FileNotFoundError: 未配置模式目录
+    """
+    if not schema_dir:
+        raise FileNotFoundError("未配置模式目录（SCHEMA_DIR），无法进行schema验证")
+
+
+def _schema_path(schema_dir: str, file_name: str) -> str:
+    check_schema_dir(schema_dir)
+    path = os.path.join(schema_dir, file_name)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"未找到模式文件 {file_name}，请将其放入模式目录 {schema_dir}")
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def load_xml_schema(schema_dir: str, file_name: str) -> etree.XMLSchema:
+    """
+    加载并编译XSD模式，每个进程只编译一次
+
+    Args:
+        schema_dir: 模式目录
+        file_name: XSD文件名
+
+    Returns:
+        编译后的XMLSchema对象
+    """
+    parser = etree.XMLParser(no_network=True)
+    parser.resolvers.add(_SchemaResolver(schema_dir))
+    document = etree.parse(_schema_path(schema_dir, file_name), parser)
+    logger.info(f"已加载模式 {file_name}")
+    return etree.XMLSchema(document)
+
+
+@functools.lru_cache(maxsize=None)
+def load_dtd(schema_dir: str, file_name: str) -> etree.DTD:
+    """
+    加载DTD，每个进程只加载一次
+
+    Args:
+        schema_dir: 模式目录
+        file_name: DTD文件名
+
+    Returns:
+        DTD对象
+    """
+    dtd = etree.DTD(_schema_path(schema_dir, file_name))
+    logger.info(f"已加载DTD {file_name}")
+    return dtd
+
+
+def validate_against(content: XmlContent, select_validator, unit_names: FrozenSet[str]) -> Tuple[int, Optional[str]]:
+    """
+    解析完整文档并使用XSD/DTD验证
+
+    Args:
+        content: 文件内容
+        select_validator: 根据根元素返回XMLSchema或DTD对象的函数，
+            无法确定时抛出ValueError
+        unit_names: 计为翻译单元的元素本地名称
+
+    Returns:
+        (单元数量, 错误信息)，有效时错误信息为None
+
+    Raises:
+        FileNotFoundError: 模式文件不存在
+    """
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    try:
+        root = etree.fromstring(xml_bytes(content), parser)
+    except etree.XMLSyntaxError as e:
+        return 0, e.msg
+
+    try:
+        validator = select_validator(root)
+    except ValueError as e:
+        return 0, str(e)
+    unit_count = sum(1 for element in root.iter() if _localname(element.tag) in unit_names)
+    if validator.validate(root):
+        return unit_count, None
+    error = validator.error_log.filter_from_errors()[0]
+    return unit_count, f"第{error.line}行第{error.column}列: {error.message}"
+
+
+def xliff_validator(schema_dir: str, root) -> etree.XMLSchema:
+    """
+    根据根元素的命名空间选择XLIFF 1.2或2.0的模式
+
+    Args:
+        schema_dir: 模式目录
+        root: 根元素
+
+    Returns:
+        XMLSchema对象
+    """
+    namespace = etree.QName(root).namespace
+    if namespace == XLIFF_12_NAMESPACE:
+        return load_xml_schema(schema_dir, XLIFF_12_SCHEMA)
+    if namespace == XLIFF_20_NAMESPACE:
+        return load_xml_schema(schema_dir, XLIFF_20_SCHEMA)
+    raise ValueError(f"无法根据命名空间 {namespace or '（无）'} 确定XLIFF模式")
+
+
+def tmx_validator(schema_dir: str, root) -> etree.DTD:
+    """
+    TMX 1.4没有官方XSD，使用官方DTD验证
+
+    Args:
+        schema_dir: 模式目录
+        root: 根元素
+
+    Returns:
+        DTD对象
+    """
+    return load_dtd(schema_dir, TMX_14_DTD)
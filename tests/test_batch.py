@@ -0,0 +1,185 @@
+import pytest
+from fastapi.testclient import TestClient
+import io
+import json
+import zipfile
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+BAD_FILE = {"fileName": "bad.xliff", "content": "<invalid>Not XLIFF</invalid>"}
+
+def test_batch_process_xliff_isolates_failures():
+    """测试批量处理时单个文件失败不影响其他文件"""
+    files = [
+        {"fileName": "a.xliff", "content": SAMPLE_FIXTURE},
+        BAD_FILE,
+        {"fileName": "c.xliff", "content": SAMPLE_FIXTURE},
+    ]
+    response = client.post("/api/batch/xliff/process", json={"files": files})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is False
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert [result["success"] for result in data["results"]] == [True, False, True]
+    assert len(data["results"][0]["data"]) == 10
+    assert data["results"][1]["data"] is None
+    assert data["message"] == "处理完成 3 个文件，成功 2 个，失败 1 个"
+
+def test_batch_process_tmx():
+    """测试TMX批量处理"""
+    response = client.post("/api/batch/tmx/process", json={"files": [{"fileName": "a.tmx", "content": SAMPLE_TMX}]})
+
+    data = response.json()
+    assert data["success"] is True
+    assert data["results"][0]["data"][0]["target"] == "你好"
+
+def test_batch_replace():
+    """测试批量替换，包括dry_run"""
+    files = [
+        {
+            "fileName": "a.xliff",
+            "content": SAMPLE_FIXTURE,
+            "translations": [{"segNumber": 1, "unitId": "greeting", "aiResult": "您好"}]
+        },
+        {
+            "fileName": "b.xliff",
+            "content": SAMPLE_FIXTURE,
+            "translations": [{"segNumber": 1, "unitId": "missing", "aiResult": "x"}]
+        },
+    ]
+    data = client.post("/api/batch/xliff/replace", json={"files": files}).json()
+
+    assert data["results"][0]["replacements_count"] == 1
+    assert "您好" in data["results"][0]["content"]
+    assert data["results"][1]["replacements_count"] == 0
+
+    data = client.post("/api/batch/xliff/replace?dry_run=true", json={"files": files}).json()
+    assert data["results"][0]["content"] == SAMPLE_FIXTURE
+    assert data["results"][1]["unmatched"] == ["missing"]
+
+    tmx_files = [{"fileName": "a.tmx", "content": SAMPLE_TMX, "translations": [{"segNumber": 1, "unitId": "1", "aiResult": "嗨"}]}]
+    data = client.post("/api/batch/tmx/replace", json={"files": tmx_files}).json()
+    assert "<seg>嗨</seg>" in data["results"][0]["content"]
+
+def test_batch_ndjson():
+    """测试批量结果按完成顺序流式输出"""
+    files = [{"fileName": "a.xliff", "content": SAMPLE_FIXTURE}, BAD_FILE]
+    response = client.post(
+        "/api/batch/xliff/process",
+        json={"files": files},
+        headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1]
+    assert lines[-1] == {"success": True, "message": "处理完成 2 个文件，成功 1 个，失败 1 个", "count": 2}
+
+def test_batch_empty():
+    """测试空批次"""
+    data = client.post("/api/batch/xliff/process", json={"files": []}).json()
+    assert data == {"results": [], "success": True, "message": "处理完成 0 个文件，成功 0 个，失败 0 个"}
+
+def make_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("kit/", "")
+        archive.writestr("kit/a.sdlxliff", SAMPLE_FIXTURE)
+        archive.writestr("kit/memory.tmx", SAMPLE_TMX.encode("utf-16"))
+        archive.writestr("kit/sniffed.xml", SAMPLE_FIXTURE.encode("utf-8-sig"))
+        archive.writestr("kit/broken.xlf", BAD_FILE["content"])
+        archive.writestr("kit/readme.txt", "not a translation file")
+        archive.writestr("__MACOSX/kit/._a.sdlxliff", b"\x00\x05")
+    return buffer.getvalue()
+
+def test_archive_upload():
+    """测试压缩包上传按类型分派并返回每个文件的结果"""
+    response = client.post("/api/batch/archive", files={"file": ("kit.zip", make_archive(), "application/zip")})
+
+    assert response.status_code == 200
+    data = response.json()
+    results = {result["fileName"]: result for result in data["results"]}
+    assert set(results) == {"kit/a.sdlxliff", "kit/memory.tmx", "kit/sniffed.xml", "kit/broken.xlf"}
+    assert results["kit/a.sdlxliff"]["fileType"] == "xliff"
+    assert len(results["kit/a.sdlxliff"]["data"]) == 10
+    assert results["kit/memory.tmx"]["fileType"] == "tmx"
+    assert results["kit/memory.tmx"]["data"][0]["target"] == "你好"
+    assert results["kit/sniffed.xml"]["fileType"] == "xliff"
+    assert results["kit/sniffed.xml"]["success"] is True
+    assert results["kit/broken.xlf"]["success"] is False
+    assert data["message"] == "处理完成 4 个文件，成功 3 个，失败 1 个，跳过 2 个其他文件"
+
+def test_archive_xliff2_member(monkeypatch):
+    """扩展名为.xlf的XLIFF 2.0文件按注册表识别，使用stream引擎提取（默认引擎为toolkit时也是如此）"""
+    monkeypatch.setattr(settings, "XLIFF_ENGINE", "toolkit")
+    xliff2 = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en" trgLang="ja">
+  <file id="f1">
+    <unit id="u1"><segment><source>Hello</source><target>こんにちは</target></segment></unit>
+    <unit id="u2"><segment><source>Bye</source></segment></unit>
+  </file>
+</xliff>"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("v2.xlf", xliff2)
+        archive.writestr("v1.xlf", SAMPLE_FIXTURE)
+
+    data = client.post("/api/batch/archive", files={"file": ("kit.zip", buffer.getvalue(), "application/zip")}).json()
+    results = {result["fileName"]: result for result in data["results"]}
+    assert results["v2.xlf"]["success"] is True
+    assert results["v2.xlf"]["fileType"] == "xliff"
+    assert [unit["unitId"] for unit in results["v2.xlf"]["data"]] == ["u1", "u2"]
+    assert results["v2.xlf"]["data"][0]["target"] == "こんにちは"
+    assert len(results["v1.xlf"]["data"]) == 10
+
+def test_archive_upload_ndjson():
+    """测试压缩包结果流式输出"""
+    response = client.post(
+        "/api/batch/archive",
+        files={"file": ("kit.zip", make_archive(), "application/zip")},
+        headers={"Accept": "application/x-ndjson"}
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len(lines) == 5
+    assert lines[-1]["count"] == 4
+
+def test_archive_member_size_limit(monkeypatch):
+    """测试解压后超过大小限制的文件单独报错"""
+    monkeypatch.setattr(settings, "ARCHIVE_MAX_MEMBER_BYTES", 100)
+    data = client.post("/api/batch/archive", files={"file": ("kit.zip", make_archive(), "application/zip")}).json()
+
+    results = {result["fileName"]: result for result in data["results"]}
+    assert results["kit/a.sdlxliff"]["success"] is False
+    assert "100" in results["kit/a.sdlxliff"]["message"]
+
+def test_archive_rejects_non_zip():
+    """测试非ZIP文件返回400"""
+    response = client.post("/api/batch/archive", files={"file": ("kit.zip", b"not a zip", "application/zip")})
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
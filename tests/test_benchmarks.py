@@ -0,0 +1,67 @@
+import pytest
+from lxml import etree
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import FORMATS, FORMAT_TMX, generate
+from benchmarks.bench_suite import compare, run_case
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+@pytest.mark.parametrize("file_format", FORMATS)
+def test_corpus_is_deterministic_and_wellformed(file_format):
+    """同一参数生成相同内容，且是格式良好的XML，单元数量正确"""
+    content = generate(file_format, 50, seed=3, tag_density=1.5, text_length=6)
+    assert content == generate(file_format, 50, seed=3, tag_density=1.5, text_length=6)
+    assert content != generate(file_format, 50, seed=4, tag_density=1.5, text_length=6)
+    etree.fromstring(content.encode('utf-8'))
+
+    if file_format == FORMAT_TMX:
+        assert len(TmxProcessorService.process_tmx_rows("bench.tmx", content)) == 50
+    else:
+        assert len(XliffProcessorService.process_xliff_rows("bench.xliff", content, engine="stream")) == 50
+
+def test_corpus_tag_density_and_text_length():
+    """标签密度和句段长度参数生效"""
+    plain = generate("xliff12", 200, tag_density=0)
+    tagged = generate("xliff12", 200, tag_density=2)
+    assert "<g " not in plain and "<x " not in plain
+    assert tagged.count(' id="') > plain.count(' id="') + 200
+    assert len(generate("tmx", 200, text_length=30)) > 2 * len(generate("tmx", 200, text_length=5))
+
+def test_compare_flags_regressions():
+    """吞吐量下降或内存增长超过容差时标记为回归"""
+    key = {"case": "process_tmx", "format": "tmx", "units": 1000, "tag_density": 0.4, "text_length": 10}
+    baseline = [{**key, "units_per_sec": 1000.0, "peak_memory_mb": 10.0}]
+
+    results = [{**key, "units_per_sec": 900.0, "peak_memory_mb": 12.0}]
+    assert compare(results, baseline, 0.25) == []
+    assert results[0]["speed_vs_baseline"] == 0.9
+
+    results = [{**key, "units_per_sec": 500.0, "peak_memory_mb": 100.0}]
+    regressions = compare(results, baseline, 0.25)
+    assert len(regressions) == 2 and results[0]["regression"] is True
+
+    # 基线中没有的用例不比较
+    results = [{**key, "units": 5000, "units_per_sec": 1.0, "peak_memory_mb": 1.0}]
+    assert compare(results, baseline, 0.25) == []
+
+def test_throughput_counts_output_units(monkeypatch):
+    """提取类用例按实际产出的单元计算吞吐量，没有产出时记为错误"""
+    # run_case 会修改这两个环境变量，测试结束后恢复
+    monkeypatch.setenv("EXECUTOR_KIND", "thread")
+    monkeypatch.setenv("PARSE_CACHE_ENABLED", "false")
+
+    # 每个TMX单元有两个句段；seconds保留4位小数，单元数量取得足够大以免舍入影响比较
+    result = run_case("clean_tmx_tags", "tmx", 2000, 0, 0.4, 10, 1)
+    assert result["output_units"] == 4000
+    assert result["units_per_sec"] == pytest.approx(4000 / result["seconds"], rel=0.1)
+
+    # translate-toolkit不解析XLIFF 2.0，处理结果为空
+    result = run_case("process_xliff[toolkit]", "xliff20", 20, 0, 0.4, 10, 1)
+    assert result["output_units"] == 0
+    assert "units_per_sec" not in result and "error" in result
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from api.columnar import COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, build_columnar, decode_columnar
+from models.xliff import TMX_DATA_FIELDS, XLIFF_DATA_FIELDS
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="zh" datatype="plaintext" original="a.txt">
+    <body>
+      <trans-unit id="1" percent="100">
+        <source>Hello</source>
+        <target>你好</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Bye</source>
+        <target>再见</target>
+      </trans-unit>
+      <trans-unit id="3">
+        <source>Thanks</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+    <tu tuid="2">
+      <tuv xml:lang="en"><seg>Bye</seg></tuv>
+      <tuv xml:lang="zh"><seg>再见</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+def test_build_columnar_hoists_constants():
+    """所有单元相同的字段只出现在constants中"""
+    rows = XliffProcessorService.process_xliff_rows("a.xliff", SAMPLE_XLIFF)
+    payload = build_columnar(rows, XLIFF_DATA_FIELDS, "ok")
+    assert payload["count"] == 3
+    assert payload["constants"] == {"fileName": "a.xliff", "srcLang": "en", "tgtLang": "zh"}
+    assert list(payload["columns"]["percent"]) == [100.0, -1.0, -1.0]
+    assert set(payload["constants"]) | set(payload["columns"]) == set(XLIFF_DATA_FIELDS)
+
+def test_build_columnar_empty():
+    """没有单元时所有列都为空"""
+    payload = build_columnar([], XLIFF_DATA_FIELDS, "ok")
+    assert payload["count"] == 0
+    assert payload["constants"] == {} and payload["columns"] == {}
+    assert list(decode_columnar(b'{"format":"columnar","fields":[],"count":0,"constants":{},"columns":{}}').rows()) == []
+
+@pytest.mark.parametrize("media_type", [COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE])
+def test_xliff_columnar_round_trip(media_type):
+    """列式响应解码后与快速路径的元组一致"""
+    response = client.post(
+        "/api/xliff/process",
+        json={"fileName": "a.xliff", "content": SAMPLE_XLIFF},
+        headers={"Accept": media_type}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    assert "Accept" in response.headers["vary"]
+
+    units = decode_columnar(response.content, response.headers["content-type"])
+    assert units.success is True
+    assert len(units) == 3
+    assert units.column("unitId") == ["1", "2", "3"]
+    assert units.column("fileName") == ["a.xliff"] * 3
+    assert list(units.rows()) == XliffProcessorService.process_xliff_rows("a.xliff", SAMPLE_XLIFF)
+
+@pytest.mark.parametrize("media_type", [COLUMNAR_JSON_MEDIA_TYPE, "application/msgpack"])
+def test_tmx_upload_columnar(media_type):
+    """上传端点同样支持列式响应"""
+    response = client.post(
+        "/api/tmx/upload",
+        files={"file": ("a.tmx", SAMPLE_TMX.encode('utf-8'), "application/xml")},
+        headers={"Accept": media_type}
+    )
+    assert response.status_code == 200
+    units = decode_columnar(response.content, response.headers["content-type"])
+    assert list(units.rows()) == TmxProcessorService.process_tmx_rows("a.tmx", SAMPLE_TMX)
+    assert units.fields == list(TMX_DATA_FIELDS)
+
+def test_default_accept_returns_row_json():
+    """未请求列式格式时返回原有结构"""
+    response = client.post(
+        "/api/xliff/process",
+        json={"fileName": "a.xliff", "content": SAMPLE_XLIFF},
+        headers={"Accept": "application/json"}
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["data"][0]["unitId"] == "1"
+
+def test_decode_rejects_row_json():
+    """解码普通JSON响应时报错"""
+    with pytest.raises(ValueError):
+        decode_columnar(b'{"data":[],"success":true}')
+
+def test_openapi_lists_columnar_types():
+    """OpenAPI文档声明列式媒体类型，并保留原有模型"""
+    schema = client.get("/openapi.json").json()
+    content = schema["paths"]["/api/xliff/process"]["post"]["responses"]["200"]["content"]
+    assert {COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, "application/x-ndjson", "application/json"} <= set(content)
+    assert content["application/json"]["schema"]["$ref"].endswith("/XliffProcessResponse")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
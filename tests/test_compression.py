@@ -0,0 +1,226 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+import gzip
+import json
+import tracemalloc
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import brotli
+import zstandard
+from main import app
+from config import settings
+from middleware.compression import CompressionMiddleware, DecompressedTooLarge, make_decoder, make_encoder, negotiate_encoding
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+COMPRESSORS = {
+    "gzip": gzip.compress,
+    "br": brotli.compress,
+    "zstd": lambda data: zstandard.ZstdCompressor().compress(data),
+}
+
+def make_app(**options):
+    """只包含压缩中间件的测试应用"""
+    test_app = FastAPI()
+    test_app.add_middleware(CompressionMiddleware, **options)
+
+    @test_app.post("/echo")
+    async def echo(request: Request):
+        return PlainTextResponse((await request.body()).decode("utf-8"))
+
+    @test_app.get("/text")
+    async def text(size: int = 4096):
+        return PlainTextResponse("x" * size)
+
+    @test_app.get("/binary")
+    async def binary():
+        return Response(b"\0" * 4096, media_type="application/zip")
+
+    @test_app.get("/stream")
+    async def stream():
+        def lines():
+            for index in range(3):
+                yield f'{{"index": {index}}}\n'.encode("utf-8")
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return test_app
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compressed_request_body(encoding):
+    """测试解压gzip/br/zstd请求体"""
+    body = json.dumps({"fileName": "sample.xliff", "content": SAMPLE_FIXTURE}).encode("utf-8")
+    response = client.post(
+        "/api/xliff/process",
+        content=COMPRESSORS[encoding](body),
+        headers={"Content-Encoding": encoding, "Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 10
+
+def test_request_decompression_errors():
+    """测试不支持的编码、损坏的数据和解压炸弹"""
+    test_client = TestClient(make_app(max_decompressed_bytes=1000))
+
+    response = test_client.post("/echo", content=b"abc", headers={"Content-Encoding": "compress"})
+    assert response.status_code == 415
+
+    response = test_client.post("/echo", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+    response = test_client.post("/echo", content=gzip.compress(b"a" * 5000), headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+
+    response = test_client.post("/echo", content=gzip.compress(b"hello"), headers={"Content-Encoding": "gzip"})
+    assert response.text == "hello"
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_truncated_request_body(encoding):
+    """截断的请求体（包括只缺少zstd帧尾部或校验和）返回400，不会交给应用"""
+    test_client = TestClient(make_app())
+    compressed = COMPRESSORS[encoding](b"hello " * 1000)
+    if encoding == "zstd":
+        compressed = zstandard.ZstdCompressor(write_checksum=True).compress(b"hello " * 1000)
+    for cut in (1, 4, len(compressed) // 2):
+        response = test_client.post("/echo", content=compressed[:-cut], headers={"Content-Encoding": encoding})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "请求体解压失败"
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_concatenated_members_and_frames(encoding):
+    """多个gzip成员或zstd帧拼接的请求体全部解压，成员之后的多余数据返回400"""
+    test_client = TestClient(make_app(max_decompressed_bytes=3000))
+    body = COMPRESSORS[encoding](b"a" * 1000) + COMPRESSORS[encoding](b"b" * 1000)
+    response = test_client.post("/echo", content=body, headers={"Content-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.text == "a" * 1000 + "b" * 1000
+
+    # 大小限制对所有成员的总和生效
+    response = test_client.post("/echo", content=body * 2, headers={"Content-Encoding": encoding})
+    assert response.status_code == 413
+
+    response = test_client.post("/echo", content=body + b"trailing garbage", headers={"Content-Encoding": encoding})
+    assert response.status_code == 400
+
+    # 通过主应用，多成员请求体解析出完整的JSON
+    payload = json.dumps({"fileName": "sample.xliff", "content": SAMPLE_FIXTURE}).encode("utf-8")
+    middle = len(payload) // 2
+    response = client.post(
+        "/api/xliff/process",
+        content=COMPRESSORS[encoding](payload[:middle]) + COMPRESSORS[encoding](payload[middle:]),
+        headers={"Content-Encoding": encoding, "Content-Type": "application/json"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 10
+
+def app_compression_middleware():
+    """主应用中间件栈中的压缩中间件"""
+    client.get("/health")
+    layer = app.middleware_stack
+    while not isinstance(layer, CompressionMiddleware):
+        layer = layer.app
+    return layer
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_decompression_output_is_bounded(encoding):
+    """解压炸弹在输出超过上限时立即中止，不会先解压出全部数据"""
+    bomb = COMPRESSORS[encoding](b"\0" * (64 * 1024 * 1024))
+    decoder = make_decoder(encoding)
+    tracemalloc.start()
+    try:
+        with pytest.raises(DecompressedTooLarge):
+            decoder.decompress(bomb, 1000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 * 1024 * 1024
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_decompression_errors_through_app(encoding, monkeypatch):
+    """经过认证中间件（BaseHTTPMiddleware）和路由时仍然返回413/400，而不是500"""
+    monkeypatch.setattr(app_compression_middleware(), "max_decompressed_bytes", 64 * 1024)
+    headers = {"Content-Encoding": encoding, "Content-Type": "application/json"}
+
+    body = json.dumps({"fileName": "a.xliff", "content": "x" * (1024 * 1024)}).encode("utf-8")
+    response = client.post("/api/xliff/process", content=COMPRESSORS[encoding](body), headers=headers)
+    assert response.status_code == 413
+    assert "解压后的请求体超过" in response.json()["detail"]
+
+    corrupt = b"\x1f\x8b\x08\x00 definitely not " + encoding.encode() + b" data"
+    response = client.post("/api/xliff/process", content=corrupt, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "请求体解压失败"
+
+    # 认证失败的响应不受影响
+    response = TestClient(app).post("/api/xliff/process", content=COMPRESSORS[encoding](b"{}"), headers=headers)
+    assert response.status_code == 401
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_response_compression(encoding):
+    """测试按Accept-Encoding压缩响应"""
+    test_client = TestClient(make_app())
+    response = test_client.get("/text", headers={"Accept-Encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < 4096
+    assert response.text == "x" * 4096
+
+def test_response_compression_threshold_and_types():
+    """测试小响应和不可压缩类型不压缩"""
+    test_client = TestClient(make_app(minimum_size=1024))
+
+    response = test_client.get("/text?size=100", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "x" * 100
+
+    response = test_client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = test_client.get("/text", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+def test_streaming_response_compression():
+    """测试流式响应逐块压缩"""
+    test_client = TestClient(make_app())
+    response = test_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line)["index"] for line in response.text.splitlines()] == [0, 1, 2]
+
+def test_streaming_flush_emits_decodable_chunks():
+    """测试同步刷新后已输出的数据可以立即解码"""
+    for encoding in ("gzip", "br", "zstd"):
+        encoder = make_encoder(encoding, 3)
+        chunk = encoder.compress(b'{"index": 0}\n') + encoder.flush()
+        if encoding == "gzip":
+            import zlib
+            decoded = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunk)
+        elif encoding == "br":
+            decoded = brotli.Decompressor().process(chunk)
+        else:
+            decoded = zstandard.ZstdDecompressor().decompressobj().decompress(chunk)
+        assert decoded == b'{"index": 0}\n'
+
+def test_negotiate_encoding():
+    """测试按q值和服务端优先顺序协商"""
+    preference = ("zstd", "br", "gzip")
+    assert negotiate_encoding("gzip, br", preference) == "br"
+    assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5", preference) == "gzip"
+    assert negotiate_encoding("zstd;q=0, gzip", preference) == "gzip"
+    assert negotiate_encoding("*", preference) == "zstd"
+    assert negotiate_encoding("identity", preference) is None
+    assert negotiate_encoding(None, preference) is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
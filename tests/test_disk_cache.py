@@ -0,0 +1,225 @@
+import multiprocessing
+import pickle
+import time
+import zlib
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from benchmarks.corpus import generate_tmx, generate_xliff
+from services import disk_cache
+from services.disk_cache import DiskCache
+from services.document_sessions import index_state, restore_index
+from services.parse_cache import PROCESSOR_VERSION, ParseCache, parse_cache
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+def _write_entries(path, prefix, count):
+    cache = DiskCache(path)
+    for i in range(count):
+        cache.put(f"{prefix}{i}", b"x" * 100)
+    cache.close()
+
+def test_disk_cache_round_trip(tmp_path):
+    """写入、读取、删除和统计"""
+    cache = DiskCache(str(tmp_path / "cache" / "parse.db"))
+    cache.put("a", b"data")
+    assert cache.get("a") == b"data"
+    assert cache.get("b") is None
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 0)
+
+def test_disk_cache_shared_between_processes(tmp_path):
+    """多个进程（各自的连接）并发写入同一个数据库"""
+    path = str(tmp_path / "parse.db")
+    DiskCache(path).close()
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_entries, args=(path, f"w{n}-", 20)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    cache = DiskCache(path)
+    assert cache.stats()["entries"] == 60
+    assert cache.get("w2-19") == b"x" * 100
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """超过字节预算时淘汰最久未访问的条目，单条超过预算的不保存"""
+    cache = DiskCache(str(tmp_path / "parse.db"), max_bytes=250)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    cache._conn.execute("UPDATE entries SET accessed = accessed - 3600 WHERE key = 'b'")
+    cache.put("c", b"c" * 100)
+    cache.put("big", b"x" * 300)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("big") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 200
+
+def test_disk_cache_ttl(tmp_path):
+    """超过TTL未访问的条目不再命中，写入时清除"""
+    cache = DiskCache(str(tmp_path / "parse.db"), ttl_seconds=60)
+    cache.put("old", b"old")
+    cache._conn.execute("UPDATE entries SET accessed = ?", (time.time() - 120,))
+    assert cache.get("old") is None
+    cache.put("new", b"new")
+    assert cache.stats()["entries"] == 1
+
+def test_disk_cache_format_version(tmp_path, monkeypatch):
+    """存储格式版本变化时清空已有条目"""
+    path = str(tmp_path / "parse.db")
+    cache = DiskCache(path)
+    cache.put("a", b"a")
+    cache.close()
+    monkeypatch.setattr(disk_cache, "_FORMAT_VERSION", disk_cache._FORMAT_VERSION + 1)
+    assert DiskCache(path).get("a") is None
+
+def test_disk_cache_running_totals(tmp_path):
+    """触发器维护的条目数和字节数与表中的数据一致"""
+    cache = DiskCache(str(tmp_path / "parse.db"), max_bytes=1000, ttl_seconds=60)
+    for i in range(30):
+        cache.put(f"k{i % 12}", b"x" * (10 + i * 7))
+    cache.delete("k3")
+    cache._conn.execute("UPDATE entries SET accessed = 0 WHERE key = 'k5'")
+    cache.put("fresh", b"y" * 50)
+
+    expected = cache._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    assert cache._totals() == expected
+    assert expected[1] <= 1000
+    cache.clear()
+    assert cache._totals() == (0, 0)
+
+def test_disk_cache_namespace(tmp_path):
+    """不同代码版本的条目互不命中，预热也只载入当前版本的条目"""
+    path = str(tmp_path / "parse.db")
+    old = DiskCache(path, namespace="1.0.0/1")
+    old.put("a", b"old")
+    new = DiskCache(path, namespace="1.0.0/2")
+    assert new.get("a") is None
+    new.put("a", b"new")
+    assert old.get("a") == b"old"
+    assert list(new.recent(1024)) == [("a", b"new")]
+
+    first = ParseCache()
+    first.configure_disk(path, 1024 * 1024, 0, "1.0.0")
+    assert first.disk.namespace == f"1.0.0/{PROCESSOR_VERSION}"
+    first.put("rows", [1, 2])
+    second = ParseCache()
+    second.configure_disk(path, 1024 * 1024, 0, "1.1.0")
+    assert second.get("rows") is None
+
+def test_disk_cache_errors_do_not_fail(tmp_path):
+    """数据库损坏或读取失败时只使用内存缓存，启动和预热不报错"""
+    path = tmp_path / "parse.db"
+    path.write_bytes(b"this is not a sqlite database" * 100)
+    cache = ParseCache()
+    cache.configure_disk(str(path), 1024 * 1024, 0)
+    assert cache.disk is None
+    cache.put("a", [1])
+    assert cache.get("a") == [1]
+
+    cache.configure_disk(str(tmp_path / "ok.db"), 1024 * 1024, 0)
+    cache.put("b", [2])
+    cache.disk._conn.close()
+    assert list(cache.disk.recent(1024)) == []
+    assert cache.warm(1024) == 0
+    assert cache.get("missing") is None
+
+def test_parse_cache_second_level(tmp_path):
+    """内存未命中时读取磁盘；另一个进程（新的ParseCache）重启后仍然命中并可以预热"""
+    path = str(tmp_path / "parse.db")
+    rows = XliffProcessorService.process_xliff_rows("a", generate_xliff(20), "stream")
+    first = ParseCache()
+    first.configure_disk(path, 1024 * 1024, 0)
+    first.put("rows", rows)
+    first.put("validate", (True, "ok", 20))
+    first.close_disk()
+
+    second = ParseCache()
+    second.configure_disk(path, 1024 * 1024, 0)
+    assert second.get("rows") == rows
+    assert second.stats()["misses"] == 1
+    # 磁盘命中后写入内存
+    assert second.get("rows") == rows
+    assert second.stats()["hits"] == 1
+
+    third = ParseCache()
+    third.configure_disk(path, 1024 * 1024, 0)
+    assert third.warm(1024 * 1024) == 2
+    assert third.get("validate") == (True, "ok", 20)
+    assert third.stats()["disk"]["hits"] == 0
+
+    # 无法恢复的条目按未命中处理并删除
+    third.disk.put("broken", b"not a cache entry")
+    assert third.get("broken") is None
+    assert third.disk.get("broken") is None
+
+    third.clear()
+    assert third.stats()["disk"]["entries"] == 0
+
+@pytest.mark.parametrize("file_format,content", [("xliff", generate_xliff(5)), ("tmx", generate_tmx(5))])
+def test_index_state(file_format, content):
+    """单元索引的状态不含文档文本，重建后与原索引一致"""
+    state = index_state(file_format, content)
+    index = restore_index(file_format, content, state)
+    assert len(index) == 5
+    assert index.units == list(state[0])
+    assert content not in repr(state)
+
+UNPICKLED = []
+
+class _Payload:
+    def __reduce__(self):
+        return (UNPICKLED.append, ("executed",))
+
+def test_disk_entries_are_not_pickled(tmp_path):
+    """磁盘条目用MessagePack保存，单元索引的命名元组可以恢复；pickle数据不会被反序列化"""
+    path = str(tmp_path / "parse.db")
+    state = index_state("tmx", generate_tmx(3))
+    first = ParseCache()
+    first.configure_disk(path, 1024 * 1024, 0)
+    first.put("state", state)
+    data = zlib.decompress(first.disk.get("state"))
+    assert b"TmxTuSpan" in data
+    assert not data.startswith(b"\x80")
+
+    second = ParseCache()
+    second.configure_disk(path, 1024 * 1024, 0)
+    restored = second.get("state")
+    assert restored == state
+    assert type(restored[0][0].tuvs[0]).__name__ == "TmxTuvSpan"
+
+    second.disk.put("pickled", zlib.compress(pickle.dumps(("value", _Payload()))))
+    assert second.get("pickled") is None
+    assert second.disk.get("pickled") is None
+    assert UNPICKLED == []
+
+def test_session_index_cached(tmp_path):
+    """创建相同文档的会话时复用缓存中的单元索引"""
+    parse_cache.configure_disk(str(tmp_path / "parse.db"), 1024 * 1024, 0)
+    try:
+        payload = {"fileName": "a.xlf", "content": generate_xliff(5)}
+        first = client.post("/api/sessions", json=payload)
+        hits = parse_cache.stats()["hits"]
+        second = client.post("/api/sessions", json=payload)
+        assert first.status_code == 201 and second.status_code == 201
+        assert second.json()["unitCount"] == 5
+        assert parse_cache.stats()["hits"] == hits + 1
+        assert parse_cache.stats()["disk"]["entries"] >= 1
+    finally:
+        parse_cache.close_disk()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.executor import ServiceExecutor, iter_completed, service_executor
+from services.xliff_processor import XliffProcessorService
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_executor_runs_service_calls(kind):
+    """测试线程池和进程池执行服务方法"""
+    executor = ServiceExecutor()
+    executor.start(kind, 2)
+    try:
+        data = asyncio.run(executor.run(XliffProcessorService.process_xliff, "sample.xliff", SAMPLE_FIXTURE, engine="stream"))
+        assert len(data) == 10
+        assert data[0].unitId == "greeting"
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(XliffProcessorService.process_xliff, "sample.xliff", SAMPLE_FIXTURE, engine="unknown"))
+
+        stats = executor.stats()
+        assert stats["kind"] == kind
+        assert stats["max_workers"] == 2
+        assert stats["calls"] == 2
+        assert stats["failures"] == 1
+        assert stats["in_flight"] == 0
+    finally:
+        executor.shutdown()
+    assert not executor.started
+
+def test_executor_runs_inline_when_not_started():
+    """测试未启动时直接调用"""
+    executor = ServiceExecutor()
+    assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+    assert executor.stats()["kind"] == "inline"
+
+def test_executor_rejects_unknown_kind():
+    """测试不支持的执行器类型"""
+    with pytest.raises(ValueError):
+        ServiceExecutor().start("fiber")
+
+def test_iter_completed_bounds_concurrency():
+    """测试按完成顺序产出结果且并发数受限"""
+    running = 0
+    peak = 0
+
+    async def job(value, delay):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delay)
+        running -= 1
+        return value
+
+    async def collect():
+        jobs = [job(1, 0.03), job(2, 0.01), job(3, 0.02), job(4, 0.0)]
+        return [value async for value in iter_completed(jobs, limit=2)]
+
+    results = asyncio.run(collect())
+    assert sorted(results) == [1, 2, 3, 4]
+    assert results[0] == 2
+    assert peak == 2
+
+def test_lifespan_starts_and_stops_executor(monkeypatch):
+    """测试应用生命周期内启动和关闭执行器"""
+    monkeypatch.setattr(settings, "EXECUTOR_KIND", "thread")
+    monkeypatch.setattr(settings, "EXECUTOR_WORKERS", 2)
+
+    with TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY}) as client:
+        assert service_executor.started
+        assert service_executor.kind == "thread"
+
+        response = client.post(
+            "/api/xliff/process",
+            json={"fileName": "sample.xliff", "content": SAMPLE_FIXTURE}
+        )
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == 10
+        assert client.get("/health").status_code == 200
+
+    assert not service_executor.started
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
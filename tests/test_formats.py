@@ -0,0 +1,124 @@
+import io
+import zipfile
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from benchmarks.corpus import generate_memoq, generate_tmx, generate_xliff, generate_xliff2
+from services.formats import FileFormat, detect_format, read_head, register_format, registered_formats, _formats
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+def test_read_head():
+    """跳过XML声明、注释、处理指令和DOCTYPE，解析根元素的命名空间和属性"""
+    content = ('<?xml version="1.0" encoding="UTF-8"?>\n<!-- <tmx> -->\n<?pi x?>\n'
+               '<!DOCTYPE x:xliff [<!ENTITY a "<tmx>">]>\n'
+               "<x:xliff xmlns:x='urn:oasis:names:tc:xliff:document:1.2' version='1.2' xmlns='other'>")
+    head = read_head(content)
+    assert head.root == "xliff"
+    assert head.namespace == "urn:oasis:names:tc:xliff:document:1.2"
+    assert head.attributes == {"version": "1.2"}
+    assert read_head("plain text") is None
+    # 只读取开头，序言超出范围时无法判断
+    assert read_head("<!--" + "x" * 5000 + "--><tmx>") is None
+
+@pytest.mark.parametrize("content,expected", [
+    (generate_xliff(3), "xliff-1.2"),
+    (generate_memoq(3), "xliff-1.2"),
+    (generate_xliff2(3), "xliff-2"),
+    ('<xliff version="2.1" xmlns="urn:oasis:names:tc:xliff:document:2.1">', "xliff-2"),
+    (generate_tmx(3), "tmx"),
+])
+def test_detect_format(content, expected):
+    """文本、各种编码的字节和文件对象识别结果一致"""
+    assert detect_format(content).name == expected
+    assert detect_format(content.encode('utf-8')).name == expected
+    assert detect_format(content.encode('utf-16')).name == expected
+    stream = io.BytesIO(content.encode('utf-8'))
+    assert detect_format(stream).name == expected
+    assert stream.tell() == 0
+
+def test_detect_format_ignores_body_text():
+    """只看根元素：TMX正文中出现 <unit、<xliff 之类的文本不影响识别"""
+    tmx = generate_tmx(2).replace("<seg>", "<seg>&lt;unit id=1&gt; <xliff ", 1)
+    assert detect_format(tmx).name == "tmx"
+    with pytest.raises(ValueError):
+        detect_format("<html><body><trans-unit/></body></html>", "a.xlf")
+
+def test_detect_format_extension_fallback():
+    """开头无法判断时按扩展名"""
+    prolog = "<!--" + "x" * 5000 + "-->"
+    assert detect_format(prolog + "<tmx/>", "a.tmx").family == "tmx"
+    assert detect_format(prolog + "<xliff/>", "a.sdlxliff").name == "xliff-1.2"
+    with pytest.raises(ValueError):
+        detect_format(prolog, "a.txt")
+
+def test_register_format():
+    """新格式注册后参与识别"""
+    custom = FileFormat(
+        name="test-po", family="po", label="PO", sniff=lambda head: head.root == "po",
+        extensions=("po",), fields=(), process=None, replace=None
+    )
+    register_format(custom)
+    try:
+        assert detect_format("<po/>") is custom
+        assert registered_formats()[-1] is custom
+    finally:
+        del _formats["test-po"]
+
+@pytest.mark.parametrize("content,expected_rows", [
+    (generate_xliff(5), lambda content: XliffProcessorService.process_xliff_rows("a", content, settings.XLIFF_ENGINE)),
+    (generate_xliff2(5), lambda content: XliffProcessorService.process_xliff_rows("a", content, "stream")),
+    (generate_tmx(5), lambda content: TmxProcessorService.process_tmx_rows("a", content)),
+])
+def test_auto_process(content, expected_rows):
+    """按识别出的格式分派，结果与对应端点一致"""
+    response = client.post("/api/auto/process", json={"fileName": "a", "content": content})
+    assert response.status_code == 200
+    assert response.headers["X-File-Format"] == detect_format(content).name
+    assert [tuple(row.values()) for row in response.json()["data"]] == expected_rows(content)
+
+def test_auto_process_options():
+    """原始XML请求体、字段选择和分页"""
+    content = generate_tmx(5)
+    response = client.post("/api/auto/process?fileName=a.tmx&fields=id&limit=2", content=content.encode('utf-16'),
+                           headers={"Content-Type": "application/xml"})
+    assert response.json()["data"] == [{"id": "1"}, {"id": "2"}]
+    assert "TMX" in response.json()["message"]
+    # 字段按识别出的格式检查
+    response = client.post("/api/auto/process?fields=noTagSource", json={"fileName": "a", "content": generate_xliff(2)})
+    assert response.status_code == 400
+    response = client.post("/api/auto/process", json={"fileName": "a.txt", "content": "plain text"})
+    assert response.status_code == 400
+
+def test_auto_replacement_xliff2():
+    """XLIFF 2.x通过注册表识别后替换"""
+    content = generate_xliff2(3)
+    unit_id = XliffProcessorService.process_xliff_rows("a", content, "stream")[0][2]
+    response = client.post("/api/replacement/auto", json={
+        "fileName": "a.xlf", "content": content,
+        "translations": [{"segNumber": 1, "unitId": unit_id, "aiResult": "新译文"}]
+    })
+    assert response.status_code == 200
+    assert "XLIFF 2.x" in response.json()["message"]
+    assert "新译文" in response.json()["content"]
+
+def test_archive_sniffing():
+    """压缩包中扩展名无法识别的文件按根元素判断"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.xml", generate_tmx(2).encode('utf-16'))
+        archive.writestr("b.txt", "plain text mentioning <tmx>")
+    response = client.post("/api/batch/archive", files={"file": ("a.zip", buffer.getvalue(), "application/zip")})
+    results = response.json()["results"]
+    assert [(result["fileName"], result["fileType"]) for result in results] == [("a.xml", "tmx")]
+    assert results[0]["success"] is True and len(results[0]["data"]) == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
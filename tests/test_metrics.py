@@ -0,0 +1,127 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.metrics import (
+    STAGE_DURATION, Counter, MetricsRegistry, collect_stages, stage
+)
+from services.xliff_processor import XliffProcessorService
+import time
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="zh" datatype="plaintext" original="a.txt">
+    <body>
+      <trans-unit id="1">
+        <source>Hello</source>
+        <target>你好</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Bye</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+def _sample(text, line_prefix):
+    """返回以line_prefix开头的样本值"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+def test_histogram_render():
+    """直方图输出累计分桶、总和与总数，标签值转义"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "demo", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route='/a"b')
+    histogram.observe(0.1, route='/a"b')
+    histogram.observe(5, route='/a"b')
+    registry.counter("demo_total", "demo").inc(3)
+    text = registry.render()
+
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a\\"b"} 3' in text
+    assert 'demo_total 3' in text
+
+def test_metric_requires_declared_labels():
+    """标签与声明不一致时报错"""
+    with pytest.raises(ValueError):
+        Counter("c_total", "c", ("route",)).inc()
+
+def test_nested_stages_are_exclusive():
+    """嵌套阶段的耗时只计入内层"""
+    def work():
+        with stage("outer"):
+            time.sleep(0.02)
+            with stage("inner"):
+                time.sleep(0.05)
+        return "done"
+
+    result, timings = collect_stages(work)
+    assert result == "done"
+    assert timings["inner"] >= 0.05
+    assert 0.02 <= timings["outer"] < 0.05
+
+def test_service_stages_collected():
+    """服务调用记录parse和extract阶段"""
+    _, timings = collect_stages(XliffProcessorService.process_xliff_rows, "a.xliff", SAMPLE_XLIFF)
+    assert set(timings) == {"parse", "extract"}
+
+    _, timings = collect_stages(
+        XliffProcessorService.splice_xliff_targets, SAMPLE_XLIFF, [{"segNumber": 1, "unitId": "1", "aiResult": "嗨"}]
+    )
+    assert set(timings) == {"parse", "replace"}
+
+def test_metrics_endpoint_records_requests():
+    """/metrics 按路由模板统计请求、单元数和各阶段耗时"""
+    before = STAGE_DURATION.count(stage="serialize")
+    with TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY}) as lifespan_client:
+        response = lifespan_client.post("/api/xliff/process", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF})
+        assert response.status_code == 200
+        lifespan_client.get("/api/no-such-path")
+        metrics = lifespan_client.get("/metrics")
+
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = metrics.text
+    route = 'route="/api/xliff/process"'
+    assert _sample(text, f'xliff_http_requests_total{{method="POST",{route},status="200"}}') >= 1
+    assert _sample(text, f'xliff_http_request_duration_seconds_count{{method="POST",{route}}}') >= 1
+    assert _sample(text, f'xliff_units_per_request_bucket{{{route},le="10"}}') >= 1
+    assert _sample(text, f'xliff_http_request_body_bytes_count{{{route}}}') >= 1
+    assert 'route="unmatched",status="404"' in text
+    assert "/api/no-such-path" not in text
+    assert _sample(text, 'xliff_stage_duration_seconds_count{stage="parse"}') >= 1
+    assert STAGE_DURATION.count(stage="serialize") > before
+    assert "xliff_parse_cache_hits_total" in text
+    assert "xliff_executor_calls_total" in text
+
+def test_ndjson_records_units():
+    """NDJSON流式响应同样记录单元数"""
+    count_line = 'xliff_units_per_request_count{route="/api/xliff/process-with-tags"}'
+    before = _sample(client.get("/metrics").text, count_line) or 0
+    response = client.post(
+        "/api/xliff/process-with-tags",
+        json={"fileName": "a.xliff", "content": SAMPLE_XLIFF},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert _sample(client.get("/metrics").text, count_line) == before + 1
+
+def test_metrics_requires_access_key():
+    """/metrics 与其他接口一样需要访问密钥"""
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 401
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
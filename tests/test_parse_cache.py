@@ -0,0 +1,104 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from models.xliff import XliffData
+from services.parse_cache import ParseCache, cache_key, parse_cache
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+def make_units(count, text="text"):
+    return [
+        XliffData(fileName="f", segNumber=i, unitId=str(i), percent=-1, source=f"{text} {i}", target="", srcLang="en", tgtLang="zh")
+        for i in range(1, count + 1)
+    ]
+
+def test_cache_key_covers_all_inputs():
+    """测试缓存键随端点、文件名、内容和参数变化"""
+    base = cache_key("xliff/process", "a.xliff", "content", "toolkit")
+
+    assert base == cache_key("xliff/process", "a.xliff", "content", "toolkit")
+    assert base != cache_key("xliff/process", "a.xliff", "content", "stream")
+    assert base != cache_key("xliff/process", "b.xliff", "content", "toolkit")
+    assert base != cache_key("xliff/process", "a.xliff", "content!", "toolkit")
+    assert base != cache_key("tmx/process", "a.xliff", "content", "toolkit")
+
+def test_cache_round_trip():
+    """测试模型列表和普通值的写入与读取"""
+    cache = ParseCache()
+    units = make_units(3)
+    cache.put("units", units)
+    cache.put("validate", (True, "ok", 3))
+
+    assert [item.model_dump() for item in cache.get("units")] == [item.model_dump() for item in units]
+    assert cache.get("validate") == (True, "ok", 3)
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 2
+
+def test_cache_evicts_least_recently_used():
+    """测试超过字节预算时淘汰最久未使用的条目"""
+    cache = ParseCache()
+    cache.put("a", make_units(50, "a"))
+    entry_bytes = cache.stats()["bytes"]
+    cache.configure(entry_bytes * 2 + entry_bytes // 2, True)
+
+    cache.put("b", make_units(50, "b"))
+    cache.get("a")
+    cache.put("c", make_units(50, "c"))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+def test_cache_disabled():
+    """测试关闭缓存后不保存任何结果"""
+    cache = ParseCache(enabled=False)
+    cache.put("a", make_units(1))
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+def test_api_repeat_request_hits_cache():
+    """测试重复提交同一文件时命中缓存且结果一致"""
+    client.delete("/api/cache")
+    payload = {"fileName": "cached.xliff", "content": SAMPLE_FIXTURE}
+
+    first = client.post("/api/xliff/process", json=payload)
+    hits = client.get("/api/cache/stats").json()["hits"]
+    second = client.post("/api/xliff/process", json=payload)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert client.get("/api/cache/stats").json()["hits"] == hits + 1
+
+    # NDJSON请求复用同一缓存条目
+    response = client.post("/api/xliff/process", json=payload, headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert client.get("/api/cache/stats").json()["hits"] == hits + 2
+
+def test_api_clear_cache():
+    """测试清空缓存端点"""
+    client.post("/api/xliff/process", json={"fileName": "cached.xliff", "content": SAMPLE_FIXTURE})
+    response = client.delete("/api/cache")
+
+    assert response.status_code == 200
+    assert client.get("/api/cache/stats").json()["entries"] == 0
+    assert parse_cache.stats()["bytes"] == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.profiling import profile_store
+import marshal
+
+ADMIN_KEY = "test-admin-key"
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_ACCESS_KEY", ADMIN_KEY)
+    profile_store.clear()
+    with TestClient(app, headers={"X-Access-Key": ADMIN_KEY}) as client:
+        yield client
+
+def test_profiled_request_is_stored(admin_client):
+    """管理员请求分析后可以按ID取回热点函数和阶段耗时"""
+    response = admin_client.post(
+        "/api/tmx/process",
+        json={"fileName": "a.tmx", "content": SAMPLE_TMX},
+        headers={"X-Profile": "1"}
+    )
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    profile_id = response.headers["X-Profile-Id"]
+
+    summary = admin_client.get(f"/api/profiles/{profile_id}").json()
+    assert summary["path"] == "/api/tmx/process"
+    assert summary["status_code"] == 200
+    assert {"parse", "extract", "serialize"} <= set(summary["stages"])
+    assert summary["calls"] and summary["top_functions"]
+    assert any("process_tmx_rows" in entry["function"] for entry in summary["top_functions"])
+
+    assert [item["id"] for item in admin_client.get("/api/profiles").json()] == [profile_id]
+    assert "cumulative" in admin_client.get(f"/api/profiles/{profile_id}?format=text").text
+
+    download = admin_client.get(f"/api/profiles/{profile_id}?format=pstats")
+    assert "attachment" in download.headers["content-disposition"]
+    assert marshal.loads(download.content)
+
+def test_unprofiled_request_has_no_profile(admin_client):
+    """没有分析请求头时不保存分析结果"""
+    response = admin_client.post("/api/tmx/process", json={"fileName": "a.tmx", "content": SAMPLE_TMX})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert admin_client.get("/api/profiles").json() == []
+
+def test_profiling_requires_admin_key(admin_client):
+    """普通访问密钥不能请求分析，也不能读取分析结果"""
+    client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+    response = client.post(
+        "/api/tmx/process",
+        json={"fileName": "a.tmx", "content": SAMPLE_TMX},
+        headers={"X-Profile": "1"}
+    )
+    assert response.status_code == 403
+    assert client.get("/api/profiles").status_code == 403
+
+def test_unknown_profile(admin_client):
+    """分析结果不存在时返回404，格式无效时返回400"""
+    assert admin_client.get("/api/profiles/missing").status_code == 404
+    assert admin_client.get("/api/profiles/missing?format=svg").status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
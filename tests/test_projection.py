@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from api.columnar import COLUMNAR_JSON_MEDIA_TYPE, decode_columnar
+from benchmarks.corpus import generate_tmx, generate_xliff
+from models.xliff import TMX_DATA_FIELDS, XLIFF_DATA_FIELDS, select_fields
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+XLIFF = generate_xliff(30, seed=3)
+TMX = generate_tmx(30, seed=3)
+
+def _project(rows, fields, all_fields):
+    indexes = [all_fields.index(field) for field in fields]
+    return [tuple(row[index] for index in indexes) for row in rows]
+
+def test_select_fields():
+    """字段按规范顺序返回，空值表示全部字段，未知字段报错"""
+    assert select_fields(None, XLIFF_DATA_FIELDS) == XLIFF_DATA_FIELDS
+    assert select_fields("", TMX_DATA_FIELDS) == TMX_DATA_FIELDS
+    assert select_fields("target, unitId,unitId", XLIFF_DATA_FIELDS) == ("unitId", "target")
+    with pytest.raises(ValueError):
+        select_fields("unitId,bogus", XLIFF_DATA_FIELDS)
+
+@pytest.mark.parametrize("engine", ["toolkit", "stream"])
+@pytest.mark.parametrize("fields", ["source", "unitId,percent", "segNumber,srcLang,tgtLang,target"])
+def test_xliff_projection_matches_full_rows(engine, fields):
+    """所选字段的结果等于完整结果的投影"""
+    selected = select_fields(fields, XLIFF_DATA_FIELDS)
+    full = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, engine)
+    rows = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, engine, fields=selected)
+    assert rows == _project(full, selected, XLIFF_DATA_FIELDS)
+
+    full = XliffProcessorService.process_xliff_with_tags_rows("a.xliff", XLIFF)
+    rows = XliffProcessorService.process_xliff_with_tags_rows("a.xliff", XLIFF, fields=selected)
+    assert rows == _project(full, selected, XLIFF_DATA_FIELDS)
+
+@pytest.mark.parametrize("fields", ["id", "noTagTarget,contextId", "srcLang,source,target"])
+def test_tmx_projection_matches_full_rows(fields):
+    """TMX所选字段的结果等于完整结果的投影"""
+    selected = select_fields(fields, TMX_DATA_FIELDS)
+    full = TmxProcessorService.process_tmx_rows("a.tmx", TMX)
+    rows = TmxProcessorService.process_tmx_rows("a.tmx", TMX, fields=selected)
+    assert rows == _project(full, selected, TMX_DATA_FIELDS)
+
+def test_tmx_skips_tag_cleaning(monkeypatch):
+    """未选择noTag字段时不清理标签"""
+    calls = []
+    original = TmxProcessorService.clean_tmx_tags
+    monkeypatch.setattr(TmxProcessorService, "clean_tmx_tags", staticmethod(lambda content: calls.append(content) or original(content)))
+
+    TmxProcessorService.process_tmx_rows("a.tmx", TMX, fields=select_fields("id,source,target", TMX_DATA_FIELDS))
+    assert calls == []
+    rows = TmxProcessorService.process_tmx_rows("a.tmx", TMX, fields=select_fields("noTagSource", TMX_DATA_FIELDS))
+    assert len(calls) == len(rows)
+
+def test_endpoints_return_selected_fields():
+    """JSON、列式和NDJSON响应只包含所选字段"""
+    body = {"fileName": "a.xliff", "content": XLIFF}
+    data = client.post("/api/xliff/process?fields=target,unitId", json=body).json()["data"]
+    assert data and all(list(row) == ["unitId", "target"] for row in data)
+
+    response = client.post("/api/xliff/process-with-tags?fields=source", json=body, headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE})
+    units = decode_columnar(response.content, response.headers["content-type"])
+    assert units.fields == ["source"]
+    assert list(units.rows()) == XliffProcessorService.process_xliff_with_tags_rows("a.xliff", XLIFF, fields=("source",))
+
+    lines = client.post("/api/tmx/process?fields=id,noTagSource", json={"fileName": "a.tmx", "content": TMX},
+                        headers={"Accept": "application/x-ndjson"}).text.splitlines()
+    assert '"noTagSource"' in lines[0] and '"source"' not in lines[0]
+
+    session_id = client.post("/api/sessions", json=body).json()["sessionId"]
+    data = client.post(f"/api/sessions/{session_id}/process-with-tags?fields=segNumber").json()["data"]
+    assert data and all(list(row) == ["segNumber"] for row in data)
+
+def test_unknown_field_rejected():
+    """未知字段返回400"""
+    body = {"fileName": "a.xliff", "content": XLIFF}
+    assert client.post("/api/xliff/process?fields=nope", json=body).status_code == 400
+    assert client.post("/api/tmx/process?fields=nope", json={"fileName": "a.tmx", "content": TMX}).status_code == 400
+    session_id = client.post("/api/sessions", json=body).json()["sessionId"]
+    assert client.post(f"/api/sessions/{session_id}/process-with-tags?fields=nope").status_code == 400
+    assert client.post(f"/api/sessions/{session_id}/process?fields=nope").status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
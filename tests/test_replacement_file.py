@@ -0,0 +1,123 @@
+import pytest
+from fastapi.testclient import TestClient
+import codecs
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.xliff_processor import XliffProcessorService
+from services.encoding import decode_xml_bytes, iter_encoded
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+TRANSLATIONS = [
+    {"segNumber": 1, "unitId": "greeting", "aiResult": "您好，世界"},
+    {"segNumber": 99, "unitId": "missing", "aiResult": "x"},
+]
+
+def upload(path, content: bytes, translations, file_name="sample.xliff"):
+    return client.post(
+        path,
+        files={
+            "file": (file_name, content, "application/xml"),
+            "translations": ("translations.json", json.dumps(translations), "application/json"),
+        }
+    )
+
+def test_replace_xliff_file():
+    """测试以文件形式上传并下载替换后的XLIFF"""
+    response = upload("/api/replacement/xliff/file", SAMPLE_FIXTURE.encode("utf-8"), TRANSLATIONS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/xml")
+    assert response.headers["x-replacements-count"] == "1"
+    assert response.headers["x-unmatched-count"] == "1"
+    assert "sample.xliff" in response.headers["content-disposition"]
+
+    expected, _, _ = XliffProcessorService.splice_xliff_targets(SAMPLE_FIXTURE, TRANSLATIONS)
+    assert response.content == expected.encode("utf-8")
+
+def test_replace_file_keeps_encoding():
+    """测试带BOM的文件按原编码返回"""
+    for encoding in ("utf-8-sig", "utf-16"):
+        response = upload("/api/replacement/xliff/file", SAMPLE_FIXTURE.encode(encoding), TRANSLATIONS)
+
+        assert response.status_code == 200
+        content, detected = decode_xml_bytes(response.content)
+        assert detected == encoding
+        assert "您好，世界" in content
+
+@pytest.mark.parametrize("declared,encoding,charset", [
+    ("UTF-8", "utf-8-sig", "utf-8"),
+    ("UTF-16", "utf-16", "utf-16"),
+    ("UTF-16", "utf-16-le", "utf-16le"),
+    ("UTF-16", "utf-16-be", "utf-16be"),
+    ("ISO-8859-1", "iso8859-1", "iso-8859-1"),
+])
+def test_replace_file_charset_header(declared, encoding, charset):
+    """测试响应的Content-Type charset与写回的编码一致（含无BOM的UTF-16和ISO-8859-1）"""
+    data = SAMPLE_FIXTURE.replace('encoding="UTF-8"', f'encoding="{declared}"').encode(encoding, "xmlcharrefreplace")
+    response = upload("/api/replacement/xliff/file", data, TRANSLATIONS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == f"application/xml; charset={charset}"
+    # 按响应头声明的charset解码得到的就是替换后的文档
+    text = response.content.decode(charset)
+    assert "您好，世界" in text or "&#24744;&#22909;" in text
+    assert decode_xml_bytes(response.content)[1] == encoding
+
+def test_replace_tmx_file():
+    """测试以文件形式替换TMX"""
+    response = upload(
+        "/api/replacement/tmx/file?target_lang=zh",
+        SAMPLE_TMX.encode("utf-8"),
+        [{"segNumber": 1, "unitId": "1", "aiResult": "嗨"}],
+        file_name="memory.tmx"
+    )
+
+    assert response.status_code == 200
+    assert response.headers["x-replacements-count"] == "1"
+    assert '<tuv xml:lang="zh"><seg>嗨</seg></tuv>' in response.text
+
+def test_replace_file_rejects_bad_input():
+    """测试翻译数据或文件编码无效时返回400"""
+    response = client.post(
+        "/api/replacement/xliff/file",
+        files={
+            "file": ("sample.xliff", SAMPLE_FIXTURE.encode("utf-8"), "application/xml"),
+            "translations": ("translations.json", "not json", "application/json"),
+        }
+    )
+    assert response.status_code == 400
+
+    response = upload("/api/replacement/xliff/file", SAMPLE_FIXTURE.encode("latin-1", "replace") + b"\xff\xfe\xfd", TRANSLATIONS)
+    assert response.status_code == 400
+
+def test_iter_encoded_chunks():
+    """测试增量编码只输出一次BOM且结果与整体编码一致"""
+    pieces = ["<a>", "中" * 10, "</a>"]
+    for encoding in ("utf-8", "utf-8-sig", "utf-16"):
+        assert b"".join(iter_encoded(pieces, encoding)) == "".join(pieces).encode(encoding)
+    assert b"".join(iter_encoded(pieces, "utf-16")).count(codecs.BOM_UTF16) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from models.xliff import TmxData, TmxProcessResponse, XliffData, XliffProcessResponse, models_from_rows
+from services.parse_cache import parse_cache
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY, "Accept-Encoding": "identity"})
+
+# 覆盖非ASCII、引号、反斜杠、控制字符转义、U+2028以及各种percent取值
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="EN-US" target-language="zh-CN" datatype="plaintext" original="a.txt">
+    <body>
+      <trans-unit id="1" percent="100">
+        <source>Say "hi" \\ &lt;b&gt;</source>
+        <target>说“你好”&#x9;tab</target>
+      </trans-unit>
+      <trans-unit id="2" percent="87.5">
+        <source xml:space="preserve">  line&#10;break sep  </source>
+        <target/>
+      </trans-unit>
+      <trans-unit id="3" percent="NaN">
+        <source>emoji 😀 <g id="1">bold</g></source>
+      </trans-unit>
+      <trans-unit id="4" percent="abc">
+        <source>x</source>
+        <target>y</target>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1" creationid="alice">
+      <prop type="x-context">ctx</prop>
+      <tuv xml:lang="en"><seg>Hello <bpt i="1">&lt;b&gt;</bpt>"world"<ept i="1">&lt;/b&gt;</ept></seg></tuv>
+      <tuv xml:lang="zh"><seg>你好\\世界</seg></tuv>
+    </tu>
+    <tu>
+      <tuv xml:lang="en"><seg>Bye</seg></tuv>
+      <tuv xml:lang="zh"><seg>再见</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    parse_cache.clear()
+    yield
+    parse_cache.clear()
+
+def reference_body(response_model):
+    """FastAPI经response_model序列化时的输出"""
+    return json.dumps(
+        jsonable_encoder(response_model),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode('utf-8')
+
+@pytest.mark.parametrize("engine", ["toolkit", "stream"])
+def test_xliff_process_matches_model_serialization(engine):
+    """快速路径输出与Pydantic模型序列化逐字节一致"""
+    data = XliffProcessorService.process_xliff("a.xliff", SAMPLE_XLIFF, engine=engine)
+    expected = reference_body(XliffProcessResponse(data=data, success=True, message=f"成功处理 {len(data)} 个翻译单元"))
+
+    response = client.post(f"/api/xliff/process?engine={engine}", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected
+
+    # 缓存命中时输出相同
+    assert client.post(f"/api/xliff/process?engine={engine}", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF}).content == expected
+
+def test_xliff_with_tags_matches_model_serialization():
+    """保留标签的快速路径输出与模型序列化一致"""
+    data = XliffProcessorService.process_xliff_with_tags("a.xliff", SAMPLE_XLIFF)
+    expected = reference_body(XliffProcessResponse(data=data, success=True, message=f"成功处理带标签的 {len(data)} 个翻译单元"))
+
+    response = client.post("/api/xliff/process-with-tags", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF})
+    assert response.content == expected
+
+def test_tmx_process_matches_model_serialization():
+    """TMX快速路径输出与模型序列化一致"""
+    data = TmxProcessorService.process_tmx("a.tmx", SAMPLE_TMX)
+    expected = reference_body(TmxProcessResponse(data=data, success=True, message=f"成功处理 {len(data)} 个TMX翻译单元"))
+
+    response = client.post("/api/tmx/process", json={"fileName": "a.tmx", "content": SAMPLE_TMX})
+    assert response.content == expected
+
+def test_ndjson_lines_match_model_serialization():
+    """NDJSON每行与model_dump_json一致"""
+    data = XliffProcessorService.process_xliff("a.xliff", SAMPLE_XLIFF, engine="stream")
+    response = client.post(
+        "/api/xliff/process?engine=stream",
+        json={"fileName": "a.xliff", "content": SAMPLE_XLIFF},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    lines = response.content.split(b"\n")
+    assert lines[:len(data)] == [item.model_dump_json().encode('utf-8') for item in data]
+
+    data = TmxProcessorService.process_tmx("a.tmx", SAMPLE_TMX)
+    response = client.post(
+        "/api/tmx/process",
+        json={"fileName": "a.tmx", "content": SAMPLE_TMX},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    lines = response.content.split(b"\n")
+    assert lines[:len(data)] == [item.model_dump_json().encode('utf-8') for item in data]
+
+def test_rows_have_model_types():
+    """元组的取值类型与模型验证后的类型一致，percent的无效值统一为-1.0"""
+    for engine in ("toolkit", "stream"):
+        rows = XliffProcessorService.process_xliff_rows("a.xliff", SAMPLE_XLIFF, engine=engine)
+        assert [type(value) for value in rows[0]] == [str, int, str, float, str, str, str, str]
+        assert [row[3] for row in rows] == [100.0, 87.5, -1.0, -1.0]
+        assert models_from_rows(XliffData, rows) == XliffProcessorService.process_xliff("a.xliff", SAMPLE_XLIFF, engine=engine)
+
+    rows = TmxProcessorService.process_tmx_rows("a.tmx", SAMPLE_TMX)
+    assert models_from_rows(TmxData, rows) == TmxProcessorService.process_tmx("a.tmx", SAMPLE_TMX)
+
+def test_openapi_keeps_response_models():
+    """OpenAPI文档仍引用原有的响应模型"""
+    schema = client.get("/openapi.json").json()
+    content = schema["paths"]["/api/xliff/process"]["post"]["responses"]["200"]["content"]
+    assert content["application/json"]["schema"]["$ref"].endswith("/XliffProcessResponse")
+    content = schema["paths"]["/api/tmx/upload"]["post"]["responses"]["200"]["content"]
+    assert content["application/json"]["schema"]["$ref"].endswith("/TmxProcessResponse")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,234 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.document_sessions import DocumentSession, DocumentSessionStore, PreconditionFailed, build_index, document_sessions
+from services.xliff_processor import XliffProcessorService
+from services.tmx_processor import TmxProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="zh" datatype="plaintext" original="a.txt">
+    <body>
+      <trans-unit id="1">
+        <source>Hello <g id="b">world</g></source>
+        <target>你好</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Bye</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+TRANSLATIONS = [{"segNumber": 2, "unitId": "2", "aiResult": "再见"}]
+
+def _create(file_name, content):
+    response = client.post("/api/sessions", json={"fileName": file_name, "content": content})
+    assert response.status_code == 201
+    return response.json()
+
+def test_xliff_session_round_trip():
+    """会话的提取和替换结果与直接提交内容一致"""
+    info = _create("a.xliff", SAMPLE_XLIFF)
+    assert info["format"] == "xliff" and info["unitCount"] == 2
+    session_id = info["sessionId"]
+
+    response = client.post(f"/api/sessions/{session_id}/process-with-tags")
+    direct = client.post("/api/xliff/process-with-tags", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF})
+    assert response.json() == direct.json()
+
+    response = client.post(f"/api/sessions/{session_id}/process")
+    assert response.json()["data"] == client.post(
+        "/api/xliff/process", json={"fileName": "a.xliff", "content": SAMPLE_XLIFF}
+    ).json()["data"]
+
+    response = client.post(f"/api/sessions/{session_id}/replace", json={"translations": TRANSLATIONS})
+    expected, count, _ = XliffProcessorService.splice_xliff_targets(SAMPLE_XLIFF, TRANSLATIONS)
+    assert response.json()["content"] == expected
+    assert response.json()["replacements_count"] == count == 1
+
+    response = client.post(f"/api/sessions/{session_id}/validate")
+    assert response.json()["valid"] is True and response.json()["unit_count"] == 2
+
+def test_tmx_session():
+    """TMX会话的提取和替换"""
+    info = _create("a.tmx", SAMPLE_TMX)
+    assert info["format"] == "tmx"
+    session_id = info["sessionId"]
+
+    rows = client.post(f"/api/sessions/{session_id}/process").json()["data"]
+    assert [row["source"] for row in rows] == ["Hello"]
+
+    translations = [{"segNumber": 1, "unitId": "1", "aiResult": "您好"}]
+    response = client.post(f"/api/sessions/{session_id}/replace", json={"translations": translations})
+    assert response.json()["content"] == TmxProcessorService.splice_tmx_targets(SAMPLE_TMX, translations)[0]
+    assert client.post(f"/api/sessions/{session_id}/process-with-tags").status_code == 400
+
+def test_etag_preconditions():
+    """If-Match不一致返回412，If-None-Match一致返回304"""
+    info = _create("a.xliff", SAMPLE_XLIFF)
+    session_id, etag = info["sessionId"], info["etag"]
+    assert client.get(f"/api/sessions/{session_id}").headers["ETag"] == etag
+
+    response = client.post(f"/api/sessions/{session_id}/replace", json={"translations": TRANSLATIONS}, headers={"If-Match": '"stale"'})
+    assert response.status_code == 412
+    response = client.post(f"/api/sessions/{session_id}/replace", json={"translations": TRANSLATIONS}, headers={"If-Match": etag})
+    assert response.status_code == 200
+
+    assert client.get(f"/api/sessions/{session_id}/content", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/api/sessions/{session_id}/content").text == SAMPLE_XLIFF
+
+def test_upload_keeps_encoding():
+    """上传UTF-16文件后按原编码下载"""
+    data = SAMPLE_XLIFF.replace('UTF-8', 'UTF-16').encode('utf-16')
+    response = client.post("/api/sessions/upload", files={"file": ("a.xlf", data, "application/xml")})
+    assert response.status_code == 201
+    assert response.json()["encoding"] == "utf-16"
+    download = client.get(f"/api/sessions/{response.json()['sessionId']}/content")
+    assert download.content == data
+
+def test_download_charset_header():
+    """下载的Content-Type charset与会话文档的原编码一致"""
+    data = SAMPLE_XLIFF.replace('UTF-8', 'ISO-8859-1').encode('latin-1', 'xmlcharrefreplace')
+    response = client.post("/api/sessions/upload", files={"file": ("a.xlf", data, "application/xml")})
+    download = client.get(f"/api/sessions/{response.json()['sessionId']}/content")
+    assert download.headers["content-type"] == "application/xml; charset=iso-8859-1"
+    assert download.content == data
+
+    data = SAMPLE_XLIFF.replace('UTF-8', 'UTF-16').encode('utf-16-le')
+    response = client.post("/api/sessions/upload", files={"file": ("a.xlf", data, "application/xml")})
+    download = client.get(f"/api/sessions/{response.json()['sessionId']}/content")
+    assert download.headers["content-type"] == "application/xml; charset=utf-16le"
+    assert download.content == data
+
+def test_delete_and_missing_session():
+    """删除后的会话返回404"""
+    session_id = _create("a.xliff", SAMPLE_XLIFF)["sessionId"]
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 200
+    assert client.post(f"/api/sessions/{session_id}/process").status_code == 404
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 404
+
+def test_invalid_document():
+    """无法识别的文档返回400"""
+    response = client.post("/api/sessions", json={"fileName": "a.txt", "content": "plain text"})
+    assert response.status_code == 400
+
+def test_store_ttl_and_budget():
+    """超过TTL的会话过期，超出预算时淘汰最久未访问的会话"""
+    def session():
+        return DocumentSession("a.xliff", "xliff", SAMPLE_XLIFF, "utf-8", build_index("xliff", SAMPLE_XLIFF))
+
+    first = session()
+    store = DocumentSessionStore(max_bytes=first.size * 2, ttl_seconds=3600)
+    store.add(first)
+    second = store.add(session())
+    # 访问first之后，second成为最久未访问的会话
+    assert store.get(first.session_id) is first
+    store.add(session())
+    assert store.get(second.session_id) is None
+    assert store.get(first.session_id) is first
+    assert store.stats()["evictions"] == 1
+
+    with pytest.raises(ValueError):
+        DocumentSessionStore(max_bytes=10).add(session())
+
+    store = DocumentSessionStore(ttl_seconds=0.05)
+    expired = store.add(session())
+    time.sleep(0.1)
+    assert store.get(expired.session_id) is None
+    assert store.stats()["expirations"] == 1
+
+def test_incremental_target_updates():
+    """分批写入的译文累积到会话文档中，下载结果与一次性替换一致"""
+    info = _create("a.xliff", SAMPLE_XLIFF)
+    session_id, etag = info["sessionId"], info["etag"]
+
+    response = client.patch(f"/api/sessions/{session_id}/targets", json={"translations": [{"segNumber": 1, "unitId": "1", "aiResult": "嗨"}]}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    first = response.json()
+    assert first["replacements_count"] == 1 and first["revision"] == 1 and first["pendingUpdates"] == 1
+    assert first["etag"] != etag and response.headers["ETag"] == first["etag"]
+
+    # 旧ETag的写入被拒绝
+    response = client.patch(f"/api/sessions/{session_id}/targets", json={"translations": TRANSLATIONS}, headers={"If-Match": etag})
+    assert response.status_code == 412
+
+    response = client.patch(f"/api/sessions/{session_id}/targets", json={"translations": TRANSLATIONS + [{"segNumber": 9, "unitId": "9", "aiResult": "x"}]})
+    assert response.json()["unmatched"] == ["9"] and response.json()["pendingUpdates"] == 2
+    # 同一单元的后续更新覆盖之前的
+    client.patch(f"/api/sessions/{session_id}/targets", json={"translations": [{"segNumber": 1, "unitId": "1", "aiResult": "你好呀"}]})
+
+    translations = [{"segNumber": 1, "unitId": "1", "aiResult": "你好呀"}] + TRANSLATIONS
+    expected = XliffProcessorService.splice_xliff_targets(SAMPLE_XLIFF, translations)[0]
+    assert client.get(f"/api/sessions/{session_id}/content").text == expected
+
+    # 需要整个文档的操作之前合并更新，之后的结果基于当前文档
+    rows = client.post(f"/api/sessions/{session_id}/process-with-tags").json()["data"]
+    assert [row["target"] for row in rows] == ["你好呀", "再见"]
+    assert client.get(f"/api/sessions/{session_id}").json()["pendingUpdates"] == 0
+    response = client.patch(f"/api/sessions/{session_id}/targets", json={"translations": TRANSLATIONS})
+    assert response.json()["revision"] == 4
+    assert client.get(f"/api/sessions/{session_id}/content").text == expected
+
+def test_session_stats():
+    """统计端点返回会话数和预算"""
+    document_sessions.clear()
+    _create("a.xliff", SAMPLE_XLIFF)
+    stats = client.get("/api/sessions").json()
+    assert stats["sessions"] == 1 and stats["bytes"] > 0
+
+def test_concurrent_updates_with_same_etag(monkeypatch):
+    """携带同一If-Match的并发写入只有一个成功，其余返回412（检查和写入在同一把锁内）"""
+    info = _create("a.xliff", SAMPLE_XLIFF)
+    session_id, etag = info["sessionId"], info["etag"]
+    plan = DocumentSession._plan
+
+    def slow_plan(self, translations, target_lang):
+        # 拉长检查和写入之间的时间，暴露检查在锁外进行时的竞争
+        time.sleep(0.05)
+        return plan(self, translations, target_lang)
+
+    monkeypatch.setattr(DocumentSession, "_plan", slow_plan)
+
+    def patch(text):
+        return client.patch(
+            f"/api/sessions/{session_id}/targets",
+            json={"translations": [{"segNumber": 1, "unitId": "1", "aiResult": text}]},
+            headers={"If-Match": etag}
+        )
+
+    with ThreadPoolExecutor(4) as pool:
+        responses = list(pool.map(patch, ["一", "二", "三", "四"]))
+
+    assert sorted(response.status_code for response in responses) == [200, 412, 412, 412]
+    winner = next(response for response in responses if response.status_code == 200)
+    assert winner.json()["revision"] == 1
+    assert client.get(f"/api/sessions/{session_id}").json()["revision"] == 1
+
+    session = document_sessions.get(session_id)
+    with pytest.raises(PreconditionFailed):
+        session.apply_targets(TRANSLATIONS, if_match=etag)
+    assert session.apply_targets(TRANSLATIONS, if_match=winner.json()["etag"]).revision == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from api.streaming import ndjson_response, wants_ndjson
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+NDJSON_HEADERS = {"Accept": "application/x-ndjson"}
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Hello</seg></tuv>
+      <tuv xml:lang="zh"><seg>你好</seg></tuv>
+    </tu>
+    <tu tuid="2">
+      <tuv xml:lang="en"><seg>Bye</seg></tuv>
+      <tuv xml:lang="zh"><seg>再见</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+def test_wants_ndjson():
+    """测试Accept请求头识别"""
+    assert wants_ndjson("application/x-ndjson")
+    assert wants_ndjson("application/json;q=0.5, application/x-ndjson")
+    assert not wants_ndjson("application/json")
+    assert not wants_ndjson(None)
+
+@pytest.mark.parametrize("engine", ["toolkit", "stream"])
+def test_api_process_xliff_ndjson(engine):
+    """测试XLIFF处理端点的NDJSON流式响应"""
+    response = client.post(
+        f"/api/xliff/process?engine={engine}",
+        json={"fileName": "sample.xliff", "content": SAMPLE_FIXTURE},
+        headers=NDJSON_HEADERS
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = read_ndjson(response)
+    assert len(lines) == 11
+    assert lines[0]["unitId"] == "greeting"
+    assert lines[0]["target"] == "你好世界"
+    assert lines[-1] == {"success": True, "message": "成功处理 10 个翻译单元", "count": 10}
+
+def test_api_process_with_tags_ndjson():
+    """测试带标签XLIFF处理端点的NDJSON流式响应"""
+    response = client.post(
+        "/api/xliff/process-with-tags",
+        json={"fileName": "sample.xliff", "content": SAMPLE_FIXTURE},
+        headers=NDJSON_HEADERS
+    )
+
+    assert response.status_code == 200
+    lines = read_ndjson(response)
+    assert len(lines) == 11
+    assert lines[-1]["count"] == 10
+
+def test_api_process_tmx_ndjson():
+    """测试TMX处理端点的NDJSON流式响应"""
+    response = client.post(
+        "/api/tmx/process",
+        json={"fileName": "sample.tmx", "content": SAMPLE_TMX},
+        headers=NDJSON_HEADERS
+    )
+
+    assert response.status_code == 200
+    lines = read_ndjson(response)
+    assert [line["source"] for line in lines[:-1]] == ["Hello", "Bye"]
+    assert lines[-1] == {"success": True, "message": "成功处理 2 个TMX翻译单元", "count": 2}
+
+def test_api_ndjson_early_error_is_http_error():
+    """测试输出第一个单元前的错误仍返回HTTP 400"""
+    response = client.post(
+        "/api/xliff/process",
+        json={"fileName": "bad.xliff", "content": "<invalid>Not XLIFF</invalid>"},
+        headers=NDJSON_HEADERS
+    )
+
+    assert response.status_code == 400
+
+def test_ndjson_late_error_reported_in_summary():
+    """测试输出过程中的错误写入汇总行"""
+    from models.xliff import XliffData
+
+    def units():
+        yield XliffData(fileName="f", segNumber=1, unitId="1", percent=-1, source="a", target="", srcLang="", tgtLang="")
+        raise ValueError("broken")
+
+    from fastapi import FastAPI
+    stream_app = FastAPI()
+
+    @stream_app.get("/")
+    async def stream():
+        return await ndjson_response(units(), lambda count: "ok")
+
+    lines = read_ndjson(TestClient(stream_app).get("/"))
+    assert lines[0]["unitId"] == "1"
+    assert lines[-1] == {"success": False, "message": "broken", "count": 1}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
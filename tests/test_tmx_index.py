@@ -0,0 +1,149 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.tmx_index import TmxTuIndex
+from services.tmx_processor import TmxProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+# 目标语言的tuv排在源语言之前，且第三个tu没有tuid
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en-US" datatype="plaintext"/>
+  <body>
+    <tu tuid="a1">
+      <tuv xml:lang="zh-CN"><seg>你好</seg></tuv>
+      <tuv xml:lang="en-US"><seg>Hello</seg></tuv>
+    </tu>
+    <tu id="b2">
+      <tuv xml:lang="en-US"><seg>Bye</seg></tuv>
+      <tuv xml:lang="zh-CN"><seg/></tuv>
+    </tu>
+    <tu>
+      <tuv xml:lang="en-US"><seg>Exit</seg></tuv>
+      <tuv xml:lang="zh-CN"><seg></seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+def test_build_index():
+    """测试tu索引的构建"""
+    index = TmxTuIndex.build(SAMPLE_TMX)
+
+    assert len(index) == 3
+    assert index.srclang == "en-US"
+    assert index.get("a1").ordinal == 1
+    assert index.get("b2").ordinal == 2
+    assert index.by_ordinal(3).tuid == ""
+
+    unit = index.get("a1")
+    assert [tuv.lang for tuv in unit.tuvs] == ["zh-CN", "en-US"]
+    seg = unit.tuvs[0].seg
+    assert SAMPLE_TMX[seg[2]:seg[3]] == "你好"
+
+def test_target_tuv_resolved_by_language():
+    """测试目标tuv按语言而不是位置确定"""
+    index = TmxTuIndex.build(SAMPLE_TMX)
+    unit = index.get("a1")
+
+    assert index.target_tuv(unit).lang == "zh-CN"
+    assert index.target_tuv(unit, "en-us").lang == "en-US"
+    assert index.target_tuv(unit, "zh").lang == "zh-CN"
+    assert index.target_tuv(unit, "fr") is None
+
+@pytest.mark.parametrize("srclang,source_lang", [("en", "en-US"), ("EN-US", "en-us"), ("en-GB", "EN-US")])
+def test_target_tuv_never_source(srclang, source_lang):
+    """源语言tuv带地区子标签或大小写不同时不会被当作目标（回归测试）"""
+    content = f"""<tmx version="1.4"><header srclang="{srclang}"/><body>
+<tu tuid="1"><tuv xml:lang="{source_lang}"><seg>Hello</seg></tuv><tuv xml:lang="de-DE"><seg>Hallo</seg></tuv></tu>
+<tu tuid="2"><tuv xml:lang="{source_lang}"><seg>Color</seg></tuv><tuv xml:lang="en-GB"><seg>Colour</seg></tuv></tu>
+</body></tmx>"""
+    index = TmxTuIndex.build(content)
+    assert index.target_tuv(index.get("1")).lang == "de-DE"
+    # 源语言和目标语言主语言相同时退回到第二个tuv
+    assert index.target_tuv(index.get("2")).lang == "en-GB"
+
+    updated, count = TmxProcessorService.replace_tmx_targets(content, [
+        {"segNumber": 1, "aiResult": "NEU1"}, {"segNumber": 2, "aiResult": "Colour!"}
+    ])
+    assert count == 2
+    assert f'<tuv xml:lang="{source_lang}"><seg>Hello</seg></tuv><tuv xml:lang="de-DE"><seg>NEU1</seg></tuv>' in updated
+    assert f'<tuv xml:lang="{source_lang}"><seg>Color</seg></tuv><tuv xml:lang="en-GB"><seg>Colour!</seg></tuv>' in updated
+
+def test_target_lang_never_falls_back_to_source():
+    """指定的目标语言与源语言主语言相同时，只按完全匹配选择，不会退回到源语言的tuv（回归测试）"""
+    content = """<tmx version="1.4"><header srclang="en"/><body>
+<tu tuid="1"><tuv xml:lang="en-US"><seg>Color</seg></tuv><tuv xml:lang="en-AU"><seg>Colour</seg></tuv></tu>
+<tu tuid="2"><tuv xml:lang="en-US"><seg>Color</seg></tuv><tuv xml:lang="en-GB"><seg>Colour</seg></tuv></tu>
+</body></tmx>"""
+    index = TmxTuIndex.build(content)
+    assert index.target_tuv(index.get("1"), "en-GB") is None
+    assert index.target_tuv(index.get("2"), "en-GB").lang == "en-GB"
+
+    updated, count, unmatched = TmxProcessorService.splice_tmx_targets(content, [
+        {"segNumber": 1, "aiResult": "X"}, {"segNumber": 2, "aiResult": "Colour!"}
+    ], target_lang="en-GB")
+    assert count == 1
+    assert unmatched == ["1"]
+    assert '<tuv xml:lang="en-US"><seg>Color</seg></tuv><tuv xml:lang="en-AU"><seg>Colour</seg></tuv>' in updated
+    assert '<tuv xml:lang="en-GB"><seg>Colour!</seg></tuv>' in updated
+
+def test_splice_tmx_targets():
+    """测试TMX拼接替换"""
+    translations = [
+        {"segNumber": 1, "unitId": "a1", "aiResult": "您好"},
+        {"segNumber": 2, "unitId": "b2", "mtResult": "再见"},
+        {"segNumber": 3, "aiResult": "退出"},
+    ]
+
+    updated, count, unmatched = TmxProcessorService.splice_tmx_targets(SAMPLE_TMX, translations)
+
+    assert count == 3
+    assert unmatched == []
+    assert '<tuv xml:lang="zh-CN"><seg>您好</seg></tuv>' in updated
+    assert '<tuv xml:lang="en-US"><seg>Hello</seg></tuv>' in updated
+    assert '<tuv xml:lang="zh-CN"><seg>再见</seg></tuv>' in updated
+    assert '<tuv xml:lang="zh-CN"><seg>退出</seg></tuv>' in updated
+
+def test_splice_tmx_dry_run_and_literal_content():
+    """测试dry_run以及替换文本中的反斜杠按原样写入"""
+    translations = [
+        {"segNumber": 3, "aiResult": "C:\\temp\\1"},
+        {"segNumber": 1, "unitId": "missing", "aiResult": "x"},
+    ]
+
+    updated, count, unmatched = TmxProcessorService.splice_tmx_targets(SAMPLE_TMX, translations, dry_run=True)
+    assert updated == SAMPLE_TMX
+    assert count == 1
+    assert unmatched == ["missing"]
+
+    updated, count = TmxProcessorService.replace_tmx_targets(SAMPLE_TMX, translations)
+    assert count == 1
+    assert "<seg>C:\\temp\\1</seg>" in updated
+
+def test_api_tmx_replacement_target_lang():
+    """测试TMX替换API端点的target_lang参数"""
+    response = client.post(
+        "/api/replacement/tmx?target_lang=en-US",
+        json={
+            "fileName": "test.tmx",
+            "content": SAMPLE_TMX,
+            "translations": [
+                {"segNumber": 1, "unitId": "a1", "aiResult": "Hi"}
+            ]
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["replacements_count"] == 1
+    assert '<tuv xml:lang="en-US"><seg>Hi</seg></tuv>' in data["content"]
+    assert '<seg>你好</seg>' in data["content"]
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,50 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_tmx_tags import legacy_clean_tmx_tags, memoq_segments, tmx_segments
+from services.tmx_processor import TmxProcessorService
+
+EDGE_CASES = [
+    "",
+    "plain text",
+    "a &amp;amp; b &amp;quot;c&amp;quot; &amp;lt;d&amp;gt; &apos;",
+    'Hello <ph>&lt;mq:rxt displaytext="\\n" val="\\n" /&gt;</ph>World<mq:ch val=" " />!',
+    # 颜色标签中间有换行占位符或换行时不还原
+    '<bpt>&lt;mq:rxt val="&lt;font&gt;"&gt;</bpt>a<ph>&lt;mq:rxt displaytext="\\n" val="\\n" /&gt;</ph>b<ept>&lt;/mq:rxt val="&lt;/font&gt;"&gt;</ept>',
+    '<bpt>&lt;mq:rxt val="&lt;font&gt;"&gt;</bpt>a\nb<ept>&lt;/mq:rxt val="&lt;/font&gt;"&gt;</ept>',
+    # 缺少结束标签的颜色标签按普通标签处理
+    '<bpt>&lt;mq:rxt val="&lt;font&gt;"&gt;</bpt>open',
+    '<mq:rxt val="&lt;b&gt;">bold</mq:rxt val="&lt;/b&gt;"> <item>x</item> <phrase/>',
+    '<bpt i="1">&lt;b&gt;</bpt><ph x="2"/>&lt;<ept i="1">&lt;/b&gt;</ept>',
+]
+
+@pytest.mark.parametrize("content", EDGE_CASES)
+def test_edge_cases_match_legacy(content):
+    """边界情况与逐步替换的原实现结果一致"""
+    assert TmxProcessorService.clean_tmx_tags(content) == legacy_clean_tmx_tags(content)
+
+@pytest.mark.parametrize("tag_density", [0, 0.4, 2])
+def test_tmx_corpus_matches_legacy(tag_density):
+    """合成TMX语料的每个句段与原实现结果一致"""
+    for segment in tmx_segments(1000, seed=5, tag_density=tag_density):
+        assert TmxProcessorService.clean_tmx_tags(segment) == legacy_clean_tmx_tags(segment), segment
+
+def test_memoq_corpus_matches_legacy():
+    """嵌套的memoQ占位符、颜色标签和再次转义的实体与原实现结果一致"""
+    segments = memoq_segments(3000, seed=7)
+    assert any('mq:rxt displaytext="font"' in segment for segment in segments)
+    for segment in segments:
+        assert TmxProcessorService.clean_tmx_tags(segment) == legacy_clean_tmx_tags(segment), segment
+
+def test_memoq_placeholders():
+    """换行占位符还原为换行，颜色标签还原为val中的HTML标签"""
+    content = ('<bpt i="1">&amp;lt;mq:rxt val=&quot;&amp;lt;span class=&quot;hl&quot;&amp;gt;&quot;&amp;gt;</bpt>'
+               'x &amp; y<ph>&lt;mq:ch val=" " /&gt;</ph>'
+               '<ept i="1">&amp;lt;/mq:rxt val=&quot;&amp;lt;/span&amp;gt;&quot;&amp;gt;</ept>'
+               '<ph>&lt;mq:rxt displaytext="\\n" val="\\n" /&gt;</ph>z')
+    assert TmxProcessorService.clean_tmx_tags(content) == '<span class="hl">x & y</span>\nz'
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
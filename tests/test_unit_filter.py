@@ -0,0 +1,128 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from benchmarks.corpus import generate_tmx, generate_xliff
+from models.xliff import TMX_DATA_FIELDS, XLIFF_DATA_FIELDS
+from services.tmx_processor import TmxProcessorService
+from services.unit_filter import UnitFilter
+from services.xliff_index import XliffUnitIndex
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+XLIFF = generate_xliff(60, seed=4)
+TMX = generate_tmx(40, seed=4)
+
+FILTERS = [
+    UnitFilter(max_percent=99),
+    UnitFilter(has_target=False),
+    UnitFilter(has_target=True, min_percent=75, offset=2, limit=5),
+    UnitFilter(unit_id_prefix="u1", limit=3),
+    UnitFilter(src_lang="EN", tgt_lang="zh"),
+    UnitFilter(tgt_lang="fr"),
+    UnitFilter(offset=55),
+    UnitFilter(offset=10, limit=10),
+]
+
+def _expected(rows, unit_filter, fields):
+    """在完整结果上过滤再分页"""
+    position = {name: index for index, name in enumerate(fields)}
+    matched = [
+        row for row in rows
+        if unit_filter.accepts(
+            str(row[position["unitId" if "unitId" in position else "id"]]),
+            row[position["percent"]],
+            row[position["srcLang"]],
+            row[position["tgtLang"]],
+            row[position["target"]]
+        )
+    ]
+    return matched[unit_filter.offset:unit_filter.stop]
+
+@pytest.mark.parametrize("unit_filter", FILTERS, ids=repr)
+def test_xliff_filters_match_full_rows(unit_filter):
+    """各解析路径过滤分页的结果等于在完整结果上过滤分页"""
+    for engine in ("toolkit", "stream"):
+        full = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, engine)
+        rows = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, engine, unit_filter=unit_filter)
+        assert rows == _expected(full, unit_filter, XLIFF_DATA_FIELDS)
+
+    full = XliffProcessorService.process_xliff_with_tags_rows("a.xliff", XLIFF)
+    expected = _expected(full, unit_filter, XLIFF_DATA_FIELDS)
+    assert XliffProcessorService.process_xliff_with_tags_rows("a.xliff", XLIFF, unit_filter=unit_filter) == expected
+    index = XliffUnitIndex.build(XLIFF)
+    assert XliffProcessorService.process_xliff_index_rows("a.xliff", index, unit_filter=unit_filter) == expected
+
+@pytest.mark.parametrize("unit_filter", FILTERS, ids=repr)
+def test_tmx_filters_match_full_rows(unit_filter):
+    full = TmxProcessorService.process_tmx_rows("a.tmx", TMX)
+    rows = TmxProcessorService.process_tmx_rows("a.tmx", TMX, unit_filter=unit_filter)
+    assert rows == _expected(full, unit_filter, TMX_DATA_FIELDS)
+
+def test_filter_with_projection():
+    """过滤字段不在所选字段中时仍然生效"""
+    unit_filter = UnitFilter(has_target=False, max_percent=99)
+    full = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, "stream")
+    rows = XliffProcessorService.process_xliff_rows("a.xliff", XLIFF, "stream", fields=("unitId",), unit_filter=unit_filter)
+    assert rows == [(row[2],) for row in _expected(full, unit_filter, XLIFF_DATA_FIELDS)]
+
+def test_stream_stops_after_page():
+    """取满一页后不再解析，文件后部的错误不影响结果"""
+    truncated = XLIFF[:XLIFF.index('<trans-unit id="u30"')] + "<trans-unit id="
+    rows = XliffProcessorService.process_xliff_rows("a.xliff", truncated, "stream", unit_filter=UnitFilter(limit=5))
+    assert [row[2] for row in rows] == ["u1", "u2", "u3", "u4", "u5"]
+    with pytest.raises(Exception):
+        XliffProcessorService.process_xliff_rows("a.xliff", truncated, "stream")
+
+def test_tmx_skipped_units_not_cleaned(monkeypatch):
+    """被过滤和分页跳过的单元不清理标签"""
+    calls = []
+    original = TmxProcessorService.clean_tmx_tags
+    monkeypatch.setattr(TmxProcessorService, "clean_tmx_tags", staticmethod(lambda content: calls.append(content) or original(content)))
+    rows = TmxProcessorService.process_tmx_rows("a.tmx", TMX, unit_filter=UnitFilter(offset=5, limit=3))
+    assert [row[0] for row in rows] == ["6", "7", "8"]
+    assert len(calls) == 6
+
+def test_invalid_filter():
+    with pytest.raises(ValueError):
+        UnitFilter(limit=0)
+    with pytest.raises(ValueError):
+        UnitFilter(offset=-1)
+    with pytest.raises(ValueError):
+        UnitFilter(min_percent=100, max_percent=50)
+
+def test_endpoints():
+    """查询参数传到服务层，不同的过滤条件分别缓存"""
+    body = {"fileName": "a.xliff", "content": XLIFF}
+    full = client.post("/api/xliff/process", json=body).json()["data"]
+    untranslated = [row for row in full if not row["target"]]
+
+    response = client.post("/api/xliff/process?hasTarget=false", json=body)
+    assert response.json()["data"] == untranslated
+    response = client.post("/api/xliff/process?hasTarget=false&offset=1&limit=2&engine=stream", json=body)
+    assert response.json()["data"] == untranslated[1:3]
+
+    lines = client.post("/api/xliff/process-with-tags?unitIdPrefix=u2&limit=4", json=body,
+                        headers={"Accept": "application/x-ndjson"}).text.splitlines()
+    assert len(lines) == 5 and lines[-1].endswith('"count": 4}')
+
+    data = client.post("/api/tmx/process?fields=id&offset=38", json={"fileName": "a.tmx", "content": TMX}).json()["data"]
+    assert data == [{"id": "39"}, {"id": "40"}]
+
+    session_id = client.post("/api/sessions", json=body).json()["sessionId"]
+    response = client.post(f"/api/sessions/{session_id}/process-with-tags?maxPercent=0&fields=percent")
+    assert response.json()["data"] and all(row["percent"] <= 0 for row in response.json()["data"])
+
+def test_invalid_parameters_rejected():
+    body = {"fileName": "a.xliff", "content": XLIFF}
+    assert client.post("/api/xliff/process?limit=0", json=body).status_code == 400
+    assert client.post("/api/xliff/process?minPercent=90&maxPercent=10", json=body).status_code == 400
+    assert client.post("/api/tmx/process?offset=-1", json={"fileName": "a.tmx", "content": TMX}).status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
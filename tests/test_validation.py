@@ -0,0 +1,183 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.xliff_processor import XliffProcessorService
+from services.tmx_processor import TmxProcessorService
+from services.xml_validation import XLIFF_12_SCHEMA, TMX_14_DTD, load_xml_schema
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1"><tuv xml:lang="en"><seg>Hello</seg></tuv></tu>
+    <tu tuid="2"><tuv xml:lang="en"><seg>Bye</seg></tuv></tu>
+  </body>
+</tmx>"""
+
+# 测试用的简化模式，只约束根元素和单元结构；与官方XSD一样按网络地址导入xml.xsd，
+# 由解析器映射到模式目录中的同名文件
+MINI_XLIFF_XSD = """<?xml version="1.0"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           targetNamespace="urn:oasis:names:tc:xliff:document:1.2"
+           xmlns="urn:oasis:names:tc:xliff:document:1.2"
+           elementFormDefault="qualified">
+  <xs:import namespace="http://www.w3.org/XML/1998/namespace" schemaLocation="http://www.w3.org/2001/xml.xsd"/>
+  <xs:element name="xliff">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="trans-unit" maxOccurs="unbounded">
+          <xs:complexType>
+            <xs:sequence>
+              <xs:element name="source">
+                <xs:complexType>
+                  <xs:simpleContent>
+                    <xs:extension base="xs:string"><xs:attribute ref="xml:lang"/></xs:extension>
+                  </xs:simpleContent>
+                </xs:complexType>
+              </xs:element>
+            </xs:sequence>
+            <xs:attribute name="id" type="xs:string" use="required"/>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+      <xs:attribute name="version" type="xs:string"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>"""
+
+MINI_XML_XSD = """<?xml version="1.0"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           targetNamespace="http://www.w3.org/XML/1998/namespace">
+  <xs:attribute name="lang" type="xs:language"/>
+</xs:schema>"""
+
+MINI_TMX_DTD = """<!ELEMENT tmx (header, body)>
+<!ATTLIST tmx version CDATA #REQUIRED>
+<!ELEMENT header EMPTY>
+<!ATTLIST header srclang CDATA #REQUIRED>
+<!ELEMENT body (tu*)>
+<!ELEMENT tu (tuv+)>
+<!ATTLIST tu tuid CDATA #IMPLIED>
+<!ELEMENT tuv (seg)>
+<!ATTLIST tuv xml:lang CDATA #REQUIRED>
+<!ELEMENT seg (#PCDATA)>
+"""
+
+@pytest.fixture
+def schema_dir(tmp_path):
+    (tmp_path / XLIFF_12_SCHEMA).write_text(MINI_XLIFF_XSD, encoding="utf-8")
+    (tmp_path / "xml.xsd").write_text(MINI_XML_XSD, encoding="utf-8")
+    (tmp_path / TMX_14_DTD).write_text(MINI_TMX_DTD, encoding="utf-8")
+    return str(tmp_path)
+
+def test_wellformed_matches_structural_count():
+    """测试格式检查模式的单元数量与完整解析一致"""
+    assert XliffProcessorService.validate_xliff(SAMPLE_FIXTURE, mode="wellformed") == (True, "XLIFF格式良好", 10)
+    assert XliffProcessorService.validate_xliff(SAMPLE_FIXTURE, mode="structural")[2] == 10
+    assert TmxProcessorService.validate_tmx(SAMPLE_TMX, mode="wellformed") == (True, "TMX格式良好", 2)
+
+def test_wellformed_reports_first_error_position():
+    """测试格式检查在第一个错误处停止并报告行列号"""
+    content = "<xliff>\n<file>\n<trans-unit></file>\n<broken"
+    valid, message, unit_count = XliffProcessorService.validate_xliff(content, mode="wellformed")
+
+    assert valid is False
+    assert unit_count == 0
+    assert "line 3" in message
+    assert "Opening and ending tag mismatch" in message
+
+def test_wellformed_rejects_wrong_root():
+    """测试格式检查拒绝错误的根元素"""
+    valid, message, _ = XliffProcessorService.validate_xliff(SAMPLE_TMX, mode="wellformed")
+    assert valid is False
+    assert "<tmx>" in message
+
+    valid, _, _ = TmxProcessorService.validate_tmx(SAMPLE_FIXTURE, mode="wellformed")
+    assert valid is False
+
+def test_schema_mode(schema_dir):
+    """测试使用模式目录中的XSD/DTD验证"""
+    valid_xliff = '<xliff xmlns="urn:oasis:names:tc:xliff:document:1.2" version="1.2"><trans-unit id="1"><source>a</source></trans-unit></xliff>'
+    invalid_xliff = '<xliff xmlns="urn:oasis:names:tc:xliff:document:1.2" version="1.2"><trans-unit><source>a</source></trans-unit></xliff>'
+    # xml:lang的类型来自导入的xml.xsd
+    bad_lang = valid_xliff.replace('<source>', '<source xml:lang="not a language">')
+
+    assert XliffProcessorService.validate_xliff(valid_xliff, mode="schema", schema_dir=schema_dir) == (True, "XLIFF符合模式", 1)
+    valid, message, _ = XliffProcessorService.validate_xliff(invalid_xliff, mode="schema", schema_dir=schema_dir)
+    assert valid is False
+    assert "id" in message
+    assert XliffProcessorService.validate_xliff(valid_xliff.replace('<source>', '<source xml:lang="en-US">'), mode="schema", schema_dir=schema_dir)[0] is True
+    valid, message, _ = XliffProcessorService.validate_xliff(bad_lang, mode="schema", schema_dir=schema_dir)
+    assert valid is False
+    assert "lang" in message
+
+    # 无命名空间时无法确定模式版本
+    valid, _, _ = XliffProcessorService.validate_xliff("<xliff/>", mode="schema", schema_dir=schema_dir)
+    assert valid is False
+
+    assert TmxProcessorService.validate_tmx(SAMPLE_TMX, mode="schema", schema_dir=schema_dir) == (True, "TMX符合模式", 2)
+    valid, _, _ = TmxProcessorService.validate_tmx(SAMPLE_TMX.replace('<header srclang="en"/>', ''), mode="schema", schema_dir=schema_dir)
+    assert valid is False
+
+def test_schema_compiled_once(schema_dir):
+    """测试模式每个进程只编译一次"""
+    assert load_xml_schema(schema_dir, XLIFF_12_SCHEMA) is load_xml_schema(schema_dir, XLIFF_12_SCHEMA)
+
+def test_schema_mode_missing_schema(tmp_path, schema_dir):
+    """测试未配置模式目录或缺少该格式的模式文件时明确报错，而不是判定内容无效"""
+    with pytest.raises(FileNotFoundError):
+        XliffProcessorService.validate_xliff(SAMPLE_FIXTURE, mode="schema", schema_dir=str(tmp_path / "empty"))
+    # 未配置时不解析文档，格式错误的内容同样报告未配置
+    for content in (SAMPLE_FIXTURE, "<broken"):
+        with pytest.raises(FileNotFoundError, match="SCHEMA_DIR"):
+            XliffProcessorService.validate_xliff(content, mode="schema")
+    with pytest.raises(FileNotFoundError, match="SCHEMA_DIR"):
+        TmxProcessorService.validate_tmx(SAMPLE_TMX, mode="schema")
+    # 模式目录中只有XLIFF 1.2的XSD时，XLIFF 2.0文档缺少模式
+    with pytest.raises(FileNotFoundError):
+        XliffProcessorService.validate_xliff('<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0"/>', mode="schema", schema_dir=schema_dir)
+
+def test_api_schema_mode(schema_dir, monkeypatch):
+    """测试验证端点的schema模式：使用SCHEMA_DIR中的模式，未配置时返回400"""
+    valid_xliff = '<xliff xmlns="urn:oasis:names:tc:xliff:document:1.2" version="1.2"><trans-unit id="1"><source>a</source></trans-unit></xliff>'
+
+    monkeypatch.setattr(settings, "SCHEMA_DIR", "")
+    response = client.post("/api/xliff/validate?mode=schema", json={"content": valid_xliff})
+    assert response.status_code == 400
+    assert "SCHEMA_DIR" in response.json()["detail"]
+
+    monkeypatch.setattr(settings, "SCHEMA_DIR", schema_dir)
+    response = client.post("/api/xliff/validate?mode=schema", json={"content": valid_xliff})
+    assert response.status_code == 200
+    assert response.json() == {"valid": True, "message": "XLIFF符合模式", "unit_count": 1}
+
+    response = client.post("/api/tmx/validate?mode=schema", json={"content": SAMPLE_TMX.replace('<header srclang="en"/>', '')})
+    assert response.status_code == 200
+    assert response.json()["valid"] is False
+
+def test_api_validate_modes():
+    """测试验证端点的mode参数"""
+    response = client.post("/api/xliff/validate?mode=wellformed", json={"content": SAMPLE_FIXTURE})
+    assert response.status_code == 200
+    assert response.json() == {"valid": True, "message": "XLIFF格式良好", "unit_count": 10}
+
+    response = client.post("/api/tmx/validate?mode=wellformed", json={"content": SAMPLE_TMX})
+    assert response.json()["unit_count"] == 2
+
+    response = client.post("/api/xliff/validate?mode=unknown", json={"content": SAMPLE_FIXTURE})
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,210 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.xliff_index import XliffUnitIndex
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="zh" datatype="plaintext">
+    <body>
+      <trans-unit id="1" percent="100">
+        <source>Hello World</source>
+        <target state="translated">你好世界</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Welcome</source>
+      </trans-unit>
+      <trans-unit id="3">
+        <source>Exit</source>
+        <target/>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+def test_build_index():
+    """测试单元索引的构建"""
+    index = XliffUnitIndex.build(SAMPLE_XLIFF)
+
+    assert len(index) == 3
+    assert [unit.unit_id for unit in index.units] == ["1", "2", "3"]
+
+    unit = index.get("1")
+    assert unit.ordinal == 1
+    assert SAMPLE_XLIFF[unit.start:unit.end].startswith('<trans-unit id="1"')
+    assert SAMPLE_XLIFF[unit.end - len("</trans-unit>"):unit.end] == "</trans-unit>"
+    assert SAMPLE_XLIFF[unit.source[2]:unit.source[3]] == "Hello World"
+    assert SAMPLE_XLIFF[unit.target[2]:unit.target[3]] == "你好世界"
+    assert unit.target_attrs == ' state="translated"'
+
+    assert index.get("2").target is None
+    assert index.get("3").target[2] == index.get("3").target[3]
+    assert index.by_ordinal(3) is index.get("3")
+    assert index.by_ordinal(4) is None
+
+def test_splice_replaces_inserts_and_keeps_attributes():
+    """测试拼接替换：保留target属性、创建缺失的target、处理自闭合target"""
+    translations = [
+        {"segNumber": 1, "aiResult": "你好"},
+        {"segNumber": 2, "mtResult": "欢迎"},
+        {"segNumber": 3, "unitId": "3", "aiResult": "退出"},
+    ]
+
+    updated, count, unmatched = XliffProcessorService.splice_xliff_targets(SAMPLE_XLIFF, translations)
+
+    assert count == 3
+    assert unmatched == []
+    assert '<target state="translated">你好</target>' in updated
+    assert '<source>Welcome</source>\n        <target>欢迎</target>' in updated
+    assert '<target>退出</target>' in updated
+    assert '<target/>' not in updated
+
+def test_splice_last_translation_wins():
+    """测试同一单元多次替换时以最后一次为准"""
+    translations = [
+        {"segNumber": 1, "aiResult": "第一次"},
+        {"segNumber": 1, "aiResult": "第二次"},
+    ]
+
+    updated, count = XliffProcessorService.replace_xliff_targets(SAMPLE_XLIFF, translations)
+
+    assert count == 2
+    assert "第一次" not in updated
+    assert '<target state="translated">第二次</target>' in updated
+
+def test_splice_dry_run_reports_unmatched():
+    """测试dry_run模式返回未匹配的单元ID且不修改内容"""
+    translations = [
+        {"segNumber": 1, "aiResult": "你好"},
+        {"segNumber": 9, "aiResult": "不存在"},
+        {"segNumber": 1, "unitId": "missing", "aiResult": "不存在"},
+        {"segNumber": 2},
+    ]
+
+    updated, count, unmatched = XliffProcessorService.splice_xliff_targets(SAMPLE_XLIFF, translations, dry_run=True)
+
+    assert updated == SAMPLE_XLIFF
+    assert count == 1
+    assert unmatched == ["9", "missing"]
+
+def test_api_xliff_replacement_dry_run():
+    """测试XLIFF替换API端点的dry_run参数"""
+    response = client.post(
+        "/api/replacement/xliff?dry_run=true",
+        json={
+            "fileName": "test.xliff",
+            "content": SAMPLE_XLIFF,
+            "translations": [
+                {"segNumber": 3, "aiResult": "退出"},
+                {"segNumber": 7, "aiResult": "不存在"}
+            ]
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["replacements_count"] == 1
+    assert data["unmatched"] == ["7"]
+    assert data["content"] == SAMPLE_XLIFF
+
+def test_api_replacement_omits_unmatched_without_dry_run():
+    """测试非dry_run的替换响应不包含unmatched字段"""
+    payload = {
+        "fileName": "test.xliff",
+        "content": SAMPLE_XLIFF,
+        "translations": [{"segNumber": 3, "aiResult": "退出"}]
+    }
+    for path in ("/api/replacement/xliff", "/api/replacement/auto"):
+        response = client.post(path, json=payload)
+        assert response.status_code == 200
+        assert "unmatched" not in response.json()
+
+MULTI_FILE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2" xmlns:mq="MQXliff">
+  <file original="a.txt" source-language="en-US" target-language="de-DE">
+    <body>
+      <trans-unit id="a1" mq:percent="85">
+        <source>Click <bpt id="1">&lt;b&gt;</bpt>here<ept id="1">&lt;/b&gt;</ept></source>
+        <target>Klicken Sie <bpt id="1">&lt;b&gt;</bpt>hier<ept id="1">&lt;/b&gt;</ept></target>
+      </trans-unit>
+    </body>
+  </file>
+  <file original="b.txt" target-language="fr-FR" source-language="en-US">
+    <body>
+      <trans-unit id="b1" target-language="fr-CA">
+        <source>Save</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+XLIFF2 = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en" trgLang="ja">
+  <file id="f1">
+    <unit id="u1">
+      <segment>
+        <source>Hello <pc id="1">world</pc></source>
+        <target>こんにちは<pc id="1">世界</pc></target>
+      </segment>
+    </unit>
+  </file>
+</xliff>"""
+
+def test_with_tags_uses_enclosing_file_languages():
+    """测试带标签处理使用所在<file>的语言，带前缀的percent属性与 /api/xliff/process 一样不识别"""
+    result = XliffProcessorService.process_xliff_with_tags("multi.xliff", MULTI_FILE_XLIFF)
+
+    assert [item.unitId for item in result] == ["a1", "b1"]
+    assert [item.segNumber for item in result] == [1, 2]
+    assert result[0].percent == -1
+    assert result[0].srcLang == "en-us"
+    assert result[0].tgtLang == "de-de"
+    assert result[0].source == 'Click <bpt id="1"><b></bpt>here<ept id="1"></b></ept>'
+    assert result[1].percent == -1
+    assert result[1].srcLang == "en-us"
+    assert result[1].tgtLang == "fr-ca"
+    assert result[1].target == ""
+
+def test_with_tags_rejects_malformed_documents():
+    """截断或标签不配对的文档与 /api/xliff/process 一样返回400"""
+    truncated = MULTI_FILE_XLIFF[:MULTI_FILE_XLIFF.rindex("</file>")]
+    unbalanced = MULTI_FILE_XLIFF.replace("<source>Save</source>", "<source>Save</target>")
+    for content in (truncated, unbalanced):
+        for path in ("/api/xliff/process-with-tags", "/api/xliff/process"):
+            response = client.post(path, json={"fileName": "bad.xliff", "content": content})
+            assert response.status_code == 400
+
+def test_with_tags_percent_matches_process():
+    """两个端点对同一单元返回相同的percent"""
+    content = MULTI_FILE_XLIFF.replace('mq:percent="85"', 'mq:percent="85" percent="70"')
+    expected = [row["percent"] for row in client.post("/api/xliff/process", json={"fileName": "a", "content": content}).json()["data"]]
+    actual = [row["percent"] for row in client.post("/api/xliff/process-with-tags", json={"fileName": "a", "content": content}).json()["data"]]
+    assert actual == expected == [70, -1]
+
+def test_with_tags_xliff2():
+    """测试带标签处理支持XLIFF 2.0的<unit>和根元素语言"""
+    result = XliffProcessorService.process_xliff_with_tags("v2.xliff", XLIFF2)
+
+    assert len(result) == 1
+    assert result[0].unitId == "u1"
+    assert result[0].source == 'Hello <pc id="1">world</pc>'
+    assert result[0].target == 'こんにちは<pc id="1">世界</pc>'
+    assert result[0].srcLang == "en"
+    assert result[0].tgtLang == "ja"
+
+def test_with_tags_rejects_non_xliff():
+    """测试带标签处理拒绝非XLIFF内容"""
+    with pytest.raises(ValueError):
+        XliffProcessorService.process_xliff_with_tags("bad.xliff", "<?xml version='1.0'?><invalid>Not XLIFF</invalid>")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES_DIR, "sample.xliff"), encoding="utf-8") as fixture:
+    SAMPLE_FIXTURE = fixture.read()
+
+# 覆盖group嵌套、行内标签、空白规范化、xml:space、缺失id和target等情况
+COMPLEX_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file original="app.properties" source-language="EN" target-language="zh-CN" datatype="plaintext">
+    <header><note>header note</note></header>
+    <body>
+      <group id="g1">
+        <trans-unit id="1" percent="100">
+          <source>Click <g id="1">here</g> to continue &amp; <x id="2"/> go<bpt id="3">&lt;b&gt;</bpt>B<ept id="3">&lt;/b&gt;</ept>  x
+    y</source>
+          <target state="new">点击<g id="1">这里</g>继续</target>
+          <alt-trans><target>alt</target></alt-trans>
+        </trans-unit>
+      </group>
+      <trans-unit id="2" xml:space="preserve"><source>  keep  spaces </source><target>  保留 </target></trans-unit>
+      <trans-unit id="3" percent="abc"><source xml:space="preserve"> a  b </source></trans-unit>
+      <trans-unit><source>no id</source></trans-unit>
+      <trans-unit id="5" source-language="FR"><note>n</note><source>a<sub>b</sub>c</source><target/></trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+NO_NAMESPACE_XLIFF = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff version="1.2">
+  <file source-language="en" target-language="zh">
+    <body>
+      <trans-unit id="1" percent="100">
+        <source>Click <g id="1">here</g> to continue</source>
+        <target>点击<g id="1">这里</g>继续</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>The <ph id="ph1">&lt;b&gt;</ph>bold<ph id="ph2">&lt;/b&gt;</ph> text</source>
+        <target></target>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+@pytest.mark.parametrize("content", [SAMPLE_FIXTURE, COMPLEX_XLIFF, NO_NAMESPACE_XLIFF])
+def test_stream_engine_parity(content):
+    """测试流式引擎与translate-toolkit引擎的结果一致"""
+    expected = XliffProcessorService.process_xliff("parity.xliff", content, engine="toolkit")
+    actual = XliffProcessorService.process_xliff("parity.xliff", content, engine="stream")
+
+    assert [item.model_dump() for item in actual] == [item.model_dump() for item in expected]
+
+def test_stream_engine_is_lazy():
+    """测试流式引擎逐个产出单元"""
+    units = XliffProcessorService.iter_xliff_stream("sample.xliff", SAMPLE_FIXTURE)
+
+    first = next(units)
+    assert first.unitId == "greeting"
+    assert first.segNumber == 1
+    assert len(list(units)) == 9
+
+def test_stream_engine_xliff2():
+    """测试流式引擎支持XLIFF 2.0"""
+    content = """<?xml version="1.0" encoding="UTF-8"?>
+<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en" trgLang="ja">
+  <file id="f1">
+    <unit id="u1">
+      <segment><source>Hello</source><target>こんにちは</target></segment>
+    </unit>
+  </file>
+</xliff>"""
+
+    result = XliffProcessorService.process_xliff("v2.xliff", content, engine="stream")
+
+    assert len(result) == 1
+    assert result[0].unitId == "u1"
+    assert result[0].target == "こんにちは"
+    assert result[0].srcLang == "en"
+    assert result[0].tgtLang == "ja"
+
+def test_stream_engine_rejects_invalid():
+    """测试流式引擎拒绝非XLIFF和格式错误的内容"""
+    with pytest.raises(ValueError):
+        XliffProcessorService.process_xliff("bad.xliff", "<?xml version='1.0'?><invalid>Not XLIFF</invalid>", engine="stream")
+    with pytest.raises(Exception):
+        XliffProcessorService.process_xliff("bad.xliff", "<xliff><file>", engine="stream")
+    with pytest.raises(ValueError):
+        XliffProcessorService.process_xliff("bad.xliff", SAMPLE_FIXTURE, engine="unknown")
+
+def test_api_process_with_stream_engine():
+    """测试API处理端点的engine参数"""
+    response = client.post(
+        "/api/xliff/process?engine=stream",
+        json={"fileName": "sample.xliff", "content": SAMPLE_FIXTURE}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert len(data["data"]) == 10
+    assert data["data"][0]["unitId"] == "greeting"
+
+    response = client.post(
+        "/api/xliff/process?engine=unknown",
+        json={"fileName": "sample.xliff", "content": SAMPLE_FIXTURE}
+    )
+    assert response.status_code == 400
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+import gzip
+import io
+import pytest
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from config import settings
+from middleware.compression import CompressionMiddleware
+from services.encoding import decode_xml_bytes, iter_encoded, xml_encoding
+from services.parse_cache import cache_key
+from services.tmx_processor import TmxProcessorService
+from services.xliff_processor import XliffProcessorService
+
+client = TestClient(app, headers={"X-Access-Key": settings.ACCESS_KEY})
+
+SAMPLE_XLIFF = """<?xml version="1.0" encoding="{encoding}"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="en" target-language="fr" datatype="plaintext" original="a.txt">
+    <body>
+      <trans-unit id="1">
+        <source>Café <g id="b">crème</g></source>
+        <target>Café crème</target>
+      </trans-unit>
+      <trans-unit id="2">
+        <source>Naïve</source>
+      </trans-unit>
+    </body>
+  </file>
+</xliff>"""
+
+SAMPLE_TMX = """<?xml version="1.0" encoding="{encoding}"?>
+<tmx version="1.4">
+  <header srclang="en"/>
+  <body>
+    <tu tuid="1">
+      <tuv xml:lang="en"><seg>Café</seg></tuv>
+      <tuv xml:lang="fr"><seg>Café crème</seg></tuv>
+    </tu>
+  </body>
+</tmx>"""
+
+# (声明的编码, Python编码)：UTF-16带BOM、UTF-16LE不带BOM、ISO-8859-1、带BOM的UTF-8
+ENCODINGS = [("UTF-16", "utf-16"), ("UTF-16", "utf-16-le"), ("ISO-8859-1", "latin-1"), ("UTF-8", "utf-8-sig")]
+
+def _document(template, declared, codec):
+    return template.format(encoding=declared).encode(codec)
+
+def test_xml_encoding():
+    """按BOM、开头字节和XML声明确定编码"""
+    assert xml_encoding(b'<a/>') == 'utf-8'
+    assert xml_encoding('<?xml version="1.0"?><a/>'.encode('utf-16')) == 'utf-16'
+    assert xml_encoding('<?xml version="1.0"?><a/>'.encode('utf-16-be')) == 'utf-16-be'
+    assert xml_encoding(b"<?xml version='1.0' encoding='windows-1252'?><a/>") == 'cp1252'
+    # 文本按UTF-8重新编码后保留了UTF-16声明
+    assert xml_encoding(b'<?xml version="1.0" encoding="UTF-16"?><a/>') == 'utf-8'
+    with pytest.raises(ValueError):
+        xml_encoding(b'<?xml version="1.0" encoding="x-unknown"?><a/>')
+
+@pytest.mark.parametrize("declared,codec", ENCODINGS)
+def test_decode_xml_bytes(declared, codec):
+    text = SAMPLE_XLIFF.format(encoding=declared)
+    content, encoding = decode_xml_bytes(text.encode(codec))
+    assert content == text
+    # 按返回的编码写回得到原始字节
+    assert b''.join(iter_encoded([content], encoding)) == text.encode(codec)
+
+def test_iter_encoded_character_references():
+    """原编码无法表示的字符写为字符引用"""
+    assert b''.join(iter_encoded(['<a>中</a>'], 'iso8859-1')) == b'<a>&#20013;</a>'
+
+@pytest.mark.parametrize("declared,codec", ENCODINGS)
+def test_xliff_bytes_match_text(declared, codec):
+    """字节内容由解析器按声明解码，结果与JSON中的文本一致"""
+    expected_text = SAMPLE_XLIFF.format(encoding="UTF-8")
+    data = _document(SAMPLE_XLIFF, declared, codec)
+    for engine in ("toolkit", "stream"):
+        expected = XliffProcessorService.process_xliff_rows("a.xlf", expected_text, engine)
+        assert XliffProcessorService.process_xliff_rows("a.xlf", data, engine) == expected
+        assert XliffProcessorService.process_xliff_rows("a.xlf", io.BytesIO(data), engine) == expected
+    expected = XliffProcessorService.process_xliff_with_tags_rows("a.xlf", expected_text)
+    assert XliffProcessorService.process_xliff_with_tags_rows("a.xlf", data) == expected
+    for mode in ("wellformed", "structural"):
+        assert XliffProcessorService.validate_xliff(data, mode) == XliffProcessorService.validate_xliff(expected_text, mode)
+    assert XliffProcessorService.validate_xliff(io.BytesIO(data), "wellformed")[0] is True
+
+@pytest.mark.parametrize("declared,codec", ENCODINGS)
+def test_tmx_bytes_match_text(declared, codec):
+    data = _document(SAMPLE_TMX, declared, codec)
+    expected = TmxProcessorService.process_tmx_rows("a.tmx", SAMPLE_TMX.format(encoding="UTF-8"))
+    assert TmxProcessorService.process_tmx_rows("a.tmx", data) == expected
+    assert TmxProcessorService.validate_tmx(data, "wellformed") == (True, "TMX格式良好", 1)
+
+def test_cache_key_bytes():
+    """UTF-8字节与对应文本的缓存键相同"""
+    text = SAMPLE_XLIFF.format(encoding="UTF-8")
+    assert cache_key("xliff/process", "a.xlf", text) == cache_key("xliff/process", "a.xlf", text.encode('utf-8'))
+
+def test_upload_non_utf8():
+    """上传声明为UTF-16和ISO-8859-1的文件"""
+    expected = client.post("/api/xliff/process", json={"fileName": "a.xlf", "content": SAMPLE_XLIFF.format(encoding="UTF-8")}).json()["data"]
+    for declared, codec in ENCODINGS:
+        data = _document(SAMPLE_XLIFF, declared, codec)
+        response = client.post("/api/xliff/upload", files={"file": ("a.xlf", data, "application/xml")})
+        assert response.status_code == 200, response.text
+        assert response.json()["data"] == expected
+
+    response = client.post("/api/tmx/upload", files={"file": ("a.tmx", _document(SAMPLE_TMX, "UTF-16", "utf-16"), "application/xml")})
+    assert response.json()["data"][0]["target"] == "Café crème"
+
+def test_raw_xml_body():
+    """Content-Type为XML时请求体按原始字节解析，文件名来自查询参数"""
+    text = SAMPLE_XLIFF.format(encoding="UTF-8")
+    data = _document(SAMPLE_XLIFF, "UTF-16", "utf-16")
+    for path in ("/api/xliff/process", "/api/xliff/process-with-tags"):
+        expected = client.post(path, json={"fileName": "a.xlf", "content": text}).json()
+        for content_type in ("application/xml", "application/xliff+xml; charset=utf-16"):
+            response = client.post(f"{path}?fileName=a.xlf", content=data, headers={"Content-Type": content_type})
+            assert response.json() == expected
+
+    lines = client.post("/api/xliff/process?fileName=a.xlf&engine=stream", content=data,
+                        headers={"Content-Type": "text/xml", "Accept": "application/x-ndjson"}).text.splitlines()
+    assert len(lines) == 3 and '"count": 2' in lines[-1]
+
+    response = client.post("/api/tmx/process?fileName=a.tmx&fields=id,target", content=_document(SAMPLE_TMX, "ISO-8859-1", "latin-1"),
+                           headers={"Content-Type": "application/xml"})
+    assert response.json()["data"] == [{"id": "1", "target": "Café crème"}]
+
+def test_raw_xml_body_errors():
+    data = _document(SAMPLE_XLIFF, "UTF-8", "utf-8")
+    assert client.post("/api/xliff/process", content=data, headers={"Content-Type": "application/xml"}).status_code == 400
+    assert client.post("/api/xliff/process?fileName=a.xlf", content=b"<xliff", headers={"Content-Type": "application/xml"}).status_code == 400
+    # JSON请求体仍按FileProcessRequest验证
+    assert client.post("/api/xliff/process", json={"fileName": "a.xlf"}).status_code == 422
+
+@pytest.mark.parametrize("path", ["/api/xliff/process", "/api/tmx/process", "/api/auto/process"])
+def test_compressed_body_errors(path, monkeypatch):
+    """压缩请求体损坏返回400、解压后过大返回413（原始XML和JSON请求体），不是500"""
+    client.get("/health")
+    layer = app.middleware_stack
+    while not isinstance(layer, CompressionMiddleware):
+        layer = layer.app
+    monkeypatch.setattr(layer, "max_decompressed_bytes", 1024)
+
+    xml_headers = {"Content-Encoding": "gzip", "Content-Type": "application/xml"}
+    json_headers = {"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    large = SAMPLE_XLIFF.format(encoding="UTF-8").replace("Naïve", "x" * 4096).encode("utf-8")
+
+    response = client.post(f"{path}?fileName=a.xlf", content=b"not gzip at all", headers=xml_headers)
+    assert response.status_code == 400
+    truncated = gzip.compress(SAMPLE_XLIFF.format(encoding="UTF-8").encode("utf-8"))[:-4]
+    response = client.post(f"{path}?fileName=a.xlf", content=truncated, headers=xml_headers)
+    assert response.status_code == 400
+    response = client.post(f"{path}?fileName=a.xlf", content=gzip.compress(large), headers=xml_headers)
+    assert response.status_code == 413
+    response = client.post(path, content=gzip.compress(b'{"fileName": "a", "content": "' + b"x" * 4096 + b'"}'), headers=json_headers)
+    assert response.status_code == 413
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])